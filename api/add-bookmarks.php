@@ -0,0 +1,87 @@
+<?php
+session_start();
+header('Content-Type: application/json');
+require_once '../includes/db.php';
+require_once '../includes/auth_functions.php';
+require_once '../includes/services/bookmark-writer.php';
+require_once '../includes/services/favicon-refresh-queue.php';
+require_once '../includes/services/index-render-cache.php';
+
+const BULK_ADD_MAX_BOOKMARKS = 1000;
+
+if (!isAuthenticated($pdo)) {
+    http_response_code(401);
+    echo json_encode(['success' => false, 'message' => 'Authentication required']);
+    exit;
+}
+
+if ($_SERVER['REQUEST_METHOD'] !== 'POST') {
+    http_response_code(405);
+    echo json_encode(['success' => false, 'message' => 'Method not allowed']);
+    exit;
+}
+
+$input = json_decode(file_get_contents('php://input'), true);
+$categoryId = (int)($input['category_id'] ?? 0);
+$submitted = $input['bookmarks'] ?? null;
+if ($categoryId <= 0 || !is_array($submitted) || !$submitted) {
+    http_response_code(400);
+    echo json_encode(['success' => false, 'message' => 'category_id and a non-empty bookmarks array are required']);
+    exit;
+}
+if (count($submitted) > BULK_ADD_MAX_BOOKMARKS) {
+    http_response_code(400);
+    echo json_encode(['success' => false, 'message' => 'At most ' . BULK_ADD_MAX_BOOKMARKS . ' bookmarks can be added at once']);
+    exit;
+}
+
+// Invalid entries are reported and skipped rather than failing the whole import
+$bookmarks = [];
+$skipped = [];
+foreach (array_values($submitted) as $index => $bookmark) {
+    if (is_string($bookmark)) {
+        $bookmark = ['url' => $bookmark];
+    }
+    try {
+        if (!is_array($bookmark) || !isset($bookmark['url'])) {
+            throw new InvalidArgumentException('URL is required');
+        }
+        $bookmark['url'] = BookmarkWriter::normalizeUrl($bookmark['url']);
+        $bookmarks[$index] = $bookmark;
+    } catch (InvalidArgumentException $e) {
+        $skipped[] = ['index' => $index, 'message' => $e->getMessage()];
+    }
+}
+
+try {
+    $added = [];
+    if ($bookmarks) {
+        $currentUserId = getCurrentUserId();
+        $writer = new BookmarkWriter($pdo, $currentUserId);
+        $ids = $writer->addMany($categoryId, array_values($bookmarks));
+        if ($ids === null) {
+            http_response_code(404);
+            echo json_encode(['success' => false, 'message' => 'Category not found or in Trash']);
+            exit;
+        }
+        IndexRenderCache::invalidate($pdo, $currentUserId);
+
+        $urls = [];
+        foreach (array_keys($bookmarks) as $position => $index) {
+            $added[] = ['index' => $index, 'id' => $ids[$position]];
+            $urls[$ids[$position]] = $bookmarks[$index]['url'];
+        }
+        // One job per site; placeholders are shown until a worker resolves the icons
+        (new FaviconRefreshQueue($pdo))->enqueueBookmarks($urls);
+    }
+
+    echo json_encode([
+        'success' => true,
+        'added' => $added,
+        'skipped' => $skipped
+    ]);
+} catch (Exception $e) {
+    http_response_code(500);
+    echo json_encode(['success' => false, 'message' => 'Failed to add bookmarks: ' . $e->getMessage()]);
+}
+?>
@@ -3,6 +3,7 @@ session_start();
 header('Content-Type: application/json');
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
+require_once '../includes/services/index-render-cache.php';
 
 // Require authentication
 requireAuth($pdo);
@@ -57,6 +58,7 @@ try {
     $stmt->execute([$currentUserId, $name, $newSortOrder]);
     
     $pageId = $pdo->lastInsertId();
+    IndexRenderCache::invalidate($pdo, $currentUserId);
     
     echo json_encode([
         'success' => true,
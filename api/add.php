@@ -3,6 +3,7 @@ session_start();
 header('Content-Type: application/json');
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
+require_once '../includes/services/index-render-cache.php';
 
 // Require auth but return JSON for API (no redirect) so client can show a proper message
 $authUser = null;
@@ -12,7 +13,8 @@ if (!isAuthenticated($pdo)) {
     exit;
 }
 
-require_once '../includes/favicon/favicon-cache.php';
+require_once '../includes/services/bookmark-writer.php';
+require_once '../includes/services/favicon-refresh-queue.php';
 
 try {
     // Get JSON input
@@ -22,54 +24,15 @@ try {
         throw new Exception('URL and category_id are required');
     }
     
-    $url = trim($input['url']);
-    // Fix common shorthand like "https:example.com" -> "https://example.com"
-    if (preg_match('~^(https?):([^/].*)$~i', $url, $m)) {
-        $url = $m[1] . '://' . $m[2];
-    }
+    $url = BookmarkWriter::normalizeUrl($input['url']);
     $categoryId = (int)$input['category_id'];
     $currentUserId = getCurrentUserId();
-
-    // Do not allow stale clients to add bookmarks to a category in Trash.
-    $stmt = $pdo->prepare('
-        SELECT id
-        FROM categories
-        WHERE id = ? AND user_id = ? AND deleted_at IS NULL
-    ');
-    $stmt->execute([$categoryId, $currentUserId]);
-    if (!$stmt->fetch()) {
-        throw new Exception('Invalid or trashed category');
-    }
-    
-    // Validate URL
-    if (!filter_var($url, FILTER_VALIDATE_URL)) {
-        throw new Exception('Invalid URL format');
-    }
-    // Ensure host exists (filter_var can accept odd strings without a host)
-    $parsedHost = parse_url($url, PHP_URL_HOST);
-    if (!$parsedHost) {
-        throw new Exception('Invalid URL host');
-    }
-    
-    // Get the highest sort_order for this category
-    $stmt = $pdo->prepare("SELECT MAX(sort_order) as max_order FROM bookmarks WHERE category_id = ? AND user_id = ?");
-    $stmt->execute([$categoryId, $currentUserId]);
-    $result = $stmt->fetch();
-    $nextOrder = ($result['max_order'] ?? -1) + 1;
-    
-    // Resolve favicon using the full bookmark URL so redirects and deep links work.
-    $domain = $parsedHost;
-    $faviconCache = new FaviconCache('../cache/favicons/', 86400 * 30, true);
-    $faviconUrl = $faviconCache->getFaviconUrl($url);
+    $domain = parse_url($url, PHP_URL_HOST);
     
     // Use provided title/description or fetch from page
     $title = trim($input['title'] ?? '');
     $description = trim($input['description'] ?? '');
     
-    // Limit URL and description to 200 characters
-    $url = substr($url, 0, 200);
-    $description = substr($description, 0, 200);
-    
     // If title/description not provided, try to fetch from the page
     if (empty($title) || empty($description)) {
         $context = stream_context_create([
@@ -96,35 +59,67 @@ try {
                     $description = trim($matches[1]);
                 }
             }
-            
-            // Limit title and description to 200 characters
-            $title = substr($title, 0, 200);
-            $description = substr($description, 0, 200);
-        } else {
-            // If we can't fetch the page, use domain as title
-            if (empty($title)) {
-                $title = $domain;
-            }
         }
     }
     
-    // Determine color (optional integer). 0 or null means default
-    $color = isset($input['color']) ? (int)$input['color'] : 0;
-    $colorParam = $color > 0 ? $color : null;
+    // Checks the category (not another user's, not in Trash) and takes the last position in one statement
+    $writer = new BookmarkWriter($pdo, $currentUserId);
+    $bookmarkId = $writer->add($categoryId, [
+        'url' => $url,
+        'title' => $title,
+        'description' => $description,
+        'color' => $input['color'] ?? 0
+    ]);
+    if ($bookmarkId === null) {
+        throw new Exception('Invalid or trashed category');
+    }
+    IndexRenderCache::invalidate($pdo, $currentUserId);
     
-    // Insert the bookmark
-    $stmt = $pdo->prepare(
-        "INSERT INTO bookmarks (user_id, title, url, description, favicon_url, category_id, color, sort_order, created_at, updated_at)
-         VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
-    );
+    // The icon is resolved after the response; until then the page shows a placeholder
+    $refreshQueue = new FaviconRefreshQueue($pdo);
+    $faviconBatchId = $refreshQueue->enqueueBookmarks([$bookmarkId => $url]);
+    $faviconPending = $faviconBatchId !== null;
     
-    $stmt->execute([$currentUserId, $title, $url, $description, $faviconUrl, $categoryId, $colorParam, $nextOrder]);
+    // Only this bookmark's job; a stored icon invalidates this user's render cache
+    $resolveQueuedFavicon = static function () use ($refreshQueue, $faviconBatchId) {
+        try {
+            require_once '../includes/favicon/icon-resolver.php';
+            $refreshQueue->processNext(new IconResolver('../cache/favicons/'), gethostname() . ':' . getmypid(), $faviconBatchId);
+        } catch (Throwable $e) {
+            // The job stays queued for the worker
+            error_log('Favicon resolution for a new bookmark failed: ' . $e->getMessage());
+        }
+    };
+    
+    // Without PHP-FPM the response cannot be finished early, and a worker may not
+    // be running, so the icon is resolved inline as before
+    $deferFavicon = function_exists('fastcgi_finish_request');
+    if ($faviconPending && !$deferFavicon) {
+        $resolveQueuedFavicon();
+        $stmt = $pdo->prepare('SELECT favicon_url FROM bookmarks WHERE id = ? AND user_id = ?');
+        $stmt->execute([$bookmarkId, $currentUserId]);
+        $faviconPending = (string)$stmt->fetchColumn() === '';
+    }
     
     echo json_encode([
         'success' => true,
-        'id' => $pdo->lastInsertId()
+        'id' => $bookmarkId,
+        'favicon_pending' => $faviconPending
     ]);
     
+    // Under PHP-FPM the response is complete here, so the icon is resolved without delaying it
+    if ($faviconPending && $deferFavicon) {
+        session_write_close();
+        fastcgi_finish_request();
+        $resolveQueuedFavicon();
+    }
+    
+} catch (Throwable $e) {
+            // The job stays queued for the worker
+            error_log('Deferred favicon resolution failed: ' . $e->getMessage());
+        }
+    }
+    
 } catch (Throwable $e) {
     http_response_code(500);
     echo json_encode([
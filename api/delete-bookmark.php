@@ -3,6 +3,7 @@ session_start();
 header('Content-Type: application/json');
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
+require_once '../includes/services/index-render-cache.php';
 
 // Require authentication
 requireAuth($pdo);
@@ -27,6 +28,11 @@ try {
         throw new Exception('Bookmark not found or access denied');
     }
     
+    // Let global-search clients drop the bookmark on their next sync
+    $stmt = $pdo->prepare("INSERT INTO bookmark_tombstones (bookmark_id, user_id) VALUES (?, ?) ON DUPLICATE KEY UPDATE deleted_at = CURRENT_TIMESTAMP");
+    $stmt->execute([$bookmarkId, $currentUserId]);
+    
+    IndexRenderCache::invalidate($pdo, $currentUserId);
     echo json_encode(['success' => true]);
     
 } catch (Exception $e) {
@@ -3,6 +3,7 @@ session_start();
 header('Content-Type: application/json');
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
+require_once '../includes/services/index-render-cache.php';
 
 // Require authentication
 requireAuth($pdo);
@@ -52,9 +53,21 @@ try {
         $isCurrentPage = true;
     }
     
+    // The page's bookmarks leave search; let global-search clients drop them on their next sync
+    $stmt = $pdo->prepare("
+        INSERT INTO bookmark_tombstones (bookmark_id, user_id)
+        SELECT b.id, b.user_id
+        FROM bookmarks b
+        JOIN categories c ON b.category_id = c.id AND c.user_id = b.user_id
+        WHERE c.page_id = ? AND b.user_id = ?
+        ON DUPLICATE KEY UPDATE deleted_at = CURRENT_TIMESTAMP
+    ");
+    $stmt->execute([$pageId, $currentUserId]);
+    
     // Delete the page (categories and bookmarks will be deleted via CASCADE)
     $stmt = $pdo->prepare("DELETE FROM pages WHERE id = ? AND user_id = ?");
     $stmt->execute([$pageId, $currentUserId]);
+    IndexRenderCache::invalidate($pdo, $currentUserId);
     
     // If this was the current page, get the first available page for this user
     $redirectPageId = null;
@@ -3,6 +3,7 @@ session_start();
 header('Content-Type: application/json');
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
+require_once '../includes/services/index-render-cache.php';
 
 // Logging function
 function logError($message, $data = []) {
@@ -127,6 +128,7 @@ try {
         throw new Exception('Category not found');
     }
     
+    IndexRenderCache::invalidate($pdo, $currentUserId);
     echo json_encode(['success' => true]);
     
 } catch (Exception $e) {
@@ -3,6 +3,7 @@ session_start();
 header('Content-Type: application/json');
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
+require_once '../includes/services/index-render-cache.php';
 
 // Require authentication
 if (!isAuthenticated($pdo)) {
@@ -62,6 +63,7 @@ try {
     // Update the page (only if it belongs to the current user)
     $stmt = $pdo->prepare("UPDATE pages SET name = ? WHERE id = ? AND user_id = ?");
     $stmt->execute([$name, $pageId, $currentUserId]);
+    IndexRenderCache::invalidate($pdo, $currentUserId);
     
     echo json_encode([
         'success' => true,
@@ -3,6 +3,7 @@ session_start();
 header('Content-Type: application/json');
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
+require_once '../includes/services/index-render-cache.php';
 require_once '../includes/favicon/favicon-config.php';
 
 // Require authentication
@@ -72,6 +73,7 @@ try {
         throw new Exception('Bookmark not found or access denied');
     }
 
+    IndexRenderCache::invalidate($pdo, $currentUserId);
     echo json_encode(['success' => true]);
 } catch (Exception $e) {
     http_response_code(500);
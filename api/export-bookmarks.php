@@ -0,0 +1,51 @@
+<?php
+session_start();
+
+require_once '../includes/db.php';
+require_once '../includes/auth_functions.php';
+require_once '../includes/services/bookmark-export.php';
+
+if (!isAuthenticated($pdo)) {
+    http_response_code(401);
+    header('Content-Type: application/json');
+    echo json_encode(['success' => false, 'message' => 'Authentication required']);
+    exit;
+}
+
+if ($_SERVER['REQUEST_METHOD'] !== 'GET') {
+    http_response_code(405);
+    header('Content-Type: application/json');
+    echo json_encode(['success' => false, 'message' => 'Method not allowed']);
+    exit;
+}
+
+$currentUserId = getCurrentUserId();
+// A large export takes a while; do not hold the session lock against the user's other requests
+session_write_close();
+
+$isJson = ($_GET['format'] ?? 'html') === 'json';
+$filename = 'startpage-bookmarks-' . date('Y-m-d') . ($isJson ? '.jsonl' : '.html');
+header('Content-Type: ' . ($isJson ? 'application/x-ndjson' : 'text/html; charset=UTF-8'));
+header('Content-Disposition: attachment; filename="' . $filename . '"');
+header('Cache-Control: private, no-store');
+header('X-Accel-Buffering: no');
+// Rows go out as they are read instead of collecting in an output buffer
+while (ob_get_level() > 0) {
+    ob_end_flush();
+}
+
+$out = fopen('php://output', 'wb');
+try {
+    $exporter = new BookmarkExporter($pdo, $currentUserId);
+    if ($isJson) {
+        $exporter->writeJsonLines($out);
+    } else {
+        $exporter->writeNetscape($out);
+    }
+} catch (Exception $e) {
+    // The download has started, so the status can no longer change
+    error_log('Bookmark export failed: ' . $e->getMessage());
+} finally {
+    fclose($out);
+}
+?>
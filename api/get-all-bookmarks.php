@@ -3,51 +3,146 @@ session_start();
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
 require_once '../includes/favicon/favicon-config.php';
+require_once '../includes/services/index-render-cache.php';
 
 // Require authentication
 requireAuth($pdo);
 
+// Tombstones older than this are pruned, so older sync tokens need a full sync
+const SEARCH_SYNC_TOMBSTONE_DAYS = 30;
+
+// Compress the payload when the client accepts it and the server does not already
+if (!ini_get('zlib.output_compression')) {
+    ob_start('ob_gzhandler');
+}
+
 header('Content-Type: application/json');
+// Responses are per user and must be revalidated before reuse
+header('Cache-Control: private, no-cache');
+header('Vary: Cookie, Accept-Encoding');
 
 try {
     $currentUserId = getCurrentUserId();
-    
-    // Get all bookmarks from all pages with category and page information
-    $stmt = $pdo->prepare('
-        SELECT 
+
+    // A sync token is "<user id>.<database unix time>"; anything else gets a full sync
+    $since = null;
+    if (isset($_GET['since']) && preg_match('/^(\d+)\.(\d+)$/', (string)$_GET['since'], $matches)) {
+        if ((int)$matches[1] === (int)$currentUserId && (int)$matches[2] > time() - SEARCH_SYNC_TOMBSTONE_DAYS * 86400) {
+            $since = (int)$matches[2];
+        }
+    }
+
+    // Every write to the user's data bumps a counter, so unchanged data costs one primary-key query
+    $dataVersion = (new IndexRenderCache($pdo))->getDataVersion($currentUserId);
+    $now = (int)$pdo->query('SELECT UNIX_TIMESTAMP()')->fetchColumn();
+
+    // Without readable counters nothing proves the data unchanged, so no ETag is sent
+    if ($dataVersion !== null) {
+        $etag = '"' . sha1(implode('|', [$currentUserId, $since ?? 'full', $dataVersion])) . '"';
+        header('ETag: ' . $etag);
+
+        $ifNoneMatch = $_SERVER['HTTP_IF_NONE_MATCH'] ?? '';
+        if ($ifNoneMatch !== '' && in_array($etag, array_map('trim', explode(',', $ifNoneMatch)), true)) {
+            http_response_code(304);
+            exit;
+        }
+    }
+
+    // The token is taken before reading, and deltas compare with >=, so a write
+    // landing in the same second is sent again rather than missed
+    $syncToken = $currentUserId . '.' . $now;
+
+    $columns = '
             b.id,
             b.title,
             b.url,
             b.description,
             b.favicon_url,
             b.category_id,
+            b.color,
+            b.sort_order,
+            b.click_count,
+            b.last_clicked_at,
             c.name as category_name,
+            c.sort_order as category_sort,
             p.id as page_id,
-            p.name as page_name
-        FROM bookmarks b
-        JOIN categories c ON b.category_id = c.id AND c.user_id = ? AND c.deleted_at IS NULL
-        JOIN pages p ON c.page_id = p.id AND p.user_id = ?
-        WHERE b.user_id = ?
-        ORDER BY p.sort_order ASC, c.sort_order ASC, b.sort_order ASC
-    ');
-    
-    $stmt->execute([$currentUserId, $currentUserId, $currentUserId]);
-    $bookmarks = $stmt->fetchAll(PDO::FETCH_ASSOC);
+            p.name as page_name,
+            p.sort_order as page_sort';
+
+    $removed = [];
+    if ($since === null) {
+        // Get all bookmarks from all pages with category and page information
+        $stmt = $pdo->prepare('
+            SELECT ' . $columns . '
+            FROM bookmarks b
+            JOIN categories c ON b.category_id = c.id AND c.user_id = ? AND c.deleted_at IS NULL
+            JOIN pages p ON c.page_id = p.id AND p.user_id = ?
+            WHERE b.user_id = ?
+            ORDER BY p.sort_order ASC, p.id ASC, c.sort_order ASC, c.id ASC, b.sort_order ASC, b.id ASC
+        ');
+        $stmt->execute([$currentUserId, $currentUserId, $currentUserId]);
+        $bookmarks = $stmt->fetchAll(PDO::FETCH_ASSOC);
+
+        // A full sync is the only reader of expired tombstones, so prune them here
+        $stmt = $pdo->prepare('DELETE FROM bookmark_tombstones WHERE user_id = ? AND deleted_at < DATE_SUB(CURRENT_TIMESTAMP, INTERVAL ' . SEARCH_SYNC_TOMBSTONE_DAYS . ' DAY)');
+        $stmt->execute([$currentUserId]);
+    } else {
+        // Bookmarks whose own row, category, or page changed since the token
+        $stmt = $pdo->prepare('
+            SELECT ' . $columns . ',
+                c.deleted_at as category_deleted_at
+            FROM bookmarks b
+            JOIN categories c ON b.category_id = c.id AND c.user_id = ?
+            LEFT JOIN pages p ON c.page_id = p.id AND p.user_id = ?
+            WHERE b.user_id = ?
+                AND (
+                    b.updated_at >= FROM_UNIXTIME(?)
+                    OR c.updated_at >= FROM_UNIXTIME(?)
+                    OR p.updated_at >= FROM_UNIXTIME(?)
+                )
+        ');
+        $stmt->execute([$currentUserId, $currentUserId, $currentUserId, $since, $since, $since]);
+
+        $bookmarks = [];
+        foreach ($stmt->fetchAll(PDO::FETCH_ASSOC) as $row) {
+            // Bookmarks in Trash or on a missing page are no longer searchable
+            if ($row['category_deleted_at'] !== null || $row['page_id'] === null) {
+                $removed[] = (int)$row['id'];
+                continue;
+            }
+            unset($row['category_deleted_at']);
+            $bookmarks[] = $row;
+        }
+
+        $stmt = $pdo->prepare('SELECT bookmark_id FROM bookmark_tombstones WHERE user_id = ? AND deleted_at >= FROM_UNIXTIME(?)');
+        $stmt->execute([$currentUserId, $since]);
+        foreach ($stmt->fetchAll(PDO::FETCH_COLUMN) as $bookmarkId) {
+            $removed[] = (int)$bookmarkId;
+        }
+    }
 
     foreach ($bookmarks as &$bookmark) {
         $bookmark['favicon_url'] = FaviconConfig::getRenderableStoredFaviconUrl($bookmark['favicon_url'] ?? '');
     }
     unset($bookmark);
-    
-    echo json_encode([
+
+    $response = [
         'success' => true,
+        'mode' => $since === null ? 'full' : 'delta',
+        'sync_token' => $syncToken,
         'bookmarks' => $bookmarks
-    ]);
-    
+    ];
+    if ($since !== null) {
+        $response['removed'] = array_values(array_unique($removed));
+    }
+
+    echo json_encode($response);
+
 } catch (Exception $e) {
+    header_remove('ETag');
     echo json_encode([
         'success' => false,
         'message' => 'Failed to fetch bookmarks: ' . $e->getMessage()
     ]);
 }
-?> 
+?>
@@ -0,0 +1,60 @@
+<?php
+session_start();
+header('Content-Type: application/json');
+
+require_once '../includes/db.php';
+require_once '../includes/auth_functions.php';
+require_once '../includes/favicon/favicon-config.php';
+
+const BOOKMARK_FAVICONS_MAX_IDS = 100;
+
+if (!isAuthenticated($pdo)) {
+    http_response_code(401);
+    echo json_encode(['success' => false, 'message' => 'Authentication required']);
+    exit;
+}
+
+if ($_SERVER['REQUEST_METHOD'] !== 'GET') {
+    http_response_code(405);
+    echo json_encode(['success' => false, 'message' => 'Method not allowed']);
+    exit;
+}
+
+$ids = array_slice(array_values(array_unique(array_filter(array_map('intval', explode(',', (string)($_GET['ids'] ?? '')))))), 0, BOOKMARK_FAVICONS_MAX_IDS);
+if (!$ids) {
+    http_response_code(400);
+    echo json_encode(['success' => false, 'message' => 'At least one bookmark ID is required']);
+    exit;
+}
+
+// Sessions are only read here; do not hold the lock while the dashboard polls
+session_write_close();
+
+try {
+    $placeholders = implode(', ', array_fill(0, count($ids), '?'));
+    $stmt = $pdo->prepare("SELECT id, url, favicon_url FROM bookmarks WHERE user_id = ? AND id IN ($placeholders)");
+    $stmt->execute(array_merge([getCurrentUserId()], $ids));
+
+    // New bookmarks are stored without an icon until their favicon job has run
+    $favicons = [];
+    $pending = [];
+    foreach ($stmt->fetchAll(PDO::FETCH_ASSOC) as $bookmark) {
+        $faviconUrl = FaviconConfig::getRenderableStoredFaviconUrl($bookmark['favicon_url']);
+        if ((string)$bookmark['favicon_url'] === '') {
+            $pending[] = (int)$bookmark['id'];
+        } else {
+            $favicons[] = ['id' => (int)$bookmark['id'], 'favicon_url' => $faviconUrl];
+        }
+    }
+
+    header('Cache-Control: private, no-store');
+    echo json_encode([
+        'success' => true,
+        'favicons' => $favicons,
+        'pending' => $pending
+    ]);
+} catch (Exception $e) {
+    http_response_code(500);
+    echo json_encode(['success' => false, 'message' => 'Failed to load favicons: ' . $e->getMessage()]);
+}
+?>
@@ -0,0 +1,64 @@
+<?php
+session_start();
+header('Content-Type: application/json');
+
+require_once '../includes/db.php';
+require_once '../includes/auth_functions.php';
+require_once '../includes/color_map.php';
+require_once '../includes/favicon/favicon-config.php';
+require_once '../includes/services/index-data-service.php';
+require_once '../includes/services/index-render-cache.php';
+
+if (!isAuthenticated($pdo)) {
+    http_response_code(401);
+    echo json_encode(['success' => false, 'message' => 'Authentication required']);
+    exit;
+}
+
+if ($_SERVER['REQUEST_METHOD'] !== 'GET') {
+    http_response_code(405);
+    echo json_encode(['success' => false, 'message' => 'Method not allowed']);
+    exit;
+}
+
+$categoryId = (int)($_GET['category_id'] ?? 0);
+if ($categoryId <= 0) {
+    http_response_code(400);
+    echo json_encode(['success' => false, 'message' => 'A valid category ID is required']);
+    exit;
+}
+
+try {
+    $dataService = new IndexDataService($pdo, getCurrentUserId(), new IndexRenderCache($pdo));
+    $categoryData = $dataService->getCategoryBookmarks($categoryId);
+    if ($categoryData === null) {
+        http_response_code(404);
+        echo json_encode(['success' => false, 'message' => 'Category not found or access denied']);
+        exit;
+    }
+
+    // Every bookmark is returned, rendered with the dashboard's own template; the
+    // client keeps the ones it already shows
+    $cat = $categoryData['category'];
+    $collapsedBookmarkLimit = $cat['collapsed_link_limit'];
+    ob_start();
+    foreach ($categoryData['bookmarks'] as $bookmarkIndex => $bm) {
+        include '../includes/templates/partials/bookmark-item.php';
+    }
+    $html = ob_get_clean();
+
+    if (!ini_get('zlib.output_compression')) {
+        ob_start('ob_gzhandler');
+    }
+    header('Cache-Control: private, no-cache');
+    echo json_encode([
+        'success' => true,
+        'category_id' => (int)$cat['id'],
+        'total' => count($categoryData['bookmarks']),
+        'html' => $html
+    ]);
+} catch (Exception $e) {
+    http_response_code(500);
+    echo json_encode(['success' => false, 'message' => 'Failed to load bookmarks: ' . $e->getMessage()]);
+}
+?>
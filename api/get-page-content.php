@@ -0,0 +1,79 @@
+<?php
+session_start();
+header('Content-Type: application/json');
+
+require_once '../includes/db.php';
+require_once '../includes/auth_functions.php';
+require_once '../includes/color_map.php';
+require_once '../includes/favicon/favicon-config.php';
+require_once '../includes/services/index-data-service.php';
+require_once '../includes/services/index-render-cache.php';
+
+if (!isAuthenticated($pdo)) {
+    http_response_code(401);
+    echo json_encode(['success' => false, 'message' => 'Authentication required']);
+    exit;
+}
+
+if ($_SERVER['REQUEST_METHOD'] !== 'GET') {
+    http_response_code(405);
+    echo json_encode(['success' => false, 'message' => 'Method not allowed']);
+    exit;
+}
+
+try {
+    $dataService = new IndexDataService($pdo, getCurrentUserId(), new IndexRenderCache($pdo));
+    // Switching here makes the choice stick for the next full page load too
+    if (!$dataService->selectPage((int)($_GET['page_id'] ?? 0))) {
+        http_response_code(404);
+        echo json_encode(['success' => false, 'message' => 'Page not found or access denied']);
+        exit;
+    }
+
+    // Read before the data, so a write in between leaves the version older, not newer
+    $pageVersion = $dataService->getPageVersion();
+    $categoriesData = $dataService->getCategoriesAndBookmarks();
+    $categories = $categoriesData['categories'];
+    $bookmarksByCategory = $categoriesData['bookmarksByCategory'];
+    $lazyBookmarks = IndexDataService::isLazyRenderingEnabled();
+    $currentPageId = (int)$_GET['page_id'];
+    ob_start();
+    include '../includes/templates/partials/category-sections.php';
+    $html = ob_get_clean();
+
+    // The quick add dialog lists this page's categories first and every other page's after
+    $quickAddCategories = ['current' => [], 'other' => []];
+    foreach ($dataService->getCategoriesByPage() as $pageId => $pageData) {
+        $pageCategories = array_map(function ($category) {
+            return ['id' => (int)$category['id'], 'name' => $category['name']];
+        }, $pageData['categories']);
+        if ((int)$pageId === $currentPageId) {
+            $quickAddCategories['current'] = $pageCategories;
+        } else {
+            $quickAddCategories['other'][] = ['page_name' => $pageData['page_name'], 'categories' => $pageCategories];
+        }
+    }
+
+    if (!ini_get('zlib.output_compression')) {
+        ob_start('ob_gzhandler');
+    }
+    header('Cache-Control: private, no-cache');
+    echo json_encode([
+        'success' => true,
+        'page' => [
+            'id' => $currentPageId,
+            'name' => $dataService->getCurrentPageName(),
+            'version' => $pageVersion
+        ],
+        'pages' => array_map(function ($page) {
+            return ['id' => (int)$page['id'], 'name' => $page['name']];
+        }, $dataService->getAllPages()),
+        'favicon_bundle' => $categoriesData['faviconBundle'],
+        'quick_add_categories' => $quickAddCategories,
+        'html' => $html
+    ]);
+} catch (Exception $e) {
+    http_response_code(500);
+    echo json_encode(['success' => false, 'message' => 'Failed to load page: ' . $e->getMessage()]);
+}
+?>
@@ -0,0 +1,45 @@
+<?php
+session_start();
+header('Content-Type: application/json');
+
+require_once '../includes/db.php';
+require_once '../includes/auth_functions.php';
+require_once '../includes/services/app-shell.php';
+require_once '../includes/services/index-data-service.php';
+require_once '../includes/services/index-render-cache.php';
+
+if (!isAuthenticated($pdo)) {
+    http_response_code(401);
+    echo json_encode(['success' => false, 'message' => 'Authentication required']);
+    exit;
+}
+
+if ($_SERVER['REQUEST_METHOD'] !== 'GET') {
+    http_response_code(405);
+    echo json_encode(['success' => false, 'message' => 'Method not allowed']);
+    exit;
+}
+
+// Sessions are only read here; every dashboard open asks, so do not hold the lock
+session_write_close();
+
+try {
+    // Only the version counters are read; the page list comes from the render cache
+    $dataService = new IndexDataService($pdo, getCurrentUserId(), new IndexRenderCache($pdo));
+    $currentPageId = (int)$dataService->getCurrentPageId();
+
+    header('Cache-Control: private, no-store');
+    echo json_encode([
+        'success' => true,
+        'user_id' => (int)getCurrentUserId(),
+        'page' => [
+            'id' => $currentPageId,
+            'version' => $dataService->getPageVersion()
+        ],
+        'assets' => AppShell::getAssetVersion()
+    ]);
+} catch (Exception $e) {
+    http_response_code(500);
+    echo json_encode(['success' => false, 'message' => 'Failed to load page version: ' . $e->getMessage()]);
+}
+?>
@@ -0,0 +1,56 @@
+<?php
+session_start();
+header('Content-Type: application/json');
+
+require_once '../includes/db.php';
+require_once '../includes/auth_functions.php';
+require_once '../includes/services/bookmark-import.php';
+require_once '../includes/services/index-render-cache.php';
+
+if (!isAuthenticated($pdo)) {
+    http_response_code(401);
+    echo json_encode(['success' => false, 'message' => 'Authentication required']);
+    exit;
+}
+
+if ($_SERVER['REQUEST_METHOD'] !== 'POST') {
+    http_response_code(405);
+    echo json_encode(['success' => false, 'message' => 'Method not allowed']);
+    exit;
+}
+
+$upload = $_FILES['file'] ?? null;
+if (!$upload || $upload['error'] !== UPLOAD_ERR_OK) {
+    $tooLarge = $upload && in_array($upload['error'], [UPLOAD_ERR_INI_SIZE, UPLOAD_ERR_FORM_SIZE], true);
+    http_response_code($tooLarge ? 413 : 400);
+    echo json_encode([
+        'success' => false,
+        'message' => $tooLarge
+            ? 'The file is larger than the server accepts. Import it with tools/import-bookmarks.php instead.'
+            : 'A bookmark file is required'
+    ]);
+    exit;
+}
+
+$currentUserId = getCurrentUserId();
+// A large import takes a while; do not hold the session lock against the user's other requests
+session_write_close();
+
+$stream = fopen($upload['tmp_name'], 'rb');
+$importer = new BookmarkImporter($pdo, $currentUserId);
+try {
+    $summary = $importer->import(BookmarkImporter::createReader($stream));
+    echo json_encode(['success' => true] + $summary);
+} catch (Exception $e) {
+    http_response_code(500);
+    echo json_encode([
+        'success' => false,
+        'message' => 'Import failed: ' . $e->getMessage(),
+        // Chunks committed before the error stay imported
+        'imported' => $importer->getSummary()
+    ]);
+} finally {
+    fclose($stream);
+    IndexRenderCache::invalidate($pdo, $currentUserId);
+}
+?>
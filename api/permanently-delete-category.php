@@ -4,6 +4,7 @@ header('Content-Type: application/json');
 
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
+require_once '../includes/services/index-render-cache.php';
 
 requireAuth($pdo);
 
@@ -52,6 +53,16 @@ try {
         exit;
     }
 
+    // Let global-search clients drop these bookmarks on their next sync
+    $stmt = $pdo->prepare('
+        INSERT INTO bookmark_tombstones (bookmark_id, user_id)
+        SELECT id, user_id
+        FROM bookmarks
+        WHERE category_id = ? AND user_id = ?
+        ON DUPLICATE KEY UPDATE deleted_at = CURRENT_TIMESTAMP
+    ');
+    $stmt->execute([$categoryId, $currentUserId]);
+
     $stmt = $pdo->prepare('DELETE FROM bookmarks WHERE category_id = ? AND user_id = ?');
     $stmt->execute([$categoryId, $currentUserId]);
     $deletedBookmarkCount = $stmt->rowCount();
@@ -69,6 +80,7 @@ try {
     }
 
     $pdo->commit();
+    IndexRenderCache::invalidate($pdo, $currentUserId);
 
     echo json_encode([
         'success' => true,
@@ -3,6 +3,7 @@ session_start();
 header('Content-Type: application/json');
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
+require_once '../includes/services/index-render-cache.php';
 
 // Require authentication
 requireAuth($pdo);
@@ -17,19 +18,32 @@ try {
         throw new Exception('Invalid input data');
     }
     
-    $order = $input['order'];
+    $order = array_values(array_unique(array_map('intval', $input['order'])));
     
     // Begin transaction
     $pdo->beginTransaction();
     
-    // Update each category's sort_order (ensure categories belong to user)
-    foreach ($order as $index => $categoryId) {
-        $stmt = $pdo->prepare("UPDATE categories SET sort_order = ? WHERE id = ? AND user_id = ? AND deleted_at IS NULL");
-        $stmt->execute([$index, $categoryId, $currentUserId]);
+    // Update every category's sort_order in one statement (ensure categories belong to user)
+    if ($order) {
+        $cases = implode(' ', array_fill(0, count($order), 'WHEN ? THEN ?'));
+        $placeholders = implode(', ', array_fill(0, count($order), '?'));
+        $caseParams = [];
+        foreach ($order as $index => $categoryId) {
+            $caseParams[] = $categoryId;
+            $caseParams[] = $index;
+        }
+        
+        $stmt = $pdo->prepare("
+            UPDATE categories
+            SET sort_order = CASE id $cases END
+            WHERE user_id = ? AND deleted_at IS NULL AND id IN ($placeholders)
+        ");
+        $stmt->execute(array_merge($caseParams, [$currentUserId], $order));
     }
     
     // Commit transaction
     $pdo->commit();
+    IndexRenderCache::invalidate($pdo, $currentUserId);
     
     echo json_encode(['success' => true]);
     
@@ -3,6 +3,7 @@ session_start();
 header('Content-Type: application/json');
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
+require_once '../includes/services/index-render-cache.php';
 
 // Require authentication
 requireAuth($pdo);
@@ -18,7 +19,7 @@ try {
     }
     
     $targetCategoryId = (int)$input['category_id'];
-    $order = $input['order'];
+    $order = array_values(array_unique(array_map('intval', $input['order'])));
     
     // Validate that the target category belongs to the user
     $stmt = $pdo->prepare("SELECT id FROM categories WHERE id = ? AND user_id = ? AND deleted_at IS NULL");
@@ -30,64 +31,84 @@ try {
     // Begin transaction
     $pdo->beginTransaction();
     
-    // First, get the current category_id for each bookmark to detect cross-category moves
-    $bookmarkCurrentCategories = [];
-    foreach ($order as $bookmarkId) {
+    if ($order) {
+        // Check ownership and read every bookmark's current position in one query
+        $placeholders = implode(', ', array_fill(0, count($order), '?'));
         $stmt = $pdo->prepare("
-            SELECT b.category_id
+            SELECT b.id, b.category_id, b.sort_order
             FROM bookmarks b
             JOIN categories c
                 ON c.id = b.category_id
                 AND c.user_id = b.user_id
                 AND c.deleted_at IS NULL
-            WHERE b.id = ? AND b.user_id = ?
+            WHERE b.user_id = ? AND b.id IN ($placeholders)
+            FOR UPDATE
         ");
-        $stmt->execute([$bookmarkId, $currentUserId]);
-        $result = $stmt->fetch();
-        if (!$result) {
+        $stmt->execute(array_merge([$currentUserId], $order));
+        $currentPositions = [];
+        foreach ($stmt->fetchAll(PDO::FETCH_ASSOC) as $row) {
+            $currentPositions[(int)$row['id']] = $row;
+        }
+        if (count($currentPositions) !== count($order)) {
             throw new Exception('Bookmark not found, access denied, or category is in Trash');
         }
-        $bookmarkCurrentCategories[$bookmarkId] = $result['category_id'];
-    }
-    
-    // Update each bookmark's category_id and sort_order (ensure bookmarks belong to user)
-    foreach ($order as $index => $bookmarkId) {
-        $stmt = $pdo->prepare("
-            UPDATE bookmarks 
-            SET category_id = ?, sort_order = ?, updated_at = CURRENT_TIMESTAMP 
-            WHERE id = ? AND user_id = ?
-        ");
-        $stmt->execute([$targetCategoryId, $index, $bookmarkId, $currentUserId]);
-    }
-    
-    // If any bookmarks were moved from a different category, we need to reorder the source category
-    $sourceCategories = array_unique(array_filter($bookmarkCurrentCategories, function($catId) use ($targetCategoryId) {
-        return $catId !== null && $catId !== $targetCategoryId;
-    }));
-    
-    foreach ($sourceCategories as $sourceCategoryId) {
-        // Get remaining bookmarks in the source category and reorder them
-        $stmt = $pdo->prepare("
-            SELECT id FROM bookmarks 
-            WHERE category_id = ? AND user_id = ? 
-            ORDER BY sort_order ASC, id ASC
-        ");
-        $stmt->execute([$sourceCategoryId, $currentUserId]);
-        $remainingBookmarks = $stmt->fetchAll(PDO::FETCH_COLUMN);
         
-        // Update sort_order for remaining bookmarks
-        foreach ($remainingBookmarks as $index => $bookmarkId) {
+        // Only bookmarks whose category or position changes are written
+        $changedPositions = [];
+        $sourceCategories = [];
+        foreach ($order as $index => $bookmarkId) {
+            $current = $currentPositions[$bookmarkId];
+            if ((int)$current['category_id'] !== $targetCategoryId) {
+                $sourceCategories[(int)$current['category_id']] = true;
+            } elseif ((int)$current['sort_order'] === $index) {
+                continue;
+            }
+            $changedPositions[$bookmarkId] = $index;
+        }
+        
+        // Apply all new positions with one CASE update
+        if ($changedPositions) {
+            $cases = implode(' ', array_fill(0, count($changedPositions), 'WHEN ? THEN ?'));
+            $placeholders = implode(', ', array_fill(0, count($changedPositions), '?'));
+            $caseParams = [];
+            foreach ($changedPositions as $bookmarkId => $index) {
+                $caseParams[] = $bookmarkId;
+                $caseParams[] = $index;
+            }
+            
+            $stmt = $pdo->prepare("
+                UPDATE bookmarks
+                SET category_id = ?, sort_order = CASE id $cases END, updated_at = CURRENT_TIMESTAMP
+                WHERE user_id = ? AND id IN ($placeholders)
+            ");
+            $stmt->execute(array_merge(
+                [$targetCategoryId],
+                $caseParams,
+                [$currentUserId],
+                array_keys($changedPositions)
+            ));
+        }
+        
+        // Close the gaps left in source categories, renumbering them in one statement
+        if ($sourceCategories) {
+            $placeholders = implode(', ', array_fill(0, count($sourceCategories), '?'));
             $stmt = $pdo->prepare("
-                UPDATE bookmarks 
-                SET sort_order = ?, updated_at = CURRENT_TIMESTAMP 
-                WHERE id = ? AND user_id = ?
+                UPDATE bookmarks b
+                JOIN (
+                    SELECT id, ROW_NUMBER() OVER (PARTITION BY category_id ORDER BY sort_order ASC, id ASC) - 1 AS new_sort_order
+                    FROM bookmarks
+                    WHERE user_id = ? AND category_id IN ($placeholders)
+                ) ranked ON ranked.id = b.id
+                SET b.sort_order = ranked.new_sort_order, b.updated_at = CURRENT_TIMESTAMP
+                WHERE b.sort_order <> ranked.new_sort_order
             ");
-            $stmt->execute([$index, $bookmarkId, $currentUserId]);
+            $stmt->execute(array_merge([$currentUserId], array_keys($sourceCategories)));
         }
     }
     
     // Commit transaction
     $pdo->commit();
+    IndexRenderCache::invalidate($pdo, $currentUserId);
     
     echo json_encode(['success' => true]);
     
@@ -4,6 +4,7 @@ header('Content-Type: application/json');
 
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
+require_once '../includes/services/index-render-cache.php';
 
 requireAuth($pdo);
 
@@ -88,6 +89,7 @@ try {
     ');
     $stmt->execute([$destinationPageId, $categoryId, $currentUserId]);
     $pdo->commit();
+    IndexRenderCache::invalidate($pdo, $currentUserId);
 
     echo json_encode([
         'success' => true,
@@ -0,0 +1,238 @@
+<?php
+session_start();
+
+require_once '../includes/db.php';
+require_once '../includes/auth_functions.php';
+require_once '../includes/services/index-render-cache.php';
+require_once '../includes/services/link-checker.php';
+require_once '../includes/favicon/favicon-cache.php';
+require_once '../includes/favicon/favicon-config.php';
+
+// Checks and favicon refreshes share this budget; links not reached are reported as skipped
+const CATEGORY_LINK_TEST_BUDGET_SECONDS = 90;
+const CATEGORY_LINK_TEST_CONCURRENCY = 8;
+const CATEGORY_LINK_TEST_PER_HOST = 2;
+
+if (($_SERVER['REQUEST_METHOD'] ?? '') !== 'POST') {
+    http_response_code(405);
+    header('Content-Type: application/json');
+    echo json_encode([
+        'success' => false,
+        'message' => 'Method not allowed',
+    ]);
+    exit;
+}
+
+if (!isAuthenticated($pdo)) {
+    http_response_code(401);
+    header('Content-Type: application/json');
+    echo json_encode([
+        'success' => false,
+        'message' => 'Not authenticated. Please log in again.',
+    ]);
+    exit;
+}
+
+$currentUserId = getCurrentUserId();
+// A run takes a while; do not hold the session lock against the user's other requests
+session_write_close();
+
+/**
+ * Write one event as an NDJSON line or a server-sent event and push it to the client.
+ * Returns false once the client has gone away.
+ */
+function sendLinkTestEvent(string $type, array $data, bool $useSse): bool
+{
+    if ($useSse) {
+        echo "event: {$type}\ndata: " . json_encode($data) . "\n\n";
+    } else {
+        echo json_encode(['type' => $type] + $data) . "\n";
+    }
+    flush();
+
+    return !connection_aborted();
+}
+
+$input = json_decode(file_get_contents('php://input'), true);
+$categoryId = (int)($input['category_id'] ?? 0);
+if ($categoryId <= 0) {
+    http_response_code(400);
+    header('Content-Type: application/json');
+    echo json_encode([
+        'success' => false,
+        'message' => 'A valid category ID is required',
+    ]);
+    exit;
+}
+
+try {
+    $stmt = $pdo->prepare('SELECT id FROM categories WHERE id = ? AND user_id = ? AND deleted_at IS NULL');
+    $stmt->execute([$categoryId, $currentUserId]);
+    if (!$stmt->fetch()) {
+        http_response_code(404);
+        header('Content-Type: application/json');
+        echo json_encode([
+            'success' => false,
+            'message' => 'Category not found or access denied',
+        ]);
+        exit;
+    }
+
+    // An optional ID list limits the run to those bookmarks, in that order
+    $params = [$categoryId, $currentUserId];
+    $idFilter = '';
+    $requestedIds = array_values(array_unique(array_filter(array_map('intval', (array)($input['ids'] ?? [])))));
+    if ($requestedIds) {
+        $idFilter = ' AND id IN (' . implode(', ', array_fill(0, count($requestedIds), '?')) . ')';
+        $params = array_merge($params, $requestedIds);
+    }
+    $stmt = $pdo->prepare('
+        SELECT id, url, description, favicon_url
+        FROM bookmarks
+        WHERE category_id = ? AND user_id = ?' . $idFilter . '
+        ORDER BY sort_order ASC, id ASC
+    ');
+    $stmt->execute($params);
+    $bookmarks = $stmt->fetchAll(PDO::FETCH_ASSOC);
+} catch (Exception $e) {
+    http_response_code(500);
+    header('Content-Type: application/json');
+    echo json_encode([
+        'success' => false,
+        'message' => 'Database error: ' . $e->getMessage(),
+    ]);
+    exit;
+}
+
+$useSse = ($_GET['format'] ?? '') === 'sse'
+    || stripos($_SERVER['HTTP_ACCEPT'] ?? '', 'text/event-stream') !== false;
+header('Content-Type: ' . ($useSse ? 'text/event-stream' : 'application/x-ndjson'));
+header('Cache-Control: no-cache');
+header('X-Accel-Buffering: no');
+@ini_set('zlib.output_compression', '0');
+while (ob_get_level() > 0) {
+    ob_end_flush();
+}
+// Keep going after a disconnect only long enough to notice it and save what was found
+ignore_user_abort(true);
+// The default max_execution_time (often 30 s) would end the run before its results are saved
+set_time_limit(CATEGORY_LINK_TEST_BUDGET_SECONDS + 15);
+
+$startedAt = microtime(true);
+$deadline = $startedAt + CATEGORY_LINK_TEST_BUDGET_SECONDS;
+$bookmarksById = [];
+foreach ($bookmarks as $bookmark) {
+    $bookmarksById[(int)$bookmark['id']] = $bookmark;
+}
+
+try {
+    $connected = sendLinkTestEvent('start', ['total' => count($bookmarks)], $useSse);
+
+    // Phase 1: check every link concurrently, streaming each result as it arrives
+    $descriptionUpdates = [];
+    $faviconCandidates = [];
+    $untestedIds = [];
+    if ($connected) {
+        $checker = new LinkChecker(CATEGORY_LINK_TEST_CONCURRENCY, CATEGORY_LINK_TEST_PER_HOST);
+        $untestedIds = $checker->checkMany($bookmarks, $deadline, function (array $bookmark, array $result) use (&$descriptionUpdates, &$faviconCandidates, $useSse) {
+            $bookmarkId = (int)$bookmark['id'];
+            if ($result['description_updated']) {
+                $descriptionUpdates[$bookmarkId] = $result['description'];
+            }
+            if (LinkChecker::canRefreshMetadata($result)) {
+                $faviconCandidates[$bookmarkId] = $result;
+            }
+
+            return sendLinkTestEvent('result', ['id' => $bookmarkId] + $result, $useSse);
+        });
+        $connected = !connection_aborted();
+    }
+
+    foreach ($untestedIds as $bookmarkId) {
+        if (!$connected) {
+            break;
+        }
+        $connected = sendLinkTestEvent('skipped', [
+            'id' => $bookmarkId,
+            'message' => 'Not tested before the time limit.',
+        ], $useSse);
+    }
+
+    // Phase 2: revalidate favicons of working links with the remaining budget,
+    // starting with links that have no cached icon at all
+    $faviconUpdates = [];
+    if ($connected && $faviconCandidates) {
+        uksort($faviconCandidates, function ($a, $b) use ($bookmarksById) {
+            $aCached = strpos(FaviconConfig::getRenderableStoredFaviconUrl($bookmarksById[$a]['favicon_url'] ?? ''), 'cache/') === 0;
+            $bCached = strpos(FaviconConfig::getRenderableStoredFaviconUrl($bookmarksById[$b]['favicon_url'] ?? ''), 'cache/') === 0;
+            return $aCached <=> $bCached;
+        });
+
+        $faviconCache = new FaviconCache(__DIR__ . '/../cache/favicons/', 0, true);
+        foreach ($faviconCandidates as $bookmarkId => $result) {
+            if (!$connected || microtime(true) >= $deadline) {
+                break;
+            }
+
+            try {
+                $faviconUrl = LinkChecker::refreshFavicon($faviconCache, trim((string)$bookmarksById[$bookmarkId]['url']));
+            } catch (Throwable $faviconError) {
+                error_log("Link test favicon refresh failed for bookmark {$bookmarkId}: " . $faviconError->getMessage());
+                continue;
+            }
+            if ($faviconUrl === '') {
+                continue;
+            }
+
+            if ($faviconUrl !== FaviconConfig::normalizeStoredFaviconUrl($bookmarksById[$bookmarkId]['favicon_url'] ?? '')) {
+                $faviconUpdates[$bookmarkId] = $faviconUrl;
+            }
+            $connected = sendLinkTestEvent('favicon', [
+                'id' => $bookmarkId,
+                'favicon_refreshed' => true,
+                'favicon_url' => $faviconUrl,
+                'message' => LinkChecker::describeWorkingLink($result, true),
+            ], $useSse);
+        }
+    }
+
+    // Write every description and favicon change in one statement
+    $updated = 0;
+    $changedIds = array_keys($descriptionUpdates + $faviconUpdates);
+    if ($changedIds) {
+        $descriptionCases = '';
+        $faviconCases = '';
+        $caseParams = [];
+        foreach ($descriptionUpdates as $bookmarkId => $description) {
+            $descriptionCases .= ' WHEN ? THEN ?';
+            array_push($caseParams, $bookmarkId, $description);
+        }
+        foreach ($faviconUpdates as $bookmarkId => $faviconUrl) {
+            $faviconCases .= ' WHEN ? THEN ?';
+            array_push($caseParams, $bookmarkId, $faviconUrl);
+        }
+
+        $stmt = $pdo->prepare('
+            UPDATE bookmarks
+            SET description = ' . ($descriptionCases !== '' ? 'CASE id' . $descriptionCases . ' ELSE description END' : 'description') . ',
+                favicon_url = ' . ($faviconCases !== '' ? 'CASE id' . $faviconCases . ' ELSE favicon_url END' : 'favicon_url') . ',
+                updated_at = CURRENT_TIMESTAMP
+            WHERE user_id = ? AND id IN (' . implode(', ', array_fill(0, count($changedIds), '?')) . ')
+        ');
+        $stmt->execute(array_merge($caseParams, [$currentUserId], $changedIds));
+        $updated = $stmt->rowCount();
+        IndexRenderCache::invalidate($pdo, $currentUserId);
+    }
+
+    if ($connected) {
+        sendLinkTestEvent('done', [
+            'updated' => $updated,
+            'skipped' => count($untestedIds),
+            'elapsed_ms' => (int)round((microtime(true) - $startedAt) * 1000),
+        ], $useSse);
+    }
+} catch (Throwable $e) {
+    error_log('Category link test failed for category ' . $categoryId . ': ' . $e->getMessage());
+    sendLinkTestEvent('error', ['message' => $e->getMessage()], $useSse);
+}
+?>
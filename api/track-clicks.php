@@ -0,0 +1,66 @@
+<?php
+session_start();
+header('Content-Type: application/json');
+require_once '../includes/db.php';
+require_once '../includes/auth_functions.php';
+require_once '../includes/services/click-buffer.php';
+require_once '../includes/services/index-render-cache.php';
+
+// Beacons cannot follow a login redirect, so answer with JSON
+if (!isAuthenticated($pdo)) {
+    http_response_code(401);
+    echo json_encode(['success' => false, 'message' => 'Not authenticated. Please log in again.']);
+    exit;
+}
+
+try {
+    if ($_SERVER['REQUEST_METHOD'] !== 'POST') {
+        http_response_code(405);
+        echo json_encode(['success' => false, 'message' => 'Method not allowed']);
+        exit;
+    }
+
+    // Get JSON input: {"clicks": [{"id": 12, "count": 2}, ...]}
+    $input = json_decode(file_get_contents('php://input'), true);
+    $clicks = ClickBuffer::normalizeClicks($input['clicks'] ?? null);
+    if (!$clicks) {
+        http_response_code(400);
+        echo json_encode(['success' => false, 'message' => 'At least one bookmark click is required']);
+        exit;
+    }
+
+    $currentUserId = getCurrentUserId();
+    $clickedAt = time();
+
+    $buffer = ClickBuffer::fromEnvironment();
+    if ($buffer) {
+        $buffer->add($currentUserId, $clicks, $clickedAt);
+        $buffer->flushIfDue($pdo);
+        $updated = null;
+    } else {
+        $updated = ClickBuffer::apply($pdo, $currentUserId, array_map(
+            static fn(int $count): array => ['count' => $count, 'clicked_at' => $clickedAt],
+            $clicks
+        ));
+    }
+
+    // Keep cached dashboards current without rebuilding them after every batch
+    IndexRenderCache::recordClicks(
+        $currentUserId,
+        array_fill_keys(array_keys($clicks), date('Y-m-d H:i:s', $clickedAt))
+    );
+
+    echo json_encode([
+        'success' => true,
+        'buffered' => $buffer !== null,
+        'updated' => $updated
+    ]);
+
+} catch (Exception $e) {
+    http_response_code(500);
+    echo json_encode([
+        'success' => false,
+        'message' => $e->getMessage()
+    ]);
+}
+?>
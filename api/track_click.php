@@ -3,6 +3,7 @@ session_start();
 header('Content-Type: application/json');
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
+require_once '../includes/services/index-render-cache.php';
 
 // Require authentication
 requireAuth($pdo);
@@ -46,6 +47,10 @@ try {
     $stmt->execute([$bookmarkId, $currentUserId]);
     $usage = $stmt->fetch(PDO::FETCH_ASSOC);
 
+    // Keep cached dashboards current without rebuilding them after every click
+    IndexRenderCache::recordClickWrite($pdo, $currentUserId);
+    IndexRenderCache::recordClick($currentUserId, $bookmarkId, $usage['last_clicked_at']);
+
     echo json_encode([
         'success' => true,
         'click_count' => (int)$usage['click_count'],
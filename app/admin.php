@@ -2,6 +2,7 @@
 session_start();
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
+require_once '../includes/services/index-render-cache.php';
 
 // Require authentication
 requireAuth($pdo);
@@ -131,6 +132,7 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
                         // Delete user (this will also delete their data due to CASCADE)
                         $stmt = $pdo->prepare("DELETE FROM users WHERE id = ?");
                         $stmt->execute([$userId]);
+                        IndexRenderCache::invalidate($pdo, $userId);
                         
                         $message = "User '{$user['username']}' has been deleted successfully!";
                     }
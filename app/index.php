@@ -8,6 +8,8 @@ require_once '../includes/favicon/favicon-cache.php';
 require_once '../includes/favicon/favicon-config.php';
 require_once '../includes/color_map.php';
 require_once '../includes/services/index-data-service.php';
+require_once '../includes/services/index-render-cache.php';
+require_once '../includes/services/app-shell.php';
 
 // Initialize favicon cache
 $faviconCache = new FaviconCache('../cache/favicons/');
@@ -16,12 +18,16 @@ $faviconCache = new FaviconCache('../cache/favicons/');
 requireAuth($pdo);
 
 $currentUserId = getCurrentUserId();
+// The service worker shows its stored copy of this page only to the same signed-in user
+header('X-Startpage-User: ' . (int)$currentUserId);
 
-// Initialize the data service
-$dataService = new IndexDataService($pdo, $currentUserId);
+// Initialize the data service; page structure is cached per user until the next write
+$dataService = new IndexDataService($pdo, $currentUserId, new IndexRenderCache($pdo));
 
 // Get current page ID (creates default page if needed)
 $currentPageId = $dataService->getCurrentPageId();
+// Read before the page data so a concurrent write leaves this copy looking stale, not current
+$pageVersion = $dataService->getPageVersion();
 
 // Get bookmarklet data
 $bookmarkletData = $dataService->getBookmarkletData();
@@ -35,6 +41,10 @@ $urlError = $bookmarkletData['urlError'];
 $categoriesData = $dataService->getCategoriesAndBookmarks();
 $categories = $categoriesData['categories'];
 $bookmarksByCategory = $categoriesData['bookmarksByCategory'];
+// One stylesheet with the page's cached favicons; bookmarks not in it load their own file
+$faviconBundle = $categoriesData['faviconBundle'];
+// Render only each category's visible bookmarks; the rest are fetched on demand
+$lazyBookmarks = IndexDataService::isLazyRenderingEnabled();
 
 // Get current page name
 $currentPageName = $dataService->getCurrentPageName();
@@ -45,43 +55,13 @@ $allPages = $dataService->getAllPages();
 // Get categories grouped by page for dropdowns
 $categoriesByPage = $dataService->getCategoriesByPage();
 
-// Load feature scripts in dependency order. Native defer scripts download in
-// parallel while preserving this execution order.
-$orderedModuleFiles = [
-    'ui-state.js',
-    'flash-messages.js',
-    'utils.js',
-    'tooltips.js',
-    'global-search.js',
-    'page-navigation.js',
-    'section-management.js',
-    'drag-drop.js',
-    'modal-management.js',
-    'bookmark-management.js',
-    'bookmark-link-testing.js',
-    'bookmark-actions.js',
-    'category-management.js',
-    'trash-management.js',
-    'page-management.js',
-    'context-menu.js',
-    'password-management.js',
-    'account-menu.js',
-    'favicon-management.js',
-    'click-tracking.js'
-];
-
-// Version local assets so browser caches are refreshed after a deployment.
-$modulePaths = array_map(
-    static fn(string $moduleFile): string => __DIR__ . '/../assets/js/modules/' . $moduleFile,
-    $orderedModuleFiles
-);
-$moduleVersion = $modulePaths
-    ? max(array_map('filemtime', $modulePaths))
-    : time();
-$appJsVersion = filemtime(__DIR__ . '/../assets/js/app.js');
-$bookmarkColorsVersion = filemtime(__DIR__ . '/../assets/css/bookmark-colors.css');
-$mainCssVersion = filemtime(__DIR__ . '/../assets/css/main.css');
-$responsiveCssVersion = filemtime(__DIR__ . '/../assets/css/responsive.css');
+// Built bundles (tools/build_assets.py) replace the separate scripts and stylesheets.
+// Their hashed names version them, so the manifest is the only file read here.
+$assetBundles = (@include __DIR__ . '/../assets/dist/manifest.php') ?: null;
+if (!$assetBundles) {
+    // Unbuilt checkout: load every source file in the order listed for the bundles
+    $assetLists = json_decode(file_get_contents(__DIR__ . '/../assets/bundles.json'), true);
+}
 $currentUsername = getCurrentUsername();
 $isLocalEnvironment = strpos($_SERVER['HTTP_HOST'] ?? '', 'localhost') !== false
     || strpos($_SERVER['HTTP_HOST'] ?? '', '127.0.0.1') !== false;
@@ -98,17 +78,20 @@ $isLocalEnvironment = strpos($_SERVER['HTTP_HOST'] ?? '', 'localhost') !== false
     <link rel="icon" type="image/png" sizes="16x16" href="../public/favicon-16x16.png">
     <link rel="apple-touch-icon" sizes="180x180" href="../public/apple-touch-icon.png">
    
-    <script src="../assets/vendor/sortablejs/Sortable.min.js?v=1.15.0" defer></script>
-    <script src="../assets/js/app.js?v=<?= $appJsVersion ?>" defer onerror="console.error('Failed to load app.js')"></script>
-    <?php foreach ($orderedModuleFiles as $moduleFile): ?>
-    <script src="../assets/js/modules/<?= rawurlencode($moduleFile) ?>?v=<?= $moduleVersion ?>" defer onerror="console.error('Failed to load <?= htmlspecialchars($moduleFile, ENT_QUOTES) ?>')"></script>
+    <?php if ($assetBundles): ?>
+    <script src="../<?= htmlspecialchars($assetBundles['js']) ?>" defer onerror="console.error('Failed to load the script bundle')"></script>
+    <link href="../<?= htmlspecialchars($assetBundles['css']) ?>" rel="stylesheet">
+    <?php else: ?>
+    <?php foreach ($assetLists['js'] as $assetPath): ?>
+    <script src="../<?= htmlspecialchars($assetPath) ?>?v=<?= filemtime(__DIR__ . '/../' . $assetPath) ?>" defer onerror="console.error('Failed to load <?= htmlspecialchars(basename($assetPath), ENT_QUOTES) ?>')"></script>
     <?php endforeach; ?>
- 
-    <link href="../warm-paper/warm-paper.css?v=<?= filemtime(__DIR__ . '/../warm-paper/warm-paper.css') ?>" rel="stylesheet">
-    <link href="../assets/css/warm-paper.css?v=<?= filemtime(__DIR__ . '/../assets/css/warm-paper.css') ?>" rel="stylesheet">
-    <link href="../assets/css/bookmark-colors.css?v=<?= $bookmarkColorsVersion ?>" rel="stylesheet">
-    <link href="../assets/css/main.css?v=<?= $mainCssVersion ?>" rel="stylesheet">
-    <link href="../assets/css/responsive.css?v=<?= $responsiveCssVersion ?>" rel="stylesheet">
+    <?php foreach ($assetLists['css'] as $assetPath): ?>
+    <link href="../<?= htmlspecialchars($assetPath) ?>?v=<?= filemtime(__DIR__ . '/../' . $assetPath) ?>" rel="stylesheet">
+    <?php endforeach; ?>
+    <?php endif; ?>
+    <?php if ($faviconBundle !== ''): ?>
+    <link id="faviconBundleStylesheet" href="../<?= htmlspecialchars($faviconBundle) ?>" rel="stylesheet">
+    <?php endif; ?>
 
     <script>
         // Favicon configuration from PHP
@@ -120,6 +103,15 @@ $isLocalEnvironment = strpos($_SERVER['HTTP_HOST'] ?? '', 'localhost') !== false
         window.bookmarkColorTokenToInt = <?= json_encode(getBookmarkColorTokenToInt()) ?>;
         // CSS classes for dynamic class removal
         window.bookmarkBgClasses = <?= json_encode(getBookmarkBgClasses()) ?>;
+        // What this copy of the page shows; the service worker may serve it again later,
+        // so app-shell.js compares it with api/get-page-version.php after every open
+        window.startpageShell = <?= json_encode([
+            'enabled' => AppShell::isEnabled(),
+            'userId' => (int)$currentUserId,
+            'pageId' => (int)$currentPageId,
+            'version' => $pageVersion,
+            'assets' => AppShell::getAssetVersion()
+        ]) ?>;
     </script>
     
 </head>
@@ -206,11 +198,14 @@ $isLocalEnvironment = strpos($_SERVER['HTTP_HOST'] ?? '', 'localhost') !== false
                     </div>
                     <div class="account-menu-section">
                         <button type="button" class="wp-menu__item account-menu-item" role="menuitem" data-account-action="trash">Trash</button>
+                        <button type="button" class="wp-menu__item account-menu-item" role="menuitem" data-account-action="import">Import bookmarks</button>
+                        <a class="wp-menu__item account-menu-item" role="menuitem" href="../api/export-bookmarks.php">Export bookmarks (HTML)</a>
+                        <a class="wp-menu__item account-menu-item" role="menuitem" href="../api/export-bookmarks.php?format=json">Export bookmarks (JSON)</a>
                         <button type="button" class="wp-menu__item account-menu-item" role="menuitem" data-account-action="password">Change password</button>
                         <button type="button" class="wp-menu__item account-menu-item" role="menuitem" data-account-action="about">About</button>
                     </div>
                     <div class="account-menu-section">
-                        <a class="wp-menu__item wp-menu__item--danger account-menu-item is-danger" role="menuitem" href="logout.php">Sign out</a>
+                        <a class="wp-menu__item wp-menu__item--danger account-menu-item is-danger" role="menuitem" href="logout.php" data-account-action="sign-out">Sign out</a>
                     </div>
                 </div>
             </div>
@@ -259,156 +254,7 @@ $isLocalEnvironment = strpos($_SERVER['HTTP_HOST'] ?? '', 'localhost') !== false
           
         <div id="categories-container" class="dashboard-columns">
             <div class="category-column" data-category-column="0">
-            <?php foreach ($categories as $cat): ?>
-                <?php
-                    $bookmarkCount = count($bookmarksByCategory[$cat['id']]);
-                    $collapsedBookmarkLimit = $cat['collapsed_link_limit'];
-                    $hiddenBookmarkCount = max(0, $bookmarkCount - $collapsedBookmarkLimit);
-                    $categoryWidth = (int)$cat['width'];
-                ?>
-
-                <!-- Header: Bookmark Category -->
-                <section style="--category-width:<?= $categoryWidth ?>px;" class="category-slot" data-category-id="<?= $cat['id'] ?>" data-collapsed-link-limit="<?= $collapsedBookmarkLimit ?>">
-                    <div class="category-card">
-                        <div class="category-card-header">
-                        <div class="category-card-heading">
-                            <span class="category-drag-handle">⋮⋮</span>
-                            <h2 class="category-heading">
-                                <button
-                                    type="button"
-                                    title="<?= htmlspecialchars($cat['name']) ?> — edit category"
-                                    class="category-title"
-                                    data-action="edit-category"
-                                    data-id="<?= $cat['id'] ?>"
-                                    data-name="<?= htmlspecialchars($cat['name']) ?>"
-                                    data-page-id="<?= $cat['page_id'] ?>"
-                                    data-width="<?= $cat['preferences']['cat_width'] ?? 3 ?>"
-                                    data-no-description="<?= $cat['no_url_description'] ?>"
-                                    data-show-favicon="<?= $cat['show_favicon'] ?>"
-                                    data-collapsed-link-limit="<?= $collapsedBookmarkLimit ?>"
-                                >
-                                    <?= htmlspecialchars($cat['name']) ?>
-                                </button>
-                            </h2>
-                        </div>
-                        <div class="category-header-actions">
-                            <button
-                                type="button"
-                                class="category-actions-btn"
-                                data-category-id="<?= $cat['id'] ?>"
-                                aria-label="Actions for <?= htmlspecialchars($cat['name']) ?>"
-                                aria-haspopup="menu"
-                                aria-expanded="false"
-                                title="Category actions"
-                            >
-                                <svg class="category-actions-icon" fill="currentColor" viewBox="0 0 24 24" aria-hidden="true">
-                                    <circle cx="5" cy="12" r="1.7"></circle>
-                                    <circle cx="12" cy="12" r="1.7"></circle>
-                                    <circle cx="19" cy="12" r="1.7"></circle>
-                                </svg>
-                            </button>
-                        </div>
-                        </div>
-
-                        <!-- Bookmark List -->
-                        <div id="category-content-<?= $cat['id'] ?>" class="section-content<?= $hiddenBookmarkCount > 0 ? ' has-expand-control' : '' ?>">
-                        <ul class="bookmark-list<?= $cat['show_favicon'] ? '' : ' no-favicons' ?>" data-category-id="<?= $cat['id'] ?>">
-                            <?php if (empty($bookmarksByCategory[$cat['id']])): ?>
-                                <li class="bookmark-empty-state">
-                                    <span>📭 No bookmarks yet</span>
-                                </li>
-                            <?php else: ?>
-                                <?php foreach ($bookmarksByCategory[$cat['id']] as $bookmarkIndex => $bm): ?>
-                                    <?php
-                                        $colorInt = isset($bm['color']) ? (int)$bm['color'] : 0;
-                                        $bgToken = bookmarkColorToken($colorInt);
-                                        $bgClass = bookmarkBgClassFromToken($bgToken);
-                                        $usageState = in_array($bm['usage_state'] ?? '', ['recent', 'fortnight', 'normal', 'stale'], true)
-                                            ? $bm['usage_state']
-                                            : 'normal';
-                                        $usageLabels = [
-                                            'recent' => 'Used within the last 3 days',
-                                            'fortnight' => 'Used within the last 14 days',
-                                            'normal' => 'Used within the last 3 months',
-                                            'stale' => empty($bm['last_clicked_at']) ? 'Never used' : 'Last used more than 3 months ago'
-                                        ];
-                                        $usageLabel = $usageLabels[$usageState];
-                                    ?>
-                                    <li class="bookmark-item<?= !empty($bm['description']) && !$cat['no_url_description'] ? ' has-description' : '' ?><?= $bookmarkIndex >= $collapsedBookmarkLimit ? ' collapsed-bookmark-hidden' : '' ?> is-not-draggable <?= $bgClass ?>"
-                                        data-id="<?= $bm['id'] ?>" 
-                                        data-title="<?= htmlspecialchars($bm['title']) ?>" 
-                                        data-url="<?= htmlspecialchars($bm['url']) ?>" 
-                                        data-description="<?= htmlspecialchars($bm['description'] ?? '') ?>"
-                                        data-category-id="<?= $bm['category_id'] ?>"
-                                        data-favicon-url="<?= htmlspecialchars($bm['favicon_url'] ?? '') ?>"
-                                        data-color="<?= $colorInt ?>"
-                                        data-usage-state="<?= $usageState ?>"
-                                        data-last-clicked-at="<?= htmlspecialchars($bm['last_clicked_at'] ?? '') ?>"
-                                        data-background-color="<?= $bgToken ?>">
-                                        <!-- Bookmark icon and desktop drag handle -->
-                                        <div class="bookmark-icon drag-handle mobile-drag-handle"<?= $cat['show_favicon'] ? '' : ' style="display:none;"' ?>>
-                                            <img src="<?= htmlspecialchars(FaviconConfig::getDisplayFaviconUrl($bm['favicon_url'] ?? '', $bm['url'] ?? '')) ?>" alt="" aria-hidden="true">
-                                        </div>
-                                        <div class="bookmark-content no-drag">
-                                            <!-- Bookmark title -->
-                                            <a href="<?= htmlspecialchars($bm['url']) ?>" target="_blank" class="bookmark-title" data-tooltip="<?= htmlspecialchars($bm['title']) ?>" data-tooltip-detail="<?= htmlspecialchars($bm['url']) ?>">
-                                                <?= htmlspecialchars($bm['title']) ?>
-                                                <!-- Bookmark description -->
-                                                <?php if (!empty($bm['description']) && !$cat['no_url_description']): ?>
-                                                    <p class="bookmark-description"><?= htmlspecialchars($bm['description']) ?></p>
-                                                <?php endif; ?>
-                                            </a>
-                                        </div>
-                                        <!-- Bookmark activity and actions -->
-                                        <div class="bookmark-activity-slot no-drag">
-                                            <button
-                                                type="button"
-                                                class="bookmark-activity-button"
-                                                data-action="bookmark-actions"
-                                                data-id="<?= $bm['id'] ?>"
-                                                data-usage-state="<?= $usageState ?>"
-                                                aria-haspopup="menu"
-                                                aria-expanded="false"
-                                                aria-label="<?= htmlspecialchars($usageLabel) ?>. Bookmark actions"
-                                                title="<?= htmlspecialchars($usageLabel) ?> — bookmark actions"
-                                            >
-                                                <span class="bookmark-recency-arc" aria-hidden="true">
-                                                    <svg viewBox="0 0 20 20">
-                                                        <circle class="bookmark-recency-track" cx="10" cy="10" r="7"></circle>
-                                                        <circle class="bookmark-recency-value" cx="10" cy="10" r="7" pathLength="100"></circle>
-                                                    </svg>
-                                                </span>
-                                            </button>
-                                        </div>
-                                    </li>
-
-                                <?php endforeach; ?>
-                            <?php endif; ?>
-                        </ul>
-                        </div>
-
-                        <?php if ($hiddenBookmarkCount > 0): ?>
-                            <div class="expand-control-footer">
-                                <button
-                                    type="button"
-                                    class="expand-indicator"
-                                    data-section-id="<?= $cat['id'] ?>"
-                                    data-hidden-count="<?= $hiddenBookmarkCount ?>"
-                                    aria-controls="category-content-<?= $cat['id'] ?>"
-                                    aria-expanded="false"
-                                    aria-label="Show <?= $hiddenBookmarkCount ?> more bookmarks in <?= htmlspecialchars($cat['name']) ?>"
-                                >
-                                    <span class="expand-indicator-label">Show <?= $hiddenBookmarkCount ?> more</span>
-                                    <svg fill="none" stroke="currentColor" viewBox="0 0 24 24" aria-hidden="true">
-                                        <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M19 9l-7 7-7-7"></path>
-                                    </svg>
-                                </button>
-                            </div>
-                        <?php endif; ?>
-
-                    </div>
-                </section>
-            <?php endforeach; ?>
+            <?php include '../includes/templates/partials/category-sections.php'; ?>
                 <button id="addCategoryCardButton" class="add-category-card-button" type="button">
                     <svg viewBox="0 0 24 24" aria-hidden="true">
                         <path d="M12 5v14M5 12h14"></path>
@@ -471,6 +317,8 @@ $isLocalEnvironment = strpos($_SERVER['HTTP_HOST'] ?? '', 'localhost') !== false
     <?php include '../includes/templates/modals/edit-bookmark-modal.php'; ?>
     <!-- Password Change Modal -->
     <?php include '../includes/templates/modals/password-change-modal.php'; ?>
+    <!-- Bookmark Import Modal -->
+    <?php include '../includes/templates/modals/bookmark-import-modal.php'; ?>
 
     <!-- Search Results Overlay -->
     <div id="searchResults" class="wp-dialog-backdrop modal-backdrop search-results-backdrop" role="dialog" aria-modal="true" aria-labelledby="searchResultsTitle" aria-hidden="true" data-dialog-dismiss="closeSearch" data-dialog-backdrop-dismiss="true">
@@ -499,7 +347,12 @@ $isLocalEnvironment = strpos($_SERVER['HTTP_HOST'] ?? '', 'localhost') !== false
     document.addEventListener("visibilitychange", function () {
       if (document.visibilityState === "visible" && !justLoaded) {
         try {
-          location.reload();
+          // Checking the page version is enough; only changed categories are replaced
+          if (window.revalidateStartpage) {
+            window.revalidateStartpage();
+          } else {
+            location.reload();
+          }
         } catch (error) {
           console.error('Failed to reload page:', error);
         }
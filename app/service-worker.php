@@ -0,0 +1,25 @@
+<?php
+/**
+ * Service worker for the dashboard's app shell (see includes/services/app-shell.php).
+ *
+ * Serves assets/js/service-worker.js with its settings prepended. Browsers compare
+ * the script byte for byte on every dashboard open, so deploying new scripts or
+ * styles installs a new worker, which precaches them and drops the old copies.
+ */
+require_once '../includes/services/app-shell.php';
+
+header('Content-Type: application/javascript; charset=utf-8');
+header('Cache-Control: no-cache');
+
+$shellConfig = [
+    'enabled' => AppShell::isEnabled(),
+    'assetVersion' => AppShell::getAssetVersion(),
+    'precache' => array_merge(AppShell::getAssetUrls(), [
+        '../public/favicon-32x32.png',
+        '../public/favicon-16x16.png'
+    ])
+];
+
+echo 'self.startpageShellConfig = ' . json_encode($shellConfig, JSON_UNESCAPED_SLASHES) . ";\n\n";
+readfile(__DIR__ . '/../assets/js/service-worker.js');
+?>
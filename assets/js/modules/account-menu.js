@@ -106,9 +106,17 @@ accountMenu?.addEventListener('click', (event) => {
     event.preventDefault();
     closeAccountMenu();
     window.openCategoryTrash?.();
+  } else if (action === 'import') {
+    event.preventDefault();
+    closeAccountMenu();
+    window.openBookmarkImportModal?.();
   } else if (action === 'about') {
     event.preventDefault();
     openAboutModal();
+  } else if (action === 'sign-out') {
+    // The next person on this browser must not find this account's bookmarks
+    window.clearStoredSearchData?.();
+    closeAccountMenu();
   } else {
     closeAccountMenu();
   }
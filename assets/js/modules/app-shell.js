@@ -0,0 +1,109 @@
+// App shell: registers the dashboard's service worker, which answers new-tab opens
+// with the last copy of this page, and keeps that copy current. After every open,
+// and whenever the tab becomes visible again, the page asks api/get-page-version.php
+// whether it is still current and patches in only the categories that changed.
+
+const SHELL_CACHE = 'startpage-shell';
+let pageRevalidation = null;
+
+function getShellState() {
+  return window.startpageShell || {};
+}
+
+// Forget the stored copy of the page and load it from the server
+async function reloadFromServer() {
+  try {
+    if ('caches' in window) await caches.delete(SHELL_CACHE);
+  } catch (error) {
+    console.error('Error clearing the stored page:', error);
+  }
+  location.reload();
+}
+
+// Compare the shown page with the server's current version; runs once at a time
+function revalidateStartpage() {
+  if (!pageRevalidation) {
+    pageRevalidation = checkPageVersion()
+      .catch(error => console.error('Error updating page:', error))
+      .finally(() => { pageRevalidation = null; });
+  }
+  return pageRevalidation;
+}
+
+async function checkPageVersion() {
+  let result;
+  try {
+    const response = await fetch('../api/get-page-version.php', {
+      headers: { Accept: 'application/json' },
+      cache: 'no-store'
+    });
+    if (response.status === 401) {
+      // Signed out since this copy was stored; the server shows the login page
+      await reloadFromServer();
+      return;
+    }
+    result = await response.json();
+    if (!result.success) throw new Error(result.message || 'Failed to check the page version');
+  } catch (error) {
+    // Offline or the server is down: keep showing the stored copy
+    console.error('Error checking page version:', error);
+    return;
+  }
+
+  const shell = getShellState();
+  // Another account's page, or scripts and styles from an older deployment
+  if (result.user_id !== shell.userId || result.assets !== shell.assets) {
+    await reloadFromServer();
+    return;
+  }
+  if (result.page.id === shell.pageId && result.page.version === shell.version) return;
+
+  const response = await fetch(`../api/get-page-content.php?page_id=${encodeURIComponent(result.page.id)}`, {
+    headers: { Accept: 'application/json' }
+  });
+  const content = await response.json();
+  if (!content.success) throw new Error(content.message || 'Failed to load page');
+
+  window.applyPageContent(content, content.page.id === shell.pageId);
+}
+
+// Warm the worker's favicon cache with this page's icons, so the next open shows
+// them without asking the server
+function precacheFavicons() {
+  const worker = navigator.serviceWorker?.controller;
+  if (!worker) return;
+
+  const urls = new Set();
+  document.querySelectorAll('#categories-container .bookmark-icon img').forEach(img => {
+    if (img.src && !img.src.startsWith('data:')) urls.add(img.src);
+  });
+  const bundle = document.getElementById('faviconBundleStylesheet');
+  if (bundle) urls.add(bundle.href);
+
+  worker.postMessage({ type: 'precache-favicons', urls: Array.from(urls) });
+}
+
+function initializeAppShell() {
+  if (!('serviceWorker' in navigator)) return;
+
+  if (!getShellState().enabled) {
+    // Switched off on the server: remove a worker installed earlier and its caches
+    navigator.serviceWorker.getRegistrations()
+      .then(registrations => Promise.all(registrations.map(registration => registration.unregister())))
+      .then(() => caches.keys())
+      .then(keys => Promise.all(keys.filter(key => key.startsWith('startpage-')).map(key => caches.delete(key))))
+      .catch(error => console.error('Error removing the service worker:', error));
+    return;
+  }
+
+  navigator.serviceWorker.register('service-worker.php')
+    .catch(error => console.error('Service worker registration failed:', error));
+  navigator.serviceWorker.ready.then(() => {
+    (window.requestIdleCallback || setTimeout)(precacheFavicons);
+  });
+}
+
+initializeAppShell();
+revalidateStartpage();
+
+window.revalidateStartpage = revalidateStartpage;
@@ -300,6 +300,11 @@ window.updateBookmarkActivity = updateBookmarkActivity;
 window.showBookmarkActionsMenu = showBookmarkActionsMenu;
 window.closeBookmarkActionsMenu = closeBookmarkActionsMenu;
 
-document.querySelectorAll('.bookmark-item').forEach((bookmark) => {
-  updateBookmarkActivity(bookmark, bookmark.dataset.usageState, bookmark.dataset.lastClickedAt);
-});
+function initializeBookmarkActivity(root = document) {
+  root.querySelectorAll('.bookmark-item').forEach((bookmark) => {
+    updateBookmarkActivity(bookmark, bookmark.dataset.usageState, bookmark.dataset.lastClickedAt);
+  });
+}
+
+initializeBookmarkActivity();
+document.addEventListener('bookmarks-rendered', (event) => initializeBookmarkActivity(event.detail?.root || document));
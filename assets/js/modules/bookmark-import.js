@@ -0,0 +1,77 @@
+// Bookmark import from a browser's HTML export or a JSON export of this start page
+const bookmarkImportModal = document.getElementById("bookmarkImportModal");
+const bookmarkImportForm = document.getElementById("bookmarkImportForm");
+const bookmarkImportCancel = document.getElementById("bookmarkImportCancel");
+const bookmarkImportSubmit = bookmarkImportForm?.querySelector('[type="submit"]');
+
+function openBookmarkImportModal() {
+  const returnFocus = document.getElementById("accountMenuButton") || document.activeElement;
+  window.showManagedDialog(
+    bookmarkImportModal,
+    document.getElementById("bookmark-import-file"),
+    returnFocus
+  );
+}
+
+function closeBookmarkImportModal(options = {}) {
+  if (bookmarkImportModal.getAttribute("aria-busy") === "true" && !options.force) return;
+  window.hideManagedDialog(bookmarkImportModal);
+  bookmarkImportModal.removeAttribute("aria-busy");
+  bookmarkImportForm.reset();
+}
+
+function describeImport(summary) {
+  const parts = [`${summary.added} bookmarks imported`];
+  if (summary.duplicates) parts.push(`${summary.duplicates} already present`);
+  if (summary.invalid) parts.push(`${summary.invalid} invalid links skipped`);
+  return parts.join(", ") + ".";
+}
+
+if (bookmarkImportCancel) {
+  bookmarkImportCancel.addEventListener("click", closeBookmarkImportModal);
+}
+
+if (bookmarkImportForm) {
+  bookmarkImportForm.addEventListener("submit", async (e) => {
+    e.preventDefault();
+
+    const fileInput = document.getElementById("bookmark-import-file");
+    if (!fileInput.files.length) return;
+
+    const formData = new FormData();
+    formData.append("file", fileInput.files[0]);
+
+    bookmarkImportModal.setAttribute("aria-busy", "true");
+    bookmarkImportSubmit.disabled = true;
+    const loadingMessageId = showFlashMessage("Importing bookmarks, please wait...", 'info');
+
+    try {
+      const response = await fetch("../api/import-bookmarks.php", {
+        method: "POST",
+        body: formData,
+      });
+      const result = await response.json();
+
+      if (result.success) {
+        updateFlashMessage(loadingMessageId, describeImport(result), 'success');
+        closeBookmarkImportModal({ force: true });
+        setTimeout(() => location.reload(), 1000);
+      } else if (result.imported?.added) {
+        // Chunks written before the error are kept
+        updateFlashMessage(loadingMessageId, `${result.message} ${describeImport(result.imported)}`, 'error');
+        closeBookmarkImportModal({ force: true });
+      } else {
+        updateFlashMessage(loadingMessageId, result.message || "Import failed", 'error');
+      }
+    } catch (error) {
+      console.error("Error importing bookmarks:", error);
+      updateFlashMessage(loadingMessageId, "Error importing bookmarks: " + error.message, 'error');
+    } finally {
+      bookmarkImportModal.removeAttribute("aria-busy");
+      bookmarkImportSubmit.disabled = false;
+    }
+  });
+}
+
+window.openBookmarkImportModal = openBookmarkImportModal;
+window.closeBookmarkImportModal = closeBookmarkImportModal;
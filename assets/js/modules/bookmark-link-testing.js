@@ -1,5 +1,10 @@
 /**
  * Shared single-bookmark checks and category-wide link test results.
+ *
+ * A category test is one request to api/test-category-links.php, which checks
+ * the links concurrently on the server and streams NDJSON events back; each
+ * row updates as its event arrives. When that endpoint cannot be reached, the
+ * links are tested one request at a time through api/test-bookmark.php.
  */
 
 const categoryLinkTestModal = document.getElementById('categoryLinkTestModal');
@@ -58,6 +63,7 @@ function applyBookmarkLinkTestResult(bookmarkElement, result) {
   if (result.favicon_refreshed) {
     const faviconImg = bookmarkElement.querySelector('.bookmark-icon img');
     if (faviconImg && bookmarkElement.dataset.faviconUrl?.startsWith('cache/')) {
+      faviconImg.classList.remove('favicon-bundled');
       faviconImg.src = `${window.formatBookmarkFaviconUrl(
         bookmarkElement.dataset.faviconUrl,
         bookmarkElement.dataset.url || ''
@@ -239,6 +245,103 @@ async function testCategoryBookmark(run, bookmarkElement) {
   }
 }
 
+function findCategoryLinkTestBookmark(run, bookmarkId) {
+  return run.bookmarks.find(bookmark => bookmark.dataset.id === String(bookmarkId));
+}
+
+function handleCategoryLinkTestEvent(run, event) {
+  if (activeCategoryLinkTest !== run || event.id === undefined) {
+    if (event.type === 'error') throw new Error(event.message || 'Link test failed');
+    return;
+  }
+
+  const bookmarkId = String(event.id);
+  const bookmarkElement = findCategoryLinkTestBookmark(run, bookmarkId);
+  let result = null;
+
+  if (event.type === 'result') {
+    result = event;
+  } else if (event.type === 'favicon') {
+    // A refreshed favicon arrives after the link's own result
+    result = { ...run.results.get(bookmarkId), ...event, type: 'result' };
+  } else if (event.type === 'skipped') {
+    result = { cancelled: true };
+  }
+  if (!result || run.results.get(bookmarkId)?.deleted) return;
+
+  if (!result.cancelled) applyBookmarkLinkTestResult(bookmarkElement, result);
+  run.results.set(bookmarkId, result);
+  renderCategoryLinkTestRow(run, bookmarkId, result);
+  updateCategoryLinkTestSummary(run);
+}
+
+async function streamCategoryLinkTest(run) {
+  const response = await fetch('../api/test-category-links.php', {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'application/x-ndjson',
+    },
+    body: JSON.stringify({
+      category_id: Number(run.categoryId),
+      ids: run.bookmarks.map(bookmark => Number(bookmark.dataset.id)),
+    }),
+    signal: run.controller.signal,
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+
+    let newline;
+    while ((newline = buffered.indexOf('\n')) !== -1) {
+      const line = buffered.slice(0, newline).trim();
+      buffered = buffered.slice(newline + 1);
+      if (!line) continue;
+      run.streamStarted = true;
+      handleCategoryLinkTestEvent(run, JSON.parse(line));
+    }
+    if (done) return;
+  }
+}
+
+async function runCategoryLinkTest(run) {
+  run.bookmarks.forEach(bookmarkElement => {
+    run.results.set(bookmarkElement.dataset.id, { testing: true });
+    renderCategoryLinkTestRow(run, bookmarkElement.dataset.id, { testing: true });
+  });
+  updateCategoryLinkTestSummary(run);
+
+  try {
+    await streamCategoryLinkTest(run);
+  } catch (error) {
+    if (error.name !== 'AbortError' && activeCategoryLinkTest === run) {
+      if (!run.streamStarted) {
+        DEBUG.log('BOOKMARK', 'Batch link test unavailable, testing links one by one:', error.message);
+        run.results.clear();
+        await runCategoryLinkTestWorkers(run);
+        return;
+      }
+
+      run.bookmarks.forEach(bookmarkElement => {
+        const bookmarkId = bookmarkElement.dataset.id;
+        if (!run.results.get(bookmarkId)?.testing) return;
+        const result = { exists: null, message: `Could not test link: ${error.message}` };
+        run.results.set(bookmarkId, result);
+        renderCategoryLinkTestRow(run, bookmarkId, result);
+      });
+    }
+  }
+
+  finishCategoryLinkTest(run);
+}
+
 async function runCategoryLinkTestWorkers(run) {
   const worker = async () => {
     while (!run.cancelled) {
@@ -252,12 +355,18 @@ async function runCategoryLinkTestWorkers(run) {
   const workerCount = Math.min(3, run.bookmarks.length);
   await Promise.all(Array.from({ length: workerCount }, () => worker()));
 
+  finishCategoryLinkTest(run);
+}
+
+function finishCategoryLinkTest(run) {
   if (activeCategoryLinkTest !== run) return;
   run.running = false;
   categoryLinkTestModal.dataset.dialogBackdropDismiss = 'true';
 
   if (run.cancelled) {
-    run.bookmarks.slice(run.nextIndex).forEach(bookmarkElement => {
+    run.bookmarks.forEach(bookmarkElement => {
+      const current = run.results.get(bookmarkElement.dataset.id);
+      if (current && !current.testing) return;
       const result = { cancelled: true };
       run.results.set(bookmarkElement.dataset.id, result);
       renderCategoryLinkTestRow(run, bookmarkElement.dataset.id, result);
@@ -287,6 +396,14 @@ function openCategoryLinkTest(categoryId, trigger = null) {
   const categorySection = document.querySelector(`section[data-category-id="${CSS.escape(String(categoryId))}"]`);
   if (!categorySection || !categoryLinkTestModal || !categoryLinkTestResults) return;
 
+  // Lazily rendered categories are tested in full
+  if (categorySection.querySelector('.bookmark-lazy-anchor')) {
+    window.loadCategoryBookmarks(categorySection)
+      .then(() => openCategoryLinkTest(categoryId, trigger))
+      .catch(() => window.showFlashMessage?.("Could not load the category's links. Please try again.", 'error'));
+    return;
+  }
+
   const bookmarks = Array.from(categorySection.querySelectorAll('.bookmark-item[data-id]'));
   if (bookmarks.length === 0) {
     window.showFlashMessage?.('This category has no links to test.', 'info');
@@ -310,6 +427,7 @@ function openCategoryLinkTest(categoryId, trigger = null) {
     retestControllers: new Set(),
     cancelled: false,
     running: true,
+    streamStarted: false,
   };
   activeCategoryLinkTest = run;
   categoryLinkTestReturnFocus = trigger || document.activeElement;
@@ -327,14 +445,14 @@ function openCategoryLinkTest(categoryId, trigger = null) {
 
   window.wpUiState.openDialog(categoryLinkTestModal);
   categoryLinkTestClose.focus();
-  runCategoryLinkTestWorkers(run);
+  runCategoryLinkTest(run);
 }
 
 async function retestCategoryBookmark(bookmarkId) {
   const run = activeCategoryLinkTest;
   if (!run || run.running) return;
 
-  const bookmarkElement = run.bookmarks.find(bookmark => bookmark.dataset.id === String(bookmarkId));
+  const bookmarkElement = findCategoryLinkTestBookmark(run, bookmarkId);
   if (!bookmarkElement?.isConnected) return;
 
   const controller = new AbortController();
@@ -13,6 +13,9 @@ document.querySelectorAll(".add-bookmark-form").forEach((form) => {
 
     const result = await response.json();
     if (result.success) {
+      if (result.favicon_pending) {
+        window.trackPendingFavicon?.(result.id);
+      }
       location.reload();
     } else {
       showFlashMessage("Failed to add bookmark: " + result.message, 'error');
@@ -200,6 +203,9 @@ quickAddForm?.addEventListener("submit", async (e) => {
 
     isDataLoaded = false;
     updateFlashMessage(loadingMessageId, "Bookmark added successfully!", 'success');
+    if (result.favicon_pending) {
+      window.trackPendingFavicon?.(result.id);
+    }
 
     setTimeout(() => {
       location.reload();
@@ -222,6 +228,14 @@ function openAllBookmarksInCategory(categoryId) {
     return;
   }
 
+  // Lazily rendered categories are opened in full
+  if (categorySection.querySelector('.bookmark-lazy-anchor')) {
+    window.loadCategoryBookmarks(categorySection)
+      .then(() => openAllBookmarksInCategory(categoryId))
+      .catch(() => window.showFlashMessage?.("Could not load the category's links. Please try again.", 'error'));
+    return;
+  }
+
   const bookmarkLinks = categorySection.querySelectorAll('a.bookmark-title[href]');
 
   if (bookmarkLinks.length > 0) {
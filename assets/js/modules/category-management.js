@@ -1,15 +1,17 @@
 // --- Click category edit pencil or title: open category modal ---
-document.querySelectorAll("[data-action='edit-category']").forEach((element) => {
-  element.addEventListener("click", () => {
-    const id = element.dataset.id;
-    const name = element.dataset.name;
-    const pageId = element.dataset.pageId;
-    const width = element.dataset.width || "3";
-    const noDescription = element.dataset.noDescription || "0";
-    const showFavicon = element.dataset.showFavicon || "1";
-    const collapsedLinkLimit = element.dataset.collapsedLinkLimit || "5";
-    openCategoryEditModal(id, name, pageId, width, noDescription, showFavicon, collapsedLinkLimit);
-  });
+// Delegated, because a page switch replaces the category sections
+document.addEventListener("click", (e) => {
+  const element = e.target.closest("[data-action='edit-category']");
+  if (!element) return;
+
+  const id = element.dataset.id;
+  const name = element.dataset.name;
+  const pageId = element.dataset.pageId;
+  const width = element.dataset.width || "3";
+  const noDescription = element.dataset.noDescription || "0";
+  const showFavicon = element.dataset.showFavicon || "1";
+  const collapsedLinkLimit = element.dataset.collapsedLinkLimit || "5";
+  openCategoryEditModal(id, name, pageId, width, noDescription, showFavicon, collapsedLinkLimit);
 });
 
 document.getElementById("addCategoryCardButton")?.addEventListener("click", () => {
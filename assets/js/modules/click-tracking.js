@@ -1,14 +1,25 @@
 /**
  * Click Tracking Module
  * Tracks clicks on bookmark links
+ *
+ * Clicks are shown immediately and sent in batches: after a short pause, when
+ * enough bookmarks are waiting, or with navigator.sendBeacon when the page is
+ * hidden or unloaded.
  */
 
+const CLICK_ENDPOINT = '../api/track-clicks.php';
+const CLICK_FLUSH_DELAY = 2000;
+const CLICK_BATCH_LIMIT = 25;
+
+const pendingClicks = new Map(); // bookmark ID -> click count
+let clickFlushTimer = null;
+
 // Track clicks on bookmarks
 function initializeClickTracking() {
   document.addEventListener('click', function(e) {
     // Find the closest anchor tag with class 'bookmark-title' or inside a bookmark item
     const link = e.target.closest('a.bookmark-title');
-    
+
     if (link) {
       // Find the parent li to get the ID
       const li = link.closest('li[data-id]');
@@ -18,39 +29,101 @@ function initializeClickTracking() {
       }
     }
   });
+
+  // Opening a bookmark often hides or unloads this page; send what is waiting
+  document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') flushClicksOnExit();
+  });
+  window.addEventListener('pagehide', flushClicksOnExit);
+}
+
+// Local time in the same format as the server's last_clicked_at values
+function formatClickTimestamp(date) {
+  const pad = value => String(value).padStart(2, '0');
+  return `${date.getFullYear()}-${pad(date.getMonth() + 1)}-${pad(date.getDate())} `
+    + `${pad(date.getHours())}:${pad(date.getMinutes())}:${pad(date.getSeconds())}`;
 }
 
 function trackClick(bookmarkId, bookmarkElement = null) {
   if (!bookmarkId) return;
-  
-  fetch('../api/track_click.php', {
+
+  const clickedAt = formatClickTimestamp(new Date());
+  pendingClicks.set(String(bookmarkId), (pendingClicks.get(String(bookmarkId)) || 0) + 1);
+
+  if (bookmarkElement) {
+    if (window.updateBookmarkActivity) {
+      window.updateBookmarkActivity(bookmarkElement, 'recent', clickedAt);
+    } else {
+      bookmarkElement.dataset.usageState = 'recent';
+      bookmarkElement.dataset.lastClickedAt = clickedAt;
+    }
+  }
+  window.recordSearchBookmarkClick?.(bookmarkId, null, clickedAt);
+
+  if (pendingClicks.size >= CLICK_BATCH_LIMIT) {
+    flushClicks();
+  } else if (!clickFlushTimer) {
+    clickFlushTimer = setTimeout(flushClicks, CLICK_FLUSH_DELAY);
+  }
+}
+
+function takePendingClicks() {
+  clearTimeout(clickFlushTimer);
+  clickFlushTimer = null;
+  const clicks = Array.from(pendingClicks, ([id, count]) => ({ id: Number(id), count }));
+  pendingClicks.clear();
+  return clicks;
+}
+
+function flushClicks() {
+  const clicks = takePendingClicks();
+  if (!clicks.length) return;
+
+  fetch(CLICK_ENDPOINT, {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json',
     },
-    body: JSON.stringify({ id: bookmarkId })
+    body: JSON.stringify({ clicks }),
+    keepalive: true
+  })
+  .then(response => {
+    // Retry later on server errors; a rejected batch (bad input, signed out) is dropped
+    if (response.status >= 500) throw new Error(`HTTP ${response.status}`);
+    return response.json();
   })
-  .then(response => response.json())
   .then(data => {
-    if (data.success && bookmarkElement) {
-      if (window.updateBookmarkActivity) {
-        window.updateBookmarkActivity(bookmarkElement, 'recent', data.last_clicked_at || '');
-      } else {
-        bookmarkElement.dataset.usageState = 'recent';
-        bookmarkElement.dataset.lastClickedAt = data.last_clicked_at || '';
-      }
-    }
-
     if (window.DEBUG && window.DEBUG.isEnabledFor('CLICK')) {
-      console.log(`[CLICK] Tracked click for bookmark ${bookmarkId}`, data);
+      console.log(`[CLICK] Tracked ${clicks.length} bookmark clicks`, data);
     }
   })
   .catch(error => {
-    console.error('Error tracking click:', error);
+    console.error('Error tracking clicks:', error);
+    clicks.forEach(({ id, count }) => {
+      pendingClicks.set(String(id), (pendingClicks.get(String(id)) || 0) + count);
+    });
+    if (!clickFlushTimer) clickFlushTimer = setTimeout(flushClicks, CLICK_FLUSH_DELAY * 5);
   });
 }
 
+function flushClicksOnExit() {
+  const clicks = takePendingClicks();
+  if (!clicks.length) return;
+
+  const body = JSON.stringify({ clicks });
+  const queued = navigator.sendBeacon?.(CLICK_ENDPOINT, new Blob([body], { type: 'application/json' }));
+  if (!queued) {
+    fetch(CLICK_ENDPOINT, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body,
+      keepalive: true
+    }).catch(() => {});
+  }
+}
+
 window.trackBookmarkClick = trackClick;
+window.flushBookmarkClicks = flushClicks;
 
 // Initialize immediately
 initializeClickTracking();
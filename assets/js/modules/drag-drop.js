@@ -151,9 +151,6 @@ function enableDragAndDrop() {
       },
       onEnd: function (evt) {
         const categoryId = evt.to.dataset.categoryId;
-        const bookmarkIds = Array.from(evt.to.querySelectorAll("li")).map(
-          (el) => el.dataset.id
-        );
         
         // Update empty states for both source and target categories
         const fromCategoryId = evt.from.dataset.categoryId;
@@ -173,14 +170,28 @@ function enableDragAndDrop() {
         // cross-category reordering.
         window.syncCategoryExpandControls?.();
         
-        // Send the reorder request to the API
-        fetch("../api/reorder.php", {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({
-            category_id: categoryId,
-            order: bookmarkIds,
-          }),
+        // The order must list every bookmark of the category, so lazily rendered
+        // lists are completed first (usually already done when the drag began)
+        Promise.resolve(window.loadAllCategoryBookmarks?.())
+        .catch(error => {
+          window.showFlashMessage?.("Could not save the new order. Reloading…", 'error');
+          setTimeout(() => location.reload(), 1500);
+          throw error;
+        })
+        .then(() => {
+          const bookmarkIds = Array.from(evt.to.querySelectorAll("li[data-id]")).map(
+            (el) => el.dataset.id
+          );
+          
+          // Send the reorder request to the API
+          return fetch("../api/reorder.php", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({
+              category_id: categoryId,
+              order: bookmarkIds,
+            }),
+          });
         })
         .then(response => response.json())
         .then(result => {
@@ -218,6 +229,15 @@ if (document.readyState === 'loading') {
 }
 
 document.addEventListener('category-columns-changed', initializeCategorySortables);
+// New bookmark items and lists (lazy loading, page switches) need draggable set up
+document.addEventListener('bookmarks-rendered', setupDragAndDrop);
+
+// Start completing lazily rendered lists as soon as a bookmark drag may begin
+document.getElementById('categories-container')?.addEventListener('pointerdown', (event) => {
+  if (categoryDragEnabled && event.target.closest('.bookmark-icon')) {
+    window.loadAllCategoryBookmarks?.().catch(error => console.error('Error loading bookmarks:', error));
+  }
+}, true);
 
 // Also try to initialize when window loads (fallback)
 window.addEventListener('load', () => {
@@ -240,7 +260,7 @@ function updateEmptyStates(categoryId) {
   if (!list) return;
   
   const bookmarkItems = list.querySelectorAll('li[data-id]'); // Only actual bookmarks, not empty state
-  const emptyStateItem = list.querySelector('li:not([data-id])'); // Empty state item
+  const emptyStateItem = list.querySelector('.bookmark-empty-state');
   
   if (bookmarkItems.length === 0) {
     // Category is empty - show empty state if not already present
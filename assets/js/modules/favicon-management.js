@@ -64,3 +64,86 @@ if (editRefreshFaviconBtn) {
     }
   });
 }
+
+// --- Icons of newly added bookmarks ---
+// add.php queues a new bookmark's icon and answers at once, so the bookmark
+// first shows a placeholder. Its ID is remembered here and the icon swapped in
+// when it has been resolved. localStorage survives the reload after an add and
+// is shared with the bookmarklet's popup window.
+const PENDING_FAVICONS_KEY = 'startpagePendingFavicons';
+const PENDING_FAVICON_TTL_MS = 2 * 60 * 1000;
+const PENDING_FAVICON_POLL_MS = 3000;
+let pendingFaviconTimer = null;
+
+function readPendingFavicons() {
+  try {
+    const now = Date.now();
+    const stored = JSON.parse(localStorage.getItem(PENDING_FAVICONS_KEY) || '{}');
+    return Object.fromEntries(
+      Object.entries(stored).filter(([, addedAt]) => now - addedAt < PENDING_FAVICON_TTL_MS)
+    );
+  } catch (error) {
+    return {};
+  }
+}
+
+function writePendingFavicons(pending) {
+  try {
+    if (Object.keys(pending).length) {
+      localStorage.setItem(PENDING_FAVICONS_KEY, JSON.stringify(pending));
+    } else {
+      localStorage.removeItem(PENDING_FAVICONS_KEY);
+    }
+  } catch (error) {
+    // Without storage the icon still appears on the next page load
+  }
+}
+
+async function pollPendingFavicons() {
+  pendingFaviconTimer = null;
+  const ids = Object.keys(readPendingFavicons());
+  if (!ids.length) {
+    writePendingFavicons({});
+    return;
+  }
+
+  try {
+    const response = await fetch(`../api/get-bookmark-favicons.php?ids=${ids.join(',')}`, { cache: 'no-store' });
+    const result = await response.json();
+    if (result.success) {
+      result.favicons.forEach(({ id, favicon_url: faviconUrl }) => {
+        const bookmark = document.querySelector(`.bookmark-item[data-id='${id}']`);
+        if (!bookmark) return;
+        bookmark.dataset.faviconUrl = window.normalizeStoredFaviconUrl(faviconUrl);
+        window.applyBookmarkFavicon(bookmark.querySelector('.bookmark-icon img'), faviconUrl, bookmark.dataset.url || '');
+      });
+
+      // Bookmarks that are resolved or gone stop being checked
+      const pending = readPendingFavicons();
+      Object.keys(pending).forEach((id) => {
+        if (ids.includes(id) && !result.pending.includes(Number(id))) {
+          delete pending[id];
+        }
+      });
+      writePendingFavicons(pending);
+    }
+  } catch (error) {
+    DEBUG.log('FAVICON', 'Checking pending favicons failed:', error);
+  }
+
+  if (Object.keys(readPendingFavicons()).length) {
+    pendingFaviconTimer = setTimeout(pollPendingFavicons, PENDING_FAVICON_POLL_MS);
+  }
+}
+
+function trackPendingFavicon(bookmarkId) {
+  const pending = readPendingFavicons();
+  pending[bookmarkId] = Date.now();
+  writePendingFavicons(pending);
+  if (!pendingFaviconTimer) {
+    pendingFaviconTimer = setTimeout(pollPendingFavicons, PENDING_FAVICON_POLL_MS);
+  }
+}
+
+window.trackPendingFavicon = trackPendingFavicon;
+pollPendingFavicons();
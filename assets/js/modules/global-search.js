@@ -4,21 +4,133 @@ let searchTimeout = null;
 let currentSearchResults = [];
 let selectedResultIndex = -1;
 let isDataLoaded = false; // Track if data has been loaded
+let searchSyncToken = null; // Token of the last applied sync; the next sync asks for changes since it
+let searchSyncPromise = null; // In-flight sync shared by concurrent callers
+
+// Snapshots are stored per user and removed on sign-out; v2 used one key for everyone
+const SEARCH_SYNC_STORAGE_PREFIX = 'startpage.searchSync.';
+const SEARCH_SYNC_STORAGE_VERSION = 'v3';
+const SEARCH_RESULT_LIMIT = 50;
+
+// Keep dashboard order: page, then category, then bookmark position
+function compareSearchBookmarks(a, b) {
+  return (a.page_sort - b.page_sort) || (a.page_id - b.page_id)
+    || (a.category_sort - b.category_sort) || (a.category_id - b.category_id)
+    || (a.sort_order - b.sort_order) || (a.id - b.id);
+}
+
+// The signed-in user's snapshot key, or null when the page does not say who that is
+function getSearchSyncStorageKey() {
+  const userId = Number(window.startpageShell?.userId);
+  return userId > 0 ? `${SEARCH_SYNC_STORAGE_PREFIX}${SEARCH_SYNC_STORAGE_VERSION}.${userId}` : null;
+}
+
+// Remove stored snapshots except keepKey; without one, all of them (sign-out)
+function clearStoredSearchData(keepKey = null) {
+  try {
+    for (let index = localStorage.length - 1; index >= 0; index--) {
+      const key = localStorage.key(index);
+      if (key && key.startsWith(SEARCH_SYNC_STORAGE_PREFIX) && key !== keepKey) {
+        localStorage.removeItem(key);
+      }
+    }
+  } catch (error) {
+    // Storage unavailable: nothing was stored either
+  }
+}
+
+function readStoredSearchSync() {
+  const storageKey = getSearchSyncStorageKey();
+  if (!storageKey) return null;
+  // Another account's bookmarks must not stay readable once someone else signs in
+  clearStoredSearchData(storageKey);
+  try {
+    const stored = JSON.parse(localStorage.getItem(storageKey) || 'null');
+    return stored && typeof stored.token === 'string' && Array.isArray(stored.bookmarks) ? stored : null;
+  } catch (error) {
+    return null;
+  }
+}
+
+function writeStoredSearchSync() {
+  const storageKey = getSearchSyncStorageKey();
+  if (!storageKey) return;
+  try {
+    localStorage.setItem(storageKey, JSON.stringify({
+      token: searchSyncToken,
+      bookmarks: allBookmarks
+    }));
+  } catch (error) {
+    // Storage full or unavailable: the next page load simply does a full sync
+    try { localStorage.removeItem(storageKey); } catch (ignored) { /* unavailable */ }
+  }
+}
+
+const searchIndex = new BookmarkSearchIndex(compareSearchBookmarks);
+
+// Merge a sync response into the bookmarks it was requested against.
+// The index is patched in place when it already holds those bookmarks.
+function applySearchSync(data, baseBookmarks, indexIsCurrent) {
+  if (data.mode !== 'delta') {
+    searchIndex.rebuild(data.bookmarks);
+    return data.bookmarks;
+  }
+
+  const bookmarksById = new Map(baseBookmarks.map(bookmark => [Number(bookmark.id), bookmark]));
+  (data.removed || []).forEach(id => bookmarksById.delete(Number(id)));
+  data.bookmarks.forEach(bookmark => bookmarksById.set(Number(bookmark.id), bookmark));
+  const bookmarks = Array.from(bookmarksById.values()).sort(compareSearchBookmarks);
+
+  if (indexIsCurrent) {
+    (data.removed || []).forEach(id => searchIndex.remove(id));
+    data.bookmarks.forEach(bookmark => searchIndex.upsert(bookmark));
+  } else {
+    searchIndex.rebuild(bookmarks);
+  }
+  return bookmarks;
+}
+
+async function fetchSearchSync() {
+  // Bookmarks stored by an earlier page load are only used once the server
+  // accepts their token, which it does for the same user only.
+  const stored = searchSyncToken ? null : readStoredSearchSync();
+  const baseToken = searchSyncToken || stored?.token || null;
+  const baseBookmarks = searchSyncToken ? allBookmarks : (stored?.bookmarks || []);
+  const url = baseToken
+    ? `../api/get-all-bookmarks.php?since=${encodeURIComponent(baseToken)}`
+    : '../api/get-all-bookmarks.php';
+
+  const response = await fetch(url);
+  const data = await response.json();
+  if (!data.success) {
+    throw new Error(data.message || 'Failed to load bookmarks');
+  }
+
+  allBookmarks = applySearchSync(data, baseBookmarks, Boolean(searchSyncToken));
+  searchSyncToken = data.sync_token;
+  isDataLoaded = true;
+  window.allBookmarks = allBookmarks;
+  window.isDataLoaded = true;
+  writeStoredSearchSync();
+  return data;
+}
+
+// Bring search data up to date: a full load the first time, only changes afterwards
+function syncSearchData() {
+  if (!searchSyncPromise) {
+    searchSyncPromise = fetchSearchSync().finally(() => {
+      searchSyncPromise = null;
+    });
+  }
+  return searchSyncPromise;
+}
 
 // Initialize search functionality (EAGER LOADING - current approach)
 async function initializeSearch() {
   try {
-    console.log('🔄 EAGER LOADING: Fetching all bookmarks on page load...');
-    const response = await fetch('../api/get-all-bookmarks.php');
-    const data = await response.json();
-    
-    if (data.success) {
-      allBookmarks = data.bookmarks;
-      isDataLoaded = true;
-      DEBUG.log(`✅ EAGER LOADING: Successfully loaded ${allBookmarks.length} bookmarks for search`);
-    } else {
-      console.error('❌ EAGER LOADING: Failed to load bookmarks for search:', data.message);
-    }
+    console.log('🔄 EAGER LOADING: Syncing bookmarks on page load...');
+    const data = await syncSearchData();
+    DEBUG.log(`✅ EAGER LOADING: ${data.mode} sync loaded ${allBookmarks.length} bookmarks for search`);
   } catch (error) {
     console.error('❌ EAGER LOADING: Error loading bookmarks for search:', error);
   }
@@ -31,17 +143,9 @@ async function loadSearchDataIfNeeded() {
   }
   
   try {
-    console.log('🔄 LAZY LOADING: Fetching all bookmarks on first search...');
-    const response = await fetch('../api/get-all-bookmarks.php');
-    const data = await response.json();
-    
-    if (data.success) {
-      allBookmarks = data.bookmarks;
-      isDataLoaded = true;
-      DEBUG.log(`✅ LAZY LOADING: Successfully loaded ${allBookmarks.length} bookmarks for search`);
-    } else {
-      console.error('❌ LAZY LOADING: Failed to load bookmarks for search:', data.message);
-    }
+    console.log('🔄 LAZY LOADING: Syncing bookmarks on first search...');
+    const data = await syncSearchData();
+    DEBUG.log(`✅ LAZY LOADING: ${data.mode} sync loaded ${allBookmarks.length} bookmarks for search`);
   } catch (error) {
     console.error('❌ LAZY LOADING: Error loading bookmarks for search:', error);
   }
@@ -54,24 +158,22 @@ function performSearch(query) {
     return;
   }
   
-  const searchTerm = query.toLowerCase();
-  const results = allBookmarks.filter(bookmark => {
-    const title = (bookmark.title || '').toLowerCase();
-    const description = (bookmark.description || '').toLowerCase();
-    const url = (bookmark.url || '').toLowerCase();
-    const category = (bookmark.category_name || '').toLowerCase();
-    const page = (bookmark.page_name || '').toLowerCase();
-    
-    return title.includes(searchTerm) || 
-           description.includes(searchTerm) || 
-           url.includes(searchTerm) ||
-           category.includes(searchTerm) ||
-           page.includes(searchTerm);
-  });
+  const { total, results } = searchIndex.search(query, SEARCH_RESULT_LIMIT);
   
   currentSearchResults = results;
   selectedResultIndex = -1;
-  displaySearchResults(results, query);
+  displaySearchResults(results, query, total);
+}
+
+// Update ranking after a bookmark is opened
+function recordSearchBookmarkClick(bookmarkId, clickCount, lastClickedAt) {
+  searchIndex.recordClick(bookmarkId, clickCount, lastClickedAt);
+}
+
+function escapeSearchHtml(value) {
+  return String(value ?? '').replace(/[&<>"']/g, character => ({
+    '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+  })[character]);
 }
 
 // Format favicon URL for display using the shared helper.
@@ -82,7 +184,7 @@ function formatFaviconUrl(faviconUrl, bookmarkUrl = '') {
 }
 
 // Display search results
-function displaySearchResults(results, query) {
+function displaySearchResults(results, query, total = results.length) {
   const container = document.getElementById('searchResultsContent');
   const overlay = document.getElementById('searchResults');
   
@@ -98,19 +200,19 @@ function displaySearchResults(results, query) {
     container.innerHTML = `
       <div class="search-results-list">
         <div class="search-results-summary">
-          Found ${results.length} result${results.length === 1 ? '' : 's'} for "${query}"
+          ${total > results.length ? `Showing the top ${results.length} of ${total} results` : `Found ${total} result${total === 1 ? '' : 's'}`} for "${escapeSearchHtml(query)}"
         </div>
         <div class="search-results-items">
           ${results.map((bookmark, index) => `
             <div class="search-result-item"
                  data-index="${index}"
                  data-bookmark-id="${bookmark.id}"
-                 data-url="${bookmark.url}">
+                 data-url="${escapeSearchHtml(bookmark.url)}">
               <div class="search-result-row">
                 <div class="search-result-icon">
                   <img src="${formatFaviconUrl(bookmark.favicon_url, bookmark.url)}" 
                        alt="" 
-                       data-bookmark-url="${bookmark.url}"
+                       data-bookmark-url="${escapeSearchHtml(bookmark.url)}"
                        class="search-result-favicon"
                        onerror="return window.handleFaviconImageError(this)">
                 </div>
@@ -118,8 +220,8 @@ function displaySearchResults(results, query) {
                   <div class="search-result-title bookmark-title">${highlightSearchTerm(bookmark.title, query)}</div>
                   ${bookmark.description ? `<div class="search-result-description">${highlightSearchTerm(bookmark.description, query)}</div>` : ''}
                   <div class="search-result-meta">
-                    <span class="search-result-chip search-result-chip--category">${bookmark.category_name}</span>
-                    <span class="search-result-chip">${bookmark.page_name}</span>
+                    <span class="search-result-chip search-result-chip--category">${escapeSearchHtml(bookmark.category_name)}</span>
+                    <span class="search-result-chip">${escapeSearchHtml(bookmark.page_name)}</span>
                   </div>
                 </div>
               </div>
@@ -143,11 +245,24 @@ function displaySearchResults(results, query) {
   });
 }
 
-// Highlight search terms in results
+// Highlight the start of every word matched by a query term
 function highlightSearchTerm(text, query) {
   if (!text) return '';
-  const regex = new RegExp(`(${query})`, 'gi');
-  return text.replace(regex, '<mark class="search-highlight">$1</mark>');
+  const terms = window.tokenizeSearchText(query)
+    .sort((a, b) => b.length - a.length)
+    .map(term => term.replace(/[.*+?^${}()|[\]\\]/g, '\\$&'));
+  if (!terms.length) return escapeSearchHtml(text);
+
+  const regex = new RegExp(`(^|[^\\p{L}\\p{N}])(${terms.join('|')})`, 'giu');
+  let html = '';
+  let lastIndex = 0;
+  for (const match of text.matchAll(regex)) {
+    const start = match.index + match[1].length;
+    html += escapeSearchHtml(text.slice(lastIndex, start));
+    html += `<mark class="search-highlight">${escapeSearchHtml(match[2])}</mark>`;
+    lastIndex = start + match[2].length;
+  }
+  return html + escapeSearchHtml(text.slice(lastIndex));
 }
 
 // Hide search results without clearing input (for short queries)
@@ -207,13 +322,13 @@ function handleSearchKeyboard(e) {
   }
 }
 
+// Mark search data stale after an edit. The bookmarks and sync token are kept,
+// so the next search only fetches what changed.
 function invalidateSearchData() {
-  allBookmarks = [];
   currentSearchResults = [];
   selectedResultIndex = -1;
   isDataLoaded = false;
   hideSearchResults();
-  window.allBookmarks = allBookmarks;
   window.isDataLoaded = false;
 }
 
@@ -258,6 +373,10 @@ if (searchInput) {
   });
   
   searchInput.addEventListener('keydown', handleSearchKeyboard);
+  // Sync and index while the user is still typing the first characters
+  searchInput.addEventListener('focus', () => {
+    loadSearchDataIfNeeded();
+  });
 }
 
 document.addEventListener('keydown', (event) => {
@@ -290,7 +409,9 @@ window.allBookmarks = allBookmarks;
 window.isDataLoaded = isDataLoaded;
 window.initializeSearch = initializeSearch;
 window.loadSearchDataIfNeeded = loadSearchDataIfNeeded;
+window.syncSearchData = syncSearchData;
 window.performSearch = performSearch;
+window.recordSearchBookmarkClick = recordSearchBookmarkClick;
 window.formatFaviconUrl = formatFaviconUrl;
 window.displaySearchResults = displaySearchResults;
 window.highlightSearchTerm = highlightSearchTerm;
@@ -299,3 +420,4 @@ window.hideSearchResults = hideSearchResults;
 window.handleSearchKeyboard = handleSearchKeyboard;
 window.updateSelectedResult = updateSelectedResult;
 window.invalidateSearchData = invalidateSearchData;
+window.clearStoredSearchData = clearStoredSearchData;
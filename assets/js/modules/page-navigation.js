@@ -85,13 +85,213 @@ function navigateToPreviousPage() {
 function navigateToPageByIndex(index) {
   if (index < 0 || index >= allPages.length) return;
   
-  const pageId = allPages[index].id;
+  switchToPage(allPages[index].id);
+}
+
+let pageSwitchController = null;
+
+// Show another page by replacing the category sections with the server's fragment.
+// Falls back to a full reload when the fragment cannot be fetched.
+async function switchToPage(pageId) {
+  pageId = String(pageId);
   
   // Set cookie for the selected page
   document.cookie = `startpage_current_page_id=${pageId}; path=/; max-age=${365 * 24 * 60 * 60}`;
   
-  // Reload the page to show the new page's content
-  window.location.reload();
+  const categoriesContainer = document.getElementById('categories-container');
+  const firstColumn = categoriesContainer?.querySelector('.category-column');
+  if (!firstColumn) {
+    window.location.reload();
+    return;
+  }
+  
+  pageSwitchController?.abort();
+  const controller = new AbortController();
+  pageSwitchController = controller;
+  categoriesContainer.setAttribute('aria-busy', 'true');
+  
+  let result;
+  try {
+    const response = await fetch(`../api/get-page-content.php?page_id=${encodeURIComponent(pageId)}`, {
+      headers: { Accept: 'application/json' },
+      signal: controller.signal
+    });
+    result = await response.json();
+    if (!result.success) throw new Error(result.message || 'Failed to load page');
+  } catch (error) {
+    if (error.name === 'AbortError') return;
+    console.error('Error switching page:', error);
+    window.location.reload();
+    return;
+  } finally {
+    if (pageSwitchController === controller) {
+      pageSwitchController = null;
+      categoriesContainer.removeAttribute('aria-busy');
+    }
+  }
+  
+  applyPageContent(result);
+}
+
+// Show a get-page-content.php result. With onlyChanged, sections whose render hash
+// matches the new markup are kept as they are and only the others are replaced.
+function applyPageContent(result, onlyChanged = false) {
+  const categoriesContainer = document.getElementById('categories-container');
+  const firstColumn = categoriesContainer?.querySelector('.category-column');
+  if (!firstColumn) return;
+  
+  const template = document.createElement('template');
+  template.innerHTML = result.html;
+  const currentSections = new Map(Array.from(
+    categoriesContainer.querySelectorAll('section[data-category-id]'),
+    section => [section.dataset.categoryId, section]
+  ));
+  const newSections = Array.from(template.content.querySelectorAll('section[data-category-id]'));
+  const sections = newSections.map(section => {
+    const current = currentSections.get(section.dataset.categoryId);
+    const keep = onlyChanged && current && current.dataset.renderHash === section.dataset.renderHash;
+    return keep ? current : section;
+  });
+  // Sections still in the template are new markup; the rest are kept from the page
+  const replaced = sections.filter(section => section.parentNode === template.content);
+  const currentOrder = Array.from(currentSections.values());
+  const unchanged = replaced.length === 0 && sections.length === currentOrder.length
+    && sections.every((section, index) => section === currentOrder[index]);
+  
+  if (!unchanged) {
+    window.closeBookmarkActionsMenu?.();
+    document.querySelectorAll('section[data-category-id] .section-content.expanded').forEach(content => {
+      window.collapseCategory?.(content.closest('section[data-category-id]'));
+    });
+    
+    // Put the sections in the new order; the columns and the add-category card stay in place
+    currentSections.forEach(section => section.remove());
+    const addCategoryCard = firstColumn.querySelector('#addCategoryCardButton');
+    sections.forEach(section => firstColumn.insertBefore(section, addCategoryCard));
+  }
+  
+  updateFaviconBundle(result.favicon_bundle);
+  updatePageList(result.pages);
+  updateCurrentPage(result.page);
+  updateQuickAddCategories(result.quick_add_categories, result.page.name);
+  // The page version app-shell.js compares against the server's
+  if (window.startpageShell && result.page.version) {
+    window.startpageShell.pageId = result.page.id;
+    window.startpageShell.version = result.page.version;
+  }
+  
+  if (!unchanged) {
+    document.dispatchEvent(new CustomEvent('categories-replaced'));
+    const root = replaced.length === 1 ? replaced[0] : categoriesContainer;
+    document.dispatchEvent(new CustomEvent('bookmarks-rendered', { detail: { root } }));
+  }
+}
+
+function updateFaviconBundle(href) {
+  let link = document.getElementById('faviconBundleStylesheet');
+  if (!href) {
+    link?.remove();
+    return;
+  }
+  if (!link) {
+    link = document.createElement('link');
+    link.id = 'faviconBundleStylesheet';
+    link.rel = 'stylesheet';
+    document.head.appendChild(link);
+  }
+  if (link.getAttribute('href') !== `../${href}`) {
+    link.href = `../${href}`;
+  }
+}
+
+// Rebuild the page menu when pages were added, removed, renamed or reordered
+function updatePageList(pages) {
+  const pageDropdownMenu = document.getElementById('pageDropdownMenu');
+  if (!pages || !pageDropdownMenu) return;
+  if (pages.length === allPages.length && pages.every((page, index) => String(page.id) === allPages[index].id && page.name === allPages[index].name)) {
+    return;
+  }
+  
+  pageDropdownMenu.replaceChildren(...pages.map(page => {
+    const option = document.createElement('button');
+    option.className = 'wp-menu__item page-option';
+    option.setAttribute('role', 'menuitem');
+    option.dataset.pageId = page.id;
+    const marker = document.createElement('span');
+    marker.className = 'page-option-marker';
+    marker.textContent = '○';
+    const name = document.createElement('span');
+    name.textContent = page.name;
+    option.append(marker, name);
+    return option;
+  }));
+  
+  // Other modules hold this array, so it is updated in place
+  allPages.splice(0, allPages.length, ...pages.map(page => ({ id: String(page.id), name: page.name })));
+}
+
+function updateCurrentPage(page) {
+  const pageEditButton = document.getElementById('pageEditButton');
+  if (pageEditButton) {
+    pageEditButton.dataset.pageId = page.id;
+    pageEditButton.dataset.pageName = page.name;
+    pageEditButton.textContent = page.name;
+  }
+  
+  document.querySelectorAll('.page-option').forEach(option => {
+    const marker = option.querySelector('.page-option-marker');
+    const isCurrent = option.dataset.pageId === String(page.id);
+    if (marker) {
+      marker.textContent = isCurrent ? '✓' : '○';
+      marker.classList.toggle('is-current', isCurrent);
+    }
+  });
+  
+  currentPageIndex = Math.max(0, allPages.findIndex(entry => entry.id === String(page.id)));
+  window.currentPageIndex = currentPageIndex;
+  updatePageCounter();
+}
+
+// Rebuild the quick add category choices: this page's categories, then other pages'
+function updateQuickAddCategories(categories, pageName) {
+  const categorySelect = document.getElementById('quick-category');
+  const otherCategorySelect = document.getElementById('quick-other-category');
+  if (!categorySelect || !categories) return;
+  
+  const createOption = (category, optionPageName) => {
+    const option = document.createElement('option');
+    option.value = category.id;
+    option.dataset.pageName = optionPageName;
+    option.textContent = category.name;
+    return option;
+  };
+  
+  categorySelect.replaceChildren(...categories.current.map(category => createOption(category, pageName)));
+  categorySelect.dataset.defaultCategoryId = categories.current[0]?.id ?? '';
+  
+  if (otherCategorySelect) {
+    const placeholder = document.createElement('option');
+    placeholder.value = '';
+    placeholder.textContent = 'Choose a category…';
+    const groups = categories.other
+      .filter(page => page.categories.length > 0)
+      .map(page => {
+        const group = document.createElement('optgroup');
+        group.label = `📄 ${page.page_name}`;
+        group.append(...page.categories.map(category => createOption(category, page.page_name)));
+        return group;
+      });
+    otherCategorySelect.replaceChildren(placeholder, ...groups);
+    
+    if (groups.length > 0) {
+      const otherPagesOption = document.createElement('option');
+      otherPagesOption.value = '__other_pages__';
+      otherPagesOption.textContent = 'Other pages…';
+      categorySelect.appendChild(otherPagesOption);
+    }
+  }
+  
+  categorySelect.value = categorySelect.dataset.defaultCategoryId || (categorySelect.options[0]?.value ?? '');
 }
 
 // Keyboard navigation
@@ -165,11 +365,9 @@ if (pageDropdown && pageDropdownMenu) {
     const pageId = pageOption.dataset.pageId;
     if (!pageId) return;
     
-    // Set cookie for the selected page
-    document.cookie = `startpage_current_page_id=${pageId}; path=/; max-age=${365 * 24 * 60 * 60}`;
-    
-    // Reload the page to show the new page's content
-    window.location.reload();
+    window.wpUiState.closeMenu(pageDropdownMenu);
+    pageDropdown.setAttribute('aria-expanded', 'false');
+    switchToPage(pageId);
   }, true); // Use capture phase to ensure this fires first
   
   // Close dropdown when clicking outside
@@ -223,3 +421,5 @@ window.updatePageCounter = updatePageCounter;
 window.navigateToNextPage = navigateToNextPage;
 window.navigateToPreviousPage = navigateToPreviousPage;
 window.navigateToPageByIndex = navigateToPageByIndex;
+window.switchToPage = switchToPage;
+window.applyPageContent = applyPageContent;
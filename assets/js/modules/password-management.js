@@ -59,6 +59,7 @@ if (passwordChangeForm) {
         showFlashMessage(result.message, 'success');
         closePasswordChangeModal({ force: true });
         // Redirect to logout to force re-login
+        window.clearStoredSearchData?.();
         window.location.href = "logout.php";
       } else {
         showFlashMessage("Error: " + result.message, 'error');
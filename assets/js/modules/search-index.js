@@ -0,0 +1,288 @@
+/**
+ * Search Index Module
+ * Tokenized prefix index over bookmarks for global search
+ *
+ * Titles, URL hosts and paths, descriptions, and category and page names are
+ * split into word tokens. Each token keeps a posting map of bookmark ID to the
+ * fields it occurs in. Tokens are bucketed by their first two characters, so
+ * a query term only scans the tokens sharing its prefix. Results are ranked
+ * by match quality plus click count and recency, and only the top K are
+ * ordered and returned.
+ */
+
+const SEARCH_FIELDS = [
+  { name: 'title', bit: 1, weight: 8 },
+  { name: 'host', bit: 2, weight: 6 },
+  { name: 'category', bit: 4, weight: 4 },
+  { name: 'page', bit: 8, weight: 3 },
+  { name: 'path', bit: 16, weight: 2 },
+  { name: 'description', bit: 32, weight: 2 }
+];
+
+const SEARCH_EXACT_TOKEN_BONUS = 1.5;
+const SEARCH_CLICK_WEIGHT = 3;
+const SEARCH_RECENCY_WEIGHT = 6;
+const SEARCH_RECENCY_DAYS = 14;
+const SEARCH_TOKEN_PATTERN = /[^\p{L}\p{N}]+/u;
+const SEARCH_ASCII_TOKEN_PATTERN = /[^a-z0-9]+/;
+const SEARCH_NON_ASCII_PATTERN = /[^\x00-\x7f]/;
+
+// Weight of the best field in each field mask, so scoring is one lookup
+const SEARCH_MASK_WEIGHTS = Array.from({ length: 1 << SEARCH_FIELDS.length }, (unused, mask) => {
+  const field = SEARCH_FIELDS.find(candidate => mask & candidate.bit);
+  return field ? field.weight : 0;
+});
+
+function tokenizeSearchText(text) {
+  if (!text) return [];
+  const lowered = String(text).toLowerCase();
+  // Most bookmark text is ASCII, which splits much faster without Unicode classes
+  const pattern = SEARCH_NON_ASCII_PATTERN.test(lowered) ? SEARCH_TOKEN_PATTERN : SEARCH_ASCII_TOKEN_PATTERN;
+  return lowered.split(pattern).filter(Boolean);
+}
+
+function splitBookmarkUrl(url) {
+  const match = /^[a-z][a-z0-9+.-]*:\/\/([^/?#]*)(.*)$/i.exec(url || '');
+  if (!match) return { host: '', path: url || '' };
+  return { host: match[1].replace(/^[^@]*@/, '').replace(/:\d+$/, ''), path: match[2] };
+}
+
+function parseSearchTimestamp(value) {
+  if (!value) return 0;
+  // MySQL DATETIME strings are parsed by hand; Date.parse is several times slower
+  const match = /^(\d{4})-(\d{2})-(\d{2})[ T](\d{2}):(\d{2}):(\d{2})/.exec(value);
+  if (match) {
+    return new Date(+match[1], match[2] - 1, +match[3], +match[4], +match[5], +match[6]).getTime();
+  }
+  const timestamp = Date.parse(value);
+  return Number.isNaN(timestamp) ? 0 : timestamp;
+}
+
+class BookmarkSearchIndex {
+  constructor(compareFallback = null) {
+    this.compareFallback = compareFallback;
+    this.scratchTokens = new Map();
+    this.clear();
+  }
+
+  clear() {
+    this.documents = new Map(); // id -> { bookmark, tokens: string[], masks: number[], usageScore }
+    this.postings = new Map(); // token -> { ids: number[], masks: number[] }
+    this.buckets = new Map(); // first two characters -> Set<token>
+  }
+
+  get size() {
+    return this.documents.size;
+  }
+
+  rebuild(bookmarks) {
+    this.clear();
+    bookmarks.forEach(bookmark => this.add(bookmark));
+  }
+
+  upsert(bookmark) {
+    this.remove(bookmark.id);
+    this.add(bookmark);
+  }
+
+  add(bookmark) {
+    const id = Number(bookmark.id);
+    const { host, path } = splitBookmarkUrl(bookmark.url);
+    const values = {
+      title: bookmark.title,
+      host,
+      category: bookmark.category_name,
+      page: bookmark.page_name,
+      path,
+      description: bookmark.description
+    };
+
+    // One scratch map is reused for every bookmark to avoid per-bookmark garbage
+    const tokens = this.scratchTokens;
+    tokens.clear();
+    for (const field of SEARCH_FIELDS) {
+      for (const token of tokenizeSearchText(values[field.name])) {
+        tokens.set(token, (tokens.get(token) || 0) | field.bit);
+      }
+    }
+
+    tokens.forEach((mask, token) => {
+      let posting = this.postings.get(token);
+      if (!posting) {
+        posting = { ids: [], masks: [] };
+        this.postings.set(token, posting);
+        const bucketKey = token.slice(0, 2);
+        let bucket = this.buckets.get(bucketKey);
+        if (!bucket) {
+          bucket = new Set();
+          this.buckets.set(bucketKey, bucket);
+        }
+        bucket.add(token);
+      }
+      posting.ids.push(id);
+      posting.masks.push(mask);
+    });
+
+    this.documents.set(id, {
+      bookmark,
+      tokens: Array.from(tokens.keys()),
+      masks: Array.from(tokens.values()),
+      usageScore: null
+    });
+  }
+
+  remove(id) {
+    const numericId = Number(id);
+    const indexed = this.documents.get(numericId);
+    if (!indexed) return;
+
+    for (const token of indexed.tokens) {
+      const posting = this.postings.get(token);
+      if (!posting) continue;
+      const position = posting.ids.indexOf(numericId);
+      if (position !== -1) {
+        posting.ids.splice(position, 1);
+        posting.masks.splice(position, 1);
+      }
+      if (posting.ids.length === 0) {
+        this.postings.delete(token);
+        const bucketKey = token.slice(0, 2);
+        const bucket = this.buckets.get(bucketKey);
+        bucket?.delete(token);
+        if (bucket && bucket.size === 0) this.buckets.delete(bucketKey);
+      }
+    }
+    this.documents.delete(numericId);
+  }
+
+  // Update ranking after a click without re-tokenizing the bookmark
+  recordClick(id, clickCount, lastClickedAt) {
+    const indexed = this.documents.get(Number(id));
+    if (!indexed) return;
+    indexed.bookmark.click_count = clickCount ?? (Number(indexed.bookmark.click_count) || 0) + 1;
+    indexed.bookmark.last_clicked_at = lastClickedAt || indexed.bookmark.last_clicked_at;
+    indexed.usageScore = null;
+  }
+
+  // Computed on first use, so building the index does not parse every timestamp
+  getUsageScore(indexed, now) {
+    if (indexed.usageScore === null) {
+      const clicks = Number(indexed.bookmark.click_count) || 0;
+      const lastClickedAt = parseSearchTimestamp(indexed.bookmark.last_clicked_at);
+      const ageDays = lastClickedAt ? Math.max(0, (now - lastClickedAt) / 86400000) : Infinity;
+      indexed.usageScore = SEARCH_CLICK_WEIGHT * Math.log1p(clicks)
+        + SEARCH_RECENCY_WEIGHT * Math.exp(-ageDays / SEARCH_RECENCY_DAYS);
+    }
+    return indexed.usageScore;
+  }
+
+  // Every token starting with the term, found through its two-character bucket
+  getMatchingTokens(term) {
+    if (term.length >= 2) {
+      const bucket = this.buckets.get(term.slice(0, 2));
+      if (!bucket) return [];
+      if (term.length === 2) return Array.from(bucket);
+      const tokens = [];
+      bucket.forEach(token => {
+        if (token.startsWith(term)) tokens.push(token);
+      });
+      return tokens;
+    }
+
+    const tokens = [];
+    this.buckets.forEach((bucket, bucketKey) => {
+      if (bucketKey.startsWith(term)) tokens.push(...bucket);
+    });
+    return tokens;
+  }
+
+  // Best score of one query term per matching bookmark, limited to the candidates
+  scoreTerm(plan, candidates) {
+    const { term, tokens, volume } = plan;
+    const scores = new Map();
+
+    // With few candidates left, checking their own tokens beats walking the postings
+    if (candidates && candidates.size * 8 < volume) {
+      candidates.forEach((candidateScore, id) => {
+        const indexed = this.documents.get(id);
+        let best = 0;
+        for (let position = 0; position < indexed.tokens.length; position++) {
+          const token = indexed.tokens[position];
+          if (!token.startsWith(term)) continue;
+          const score = SEARCH_MASK_WEIGHTS[indexed.masks[position]] * (token === term ? SEARCH_EXACT_TOKEN_BONUS : 1);
+          if (score > best) best = score;
+        }
+        if (best > 0) scores.set(id, best);
+      });
+      return scores;
+    }
+
+    for (const token of tokens) {
+      const exactBonus = token === term ? SEARCH_EXACT_TOKEN_BONUS : 1;
+      const { ids, masks } = this.postings.get(token);
+      for (let position = 0; position < ids.length; position++) {
+        const id = ids[position];
+        if (candidates && !candidates.has(id)) continue;
+        const score = SEARCH_MASK_WEIGHTS[masks[position]] * exactBonus;
+        if (score > (scores.get(id) || 0)) scores.set(id, score);
+      }
+    }
+    return scores;
+  }
+
+  /**
+   * Find bookmarks where every query term prefixes a token.
+   * Returns the total match count and the best `limit` bookmarks in rank order.
+   */
+  search(query, limit = 50) {
+    const terms = Array.from(new Set(tokenizeSearchText(query)));
+    if (!terms.length) return { total: 0, results: [], terms };
+
+    // Start with the term matching the fewest postings, so later terms only check survivors
+    const plans = terms.map(term => {
+      const tokens = this.getMatchingTokens(term);
+      let volume = 0;
+      tokens.forEach(token => { volume += this.postings.get(token).ids.length; });
+      return { term, tokens, volume };
+    }).sort((a, b) => a.volume - b.volume);
+
+    let scores = null;
+    for (const plan of plans) {
+      const termScores = this.scoreTerm(plan, scores);
+      if (scores) {
+        termScores.forEach((score, id) => termScores.set(id, score + scores.get(id)));
+      }
+      scores = termScores;
+      if (!scores.size) break;
+    }
+
+    const now = Date.now();
+    const top = [];
+    scores.forEach((matchScore, id) => {
+      const indexed = this.documents.get(id);
+      const score = matchScore + this.getUsageScore(indexed, now);
+      if (top.length === limit && this.compareEntries(score, indexed.bookmark, top[top.length - 1]) >= 0) return;
+
+      // Insert into the bounded, sorted top-K list
+      let low = 0;
+      let high = top.length;
+      while (low < high) {
+        const middle = (low + high) >> 1;
+        if (this.compareEntries(score, indexed.bookmark, top[middle]) < 0) high = middle;
+        else low = middle + 1;
+      }
+      top.splice(low, 0, { score, bookmark: indexed.bookmark });
+      if (top.length > limit) top.pop();
+    });
+
+    return { total: scores.size, results: top.map(entry => entry.bookmark), terms };
+  }
+
+  compareEntries(score, bookmark, entry) {
+    if (score !== entry.score) return entry.score - score;
+    return this.compareFallback ? this.compareFallback(bookmark, entry.bookmark) : 0;
+  }
+}
+
+window.BookmarkSearchIndex = BookmarkSearchIndex;
+window.tokenizeSearchText = tokenizeSearchText;
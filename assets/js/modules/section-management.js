@@ -57,6 +57,59 @@ function createExpandFooter(section, hiddenCount) {
   return button;
 }
 
+// In lazy mode (STARTPAGE_LAZY_BOOKMARKS) the list ends in a hidden anchor standing
+// in for the bookmarks behind "Show more" until they are fetched.
+const categoryBookmarkLoads = new WeakMap();
+
+function getPendingBookmarkCount(section) {
+  const anchor = section?.querySelector('.bookmark-lazy-anchor');
+  return anchor ? parseInt(anchor.dataset.pendingCount || '0', 10) : 0;
+}
+
+function loadCategoryBookmarks(section) {
+  const anchor = section?.querySelector('.bookmark-lazy-anchor');
+  if (!anchor) return Promise.resolve();
+  if (categoryBookmarkLoads.has(section)) return categoryBookmarkLoads.get(section);
+
+  const list = anchor.closest('ul[data-category-id]');
+  const params = new URLSearchParams({ category_id: section.dataset.categoryId });
+
+  const load = fetch(`../api/get-category-bookmarks.php?${params}`, { headers: { Accept: 'application/json' } })
+    .then(response => response.json())
+    .then(result => {
+      if (!result.success) throw new Error(result.message || 'Failed to load bookmarks');
+
+      const template = document.createElement('template');
+      template.innerHTML = result.html;
+      // Skip bookmarks already on the page: the visible ones, and any moved or
+      // edited since it was rendered
+      template.content.querySelectorAll('.bookmark-item[data-id]').forEach(item => {
+        if (document.querySelector(`li[data-id="${CSS.escape(item.dataset.id)}"]`)) item.remove();
+      });
+      list.insertBefore(template.content, anchor);
+      anchor.remove();
+
+      document.dispatchEvent(new CustomEvent('bookmarks-rendered', { detail: { root: list } }));
+      syncCategoryExpandControls();
+    })
+    .catch(error => {
+      categoryBookmarkLoads.delete(section);
+      throw error;
+    });
+
+  categoryBookmarkLoads.set(section, load);
+  return load;
+}
+
+// Drag and drop needs complete lists, so every pending category is loaded at once
+function loadAllCategoryBookmarks() {
+  return Promise.all(
+    getCategorySections()
+      .filter(section => section.querySelector('.bookmark-lazy-anchor'))
+      .map(section => loadCategoryBookmarks(section))
+  );
+}
+
 function syncCategoryExpandControls() {
   if (!categoriesContainer) return;
 
@@ -67,7 +120,7 @@ function syncCategoryExpandControls() {
     const collapsedLinkLimit = Number.isInteger(configuredLimit)
       ? Math.min(maximumCollapsedLinkLimit, Math.max(minimumCollapsedLinkLimit, configuredLimit))
       : defaultCollapsedLinkLimit;
-    const hiddenCount = Math.max(0, bookmarkItems.length - collapsedLinkLimit);
+    const hiddenCount = Math.max(0, bookmarkItems.length + getPendingBookmarkCount(section) - collapsedLinkLimit);
     let indicator = section.querySelector('.expand-indicator');
 
     section.dataset.collapsedLinkLimit = String(collapsedLinkLimit);
@@ -270,6 +323,15 @@ categoriesContainer?.addEventListener('click', event => {
 
   if (content.classList.contains('expanded')) {
     collapseCategory(section);
+  } else if (section.querySelector('.bookmark-lazy-anchor')) {
+    indicator.setAttribute('aria-busy', 'true');
+    loadCategoryBookmarks(section)
+      .then(() => expandCategory(section))
+      .catch(error => {
+        console.error('Error loading bookmarks:', error);
+        window.showFlashMessage?.('Could not load the remaining bookmarks. Please try again.', 'error');
+      })
+      .finally(() => indicator.removeAttribute('aria-busy'));
   } else {
     expandCategory(section);
   }
@@ -290,8 +352,9 @@ document.addEventListener('keydown', event => {
   if (section) collapseCategory(section, true);
 });
 
+let categoryResizeObserver = null;
 if (categoriesContainer && 'ResizeObserver' in window) {
-  const categoryResizeObserver = new ResizeObserver(entries => {
+  categoryResizeObserver = new ResizeObserver(entries => {
     const collapsedCardChanged = entries.some(entry => {
       const section = entry.target.closest('section[data-category-id]');
       return section && !section.classList.contains('overlay-expanded') && !section.querySelector('.section-content.expanded');
@@ -313,10 +376,22 @@ mobileCategoryLayout.addEventListener('change', () => {
 window.addEventListener('load', scheduleCategoryLayout);
 window.addEventListener('resize', scheduleCategoryLayout);
 
+// A page switch replaces every category section
+document.addEventListener('categories-replaced', () => {
+  getCategorySections().forEach(section => {
+    const card = section.querySelector('.category-card');
+    if (card) categoryResizeObserver?.observe(card);
+  });
+  syncCategoryExpandControls();
+  rebalanceCategoryColumns(true);
+});
+
 window.rebalanceCategoryColumns = rebalanceCategoryColumns;
 window.refreshCategoryMasonry = scheduleCategoryLayout;
 window.setCategoryLayoutFrozen = setCategoryLayoutFrozen;
 window.syncCategoryExpandControls = syncCategoryExpandControls;
 window.collapseCategory = collapseCategory;
+window.loadCategoryBookmarks = loadCategoryBookmarks;
+window.loadAllCategoryBookmarks = loadAllCategoryBookmarks;
 
 syncCategoryExpandControls();
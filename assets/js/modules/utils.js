@@ -171,6 +171,8 @@ function applyBookmarkFavicon(img, faviconUrl, bookmarkUrl = '') {
 
   img.dataset.faviconUrl = normalizeStoredFaviconUrl(faviconUrl);
   img.dataset.bookmarkUrl = bookmarkUrl || img.dataset.bookmarkUrl || '';
+  // The new icon is loaded on its own; drop the bundled one behind it
+  img.classList.remove('favicon-bundled');
   img.onerror = function () {
     return handleFaviconImageError(this);
   };
@@ -184,13 +186,19 @@ window.describeStoredFavicon = describeStoredFavicon;
 window.applyBookmarkFavicon = applyBookmarkFavicon;
 window.handleFaviconImageError = handleFaviconImageError;
 
-document.querySelectorAll(".bookmark-item[data-id]").forEach((bookmark) => {
-  const faviconImg = bookmark.querySelector(".bookmark-icon img");
-  bookmark.dataset.faviconUrl = normalizeStoredFaviconUrl(bookmark.dataset.faviconUrl || '');
-  if (faviconImg) {
-    applyBookmarkFavicon(faviconImg, bookmark.dataset.faviconUrl || '', bookmark.dataset.url || '');
-  }
-});
+function initializeBookmarkFavicons(root = document) {
+  root.querySelectorAll(".bookmark-item[data-id]").forEach((bookmark) => {
+    const faviconImg = bookmark.querySelector(".bookmark-icon img");
+    bookmark.dataset.faviconUrl = normalizeStoredFaviconUrl(bookmark.dataset.faviconUrl || '');
+    // Bundled icons are already shown by the page's favicon stylesheet
+    if (faviconImg && !faviconImg.classList.contains('favicon-bundled')) {
+      applyBookmarkFavicon(faviconImg, bookmark.dataset.faviconUrl || '', bookmark.dataset.url || '');
+    }
+  });
+}
+
+initializeBookmarkFavicons();
+document.addEventListener('bookmarks-rendered', (event) => initializeBookmarkFavicons(event.detail?.root || document));
 
 // ===== DOM UPDATE FUNCTIONS =====
 
@@ -0,0 +1,225 @@
+// Service worker for the dashboard. app/service-worker.php serves this file with
+// self.startpageShellConfig prepended.
+//
+// - Opening the dashboard is answered with the last copy of app/index.php once a
+//   short api/get-page-version.php request confirms the same user is still signed
+//   in, while a fresh copy is fetched for the next open (stale-while-revalidate).
+//   The page then checks the version again and patches in what changed.
+// - The scripts and stylesheets the page links are precached. Built bundles and
+//   favicon bundles have content-hashed names and are never asked for again;
+//   other static files and favicons are refreshed in the background.
+// - Any request other than GET, apart from click tracking and link tests, is a
+//   write, so it drops the stored page copy and the reload that follows most
+//   writes gets the server's copy.
+// - API requests are left to the browser.
+
+const shellConfig = self.startpageShellConfig || { enabled: false, assetVersion: '', precache: [] };
+const CACHE_PREFIX = 'startpage-';
+const SHELL_CACHE = 'startpage-shell';
+const ASSET_CACHE = `startpage-assets-${shellConfig.assetVersion}`;
+const FAVICON_CACHE = 'startpage-favicons';
+const MAX_FAVICON_ENTRIES = 2000;
+
+const APP_PATH = new URL('./', self.location).pathname;
+const ROOT_PATH = new URL('../', self.location).pathname;
+const SHELL_URL = new URL('index.php', self.location).href;
+const SESSION_URL = new URL('../api/get-page-version.php', self.location).href;
+const SESSION_CHECK_TIMEOUT_MS = 3000;
+const STATIC_PATHS = ['assets/', 'warm-paper/', 'public/'].map(path => ROOT_PATH + path);
+const HASHED_PATHS = ['assets/dist/', 'cache/favicon-bundles/'].map(path => ROOT_PATH + path);
+const FAVICON_PATHS = ['cache/favicons/', 'cache/favicon-bundles/'].map(path => ROOT_PATH + path);
+// POSTs that change nothing the stored page shows, or only what the version check patches
+const NON_WRITE_PATHS = ['api/track-clicks.php', 'api/track_click.php', 'api/test-bookmark.php', 'api/test-category-links.php']
+  .map(path => ROOT_PATH + path);
+
+// Incremented by every write; a page copy fetched before the write is not stored
+let shellGeneration = 0;
+
+self.addEventListener('install', (event) => {
+  event.waitUntil((async () => {
+    if (shellConfig.enabled) {
+      const cache = await caches.open(ASSET_CACHE);
+      // One missing file must not keep the new worker from installing
+      await Promise.all(shellConfig.precache.map(url => {
+        return cache.add(new URL(url, self.location)).catch(error => console.error(`Failed to precache ${url}:`, error));
+      }));
+    }
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil((async () => {
+    // The stored page links the previous assets, so a new worker starts without one
+    const keep = shellConfig.enabled ? [ASSET_CACHE, FAVICON_CACHE] : [];
+    const keys = await caches.keys();
+    await Promise.all(keys
+      .filter(key => key.startsWith(CACHE_PREFIX) && !keep.includes(key))
+      .map(key => caches.delete(key)));
+
+    if (!shellConfig.enabled) {
+      await self.registration.unregister();
+      return;
+    }
+    await self.clients.claim();
+  })());
+});
+
+self.addEventListener('fetch', (event) => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (!shellConfig.enabled || url.origin !== self.location.origin) return;
+
+  if (request.method !== 'GET') {
+    if (!NON_WRITE_PATHS.includes(url.pathname)) event.waitUntil(forgetShell());
+    return;
+  }
+
+  if (request.mode === 'navigate') {
+    if (url.search === '' && (url.pathname === APP_PATH || url.pathname === APP_PATH + 'index.php')) {
+      event.respondWith(respondWithShell(event));
+    } else if (url.pathname === APP_PATH + 'logout.php') {
+      event.waitUntil(forgetShell());
+    }
+    return;
+  }
+
+  const isFavicon = startsWithAny(url.pathname, FAVICON_PATHS);
+  const cacheName = isFavicon ? FAVICON_CACHE : ASSET_CACHE;
+  if (startsWithAny(url.pathname, HASHED_PATHS) || (startsWithAny(url.pathname, STATIC_PATHS) && url.searchParams.has('v'))) {
+    event.respondWith(cacheFirst(event, cacheName));
+  } else if (isFavicon || startsWithAny(url.pathname, STATIC_PATHS)) {
+    event.respondWith(staleWhileRevalidate(event, cacheName));
+  }
+});
+
+self.addEventListener('message', (event) => {
+  if (shellConfig.enabled && event.data?.type === 'precache-favicons') {
+    event.waitUntil(precacheFavicons(event.data.urls || []));
+  }
+});
+
+function startsWithAny(pathname, prefixes) {
+  return prefixes.some(prefix => pathname.startsWith(prefix));
+}
+
+function forgetShell() {
+  shellGeneration++;
+  return caches.open(SHELL_CACHE).then(cache => cache.delete(SHELL_URL));
+}
+
+async function respondWithShell(event) {
+  const cache = await caches.open(SHELL_CACHE);
+  let cached = await cache.match(SHELL_URL);
+  const fromNetwork = fetchShell(event, cache);
+
+  // A reload asks for the server's copy; the stored one is then only the offline fallback
+  const wantsFresh = event.request.cache === 'reload' || event.request.cache === 'no-cache';
+  if (cached && !wantsFresh) {
+    // Another user, or nobody after a session expired, must never see the stored page
+    const session = await checkShellSession(cached);
+    if (session === 'valid') {
+      event.waitUntil(fromNetwork.catch(() => {}));
+      return cached;
+    }
+    if (session === 'signed-out') {
+      await forgetShell();
+      cached = null;
+    }
+  }
+
+  try {
+    return await fromNetwork;
+  } catch (error) {
+    if (cached) return cached;
+    throw error;
+  }
+}
+
+// 'valid' when the stored copy was rendered for the signed-in user, 'signed-out' when
+// nobody or someone else is signed in, 'unknown' when the server cannot be reached
+async function checkShellSession(cached) {
+  const controller = new AbortController();
+  const timer = setTimeout(() => controller.abort(), SESSION_CHECK_TIMEOUT_MS);
+  try {
+    const response = await fetch(SESSION_URL, {
+      headers: { Accept: 'application/json' },
+      cache: 'no-store',
+      signal: controller.signal
+    });
+    if (response.status === 401 || response.status === 403) return 'signed-out';
+    if (!response.ok) return 'unknown';
+
+    const result = await response.json();
+    return result.success && String(result.user_id) === cached.headers.get('X-Startpage-User') ? 'valid' : 'signed-out';
+  } catch (error) {
+    return 'unknown';
+  } finally {
+    clearTimeout(timer);
+  }
+}
+
+async function fetchShell(event, cache) {
+  const generation = shellGeneration;
+  const response = await fetch(event.request);
+
+  if (response.status === 200 && response.type === 'basic') {
+    if (generation === shellGeneration) {
+      event.waitUntil(cache.put(SHELL_URL, response.clone()));
+    }
+  } else if (response.type === 'opaqueredirect' || response.status === 401 || response.status === 403) {
+    // Signed out: the login redirect must not be answered with the old page again
+    event.waitUntil(cache.delete(SHELL_URL));
+  }
+  return response;
+}
+
+async function cacheFirst(event, cacheName) {
+  const cache = await caches.open(cacheName);
+  const cached = await cache.match(event.request);
+  if (cached) return cached;
+
+  const response = await fetch(event.request);
+  if (response.ok) {
+    event.waitUntil(cache.put(event.request, response.clone()));
+  }
+  return response;
+}
+
+async function staleWhileRevalidate(event, cacheName) {
+  const cache = await caches.open(cacheName);
+  const cached = await cache.match(event.request);
+  const fromNetwork = fetch(event.request).then(response => {
+    if (response.ok) {
+      event.waitUntil(cache.put(event.request, response.clone()));
+    }
+    return response;
+  });
+
+  if (cached) {
+    event.waitUntil(fromNetwork.catch(() => {}));
+    return cached;
+  }
+  return fromNetwork;
+}
+
+// Store the favicons a page shows, including those the browser has not requested yet
+async function precacheFavicons(urls) {
+  const cache = await caches.open(FAVICON_CACHE);
+  for (const url of urls) {
+    const faviconUrl = new URL(url, self.location);
+    if (faviconUrl.origin !== self.location.origin || !startsWithAny(faviconUrl.pathname, FAVICON_PATHS)) continue;
+    if (await cache.match(faviconUrl)) continue;
+
+    try {
+      const response = await fetch(faviconUrl);
+      if (response.ok) await cache.put(faviconUrl, response);
+    } catch (error) {
+      console.error(`Failed to precache ${faviconUrl.pathname}:`, error);
+    }
+  }
+
+  // Keys come back in insertion order, so the oldest icons go first
+  const keys = await cache.keys();
+  await Promise.all(keys.slice(0, Math.max(0, keys.length - MAX_FAVICON_ENTRIES)).map(key => cache.delete(key)));
+}
@@ -20,7 +20,6 @@ CREATE TABLE remember_tokens (
     expires_at DATETIME NOT NULL,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-    INDEX (token),
     INDEX (expires_at)
 );
 
@@ -28,5 +27,4 @@ CREATE TABLE remember_tokens (
 INSERT INTO users (username, password_hash) VALUES 
 ('admin', '$2y$10$B5IrFflIRCRVO6EMo/XT9OBouo/p5Huy4HhhO1jGuhw5QUriv.3QS');
 
--- Clean up expired tokens (run this periodically)
--- DELETE FROM remember_tokens WHERE expires_at < NOW(); 
\ No newline at end of file
+-- Expired tokens are removed by tools/maintenance.php; run it periodically from cron
\ No newline at end of file
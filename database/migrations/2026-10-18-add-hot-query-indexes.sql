@@ -0,0 +1,20 @@
+-- Composite indexes for the hottest statements, checked by perf/query_plans.py.
+--
+-- A category's bookmarks in sort order: the LEFT JOIN of the dashboard page query,
+-- the ROW_NUMBER() renumbering in api/reorder.php, and MAX(sort_order) when a
+-- bookmark is added, which the index answers without reading rows. InnoDB appends
+-- the primary key, so the index also matches ORDER BY sort_order, id.
+CREATE INDEX IF NOT EXISTS idx_bookmarks_user_category_sort
+    ON bookmarks (user_id, category_id, sort_order);
+
+-- A user's pages in menu order without a filesort: the page menu, the first page
+-- after a delete, and MAX(sort_order) when a page is added.
+CREATE INDEX IF NOT EXISTS idx_pages_user_sort
+    ON pages (user_id, sort_order);
+
+-- These are prefixes of the indexes above or of other user_id-first indexes, so they
+-- only cost writes. The user foreign keys use the longer indexes instead.
+DROP INDEX IF EXISTS idx_bookmarks_user_category ON bookmarks;
+DROP INDEX IF EXISTS idx_bookmarks_user ON bookmarks;
+DROP INDEX IF EXISTS idx_pages_user ON pages;
+DROP INDEX IF EXISTS idx_categories_user ON categories;
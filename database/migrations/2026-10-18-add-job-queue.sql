@@ -0,0 +1,34 @@
+-- Persistent background job queue.
+-- A batch groups the jobs of one run (for example a favicon refresh) so its
+-- progress can be reported; jobs are claimed with a lease, so work held by a
+-- worker that crashed is picked up again once the lease expires.
+CREATE TABLE IF NOT EXISTS job_batches (
+    id INT NOT NULL AUTO_INCREMENT,
+    type VARCHAR(50) NOT NULL,
+    total_jobs INT NOT NULL DEFAULT 0,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at DATETIME DEFAULT NULL,
+    PRIMARY KEY (id),
+    KEY idx_job_batches_type_finished (type, finished_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id INT NOT NULL AUTO_INCREMENT,
+    batch_id INT NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    dedupe_key VARCHAR(191) NOT NULL,
+    payload MEDIUMTEXT NOT NULL,
+    status ENUM('pending', 'running', 'done', 'failed') NOT NULL DEFAULT 'pending',
+    attempts TINYINT UNSIGNED NOT NULL DEFAULT 0,
+    locked_by VARCHAR(64) DEFAULT NULL,
+    locked_until DATETIME DEFAULT NULL,
+    result TEXT DEFAULT NULL,
+    error VARCHAR(255) DEFAULT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (id),
+    UNIQUE KEY uniq_jobs_batch_dedupe (batch_id, dedupe_key),
+    KEY idx_jobs_type_status (type, status, id),
+    KEY idx_jobs_batch_status (batch_id, status),
+    KEY idx_jobs_locked_by (locked_by),
+    CONSTRAINT fk_jobs_batch FOREIGN KEY (batch_id) REFERENCES job_batches (id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
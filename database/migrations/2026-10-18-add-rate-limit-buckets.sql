@@ -0,0 +1,15 @@
+-- Store registration rate limits as token buckets.
+-- RateLimiter keeps one row per action and IP address holding the time, in
+-- milliseconds, at which its bucket is full again; one upsert checks and takes
+-- an attempt. tools/maintenance.php deletes rows that are already full.
+-- Installations with APCu keep buckets in memory and leave this table empty.
+CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+    action VARCHAR(50) NOT NULL,
+    ip_address VARCHAR(45) NOT NULL,
+    full_at_ms BIGINT NOT NULL,
+    PRIMARY KEY (action, ip_address),
+    KEY idx_rate_limit_buckets_full_at (full_at_ms)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- The previous limiter created this table at runtime; its counters only cover the last hour.
+DROP TABLE IF EXISTS rate_limits;
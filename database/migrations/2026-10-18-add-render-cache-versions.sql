@@ -0,0 +1,10 @@
+-- Store the index render cache version counters in the database.
+-- IndexRenderCache keeps its entries in APCu or in private files, which
+-- command-line tools cannot reach. The counters live here instead, so an
+-- invalidation from a tool or a worker reaches the web server's entries too.
+-- Scope "all" is the global epoch; "user:<id>" is one user's counter.
+CREATE TABLE IF NOT EXISTS render_cache_versions (
+    scope VARCHAR(32) NOT NULL,
+    version BIGINT NOT NULL,
+    PRIMARY KEY (scope)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
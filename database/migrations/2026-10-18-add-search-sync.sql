@@ -0,0 +1,19 @@
+-- Support incremental global-search sync.
+-- Category changes (rename, move, trash, restore) must be visible to delta
+-- queries, so categories get the same updated_at column as bookmarks and pages.
+ALTER TABLE categories
+    ADD COLUMN IF NOT EXISTS updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    AFTER deleted_at;
+
+CREATE INDEX IF NOT EXISTS idx_bookmarks_user_updated
+    ON bookmarks (user_id, updated_at);
+
+-- Deleted bookmarks leave a tombstone so clients holding a sync token can drop them.
+CREATE TABLE IF NOT EXISTS bookmark_tombstones (
+    bookmark_id INT NOT NULL,
+    user_id INT NOT NULL,
+    deleted_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (bookmark_id),
+    KEY idx_bookmark_tombstones_user_deleted (user_id, deleted_at),
+    CONSTRAINT fk_bookmark_tombstones_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,10 @@
+-- Store remember-me tokens as SHA-256 hashes.
+-- The cookie keeps the raw token; the application hashes it before every
+-- lookup, so existing logins keep working once their rows are converted.
+-- Converted rows carry a "sha256:" prefix, which makes this safe to re-run.
+UPDATE remember_tokens
+    SET token = CONCAT('sha256:', SHA2(token, 256))
+    WHERE token NOT LIKE 'sha256:%';
+
+-- Lookups go through the unique `token` index; this duplicate only slowed writes.
+DROP INDEX IF EXISTS token_2 ON remember_tokens;
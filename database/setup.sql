@@ -39,6 +39,18 @@ CREATE TABLE `bookmarks` (
 
 -- --------------------------------------------------------
 
+--
+-- Table structure for table `bookmark_tombstones`
+--
+
+CREATE TABLE `bookmark_tombstones` (
+  `bookmark_id` int(11) NOT NULL,
+  `user_id` int(11) NOT NULL,
+  `deleted_at` datetime NOT NULL DEFAULT current_timestamp()
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- --------------------------------------------------------
+
 --
 -- Table structure for table `categories`
 --
@@ -50,11 +62,47 @@ CREATE TABLE `categories` (
   `sort_order` int(11) NOT NULL DEFAULT 0,
   `preferences` varchar(200) NOT NULL DEFAULT '{"cat_width": 3, "no_descr": 0, "show_fav": 1, "collapsed_link_limit": 5}',
   `deleted_at` datetime DEFAULT NULL,
+  `updated_at` datetime DEFAULT current_timestamp() ON UPDATE current_timestamp(),
   `user_id` int(11) NOT NULL DEFAULT 1
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- --------------------------------------------------------
 
+--
+-- Table structure for table `jobs`
+--
+
+CREATE TABLE `jobs` (
+  `id` int(11) NOT NULL,
+  `batch_id` int(11) NOT NULL,
+  `type` varchar(50) NOT NULL,
+  `dedupe_key` varchar(191) NOT NULL,
+  `payload` mediumtext NOT NULL,
+  `status` enum('pending','running','done','failed') NOT NULL DEFAULT 'pending',
+  `attempts` tinyint(3) UNSIGNED NOT NULL DEFAULT 0,
+  `locked_by` varchar(64) DEFAULT NULL,
+  `locked_until` datetime DEFAULT NULL,
+  `result` text DEFAULT NULL,
+  `error` varchar(255) DEFAULT NULL,
+  `updated_at` datetime DEFAULT current_timestamp() ON UPDATE current_timestamp()
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `job_batches`
+--
+
+CREATE TABLE `job_batches` (
+  `id` int(11) NOT NULL,
+  `type` varchar(50) NOT NULL,
+  `total_jobs` int(11) NOT NULL DEFAULT 0,
+  `created_at` datetime NOT NULL DEFAULT current_timestamp(),
+  `finished_at` datetime DEFAULT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- --------------------------------------------------------
+
 --
 -- Table structure for table `pages`
 --
@@ -70,6 +118,29 @@ CREATE TABLE `pages` (
 
 -- --------------------------------------------------------
 
+--
+-- Table structure for table `rate_limit_buckets`
+--
+
+CREATE TABLE `rate_limit_buckets` (
+  `action` varchar(50) NOT NULL,
+  `ip_address` varchar(45) NOT NULL,
+  `full_at_ms` bigint(20) NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `render_cache_versions`
+--
+
+CREATE TABLE `render_cache_versions` (
+  `scope` varchar(32) NOT NULL,
+  `version` bigint(20) NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- --------------------------------------------------------
+
 --
 -- Table structure for table `remember_tokens`
 --
@@ -108,25 +179,61 @@ CREATE TABLE `users` (
 ALTER TABLE `bookmarks`
   ADD PRIMARY KEY (`id`),
   ADD KEY `category_id` (`category_id`),
-  ADD KEY `idx_bookmarks_user` (`user_id`),
-  ADD KEY `idx_bookmarks_user_category` (`user_id`,`category_id`),
-  ADD KEY `idx_bookmarks_last_clicked_at` (`last_clicked_at`);
+  ADD KEY `idx_bookmarks_user_category_sort` (`user_id`,`category_id`,`sort_order`),
+  ADD KEY `idx_bookmarks_last_clicked_at` (`last_clicked_at`),
+  ADD KEY `idx_bookmarks_user_updated` (`user_id`,`updated_at`);
+
+--
+-- Indexes for table `bookmark_tombstones`
+--
+ALTER TABLE `bookmark_tombstones`
+  ADD PRIMARY KEY (`bookmark_id`),
+  ADD KEY `idx_bookmark_tombstones_user_deleted` (`user_id`,`deleted_at`);
 
 --
 -- Indexes for table `categories`
 --
 ALTER TABLE `categories`
   ADD PRIMARY KEY (`id`),
-  ADD KEY `idx_categories_user` (`user_id`),
   ADD KEY `idx_categories_user_page` (`user_id`,`page_id`),
   ADD KEY `idx_categories_user_deleted_page` (`user_id`,`deleted_at`,`page_id`,`sort_order`);
 
+--
+-- Indexes for table `jobs`
+--
+ALTER TABLE `jobs`
+  ADD PRIMARY KEY (`id`),
+  ADD UNIQUE KEY `uniq_jobs_batch_dedupe` (`batch_id`,`dedupe_key`),
+  ADD KEY `idx_jobs_type_status` (`type`,`status`,`id`),
+  ADD KEY `idx_jobs_batch_status` (`batch_id`,`status`),
+  ADD KEY `idx_jobs_locked_by` (`locked_by`);
+
+--
+-- Indexes for table `job_batches`
+--
+ALTER TABLE `job_batches`
+  ADD PRIMARY KEY (`id`),
+  ADD KEY `idx_job_batches_type_finished` (`type`,`finished_at`);
+
 --
 -- Indexes for table `pages`
 --
 ALTER TABLE `pages`
   ADD PRIMARY KEY (`id`),
-  ADD KEY `idx_pages_user` (`user_id`);
+  ADD KEY `idx_pages_user_sort` (`user_id`,`sort_order`);
+
+--
+-- Indexes for table `rate_limit_buckets`
+--
+ALTER TABLE `rate_limit_buckets`
+  ADD PRIMARY KEY (`action`,`ip_address`),
+  ADD KEY `idx_rate_limit_buckets_full_at` (`full_at_ms`);
+
+--
+-- Indexes for table `render_cache_versions`
+--
+ALTER TABLE `render_cache_versions`
+  ADD PRIMARY KEY (`scope`);
 
 --
 -- Indexes for table `remember_tokens`
@@ -135,7 +242,6 @@ ALTER TABLE `remember_tokens`
   ADD PRIMARY KEY (`id`),
   ADD UNIQUE KEY `token` (`token`),
   ADD KEY `user_id` (`user_id`),
-  ADD KEY `token_2` (`token`),
   ADD KEY `expires_at` (`expires_at`);
 
 --
@@ -161,6 +267,18 @@ ALTER TABLE `bookmarks`
 ALTER TABLE `categories`
   MODIFY `id` int(11) NOT NULL AUTO_INCREMENT;
 
+--
+-- AUTO_INCREMENT for table `jobs`
+--
+ALTER TABLE `jobs`
+  MODIFY `id` int(11) NOT NULL AUTO_INCREMENT;
+
+--
+-- AUTO_INCREMENT for table `job_batches`
+--
+ALTER TABLE `job_batches`
+  MODIFY `id` int(11) NOT NULL AUTO_INCREMENT;
+
 --
 -- AUTO_INCREMENT for table `pages`
 --
@@ -190,12 +308,24 @@ ALTER TABLE `bookmarks`
   ADD CONSTRAINT `bookmarks_ibfk_1` FOREIGN KEY (`category_id`) REFERENCES `categories` (`id`) ON DELETE SET NULL,
   ADD CONSTRAINT `fk_bookmarks_user` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE;
 
+--
+-- Constraints for table `bookmark_tombstones`
+--
+ALTER TABLE `bookmark_tombstones`
+  ADD CONSTRAINT `fk_bookmark_tombstones_user` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE;
+
 --
 -- Constraints for table `categories`
 --
 ALTER TABLE `categories`
   ADD CONSTRAINT `fk_categories_user` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE;
 
+--
+-- Constraints for table `jobs`
+--
+ALTER TABLE `jobs`
+  ADD CONSTRAINT `fk_jobs_batch` FOREIGN KEY (`batch_id`) REFERENCES `job_batches` (`id`) ON DELETE CASCADE;
+
 --
 -- Constraints for table `pages`
 --
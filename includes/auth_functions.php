@@ -22,6 +22,15 @@ function generateSecureToken($length = 64) {
     return bin2hex(random_bytes($length / 2));
 }
 
+/**
+ * Hash a remember me token for storage and lookup
+ * Only the hash is kept in the database; the cookie holds the token itself.
+ * The prefix tells hashed rows apart from tokens stored before hashing was added.
+ */
+function hashRememberToken($token) {
+    return 'sha256:' . hash('sha256', (string)$token);
+}
+
 /**
  * Create a remember me token for a user
  * Limits to maximum 10 tokens per user (keeps 9 most recent + new one)
@@ -37,7 +46,7 @@ function createRememberToken($pdo, $userId) {
         INSERT INTO remember_tokens (user_id, token, user_agent, ip_address, expires_at) 
         VALUES (?, ?, ?, ?, ?)
     ");
-    $stmt->execute([$userId, $token, $userAgent, $ipAddress, $expiresAt]);
+    $stmt->execute([$userId, hashRememberToken($token), $userAgent, $ipAddress, $expiresAt]);
     
     // Keep only the 10 most recent tokens (9 most recent + the new one we just inserted)
     // Delete all tokens for this user that are not in the top 10 most recent
@@ -83,18 +92,21 @@ function truncateUserAgent($userAgent, $maxLength = 200) {
 
 /**
  * Validate a remember me token
+ * Expired rows are skipped here and removed by pruneExpiredRememberTokens()
  */
 function validateRememberToken($pdo, $token) {
-    // Clean up expired tokens first
-    $pdo->prepare("DELETE FROM remember_tokens WHERE expires_at < NOW()")->execute();
+    // Tokens are always 64 hex characters; anything else cannot match
+    if (!is_string($token) || !preg_match('/^[0-9a-f]{64}$/', $token)) {
+        return false;
+    }
     
     $stmt = $pdo->prepare("
         SELECT u.id, u.username 
-        FROM users u 
-        JOIN remember_tokens rt ON u.id = rt.user_id 
+        FROM remember_tokens rt 
+        JOIN users u ON u.id = rt.user_id 
         WHERE rt.token = ? AND rt.expires_at > NOW()
     ");
-    $stmt->execute([$token]);
+    $stmt->execute([hashRememberToken($token)]);
     $result = $stmt->fetch(PDO::FETCH_ASSOC);
     
     return $result;
@@ -105,7 +117,22 @@ function validateRememberToken($pdo, $token) {
  */
 function deleteRememberToken($pdo, $token) {
     $stmt = $pdo->prepare("DELETE FROM remember_tokens WHERE token = ?");
-    $stmt->execute([$token]);
+    $stmt->execute([hashRememberToken($token)]);
+}
+
+/**
+ * Delete expired remember me tokens
+ * Runs from tools/maintenance.php, in small batches so logins are never blocked for long
+ */
+function pruneExpiredRememberTokens($pdo, $batchSize = 1000) {
+    $stmt = $pdo->prepare("DELETE FROM remember_tokens WHERE expires_at < NOW() LIMIT " . max(1, (int)$batchSize));
+    $deleted = 0;
+    do {
+        $stmt->execute();
+        $deleted += $stmt->rowCount();
+    } while ($stmt->rowCount() >= $batchSize);
+    
+    return $deleted;
 }
 
 /**
@@ -121,7 +148,7 @@ function deleteAllUserTokens($pdo, $userId) {
  */
 function getUserDevices($pdo, $userId) {
     $stmt = $pdo->prepare("
-        SELECT id, token, user_agent, ip_address, created_at, expires_at 
+        SELECT id, user_agent, ip_address, created_at, expires_at 
         FROM remember_tokens 
         WHERE user_id = ? AND expires_at > NOW()
         ORDER BY created_at DESC
@@ -181,8 +208,12 @@ function deleteRememberCookie() {
  * Check if user is authenticated
  */
 function isAuthenticated($pdo) {
-    // First check remember me cookie (even if session exists, to refresh session)
-    // This ensures remember me tokens can recreate sessions even if PHP session expired
+    // A live session is trusted without touching the database
+    if (isset($_SESSION['user_id'])) {
+        return true;
+    }
+    
+    // Without one, a remember me token recreates the session (e.g. after the PHP session expired)
     if (isset($_COOKIE['startpage_remember_token'])) {
         try {
             $user = validateRememberToken($pdo, $_COOKIE['startpage_remember_token']);
@@ -211,11 +242,6 @@ function isAuthenticated($pdo) {
         }
     }
     
-    // Check if user has active session
-    if (isset($_SESSION['user_id'])) {
-        return true;
-    }
-    
     return false;
 }
 
@@ -1,4 +1,6 @@
 <?php
+require_once __DIR__ . '/services/profiled-pdo.php';
+
 $host = 'localhost';
 $db   = 'startpage';
 $user = 'root';
@@ -11,10 +13,13 @@ $options = [
     PDO::ATTR_ERRMODE            => PDO::ERRMODE_EXCEPTION,  // throw exceptions on errors
     PDO::ATTR_DEFAULT_FETCH_MODE => PDO::FETCH_ASSOC,        // return results as associative arrays
     PDO::ATTR_EMULATE_PREPARES   => false,                   // use real prepared statements
+    // STARTPAGE_DB_PERSISTENT=1 reuses the PHP worker's connection across requests
+    PDO::ATTR_PERSISTENT         => in_array(strtolower(trim((string)getenv('STARTPAGE_DB_PERSISTENT'))), ['1', 'on', 'true'], true),
 ];
 
 try {
-    $pdo = new PDO($dsn, $user, $pass, $options);
+    // Statement counts and timings; see includes/services/query-profiler.php for reporting
+    $pdo = new ProfiledPDO($dsn, $user, $pass, $options, QueryProfiler::fromEnvironment());
 } catch (\PDOException $e) {
     echo "Database connection failed: " . $e->getMessage();
     exit;
@@ -0,0 +1,133 @@
+<?php
+/**
+ * Favicon Bundle
+ * Packs a page's cached favicons into one stylesheet of data URIs.
+ *
+ * app/index.php links the stylesheet and gives each bundled icon's <img> a
+ * class from it, so a page loads one file instead of one request per
+ * bookmark. Stylesheets are named after the files they contain, so an
+ * unchanged icon set reuses the same URL and stays in the browser cache.
+ * Icons too large to inline keep loading as individual files.
+ */
+
+class FaviconBundle {
+    // Transparent 1x1 GIF shown by bundled <img> elements; the icon is their background
+    public const PLACEHOLDER_SRC = 'data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7';
+    private const BUNDLE_PATH = 'cache/favicon-bundles/';
+    private const MAX_ICON_BYTES = 8192;
+    private const MAX_BUNDLE_BYTES = 393216;
+    private const MIME_TYPES = [
+        'ico' => 'image/x-icon',
+        'png' => 'image/png',
+        'jpg' => 'image/jpeg',
+        'jpeg' => 'image/jpeg',
+        'gif' => 'image/gif',
+        'svg' => 'image/svg+xml',
+        'webp' => 'image/webp',
+    ];
+
+    private $rootDir;
+
+    public function __construct() {
+        $this->rootDir = dirname(__DIR__, 2) . '/';
+    }
+
+    /**
+     * Bundle cached favicon paths (cache/favicons/...). Returns the stylesheet path, or ''
+     * when nothing was bundled, and the class assigned to each bundled path.
+     */
+    public function build(array $faviconPaths) {
+        $icons = [];
+        $bundleBytes = 0;
+        $faviconPaths = array_unique($faviconPaths);
+        sort($faviconPaths);
+        foreach ($faviconPaths as $path) {
+            $extension = strtolower(pathinfo($path, PATHINFO_EXTENSION));
+            if (strpos($path, 'cache/favicons/') !== 0 || !isset(self::MIME_TYPES[$extension])) {
+                continue;
+            }
+
+            $file = $this->rootDir . $path;
+            $size = @filesize($file);
+            if (!$size || $size > self::MAX_ICON_BYTES) {
+                continue;
+            }
+
+            // Base64 grows each icon by a third
+            $bundleBytes += (int)ceil($size / 3) * 4;
+            if ($bundleBytes > self::MAX_BUNDLE_BYTES) {
+                break;
+            }
+
+            $icons[$path] = [
+                'file' => $file,
+                'mime' => self::MIME_TYPES[$extension],
+                'fingerprint' => $path . ':' . $size . ':' . filemtime($file),
+                'class' => 'fi-' . substr(sha1($path), 0, 10),
+            ];
+        }
+
+        if (!$icons) {
+            return ['href' => '', 'classes' => []];
+        }
+
+        $version = substr(sha1(implode("\n", array_column($icons, 'fingerprint'))), 0, 16);
+        $href = self::BUNDLE_PATH . 'icons-' . $version . '.css';
+        $target = $this->rootDir . $href;
+
+        if (is_file($target)) {
+            // Still in use; keeps pruneUnused() away from it
+            @touch($target);
+        } elseif (!$this->writeStylesheet($target, $icons)) {
+            return ['href' => '', 'classes' => []];
+        }
+
+        return [
+            'href' => $href,
+            'classes' => array_map(function ($icon) {
+                return $icon['class'];
+            }, $icons),
+        ];
+    }
+
+    /**
+     * Delete stylesheets no page has used for $maxAgeSeconds. Returns the number deleted.
+     */
+    public function pruneUnused($maxAgeSeconds = 86400 * 30) {
+        $deleted = 0;
+        foreach (glob($this->rootDir . self::BUNDLE_PATH . 'icons-*.css') ?: [] as $file) {
+            if (time() - filemtime($file) > $maxAgeSeconds && @unlink($file)) {
+                $deleted++;
+            }
+        }
+
+        return $deleted;
+    }
+
+    private function writeStylesheet($target, array $icons) {
+        $css = '';
+        foreach ($icons as $icon) {
+            $body = @file_get_contents($icon['file']);
+            if ($body === false) {
+                // A missing rule would leave the icon blank, so fall back to plain files this time
+                return false;
+            }
+            $css .= '.favicon-bundled.' . $icon['class'] . '{background-image:url("data:' . $icon['mime'] . ';base64,' . base64_encode($body) . '")}' . "\n";
+        }
+
+        $dir = dirname($target);
+        if (!is_dir($dir) && !@mkdir($dir, 0755, true) && !is_dir($dir)) {
+            return false;
+        }
+
+        // Write aside and rename, so no request ever sees a partial stylesheet
+        $tempPath = $target . '.tmp-' . bin2hex(random_bytes(4));
+        if (file_put_contents($tempPath, $css) === strlen($css) && rename($tempPath, $target)) {
+            return true;
+        }
+
+        @unlink($tempPath);
+        return false;
+    }
+}
+?>
@@ -0,0 +1,215 @@
+<?php
+/**
+ * Icon Cache Index
+ * SQLite index of the favicon cache directory, keyed by cache base name.
+ *
+ * Each cached icon's extension, size, modification time, source URL and
+ * content hash are recorded here, so lookups, stats and cleanup never have
+ * to scan the directory. IconResolver uses the content hash to store icons
+ * with identical bytes once.
+ *
+ * The origins table remembers the last resolution per site origin: the icon
+ * other bookmarks on that origin can share, or the kind of failure and when
+ * the next real attempt is due.
+ */
+
+class IconCacheIndex {
+    private const SCHEMA_VERSION = 2;
+    private const DELETE_CHUNK_SIZE = 500;
+
+    private $pdo;
+    private $needsImport = false;
+
+    /**
+     * Open the index at $path, creating it when missing. Returns null when pdo_sqlite
+     * is not available or the file cannot be opened.
+     */
+    public static function open($path) {
+        if (!class_exists('PDO') || !in_array('sqlite', PDO::getAvailableDrivers(), true)) {
+            return null;
+        }
+
+        try {
+            return new self(new PDO('sqlite:' . $path, null, null, [
+                PDO::ATTR_ERRMODE => PDO::ERRMODE_EXCEPTION,
+                PDO::ATTR_DEFAULT_FETCH_MODE => PDO::FETCH_ASSOC,
+            ]));
+        } catch (PDOException $e) {
+            error_log('Favicon cache index unavailable: ' . $e->getMessage());
+            return null;
+        }
+    }
+
+    private function __construct(PDO $pdo) {
+        $this->pdo = $pdo;
+        // Refresh workers write from several processes at once
+        $this->pdo->exec('PRAGMA busy_timeout = 5000');
+        $this->pdo->exec('PRAGMA journal_mode = WAL');
+        $this->pdo->exec('PRAGMA synchronous = NORMAL');
+
+        $version = (int)$this->pdo->query('PRAGMA user_version')->fetchColumn();
+        if ($version < 1) {
+            $this->pdo->exec('
+                CREATE TABLE IF NOT EXISTS icons (
+                    base_name TEXT PRIMARY KEY,
+                    extension TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime INTEGER NOT NULL,
+                    source_url TEXT,
+                    content_hash TEXT NOT NULL
+                )
+            ');
+            $this->pdo->exec('CREATE INDEX IF NOT EXISTS idx_icons_content_hash ON icons (content_hash)');
+            $this->pdo->exec('CREATE INDEX IF NOT EXISTS idx_icons_mtime ON icons (mtime)');
+            $this->needsImport = true;
+        }
+        if ($version < 2) {
+            $this->pdo->exec('
+                CREATE TABLE IF NOT EXISTS origins (
+                    origin TEXT PRIMARY KEY,
+                    base_name TEXT,
+                    failure_kind TEXT,
+                    failures INTEGER NOT NULL DEFAULT 0,
+                    checked_at INTEGER NOT NULL,
+                    retry_at INTEGER NOT NULL DEFAULT 0
+                )
+            ');
+            // A new index is stamped once its files are imported
+            if (!$this->needsImport) {
+                $this->pdo->exec('PRAGMA user_version = ' . self::SCHEMA_VERSION);
+            }
+        }
+    }
+
+    /**
+     * Whether the index was just created and does not yet know the files already on disk.
+     */
+    public function needsImport() {
+        return $this->needsImport;
+    }
+
+    /**
+     * Record existing cache files once. Entries already in the index are kept.
+     */
+    public function import(array $entries) {
+        $this->pdo->beginTransaction();
+        try {
+            $stmt = $this->pdo->prepare('
+                INSERT OR IGNORE INTO icons (base_name, extension, size, mtime, source_url, content_hash)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ');
+            foreach ($entries as $entry) {
+                $stmt->execute($this->toRow($entry));
+            }
+            $this->pdo->exec('PRAGMA user_version = ' . self::SCHEMA_VERSION);
+            $this->pdo->commit();
+        } catch (Exception $e) {
+            $this->pdo->rollBack();
+            throw $e;
+        }
+
+        $this->needsImport = false;
+    }
+
+    public function find($baseName) {
+        $stmt = $this->pdo->prepare('SELECT * FROM icons WHERE base_name = ?');
+        $stmt->execute([$baseName]);
+        return $stmt->fetch() ?: null;
+    }
+
+    /**
+     * Another cached icon with the same content, or null.
+     */
+    public function findByContentHash($contentHash, $excludeBaseName) {
+        $stmt = $this->pdo->prepare('SELECT * FROM icons WHERE content_hash = ? AND base_name <> ? LIMIT 1');
+        $stmt->execute([$contentHash, $excludeBaseName]);
+        return $stmt->fetch() ?: null;
+    }
+
+    public function put(array $entry) {
+        $stmt = $this->pdo->prepare('
+            INSERT OR REPLACE INTO icons (base_name, extension, size, mtime, source_url, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ');
+        $stmt->execute($this->toRow($entry));
+    }
+
+    public function remove(array $baseNames) {
+        foreach (array_chunk(array_values($baseNames), self::DELETE_CHUNK_SIZE) as $chunk) {
+            $placeholders = implode(', ', array_fill(0, count($chunk), '?'));
+            $stmt = $this->pdo->prepare('DELETE FROM icons WHERE base_name IN (' . $placeholders . ')');
+            $stmt->execute($chunk);
+        }
+    }
+
+    public function clear() {
+        $this->pdo->exec('DELETE FROM icons');
+        $this->pdo->exec('DELETE FROM origins');
+    }
+
+    /**
+     * The last resolution recorded for an origin, or null.
+     */
+    public function findOrigin($origin) {
+        $stmt = $this->pdo->prepare('SELECT * FROM origins WHERE origin = ?');
+        $stmt->execute([$origin]);
+        return $stmt->fetch() ?: null;
+    }
+
+    public function putOrigin(array $entry) {
+        $stmt = $this->pdo->prepare('
+            INSERT OR REPLACE INTO origins (origin, base_name, failure_kind, failures, checked_at, retry_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ');
+        $stmt->execute([
+            $entry['origin'],
+            $entry['base_name'] ?? null,
+            $entry['failure_kind'] ?? null,
+            (int)($entry['failures'] ?? 0),
+            (int)$entry['checked_at'],
+            (int)($entry['retry_at'] ?? 0),
+        ]);
+    }
+
+    public function findOlderThan($mtime) {
+        $stmt = $this->pdo->prepare('SELECT base_name, extension FROM icons WHERE mtime < ?');
+        $stmt->execute([(int)$mtime]);
+        return $stmt->fetchAll();
+    }
+
+    public function all() {
+        return $this->pdo->query('SELECT base_name, extension FROM icons ORDER BY base_name')->fetchAll();
+    }
+
+    /**
+     * Entry count, distinct content count, and bytes on disk (each distinct content counted once).
+     */
+    public function getStats() {
+        $stats = $this->pdo->query('
+            SELECT COUNT(*) AS count, COUNT(DISTINCT content_hash) AS unique_count
+            FROM icons
+        ')->fetch();
+        $size = $this->pdo->query('
+            SELECT COALESCE(SUM(size), 0)
+            FROM (SELECT MAX(size) AS size FROM icons GROUP BY content_hash)
+        ')->fetchColumn();
+
+        return [
+            'count' => (int)$stats['count'],
+            'unique_count' => (int)$stats['unique_count'],
+            'size' => (int)$size,
+        ];
+    }
+
+    private function toRow(array $entry) {
+        return [
+            $entry['base_name'],
+            $entry['extension'],
+            (int)$entry['size'],
+            (int)$entry['mtime'],
+            $entry['source_url'] ?? null,
+            $entry['content_hash'],
+        ];
+    }
+}
+?>
@@ -5,11 +5,17 @@
  */
 
 require_once __DIR__ . '/favicon-config.php';
+require_once __DIR__ . '/icon-cache-index.php';
+require_once __DIR__ . '/../private_storage.php';
 
 class IconResolver {
     private const BROWSER_USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36';
     private const DEFAULT_RESOLVE_TIMEOUT_SECONDS = 6.0;
     private const DEBUG_RESOLVE_TIMEOUT_SECONDS = 12.0;
+    private const DEFAULT_CONCURRENCY = 6;
+    private const MAX_HOST_CONNECTIONS = 4;
+    // Roughly a same-origin favicon.ico, a sized HTML icon, or an SVG icon
+    private const GOOD_ENOUGH_CANDIDATE_SCORE = 220;
     private const ROOT_ICON_PATHS = [
         '/favicon.ico',
         '/favicon.svg',
@@ -27,6 +33,25 @@ class IconResolver {
 
     private const CACHE_EXTENSIONS = ['ico', 'png', 'jpg', 'jpeg', 'gif', 'svg', 'webp'];
 
+    // First wait before an origin that failed is tried again; it doubles with each further failure
+    private const ORIGIN_BACKOFF_SECONDS = [
+        'dns' => 3600,
+        'connect' => 900,
+        'timeout' => 900,
+        'http_4xx' => 3600,
+        'http_5xx' => 900,
+        'no_candidate' => 21600,
+    ];
+    private const MAX_ORIGIN_BACKOFF_SECONDS = 86400 * 7;
+    private const ORIGIN_FAILURE_REASONS = [
+        'dns' => 'Site host name could not be resolved',
+        'connect' => 'Site could not be reached',
+        'timeout' => 'Site did not answer in time',
+        'http_4xx' => 'Site refused the request',
+        'http_5xx' => 'Site returned a server error',
+        'no_candidate' => 'No valid site icon found',
+    ];
+
     private $cacheDir;
     private $cacheTime;
     private $userAgent;
@@ -35,25 +60,49 @@ class IconResolver {
     private $debugLog = [];
     private $resolveDeadline = null;
     private $resolveTimeoutLogged = false;
+    private $concurrency;
+    private $responseCache = [];
+    private $multiHandle = null;
+    private $shareHandle = null;
+    // Opened on first use; null when SQLite is unavailable and the directory is scanned instead
+    private $cacheIndex = false;
 
+    /**
+     * With a concurrency above 1, requests are made in parallel through curl_multi;
+     * 1 keeps the original one-request-at-a-time probing.
+     */
     public function __construct(
         $cacheDir = null,
         $cacheTime = 86400 * 30,
         $userAgent = self::BROWSER_USER_AGENT,
         $timeout = 10,
-        $debug = false
+        $debug = false,
+        $concurrency = null
     ) {
         $this->cacheDir = $cacheDir ?: dirname(__DIR__, 2) . '/cache/favicons/';
         $this->cacheTime = $cacheTime;
         $this->userAgent = $userAgent;
         $this->timeout = $timeout;
         $this->debug = $debug;
+        $this->concurrency = max(1, (int)($concurrency ?? (getenv('STARTPAGE_FAVICON_CONCURRENCY') ?: self::DEFAULT_CONCURRENCY)));
+        if (!function_exists('curl_multi_init')) {
+            $this->concurrency = 1;
+        }
 
         if (!is_dir($this->cacheDir)) {
             mkdir($this->cacheDir, 0755, true);
         }
     }
 
+    public function __destruct() {
+        if ($this->multiHandle) {
+            curl_multi_close($this->multiHandle);
+        }
+        if ($this->shareHandle) {
+            curl_share_close($this->shareHandle);
+        }
+    }
+
     public function getDebugLog() {
         return $this->debugLog;
     }
@@ -104,6 +153,7 @@ class IconResolver {
         $this->clearDebugLog();
         $this->resolveDeadline = microtime(true) + ($this->debug ? self::DEBUG_RESOLVE_TIMEOUT_SECONDS : self::DEFAULT_RESOLVE_TIMEOUT_SECONDS);
         $this->resolveTimeoutLogged = false;
+        $this->responseCache = [];
 
         $normalizedUrl = $this->normalizeUrl($bookmarkUrl);
         $cacheBaseName = $this->getCacheBaseName($normalizedUrl);
@@ -114,11 +164,12 @@ class IconResolver {
             'force_refresh' => $forceRefresh,
             'cache_base_name' => $cacheBaseName,
             'resolve_timeout_seconds' => $this->debug ? self::DEBUG_RESOLVE_TIMEOUT_SECONDS : self::DEFAULT_RESOLVE_TIMEOUT_SECONDS,
+            'concurrency' => $this->concurrency,
         ]);
 
         if (!$forceRefresh) {
             $existingCache = $this->findExistingCacheFile($cacheBaseName);
-            if ($existingCache && (time() - filemtime($existingCache['path'])) < $this->cacheTime) {
+            if ($existingCache && (time() - $existingCache['mtime']) < $this->cacheTime) {
                 $this->addDebugLog('cache', 'Using fresh cached icon', [
                     'favicon_url' => $existingCache['url'],
                     'cache_path' => $existingCache['path'],
@@ -134,8 +185,40 @@ class IconResolver {
                     'failure_reason' => null,
                 ]));
             }
-        } else {
-            $this->deleteExistingCacheFiles($cacheBaseName);
+        }
+        // A forced refresh keeps the current icon in place until a new one replaces it
+
+        $origin = $this->getOrigin($normalizedUrl);
+        $originEntry = $this->findOriginEntry($origin);
+        if (!$forceRefresh && $originEntry) {
+            $shared = $this->shareOriginIcon($cacheBaseName, $originEntry);
+            if ($shared) {
+                $this->addDebugLog('cache', 'Using cached icon of the same origin', [
+                    'origin' => $origin,
+                    'favicon_url' => $shared['url'],
+                ]);
+
+                return $this->finishResolve($this->buildResult([
+                    'normalized_url' => $normalizedUrl,
+                    'final_url' => $normalizedUrl,
+                    'source_url' => null,
+                    'favicon_url' => $shared['url'],
+                    'source' => 'origin-cache',
+                    'cached' => true,
+                    'failure_reason' => null,
+                ]));
+            }
+        }
+
+        // Forced refreshes are asked for by hand and debug runs diagnose an origin,
+        // so both go to the network while the origin is backed off
+        if ($originEntry && !$forceRefresh && !$this->debug && (int)$originEntry['retry_at'] > time()) {
+            return $this->finishResolve($this->buildFallbackResult($normalizedUrl, $normalizedUrl, $this->describeOriginFailure($originEntry)));
+        }
+
+        if ($this->concurrency > 1) {
+            // The page, homepage, root manifests and root icons do not depend on each other
+            $this->prefetchUrls(array_merge([$normalizedUrl], $this->getOriginProbeUrls($normalizedUrl)));
         }
 
         $pageResponse = $this->fetchUrl($normalizedUrl);
@@ -153,6 +236,11 @@ class IconResolver {
                 'manifest_count' => count($pageDiscovery['manifests']),
             ]);
 
+            if ($this->concurrency > 1) {
+                // Linked manifests, plus the root probes again in case the page redirected to another origin
+                $this->prefetchUrls(array_merge($pageDiscovery['manifests'], $this->getOriginProbeUrls($finalUrl)));
+            }
+
             foreach ($pageDiscovery['manifests'] as $manifestUrl) {
                 if ($this->hasResolveTimedOut()) {
                     $this->noteResolveTimeout('Stopped page manifest probing after resolve timeout');
@@ -203,6 +291,9 @@ class IconResolver {
                     $icon['context'] = 'homepage';
                     $candidates[] = $icon;
                 }
+                if ($this->concurrency > 1) {
+                    $this->prefetchUrls($homeDiscovery['manifests']);
+                }
                 foreach ($homeDiscovery['manifests'] as $manifestUrl) {
                     if ($this->hasResolveTimedOut()) {
                         $this->noteResolveTimeout('Stopped homepage manifest probing after resolve timeout');
@@ -232,6 +323,7 @@ class IconResolver {
         $best = $this->resolveBestCandidate($candidates, $pageOrigin);
         if ($best) {
             $cachedUrl = $this->storeCachedIcon($cacheBaseName, $best['response']['body'], $best['response'], $best['candidate']);
+            $this->recordOriginSuccess($origin, $cacheBaseName);
 
             $result = $this->buildResult([
                 'normalized_url' => $normalizedUrl,
@@ -247,57 +339,52 @@ class IconResolver {
             return $this->finishResolve($result);
         }
 
-        $failureReason = 'No valid site icon found';
-        $externalFallback = FaviconConfig::getExternalFallbackFaviconUrl($normalizedUrl);
-        if ($externalFallback !== '') {
-            $result = $this->buildResult([
-                'normalized_url' => $normalizedUrl,
-                'final_url' => $finalUrl,
-                'source_url' => $externalFallback,
-                'favicon_url' => $externalFallback,
-                'source' => 'external-fallback',
-                'cached' => false,
-                'failure_reason' => $failureReason,
-            ]);
-
-            $this->addDebugLog('resolve', 'Using external favicon fallback', $result);
-            return $this->finishResolve($result);
-        }
-
-        $generated = FaviconConfig::getGeneratedFaviconDataUri($normalizedUrl);
-        $result = $this->buildResult([
-            'normalized_url' => $normalizedUrl,
-            'final_url' => $finalUrl,
-            'source_url' => null,
-            'favicon_url' => $generated,
-            'source' => 'generated',
-            'cached' => false,
-            'failure_reason' => $failureReason,
-        ]);
-
-        $this->addDebugLog('resolve', 'Using generated placeholder', $result);
-        return $this->finishResolve($result);
+        $originEntry = $this->recordOriginFailure($origin, $this->classifyFailure($pageResponse), $originEntry);
+        return $this->finishResolve($this->buildFallbackResult($normalizedUrl, $finalUrl, $this->describeOriginFailure($originEntry)));
     }
 
     public function cleanupCache() {
-        foreach ($this->getAllCacheFiles() as $file) {
-            if ((time() - filemtime($file)) > $this->cacheTime) {
-                unlink($file);
+        $index = $this->getCacheIndex();
+        if (!$index) {
+            foreach ($this->getAllCacheFiles() as $file) {
+                if ((time() - filemtime($file)) > $this->cacheTime) {
+                    unlink($file);
+                }
             }
+            return;
+        }
+
+        $expired = $index->findOlderThan(time() - $this->cacheTime);
+        foreach ($expired as $entry) {
+            @unlink($this->getCachePath($entry['base_name'], $entry['extension']));
         }
+        $index->remove(array_column($expired, 'base_name'));
     }
 
     public function clearCache() {
+        // Clearing is rare, so it scans the directory and also removes files the index missed
         $deleted = 0;
         foreach ($this->getAllCacheFiles() as $file) {
             if (unlink($file)) {
                 $deleted++;
             }
         }
+
+        $index = $this->getCacheIndex();
+        if ($index) {
+            $index->clear();
+        }
         return $deleted;
     }
 
     public function getCacheStats() {
+        $index = $this->getCacheIndex();
+        if ($index) {
+            $stats = $index->getStats();
+            $stats['size_formatted'] = $this->formatBytes($stats['size']);
+            return $stats;
+        }
+
         $files = $this->getAllCacheFiles();
         $totalSize = 0;
 
@@ -307,13 +394,56 @@ class IconResolver {
 
         return [
             'count' => count($files),
+            'unique_count' => count($files),
             'size' => $totalSize,
             'size_formatted' => $this->formatBytes($totalSize),
         ];
     }
 
     public function getCachePreviewFiles() {
-        return $this->getAllCacheFiles();
+        $index = $this->getCacheIndex();
+        if (!$index) {
+            return $this->getAllCacheFiles();
+        }
+
+        return array_map(function ($entry) {
+            return $this->getCachePath($entry['base_name'], $entry['extension']);
+        }, $index->all());
+    }
+
+    /**
+     * The configured external fallback, or else a generated placeholder.
+     */
+    private function buildFallbackResult($normalizedUrl, $finalUrl, $failureReason) {
+        $externalFallback = FaviconConfig::getExternalFallbackFaviconUrl($normalizedUrl);
+        if ($externalFallback !== '') {
+            $result = $this->buildResult([
+                'normalized_url' => $normalizedUrl,
+                'final_url' => $finalUrl,
+                'source_url' => $externalFallback,
+                'favicon_url' => $externalFallback,
+                'source' => 'external-fallback',
+                'cached' => false,
+                'failure_reason' => $failureReason,
+            ]);
+
+            $this->addDebugLog('resolve', 'Using external favicon fallback', $result);
+            return $result;
+        }
+
+        $generated = FaviconConfig::getGeneratedFaviconDataUri($normalizedUrl);
+        $result = $this->buildResult([
+            'normalized_url' => $normalizedUrl,
+            'final_url' => $finalUrl,
+            'source_url' => null,
+            'favicon_url' => $generated,
+            'source' => 'generated',
+            'cached' => false,
+            'failure_reason' => $failureReason,
+        ]);
+
+        $this->addDebugLog('resolve', 'Using generated placeholder', $result);
+        return $result;
     }
 
     private function buildResult(array $data) {
@@ -358,41 +488,97 @@ class IconResolver {
             return $this->estimateCandidateScore($b, $pageOrigin) <=> $this->estimateCandidateScore($a, $pageOrigin);
         });
 
+        if ($this->concurrency > 1) {
+            return $this->resolveBestCandidateConcurrently($candidates, $pageOrigin);
+        }
+
         $best = null;
-        foreach ($candidates as $candidate) {
+        foreach ($candidates as $rank => $candidate) {
             if ($this->hasResolveTimedOut()) {
                 $this->noteResolveTimeout('Stopped candidate probing after resolve timeout');
                 break;
             }
-            $response = $this->fetchUrl($candidate['href']);
-            $isImage = $this->isImageResponse($response);
-            $this->addDebugLog('candidate', $isImage ? 'Candidate returned image response' : 'Candidate rejected after fetch', [
-                'href' => $candidate['href'],
-                'source' => $candidate['source'],
-                'rel' => $candidate['rel'],
-                'sizes' => $candidate['sizes'],
-                'estimated_score' => $this->estimateCandidateScore($candidate, $pageOrigin),
-                'response' => $this->summarizeResponse($response),
-            ]);
+            $best = $this->pickBetterCandidate($best, $candidate, $rank, $this->fetchUrl($candidate['href']), $pageOrigin);
+        }
 
-            if (!$isImage) {
-                continue;
+        return $best;
+    }
+
+    /**
+     * Probe the sorted candidates through curl_multi, keeping up to the concurrency limit in flight.
+     * Probing stops once a candidate scores as good enough and every candidate ranked above it has answered.
+     */
+    private function resolveBestCandidateConcurrently(array $candidates, $pageOrigin) {
+        $ranks = [];
+        foreach ($candidates as $rank => $candidate) {
+            $ranks[$candidate['href']] = $rank;
+        }
+
+        $best = null;
+        $answered = [];
+        $this->fetchUrls(array_keys($ranks), function ($href, array $response) use ($candidates, $ranks, $pageOrigin, &$best, &$answered) {
+            $rank = $ranks[$href];
+            $answered[$rank] = true;
+            $best = $this->pickBetterCandidate($best, $candidates[$rank], $rank, $response, $pageOrigin);
+
+            if (!$best || $best['score'] < self::GOOD_ENOUGH_CANDIDATE_SCORE) {
+                return false;
+            }
+            for ($higherRank = 0; $higherRank < $best['rank']; $higherRank++) {
+                if (!isset($answered[$higherRank])) {
+                    return false;
+                }
             }
 
-            $score = $this->scoreResolvedCandidate($candidate, $response, $pageOrigin);
-            $this->addDebugLog('candidate', 'Candidate scored', [
-                'href' => $candidate['href'],
-                'score' => $score,
-                'content_type' => $response['content_type'] ?: $candidate['type'],
-                'final_url' => $response['final_url'] ?: $candidate['href'],
+            $this->addDebugLog('candidate', 'Stopped candidate probing after a good enough candidate', [
+                'href' => $best['candidate']['href'],
+                'score' => $best['score'],
+                'probed' => count($answered),
+                'skipped' => count($candidates) - count($answered),
             ]);
-            if (!$best || $score > $best['score']) {
-                $best = [
-                    'candidate' => $candidate,
-                    'response' => $response,
-                    'score' => $score,
-                ];
-            }
+            return true;
+        });
+
+        if ($this->hasResolveTimedOut()) {
+            $this->noteResolveTimeout('Stopped candidate probing after resolve timeout');
+        }
+
+        return $best;
+    }
+
+    /**
+     * Score a fetched candidate and return whichever of it and the current best wins.
+     * Equal scores go to the candidate with the better estimate, as in sequential probing.
+     */
+    private function pickBetterCandidate($best, array $candidate, $rank, array $response, $pageOrigin) {
+        $isImage = $this->isImageResponse($response);
+        $this->addDebugLog('candidate', $isImage ? 'Candidate returned image response' : 'Candidate rejected after fetch', [
+            'href' => $candidate['href'],
+            'source' => $candidate['source'],
+            'rel' => $candidate['rel'],
+            'sizes' => $candidate['sizes'],
+            'estimated_score' => $this->estimateCandidateScore($candidate, $pageOrigin),
+            'response' => $this->summarizeResponse($response),
+        ]);
+
+        if (!$isImage) {
+            return $best;
+        }
+
+        $score = $this->scoreResolvedCandidate($candidate, $response, $pageOrigin);
+        $this->addDebugLog('candidate', 'Candidate scored', [
+            'href' => $candidate['href'],
+            'score' => $score,
+            'content_type' => $response['content_type'] ?: $candidate['type'],
+            'final_url' => $response['final_url'] ?: $candidate['href'],
+        ]);
+        if (!$best || $score > $best['score'] || ($score === $best['score'] && $rank < $best['rank'])) {
+            return [
+                'candidate' => $candidate,
+                'response' => $response,
+                'score' => $score,
+                'rank' => $rank,
+            ];
         }
 
         return $best;
@@ -676,22 +862,147 @@ class IconResolver {
         return $path !== '/' || $query !== '';
     }
 
+    /**
+     * Root manifest and icon probes for a URL's origin, plus its homepage when the URL is not the homepage.
+     */
+    private function getOriginProbeUrls($url) {
+        $origin = rtrim($this->getOrigin($url), '/');
+        if ($origin === '') {
+            return [];
+        }
+
+        $urls = [];
+        if ($this->shouldRetryHomepage($url)) {
+            $urls[] = $origin . '/';
+        }
+        foreach (array_merge(self::MANIFEST_PROBES, self::ROOT_ICON_PATHS) as $path) {
+            $urls[] = $origin . $path;
+        }
+
+        return $urls;
+    }
+
+    /**
+     * Fetch URLs in parallel so the sequential discovery steps find them in the response cache.
+     */
+    private function prefetchUrls(array $urls) {
+        $started = microtime(true);
+        $responses = $this->fetchUrls($urls);
+        $this->addDebugLog('fetch', 'Prefetched URLs in parallel', [
+            'count' => count($responses),
+            'elapsed_ms' => (int)round((microtime(true) - $started) * 1000),
+        ]);
+    }
+
     private function fetchUrl($url) {
+        if (isset($this->responseCache[$url])) {
+            return $this->responseCache[$url];
+        }
+
         $this->addDebugLog('fetch', 'Fetching URL', ['url' => $url]);
 
         $remainingBudgetMs = $this->getRemainingResolveBudgetMs();
         if ($remainingBudgetMs <= 0) {
             $this->noteResolveTimeout('Skipped fetch because resolve timeout was exceeded', ['url' => $url]);
-            return [
-                'ok' => false,
-                'status' => 0,
-                'content_type' => '',
-                'final_url' => $url,
-                'body' => '',
-                'error' => 'Resolve deadline exceeded',
-            ];
+            return $this->buildDeadlineResponse($url);
+        }
+
+        $ch = $this->createCurlHandle($url, $remainingBudgetMs);
+        $body = curl_exec($ch);
+        $response = $this->readCurlResponse($ch, $url, $body, curl_error($ch), curl_errno($ch));
+        curl_close($ch);
+
+        return $this->responseCache[$url] = $response;
+    }
+
+    /**
+     * Fetch several URLs through one curl_multi handle, which keeps connections open per origin
+     * between batches. $onResponse is called with each URL and response as it completes, cached
+     * responses first; returning true stops the batch and abandons the requests still in flight.
+     */
+    private function fetchUrls(array $urls, ?callable $onResponse = null) {
+        $responses = [];
+        $queue = [];
+        foreach (array_values(array_unique($urls)) as $url) {
+            if (!isset($this->responseCache[$url])) {
+                $queue[] = $url;
+                continue;
+            }
+            $responses[$url] = $this->responseCache[$url];
+            if ($onResponse && $onResponse($url, $responses[$url]) === true) {
+                return $responses;
+            }
         }
 
+        $multi = $this->getMultiHandle();
+        $inFlight = [];
+        $stopped = false;
+
+        while (!$stopped && ($queue || $inFlight)) {
+            while ($queue && count($inFlight) < $this->concurrency) {
+                $url = array_shift($queue);
+                $remainingBudgetMs = $this->getRemainingResolveBudgetMs();
+                if ($remainingBudgetMs <= 0) {
+                    $this->noteResolveTimeout('Skipped fetch because resolve timeout was exceeded', ['url' => $url]);
+                    $responses[$url] = $this->buildDeadlineResponse($url);
+                    if ($onResponse && $onResponse($url, $responses[$url]) === true) {
+                        $stopped = true;
+                        break;
+                    }
+                    continue;
+                }
+
+                $this->addDebugLog('fetch', 'Fetching URL', ['url' => $url, 'parallel' => true]);
+                $ch = $this->createCurlHandle($url, $remainingBudgetMs);
+                curl_setopt($ch, CURLOPT_PRIVATE, $url);
+                curl_multi_add_handle($multi, $ch);
+                $inFlight[] = $ch;
+            }
+            if ($stopped || !$inFlight) {
+                break;
+            }
+
+            do {
+                $status = curl_multi_exec($multi, $running);
+            } while ($status === CURLM_CALL_MULTI_PERFORM);
+
+            while (!$stopped && ($info = curl_multi_info_read($multi))) {
+                $ch = $info['handle'];
+                $url = curl_getinfo($ch, CURLINFO_PRIVATE);
+                $failed = $info['result'] !== CURLE_OK;
+                $response = $this->readCurlResponse(
+                    $ch,
+                    $url,
+                    $failed ? false : curl_multi_getcontent($ch),
+                    $failed ? curl_strerror($info['result']) : '',
+                    $info['result']
+                );
+
+                curl_multi_remove_handle($multi, $ch);
+                curl_close($ch);
+                unset($inFlight[array_search($ch, $inFlight, true)]);
+
+                $this->responseCache[$url] = $response;
+                $responses[$url] = $response;
+                if ($onResponse && $onResponse($url, $response) === true) {
+                    $stopped = true;
+                }
+            }
+
+            if (!$stopped && $running > 0 && curl_multi_select($multi, 0.1) === -1) {
+                usleep(1000);
+            }
+        }
+
+        foreach ($inFlight as $ch) {
+            curl_multi_remove_handle($multi, $ch);
+            curl_close($ch);
+        }
+
+        return $responses;
+    }
+
+    private function createCurlHandle($url, $remainingBudgetMs) {
         $origin = $this->getOrigin($url);
         $referer = $origin ? rtrim($origin, '/') . '/' : $url;
         $requestTimeoutMs = min((int)round($this->timeout * 1000), $remainingBudgetMs);
@@ -720,16 +1031,24 @@ class IconResolver {
             CURLOPT_SSL_VERIFYHOST => false,
         ]);
 
-        $body = curl_exec($ch);
+        $shareHandle = $this->getShareHandle();
+        if ($shareHandle) {
+            curl_setopt($ch, CURLOPT_SHARE, $shareHandle);
+        }
+
+        return $ch;
+    }
+
+    private function readCurlResponse($ch, $url, $body, $error, $errorCode) {
         $response = [
             'ok' => $body !== false,
             'status' => curl_getinfo($ch, CURLINFO_HTTP_CODE),
             'content_type' => curl_getinfo($ch, CURLINFO_CONTENT_TYPE) ?: '',
             'final_url' => curl_getinfo($ch, CURLINFO_EFFECTIVE_URL) ?: $url,
             'body' => $body !== false ? $body : '',
-            'error' => curl_error($ch),
+            'error' => $error,
+            'error_code' => (int)$errorCode,
         ];
-        curl_close($ch);
 
         if (!$response['ok'] || $response['status'] < 200 || $response['status'] >= 400) {
             $response['ok'] = false;
@@ -738,9 +1057,52 @@ class IconResolver {
         return $response;
     }
 
+    private function buildDeadlineResponse($url) {
+        return [
+            'ok' => false,
+            'status' => 0,
+            'content_type' => '',
+            'final_url' => $url,
+            'body' => '',
+            'error' => 'Resolve deadline exceeded',
+            'error_code' => CURLE_OPERATION_TIMEDOUT,
+        ];
+    }
+
+    private function getMultiHandle() {
+        if (!$this->multiHandle) {
+            $this->multiHandle = curl_multi_init();
+            if (defined('CURLMOPT_MAX_HOST_CONNECTIONS')) {
+                curl_multi_setopt($this->multiHandle, CURLMOPT_MAX_HOST_CONNECTIONS, self::MAX_HOST_CONNECTIONS);
+            }
+            if (defined('CURLMOPT_PIPELINING') && defined('CURLPIPE_MULTIPLEX')) {
+                curl_multi_setopt($this->multiHandle, CURLMOPT_PIPELINING, CURLPIPE_MULTIPLEX);
+            }
+        }
+
+        return $this->multiHandle;
+    }
+
+    /**
+     * DNS results and TLS sessions are shared by every request this resolver makes.
+     */
+    private function getShareHandle() {
+        if ($this->shareHandle === null) {
+            $this->shareHandle = false;
+            if (function_exists('curl_share_init')) {
+                $this->shareHandle = curl_share_init();
+                curl_share_setopt($this->shareHandle, CURLSHOPT_SHARE, CURL_LOCK_DATA_DNS);
+                curl_share_setopt($this->shareHandle, CURLSHOPT_SHARE, CURL_LOCK_DATA_SSL_SESSION);
+            }
+        }
+
+        return $this->shareHandle;
+    }
+
     private function finishResolve(array $result) {
         $this->resolveDeadline = null;
         $this->resolveTimeoutLogged = false;
+        $this->responseCache = [];
         return $result;
     }
 
@@ -805,10 +1167,57 @@ class IconResolver {
     private function storeCachedIcon($cacheBaseName, $body, array $response, array $candidate) {
         $extension = $this->detectExtension($response, $candidate);
         $filename = $cacheBaseName . '.' . $extension;
-        $cachePath = rtrim($this->cacheDir, '/\\') . DIRECTORY_SEPARATOR . $filename;
+        $cachePath = $this->getCachePath($cacheBaseName, $extension);
+        $index = $this->getCacheIndex();
+        $entry = [
+            'base_name' => $cacheBaseName,
+            'extension' => $extension,
+            'size' => strlen($body),
+            'mtime' => time(),
+            'source_url' => $response['final_url'] ?: $candidate['href'],
+            'content_hash' => sha1($body),
+        ];
+
+        if (!$index) {
+            // Write aside and rename, so readers see either the old icon or the complete new one
+            $tempPath = $cachePath . '.tmp-' . bin2hex(random_bytes(4));
+            if (file_put_contents($tempPath, $body) === strlen($body) && rename($tempPath, $cachePath)) {
+                $this->deleteExistingCacheFiles($cacheBaseName, $extension);
+            } else {
+                @unlink($tempPath);
+            }
 
-        $this->deleteExistingCacheFiles($cacheBaseName);
-        file_put_contents($cachePath, $body);
+            return 'cache/favicons/' . $filename;
+        }
+
+        $previous = $index->find($cacheBaseName);
+        if (
+            $previous
+            && $previous['content_hash'] === $entry['content_hash']
+            && $previous['extension'] === $extension
+            && is_file($cachePath)
+        ) {
+            // Unchanged icon: only its age is reset
+            $index->put($entry);
+            return 'cache/favicons/' . $filename;
+        }
+
+        // An icon whose bytes are already cached under another key is hard-linked instead of written again
+        $tempPath = $cachePath . '.tmp-' . bin2hex(random_bytes(4));
+        $duplicate = $index->findByContentHash($entry['content_hash'], $cacheBaseName);
+        $written = $duplicate && @link($this->getCachePath($duplicate['base_name'], $duplicate['extension']), $tempPath);
+        if (!$written) {
+            $written = file_put_contents($tempPath, $body) === strlen($body);
+        }
+
+        if ($written && rename($tempPath, $cachePath)) {
+            $index->put($entry);
+            if ($previous && $previous['extension'] !== $extension) {
+                @unlink($this->getCachePath($cacheBaseName, $previous['extension']));
+            }
+        } else {
+            @unlink($tempPath);
+        }
 
         return 'cache/favicons/' . $filename;
     }
@@ -843,6 +1252,128 @@ class IconResolver {
         return 'ico';
     }
 
+    /**
+     * Why the bookmark page gave no icon: its DNS lookup, connection, or status,
+     * the resolve deadline, or else no usable candidate on a reachable site.
+     */
+    private function classifyFailure(array $pageResponse) {
+        $errorCode = (int)($pageResponse['error_code'] ?? 0);
+        if ($errorCode === CURLE_COULDNT_RESOLVE_HOST) {
+            return 'dns';
+        }
+        if ($errorCode === CURLE_OPERATION_TIMEDOUT) {
+            return 'timeout';
+        }
+        if ($errorCode !== 0) {
+            return 'connect';
+        }
+
+        $status = (int)($pageResponse['status'] ?? 0);
+        if ($status >= 500) {
+            return 'http_5xx';
+        }
+        if ($status >= 400) {
+            return 'http_4xx';
+        }
+
+        return $this->hasResolveTimedOut() ? 'timeout' : 'no_candidate';
+    }
+
+    private function describeOriginFailure(array $originEntry) {
+        $reason = self::ORIGIN_FAILURE_REASONS[$originEntry['failure_kind']] ?? self::ORIGIN_FAILURE_REASONS['no_candidate'];
+        if ((int)$originEntry['retry_at'] > 0) {
+            $reason .= '; next attempt after ' . date('Y-m-d H:i', (int)$originEntry['retry_at']);
+        }
+        return $reason;
+    }
+
+    private function findOriginEntry($origin) {
+        $index = $this->getCacheIndex();
+        return $index && $origin !== '' ? $index->findOrigin($origin) : null;
+    }
+
+    /**
+     * Give $cacheBaseName the fresh icon last resolved for its origin, hard-linked
+     * where possible. Returns the cache file, or null when there is none to share.
+     */
+    private function shareOriginIcon($cacheBaseName, array $originEntry) {
+        if (($originEntry['base_name'] ?? null) === null || $originEntry['base_name'] === $cacheBaseName) {
+            return null;
+        }
+
+        $index = $this->getCacheIndex();
+        $source = $index->find($originEntry['base_name']);
+        if (!$source || (time() - (int)$source['mtime']) >= $this->cacheTime) {
+            return null;
+        }
+
+        $sourcePath = $this->getCachePath($source['base_name'], $source['extension']);
+        $cachePath = $this->getCachePath($cacheBaseName, $source['extension']);
+        $tempPath = $cachePath . '.tmp-' . bin2hex(random_bytes(4));
+        $written = @link($sourcePath, $tempPath) || @copy($sourcePath, $tempPath);
+        if (!$written || !rename($tempPath, $cachePath)) {
+            @unlink($tempPath);
+            return null;
+        }
+
+        $previous = $index->find($cacheBaseName);
+        // The shared icon keeps its age, so it expires with the origin's icon
+        $source['base_name'] = $cacheBaseName;
+        $index->put($source);
+        if ($previous && $previous['extension'] !== $source['extension']) {
+            @unlink($this->getCachePath($cacheBaseName, $previous['extension']));
+        }
+
+        return [
+            'path' => $cachePath,
+            'url' => 'cache/favicons/' . basename($cachePath),
+        ];
+    }
+
+    private function recordOriginSuccess($origin, $cacheBaseName) {
+        $index = $this->getCacheIndex();
+        if (!$index || $origin === '') {
+            return;
+        }
+
+        $index->putOrigin([
+            'origin' => $origin,
+            'base_name' => $cacheBaseName,
+            'checked_at' => time(),
+        ]);
+    }
+
+    /**
+     * Count another failure for the origin and schedule the next attempt. Its last
+     * icon, if any, stays shareable. Returns the recorded entry.
+     */
+    private function recordOriginFailure($origin, $failureKind, $originEntry) {
+        $failures = (int)($originEntry['failures'] ?? 0) + 1;
+        $delay = min(
+            self::MAX_ORIGIN_BACKOFF_SECONDS,
+            self::ORIGIN_BACKOFF_SECONDS[$failureKind] * (2 ** min($failures - 1, 16))
+        );
+        $entry = [
+            'origin' => $origin,
+            'base_name' => $originEntry['base_name'] ?? null,
+            'failure_kind' => $failureKind,
+            'failures' => $failures,
+            'checked_at' => time(),
+            'retry_at' => time() + $delay,
+        ];
+
+        $index = $this->getCacheIndex();
+        if (!$index || $origin === '') {
+            // Without the index nothing is remembered, so no wait is reported either
+            $entry['retry_at'] = 0;
+            return $entry;
+        }
+
+        $index->putOrigin($entry);
+        $this->addDebugLog('resolve', 'Recorded origin failure', $entry);
+        return $entry;
+    }
+
     private function getAllCacheFiles() {
         $files = [];
         foreach (self::CACHE_EXTENSIONS as $extension) {
@@ -860,12 +1391,34 @@ class IconResolver {
     }
 
     private function findExistingCacheFile($cacheBaseName) {
+        $index = $this->getCacheIndex();
+        if ($index) {
+            $entry = $index->find($cacheBaseName);
+            if (!$entry) {
+                return null;
+            }
+
+            $path = $this->getCachePath($cacheBaseName, $entry['extension']);
+            if (!is_file($path)) {
+                // Deleted outside the resolver
+                $index->remove([$cacheBaseName]);
+                return null;
+            }
+
+            return [
+                'path' => $path,
+                'url' => 'cache/favicons/' . basename($path),
+                'mtime' => (int)$entry['mtime'],
+            ];
+        }
+
         foreach (self::CACHE_EXTENSIONS as $extension) {
-            $path = rtrim($this->cacheDir, '/\\') . DIRECTORY_SEPARATOR . $cacheBaseName . '.' . $extension;
+            $path = $this->getCachePath($cacheBaseName, $extension);
             if (file_exists($path)) {
                 return [
                     'path' => $path,
                     'url' => 'cache/favicons/' . basename($path),
+                    'mtime' => filemtime($path),
                 ];
             }
         }
@@ -873,15 +1426,75 @@ class IconResolver {
         return null;
     }
 
-    private function deleteExistingCacheFiles($cacheBaseName) {
+    private function deleteExistingCacheFiles($cacheBaseName, $keepExtension = null) {
         foreach (self::CACHE_EXTENSIONS as $extension) {
-            $path = rtrim($this->cacheDir, '/\\') . DIRECTORY_SEPARATOR . $cacheBaseName . '.' . $extension;
+            if ($extension === $keepExtension) {
+                continue;
+            }
+            $path = $this->getCachePath($cacheBaseName, $extension);
             if (file_exists($path)) {
                 unlink($path);
             }
         }
     }
 
+    private function getCachePath($cacheBaseName, $extension) {
+        return rtrim($this->cacheDir, '/\\') . DIRECTORY_SEPARATOR . $cacheBaseName . '.' . $extension;
+    }
+
+    /**
+     * The cache index lists every origin and icon source, so it lives in the private
+     * storage directory, named after the cache directory it describes.
+     */
+    private function getCacheIndex() {
+        if ($this->cacheIndex !== false) {
+            return $this->cacheIndex;
+        }
+
+        $cacheDir = rtrim($this->cacheDir, '/\\');
+        $this->removeLegacyCacheIndex($cacheDir);
+        $indexName = basename($cacheDir) . '-index-' . substr(sha1(realpath($cacheDir) ?: $cacheDir), 0, 12) . '.sqlite';
+        $this->cacheIndex = IconCacheIndex::open(getPrivateStoragePath($indexName));
+        if ($this->cacheIndex && $this->cacheIndex->needsImport()) {
+            $this->importCacheFiles($this->cacheIndex);
+        }
+
+        return $this->cacheIndex;
+    }
+
+    /**
+     * Delete the index earlier versions kept beside the cache directory, where the
+     * web server could serve it. The new index imports the cached icons again.
+     */
+    private function removeLegacyCacheIndex($cacheDir) {
+        $legacyPath = dirname($cacheDir) . DIRECTORY_SEPARATOR . basename($cacheDir) . '-index.sqlite';
+        foreach (['', '-wal', '-shm'] as $suffix) {
+            if (is_file($legacyPath . $suffix)) {
+                @unlink($legacyPath . $suffix);
+            }
+        }
+    }
+
+    /**
+     * Record icons cached before the index existed. Runs once, when the index is created.
+     */
+    private function importCacheFiles(IconCacheIndex $index) {
+        $entries = [];
+        foreach ($this->getAllCacheFiles() as $file) {
+            $extension = strtolower(pathinfo($file, PATHINFO_EXTENSION));
+            $entries[] = [
+                'base_name' => pathinfo($file, PATHINFO_FILENAME),
+                'extension' => $extension,
+                'size' => filesize($file),
+                'mtime' => filemtime($file),
+                'source_url' => null,
+                'content_hash' => sha1_file($file),
+            ];
+        }
+
+        $index->import($entries);
+    }
+
     private function normalizeUrl($url) {
         $url = trim((string)$url);
         if ($url === '') {
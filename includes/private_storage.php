@@ -0,0 +1,42 @@
+<?php
+/**
+ * Private Storage
+ * Location for server-side files that must never be served over HTTP.
+ *
+ * Everything under cache/ is reachable from the web (favicons are linked as
+ * ../cache/favicons/...), so per-user data and indexes live here instead.
+ * STARTPAGE_PRIVATE_DIR sets the directory; the default is private/ in the
+ * installation, closed to HTTP by its .htaccess (other web servers need an
+ * equivalent rule). It is deliberately not in the system temp directory: a
+ * web server with a private /tmp would see different files than the
+ * command-line tools, and temp cleaners would delete them.
+ */
+
+/**
+ * Get the private storage directory, creating it when missing
+ * @return string Absolute path without a trailing slash
+ */
+function getPrivateStorageDir(): string {
+    $configured = trim((string)getenv('STARTPAGE_PRIVATE_DIR'));
+    $dir = $configured !== ''
+        ? rtrim($configured, '/\\')
+        : dirname(__DIR__) . DIRECTORY_SEPARATOR . 'private';
+
+    if (!is_dir($dir)) {
+        @mkdir($dir, 0700, true);
+    }
+    // The default folder is under the web root; restore its deny rule if it is missing
+    if ($configured === '' && !is_file($dir . DIRECTORY_SEPARATOR . '.htaccess')) {
+        @file_put_contents($dir . DIRECTORY_SEPARATOR . '.htaccess', "Require all denied\n");
+    }
+
+    return $dir;
+}
+
+/**
+ * Get a path inside the private storage directory
+ */
+function getPrivateStoragePath(string $name): string {
+    return getPrivateStorageDir() . DIRECTORY_SEPARATOR . $name;
+}
+?>
@@ -1,136 +1,172 @@
 <?php
 /**
- * Simple rate limiter to prevent spam registrations
+ * Rate limiter to prevent spam registrations
+ *
+ * Each IP address and action has a token bucket holding $maxAttempts attempts,
+ * refilled evenly over $timeWindow seconds. The bucket is kept as the time at
+ * which it is full again (the generic cell rate algorithm), so checking and
+ * taking an attempt is one read and one write of a single number. It lives in
+ * APCu when available and otherwise in the rate_limit_buckets table, updated
+ * with one upsert. STARTPAGE_RATE_LIMIT_BACKEND ("apcu" or "mysql") overrides
+ * the choice. Expired rows are deleted by tools/maintenance.php.
  */
 class RateLimiter {
-    private $pdo;
-    private $tableName = 'rate_limits';
-    
-    public function __construct($pdo) {
-        $this->pdo = $pdo;
-        $this->createTable();
-    }
-    
-    /**
-     * Create rate limiting table if it doesn't exist
-     */
-    private function createTable() {
-        $sql = "CREATE TABLE IF NOT EXISTS {$this->tableName} (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            ip_address VARCHAR(45) NOT NULL,
-            action VARCHAR(50) NOT NULL,
-            attempts INT DEFAULT 1,
-            first_attempt DATETIME DEFAULT CURRENT_TIMESTAMP,
-            last_attempt DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-            INDEX idx_ip_action (ip_address, action),
-            INDEX idx_last_attempt (last_attempt)
-        )";
-        $this->pdo->exec($sql);
+    private $store;
+
+    public function __construct($pdo, $store = null) {
+        $this->store = $store ?: self::createStore($pdo);
     }
-    
+
     /**
-     * Check if an action is allowed for an IP
+     * The store configured by STARTPAGE_RATE_LIMIT_BACKEND, defaulting to APCu when it is enabled
      */
-    public function isAllowed($ipAddress, $action, $maxAttempts = 5, $timeWindow = 3600) {
-        // Clean up old records
-        $this->cleanup($timeWindow);
-        
-        // Get current attempts for this IP and action
-        $stmt = $this->pdo->prepare("
-            SELECT attempts, first_attempt 
-            FROM {$this->tableName} 
-            WHERE ip_address = ? AND action = ?
-        ");
-        $stmt->execute([$ipAddress, $action]);
-        $record = $stmt->fetch(PDO::FETCH_ASSOC);
-        
-        if (!$record) {
-            // First attempt
-            $this->recordAttempt($ipAddress, $action);
-            return true;
+    public static function createStore($pdo) {
+        $backend = strtolower(trim((string)getenv('STARTPAGE_RATE_LIMIT_BACKEND')));
+        $hasApcu = function_exists('apcu_enabled') && apcu_enabled();
+
+        if ($backend === 'apcu' && !$hasApcu) {
+            error_log('APCu is not available for the rate limiter; using the database');
         }
-        
-        // Check if within time window
-        $firstAttempt = strtotime($record['first_attempt']);
-        $timeElapsed = time() - $firstAttempt;
-        
-        if ($timeElapsed > $timeWindow) {
-            // Reset after time window
-            $this->resetAttempts($ipAddress, $action);
-            return true;
+        if ($backend !== 'mysql' && $hasApcu) {
+            return new ApcuRateLimitStore();
         }
-        
-        // Check if under limit
-        if ($record['attempts'] < $maxAttempts) {
-            $this->incrementAttempts($ipAddress, $action);
-            return true;
-        }
-        
-        return false;
+
+        return new MysqlRateLimitStore($pdo);
     }
-    
+
     /**
-     * Record a new attempt
+     * Check if an action is allowed for an IP, taking one attempt when it is
      */
-    private function recordAttempt($ipAddress, $action) {
-        $stmt = $this->pdo->prepare("
-            INSERT INTO {$this->tableName} (ip_address, action) 
-            VALUES (?, ?)
-        ");
-        $stmt->execute([$ipAddress, $action]);
+    public function isAllowed($ipAddress, $action, $maxAttempts = 5, $timeWindow = 3600) {
+        [$intervalMs, $toleranceMs] = self::getBucketShape($maxAttempts, $timeWindow);
+        return $this->store->consume($action, $ipAddress, self::nowMs(), $intervalMs, $toleranceMs);
     }
-    
+
     /**
-     * Increment attempt count
+     * Get remaining attempts for an IP
      */
-    private function incrementAttempts($ipAddress, $action) {
-        $stmt = $this->pdo->prepare("
-            UPDATE {$this->tableName} 
-            SET attempts = attempts + 1, last_attempt = CURRENT_TIMESTAMP 
-            WHERE ip_address = ? AND action = ?
-        ");
-        $stmt->execute([$ipAddress, $action]);
+    public function getRemainingAttempts($ipAddress, $action, $maxAttempts = 5, $timeWindow = 3600) {
+        [$intervalMs] = self::getBucketShape($maxAttempts, $timeWindow);
+        $fullAtMs = $this->store->getFullAt($action, $ipAddress);
+        $nowMs = self::nowMs();
+
+        if ($fullAtMs === null || $fullAtMs <= $nowMs) {
+            return (int)$maxAttempts;
+        }
+
+        return max(0, (int)$maxAttempts - (int)ceil(($fullAtMs - $nowMs) / $intervalMs));
     }
-    
+
     /**
-     * Reset attempts after time window
+     * Delete database buckets that are full again. Returns the number deleted.
      */
-    private function resetAttempts($ipAddress, $action) {
-        $stmt = $this->pdo->prepare("
-            UPDATE {$this->tableName} 
-            SET attempts = 1, first_attempt = CURRENT_TIMESTAMP, last_attempt = CURRENT_TIMESTAMP 
-            WHERE ip_address = ? AND action = ?
-        ");
-        $stmt->execute([$ipAddress, $action]);
+    public static function pruneExpired($pdo) {
+        return (new MysqlRateLimitStore($pdo))->pruneExpired(self::nowMs());
     }
-    
+
     /**
-     * Clean up old records
+     * One attempt is refilled every $intervalMs; a bucket may run $toleranceMs
+     * ahead of now, which allows a burst of $maxAttempts.
      */
-    private function cleanup($timeWindow) {
-        $stmt = $this->pdo->prepare("
-            DELETE FROM {$this->tableName} 
-            WHERE last_attempt < DATE_SUB(NOW(), INTERVAL ? SECOND)
-        ");
-        $stmt->execute([$timeWindow]);
+    private static function getBucketShape($maxAttempts, $timeWindow) {
+        $maxAttempts = max(1, (int)$maxAttempts);
+        $intervalMs = max(1, (int)round($timeWindow * 1000 / $maxAttempts));
+
+        return [$intervalMs, $intervalMs * ($maxAttempts - 1)];
     }
-    
-    /**
-     * Get remaining attempts for an IP
-     */
-    public function getRemainingAttempts($ipAddress, $action, $maxAttempts = 5) {
+
+    private static function nowMs() {
+        return (int)floor(microtime(true) * 1000);
+    }
+}
+
+/**
+ * Buckets in APCu: no database work at all, but per server and lost on restart
+ */
+class ApcuRateLimitStore {
+    private const KEY_PREFIX = 'startpage:ratelimit:';
+    private const LOCK_ATTEMPTS = 50;
+
+    public function consume($action, $ipAddress, $nowMs, $intervalMs, $toleranceMs) {
+        $key = self::KEY_PREFIX . $action . ':' . $ipAddress;
+
+        // A short per-bucket lock; without it, two requests could both take the last attempt
+        $locked = false;
+        for ($i = 0; $i < self::LOCK_ATTEMPTS && !$locked; $i++) {
+            $locked = apcu_add($key . ':lock', 1, 1);
+            if (!$locked) {
+                usleep(1000);
+            }
+        }
+
+        try {
+            $fullAtMs = max((int)apcu_fetch($key), $nowMs);
+            if ($fullAtMs - $nowMs > $toleranceMs) {
+                return false;
+            }
+
+            // The entry expires when the bucket is full again, which is the same as no entry
+            $fullAtMs += $intervalMs;
+            apcu_store($key, $fullAtMs, max(1, (int)ceil(($fullAtMs - $nowMs) / 1000)));
+            return true;
+        } finally {
+            if ($locked) {
+                apcu_delete($key . ':lock');
+            }
+        }
+    }
+
+    public function getFullAt($action, $ipAddress) {
+        $fullAtMs = apcu_fetch(self::KEY_PREFIX . $action . ':' . $ipAddress, $found);
+        return $found ? (int)$fullAtMs : null;
+    }
+}
+
+/**
+ * Buckets in the rate_limit_buckets table, shared by every web server
+ */
+class MysqlRateLimitStore {
+    private $pdo;
+
+    public function __construct($pdo) {
+        $this->pdo = $pdo;
+    }
+
+    public function consume($action, $ipAddress, $nowMs, $intervalMs, $toleranceMs) {
+        // A refused attempt leaves the row unchanged, so MySQL reports 0 affected rows;
+        // a new row counts 1 and an updated one 2
         $stmt = $this->pdo->prepare("
-            SELECT attempts FROM {$this->tableName} 
-            WHERE ip_address = ? AND action = ?
+            INSERT INTO rate_limit_buckets (action, ip_address, full_at_ms)
+            VALUES (?, ?, ?)
+            ON DUPLICATE KEY UPDATE full_at_ms = IF(
+                GREATEST(full_at_ms, ?) - ? <= ?,
+                GREATEST(full_at_ms, ?) + ?,
+                full_at_ms
+            )
         ");
-        $stmt->execute([$ipAddress, $action]);
-        $record = $stmt->fetch(PDO::FETCH_ASSOC);
-        
-        if (!$record) {
-            return $maxAttempts;
-        }
-        
-        return max(0, $maxAttempts - $record['attempts']);
+        $stmt->execute([
+            $action,
+            $ipAddress,
+            $nowMs + $intervalMs,
+            $nowMs, $nowMs, $toleranceMs,
+            $nowMs, $intervalMs,
+        ]);
+
+        return $stmt->rowCount() > 0;
+    }
+
+    public function getFullAt($action, $ipAddress) {
+        $stmt = $this->pdo->prepare("SELECT full_at_ms FROM rate_limit_buckets WHERE action = ? AND ip_address = ?");
+        $stmt->execute([$action, $ipAddress]);
+        $fullAtMs = $stmt->fetchColumn();
+
+        return $fullAtMs === false ? null : (int)$fullAtMs;
+    }
+
+    public function pruneExpired($nowMs) {
+        $stmt = $this->pdo->prepare("DELETE FROM rate_limit_buckets WHERE full_at_ms < ?");
+        $stmt->execute([$nowMs]);
+        return $stmt->rowCount();
     }
 }
-?> 
\ No newline at end of file
+?>
\ No newline at end of file
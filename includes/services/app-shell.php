@@ -0,0 +1,50 @@
+<?php
+/**
+ * App Shell
+ * Settings shared by the dashboard's service worker, app/index.php and the page
+ * version endpoint.
+ *
+ * The service worker (app/service-worker.php) answers new-tab opens of the
+ * dashboard with the last copy of the page it received, precaches the current
+ * scripts and stylesheets and keeps favicon files. The page then asks
+ * api/get-page-version.php whether that copy is current and patches in the
+ * categories that changed.
+ */
+
+class AppShell {
+    /**
+     * Whether the service worker is used (STARTPAGE_APP_SHELL, on unless "0" or "off").
+     * When it is turned off, installed workers delete their caches and unregister.
+     */
+    public static function isEnabled() {
+        $setting = strtolower(trim((string)getenv('STARTPAGE_APP_SHELL')));
+        return $setting !== '0' && $setting !== 'off';
+    }
+
+    /**
+     * URLs of the scripts and stylesheets app/index.php links, relative to app/
+     */
+    public static function getAssetUrls() {
+        $rootDir = dirname(__DIR__, 2) . '/';
+        $assetBundles = (@include $rootDir . 'assets/dist/manifest.php') ?: null;
+        if ($assetBundles) {
+            return ['../' . $assetBundles['js'], '../' . $assetBundles['css']];
+        }
+
+        // Unbuilt checkout: every source file, versioned by its modification time as in app/index.php
+        $assetLists = json_decode(file_get_contents($rootDir . 'assets/bundles.json'), true);
+        $urls = [];
+        foreach (array_merge($assetLists['js'], $assetLists['css']) as $assetPath) {
+            $urls[] = '../' . $assetPath . '?v=' . filemtime($rootDir . $assetPath);
+        }
+        return $urls;
+    }
+
+    /**
+     * A short hash of getAssetUrls(), which changes whenever a script or stylesheet does
+     */
+    public static function getAssetVersion() {
+        return substr(sha1(implode("\n", self::getAssetUrls())), 0, 12);
+    }
+}
+?>
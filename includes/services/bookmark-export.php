@@ -0,0 +1,164 @@
+<?php
+/**
+ * Bookmark Export
+ * Writes a user's pages, categories and bookmarks as a Netscape bookmark file
+ * or as JSON Lines.
+ *
+ * Rows are read from an unbuffered cursor and written to the output as they
+ * arrive, so memory use does not grow with the collection. BookmarkImporter
+ * reads both formats back.
+ */
+
+class BookmarkExporter {
+    public const JSON_FORMAT_NAME = 'startpage-bookmarks';
+    public const JSON_FORMAT_VERSION = 1;
+    private const FLUSH_EVERY = 500;
+    private const JSON_FLAGS = JSON_UNESCAPED_UNICODE | JSON_UNESCAPED_SLASHES | JSON_INVALID_UTF8_SUBSTITUTE;
+
+    private $pdo;
+    private $userId;
+
+    public function __construct($pdo, $userId) {
+        $this->pdo = $pdo;
+        $this->userId = (int)$userId;
+    }
+
+    /**
+     * Write a Netscape bookmark file, which browsers import. Pages become
+     * top-level folders and their categories the folders inside them.
+     */
+    public function writeNetscape($out) {
+        fwrite($out, "<!DOCTYPE NETSCAPE-Bookmark-file-1>\n"
+            . "<!-- This is an automatically generated file.\n     It will be read and overwritten.\n     DO NOT EDIT! -->\n"
+            . "<META HTTP-EQUIV=\"Content-Type\" CONTENT=\"text/html; charset=UTF-8\">\n"
+            . "<TITLE>Bookmarks</TITLE>\n<H1>Bookmarks</H1>\n<DL><p>\n");
+
+        $pageId = null;
+        $categoryId = null;
+        $this->eachRow($out, function (array $row) use ($out, &$pageId, &$categoryId) {
+            if ((int)$row['page_id'] !== $pageId) {
+                if ($categoryId !== null) {
+                    fwrite($out, "        </DL><p>\n");
+                }
+                if ($pageId !== null) {
+                    fwrite($out, "    </DL><p>\n");
+                }
+                fwrite($out, '    <DT><H3>' . self::escape($row['page_name']) . "</H3>\n    <DL><p>\n");
+                $pageId = (int)$row['page_id'];
+                $categoryId = null;
+            }
+
+            if ($row['category_id'] !== null && (int)$row['category_id'] !== $categoryId) {
+                if ($categoryId !== null) {
+                    fwrite($out, "        </DL><p>\n");
+                }
+                fwrite($out, '        <DT><H3>' . self::escape($row['category_name']) . "</H3>\n        <DL><p>\n");
+                $categoryId = (int)$row['category_id'];
+            }
+
+            if ($row['url'] !== null) {
+                fwrite($out, sprintf(
+                    "            <DT><A HREF=\"%s\" ADD_DATE=\"%d\">%s</A>\n",
+                    self::escape($row['url']),
+                    (int)$row['added_at'],
+                    self::escape($row['title'])
+                ));
+                if ((string)$row['description'] !== '') {
+                    fwrite($out, '            <DD>' . self::escape($row['description']) . "\n");
+                }
+            }
+        });
+
+        if ($categoryId !== null) {
+            fwrite($out, "        </DL><p>\n");
+        }
+        if ($pageId !== null) {
+            fwrite($out, "    </DL><p>\n");
+        }
+        fwrite($out, "</DL><p>\n");
+    }
+
+    /**
+     * Write one JSON object per line: a header, then a record for every page,
+     * category and bookmark. Unlike the HTML format it keeps bookmark colors.
+     */
+    public function writeJsonLines($out) {
+        fwrite($out, json_encode([
+            'format' => self::JSON_FORMAT_NAME,
+            'version' => self::JSON_FORMAT_VERSION,
+            'exported_at' => gmdate('c'),
+        ], self::JSON_FLAGS) . "\n");
+
+        $pageId = null;
+        $categoryId = null;
+        $this->eachRow($out, function (array $row) use ($out, &$pageId, &$categoryId) {
+            if ((int)$row['page_id'] !== $pageId) {
+                fwrite($out, json_encode(['type' => 'page', 'page' => $row['page_name']], self::JSON_FLAGS) . "\n");
+                $pageId = (int)$row['page_id'];
+                $categoryId = null;
+            }
+
+            if ($row['category_id'] !== null && (int)$row['category_id'] !== $categoryId) {
+                fwrite($out, json_encode([
+                    'type' => 'category',
+                    'page' => $row['page_name'],
+                    'category' => $row['category_name'],
+                ], self::JSON_FLAGS) . "\n");
+                $categoryId = (int)$row['category_id'];
+            }
+
+            if ($row['url'] !== null) {
+                fwrite($out, json_encode([
+                    'type' => 'bookmark',
+                    'page' => $row['page_name'],
+                    'category' => $row['category_name'],
+                    'title' => $row['title'],
+                    'url' => $row['url'],
+                    'description' => (string)$row['description'],
+                    'color' => (int)$row['color'],
+                    'added_at' => gmdate('c', (int)$row['added_at']),
+                ], self::JSON_FLAGS) . "\n");
+            }
+        });
+    }
+
+    /**
+     * Pass every page, active category and bookmark of the user to $callback in
+     * display order, one row at a time. Empty pages and categories come as rows
+     * without a category or URL.
+     */
+    private function eachRow($out, callable $callback) {
+        // A buffered query would copy the whole result into PHP before the first row
+        $this->pdo->setAttribute(PDO::MYSQL_ATTR_USE_BUFFERED_QUERY, false);
+        try {
+            $stmt = $this->pdo->prepare('
+                SELECT p.id AS page_id, p.name AS page_name,
+                    c.id AS category_id, c.name AS category_name,
+                    b.title, b.url, b.description, b.color, UNIX_TIMESTAMP(b.created_at) AS added_at
+                FROM pages p
+                LEFT JOIN categories c ON c.page_id = p.id AND c.user_id = p.user_id AND c.deleted_at IS NULL
+                LEFT JOIN bookmarks b ON b.category_id = c.id AND b.user_id = p.user_id
+                WHERE p.user_id = ?
+                ORDER BY p.sort_order ASC, p.id ASC, c.sort_order ASC, c.id ASC, b.sort_order ASC, b.id ASC
+            ');
+            $stmt->execute([$this->userId]);
+
+            $count = 0;
+            while ($row = $stmt->fetch(PDO::FETCH_ASSOC)) {
+                $callback($row);
+                if (++$count % self::FLUSH_EVERY === 0) {
+                    fflush($out);
+                    flush();
+                }
+            }
+            $stmt->closeCursor();
+        } finally {
+            $this->pdo->setAttribute(PDO::MYSQL_ATTR_USE_BUFFERED_QUERY, true);
+        }
+    }
+
+    private static function escape($text) {
+        return htmlspecialchars((string)$text, ENT_QUOTES | ENT_SUBSTITUTE, 'UTF-8');
+    }
+}
+?>
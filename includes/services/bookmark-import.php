@@ -0,0 +1,503 @@
+<?php
+/**
+ * Bookmark Import
+ * Streams browser bookmark files and this application's exports into pages,
+ * categories and bookmarks.
+ *
+ * Readers yield one folder or bookmark at a time from an open stream, so a file
+ * is never held in memory. Top-level folders become pages and the folders inside
+ * them categories; deeper folders become categories named by their path, such
+ * as "Tools / Python". Bookmarks are written with multi-row INSERTs, one
+ * transaction per chunk, and a URL already in its target category is skipped.
+ */
+
+require_once __DIR__ . '/bookmark-writer.php';
+require_once __DIR__ . '/favicon-refresh-queue.php';
+
+class BookmarkImporter {
+    public const DEFAULT_PAGE_NAME = 'Imported';
+    private const CHUNK_SIZE = 500;
+    private const NAME_LENGTH = 100;
+
+    private $pdo;
+    private $userId;
+    private $refreshQueue;
+    private $pageIds = [];
+    private $categoryIds = [];
+    private $pending = [];
+    private $pendingKeys = [];
+    private $summary = [];
+
+    public function __construct($pdo, $userId, $refreshQueue = null) {
+        $this->pdo = $pdo;
+        $this->userId = (int)$userId;
+        $this->refreshQueue = $refreshQueue ?: new FaviconRefreshQueue($pdo);
+    }
+
+    /**
+     * A reader for the stream's format: JSON Lines when it starts with "{", a
+     * Netscape bookmark file otherwise. The stream must be seekable.
+     */
+    public static function createReader($stream) {
+        $start = ltrim((string)fread($stream, 512), "\xEF\xBB\xBF \t\r\n");
+        rewind($stream);
+
+        return strpos($start, '{') === 0
+            ? new JsonBookmarkReader($stream)
+            : new NetscapeBookmarkReader($stream);
+    }
+
+    /**
+     * Import every entry of a reader. Returns the number of pages and categories
+     * created and of bookmarks added, skipped as duplicates, and skipped as invalid.
+     * Chunks written before an error stay imported; getSummary() reports them.
+     */
+    public function import($reader) {
+        $this->summary = [
+            'pages_created' => 0,
+            'categories_created' => 0,
+            'added' => 0,
+            'duplicates' => 0,
+            'invalid' => 0,
+        ];
+
+        try {
+            foreach ($reader->entries() as $entry) {
+                if ($entry['type'] === 'folder') {
+                    if (count($entry['path']) === 1) {
+                        $this->getPageId($entry['path'][0]);
+                    } else {
+                        $this->getCategoryId($entry['path']);
+                    }
+                } else {
+                    $this->queueBookmark($entry);
+                }
+            }
+            $this->flush();
+        } catch (Exception $e) {
+            if ($this->pdo->inTransaction()) {
+                $this->pdo->rollBack();
+            }
+            throw $e;
+        }
+
+        return $this->summary;
+    }
+
+    public function getSummary() {
+        return $this->summary;
+    }
+
+    private function queueBookmark(array $entry) {
+        try {
+            $url = BookmarkWriter::normalizeUrl($entry['url']);
+        } catch (InvalidArgumentException $e) {
+            // Browser-internal links such as place: or javascript: have no host
+            $this->summary['invalid']++;
+            return;
+        }
+        // A shortened URL would point somewhere else
+        if (strlen($url) > BookmarkWriter::MAX_FIELD_LENGTH) {
+            $this->summary['invalid']++;
+            return;
+        }
+
+        $categoryId = $this->getCategoryId($entry['path']);
+        // Duplicates already stored are left out by the INSERT; this catches those within a chunk
+        $key = $categoryId . ' ' . $url;
+        if (isset($this->pendingKeys[$key])) {
+            $this->summary['duplicates']++;
+            return;
+        }
+        $this->pendingKeys[$key] = true;
+
+        $row = BookmarkWriter::prepareRow([
+            'url' => $url,
+            'title' => $entry['title'] ?? '',
+            'description' => $entry['description'] ?? '',
+            'color' => $entry['color'] ?? 0,
+        ]);
+        $row['category_id'] = $categoryId;
+        $this->pending[] = $row;
+
+        if (count($this->pending) >= self::CHUNK_SIZE) {
+            $this->flush();
+        }
+    }
+
+    /**
+     * Write the pending bookmarks and commit the chunk's transaction.
+     */
+    private function flush() {
+        if (!$this->pending) {
+            if ($this->pdo->inTransaction()) {
+                $this->pdo->commit();
+            }
+            return;
+        }
+
+        $this->beginChunk();
+
+        // Positions are read under a lock on each category, as BookmarkWriter does
+        $nextOrders = [];
+        foreach ($this->pending as $row) {
+            if (isset($nextOrders[$row['category_id']])) {
+                continue;
+            }
+            $stmt = $this->pdo->prepare('SELECT id FROM categories WHERE id = ? FOR UPDATE');
+            $stmt->execute([$row['category_id']]);
+            $stmt->fetchColumn();
+
+            $stmt = $this->pdo->prepare('SELECT COALESCE(MAX(sort_order) + 1, 0) FROM bookmarks WHERE category_id = ? AND user_id = ?');
+            $stmt->execute([$row['category_id'], $this->userId]);
+            $nextOrders[$row['category_id']] = (int)$stmt->fetchColumn();
+        }
+
+        $selects = [];
+        $params = [$this->userId];
+        foreach ($this->pending as $row) {
+            $selects[] = 'SELECT ? AS title, ? AS url, ? AS description, ? AS category_id, ? AS color, ? AS sort_order';
+            array_push(
+                $params,
+                $row['title'],
+                $row['url'],
+                $row['description'],
+                $row['category_id'],
+                $row['color'],
+                $nextOrders[$row['category_id']]++
+            );
+        }
+
+        $stmt = $this->pdo->prepare("
+            INSERT INTO bookmarks (user_id, title, url, description, favicon_url, category_id, color, sort_order, created_at, updated_at)
+            SELECT ?, v.title, v.url, v.description, '', v.category_id, v.color, v.sort_order, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+            FROM (" . implode(' UNION ALL ', $selects) . ") v
+            WHERE NOT EXISTS (
+                SELECT 1 FROM bookmarks b WHERE b.category_id = v.category_id AND b.url = v.url
+            )
+        ");
+        $stmt->execute($params);
+        $added = $stmt->rowCount();
+        $this->summary['added'] += $added;
+        $this->summary['duplicates'] += count($this->pending) - $added;
+
+        $urls = [];
+        if ($added > 0) {
+            // New rows are the only ones of the user from the first inserted ID on that have no icon yet
+            $stmt = $this->pdo->prepare("SELECT id, url FROM bookmarks WHERE user_id = ? AND id >= ? AND favicon_url = ''");
+            $stmt->execute([$this->userId, (int)$this->pdo->lastInsertId()]);
+            foreach ($stmt->fetchAll(PDO::FETCH_ASSOC) as $bookmark) {
+                $urls[(int)$bookmark['id']] = $bookmark['url'];
+            }
+        }
+
+        $this->pdo->commit();
+        $this->pending = [];
+        $this->pendingKeys = [];
+
+        if ($urls) {
+            $this->refreshQueue->enqueueBookmarks($urls);
+        }
+    }
+
+    private function beginChunk() {
+        if (!$this->pdo->inTransaction()) {
+            $this->pdo->beginTransaction();
+        }
+    }
+
+    private function getPageId($name) {
+        $name = self::cleanName($name);
+        $key = self::lower($name);
+        if (isset($this->pageIds[$key])) {
+            return $this->pageIds[$key];
+        }
+
+        $stmt = $this->pdo->prepare('SELECT id FROM pages WHERE user_id = ? AND name = ? ORDER BY id ASC LIMIT 1');
+        $stmt->execute([$this->userId, $name]);
+        $pageId = $stmt->fetchColumn();
+
+        if ($pageId === false) {
+            $this->beginChunk();
+            $stmt = $this->pdo->prepare('
+                INSERT INTO pages (user_id, name, sort_order)
+                SELECT ?, ?, COALESCE(MAX(sort_order), 0) + 1 FROM pages WHERE user_id = ?
+            ');
+            $stmt->execute([$this->userId, $name, $this->userId]);
+            $pageId = $this->pdo->lastInsertId();
+            $this->summary['pages_created']++;
+        }
+
+        return $this->pageIds[$key] = (int)$pageId;
+    }
+
+    /**
+     * The category for a folder path, created on first use. Bookmarks outside any
+     * folder go to the "Imported" page, and those directly in a top-level folder
+     * to a category named after it.
+     */
+    private function getCategoryId(array $path) {
+        if (!$path) {
+            $path = [self::DEFAULT_PAGE_NAME];
+        }
+        $pageId = $this->getPageId($path[0]);
+        $name = self::cleanName(count($path) > 1 ? implode(' / ', array_slice($path, 1)) : $path[0]);
+        $key = $pageId . ':' . self::lower($name);
+        if (isset($this->categoryIds[$key])) {
+            return $this->categoryIds[$key];
+        }
+
+        $stmt = $this->pdo->prepare('
+            SELECT id
+            FROM categories
+            WHERE user_id = ? AND page_id = ? AND name = ? AND deleted_at IS NULL
+            ORDER BY id ASC
+            LIMIT 1
+        ');
+        $stmt->execute([$this->userId, $pageId, $name]);
+        $categoryId = $stmt->fetchColumn();
+
+        if ($categoryId === false) {
+            $this->beginChunk();
+            $stmt = $this->pdo->prepare('
+                INSERT INTO categories (user_id, name, page_id, sort_order)
+                SELECT ?, ?, ?, COALESCE(MAX(sort_order), 0) + 1
+                FROM categories
+                WHERE page_id = ? AND user_id = ? AND deleted_at IS NULL
+            ');
+            $stmt->execute([$this->userId, $name, $pageId, $pageId, $this->userId]);
+            $categoryId = $this->pdo->lastInsertId();
+            $this->summary['categories_created']++;
+        }
+
+        return $this->categoryIds[$key] = (int)$categoryId;
+    }
+
+    private static function cleanName($name) {
+        $name = trim((string)$name);
+        $name = function_exists('mb_substr') ? mb_substr($name, 0, self::NAME_LENGTH, 'UTF-8') : substr($name, 0, self::NAME_LENGTH);
+        return $name !== '' ? $name : 'Untitled';
+    }
+
+    private static function lower($name) {
+        return function_exists('mb_strtolower') ? mb_strtolower($name, 'UTF-8') : strtolower($name);
+    }
+}
+
+/**
+ * Reads a Netscape bookmark file, the HTML format every browser exports, one
+ * tag at a time.
+ */
+class NetscapeBookmarkReader {
+    private const READ_SIZE = 65536;
+    // Browsers embed icons as data URIs in the <A> tag
+    private const MAX_TAG_SIZE = 4194304;
+    private const MAX_TEXT_LENGTH = 4096;
+
+    private $stream;
+
+    public function __construct($stream) {
+        $this->stream = $stream;
+    }
+
+    /**
+     * Yields ['type' => 'folder', 'path' => [...]] when a folder opens and
+     * ['type' => 'bookmark', 'path', 'url', 'title', 'description'] for each link.
+     */
+    public function entries() {
+        // One entry per open <DL>; null for lists without a folder heading, such as the root
+        $lists = [];
+        $folderName = null;
+        $capture = null;
+        $text = '';
+        $href = '';
+        // A finished link is held until it is clear that no <DD> description follows
+        $link = null;
+
+        foreach ($this->tokens() as $token) {
+            if ($token[0] === 'text') {
+                if ($capture !== null && strlen($text) < self::MAX_TEXT_LENGTH) {
+                    $text .= $token[1];
+                }
+                continue;
+            }
+
+            [, $name, $attributes, $closing] = $token;
+            if ($capture === 'description') {
+                $link['description'] = self::decode($text);
+                $capture = null;
+            }
+            if ($link !== null && $capture === null && !($name === 'dd' && !$closing)) {
+                yield $link;
+                $link = null;
+            }
+
+            if ($name === 'h3') {
+                if (!$closing) {
+                    $capture = 'folder';
+                    $text = '';
+                } elseif ($capture === 'folder') {
+                    $folderName = self::decode($text);
+                    $capture = null;
+                }
+            } elseif ($name === 'dl') {
+                if (!$closing) {
+                    $lists[] = $folderName;
+                    if ($folderName !== null) {
+                        yield ['type' => 'folder', 'path' => self::getPath($lists)];
+                    }
+                    $folderName = null;
+                } else {
+                    array_pop($lists);
+                }
+            } elseif ($name === 'a') {
+                if (!$closing) {
+                    $capture = 'link';
+                    $text = '';
+                    $href = self::getAttribute($attributes, 'href');
+                } elseif ($capture === 'link') {
+                    $link = [
+                        'type' => 'bookmark',
+                        'path' => self::getPath($lists),
+                        'url' => $href,
+                        'title' => self::decode($text),
+                        'description' => '',
+                    ];
+                    $capture = null;
+                }
+            } elseif ($name === 'dd' && !$closing && $link !== null) {
+                $capture = 'description';
+                $text = '';
+            }
+        }
+
+        if ($capture === 'description') {
+            $link['description'] = self::decode($text);
+        }
+        if ($link !== null) {
+            yield $link;
+        }
+    }
+
+    /**
+     * Tags as ['tag', name, attributes, closing] and the text between them as ['text', text].
+     */
+    private function tokens() {
+        $buffer = '';
+        $offset = 0;
+        $eof = false;
+
+        while (true) {
+            $length = strlen($buffer);
+            if ($offset < $length) {
+                if ($buffer[$offset] === '<') {
+                    $end = strpos($buffer, '>', $offset);
+                    if ($end !== false) {
+                        $tag = substr($buffer, $offset + 1, $end - $offset - 1);
+                        $offset = $end + 1;
+                        // Comments, the doctype and other declarations do not match
+                        if (preg_match('~^(/?)([a-z][a-z0-9]*)\b(.*)$~is', $tag, $m)) {
+                            yield ['tag', strtolower($m[2]), $m[3], $m[1] === '/'];
+                        }
+                        continue;
+                    }
+                } else {
+                    $end = strpos($buffer, '<', $offset);
+                    if ($end !== false || $eof || $length - $offset >= self::READ_SIZE) {
+                        $end = $end === false ? $length : $end;
+                        yield ['text', substr($buffer, $offset, $end - $offset)];
+                        $offset = $end;
+                        continue;
+                    }
+                }
+            }
+
+            if ($eof) {
+                return;
+            }
+
+            // Keep only the unfinished token and read on
+            $buffer = substr($buffer, $offset);
+            $offset = 0;
+            if (strlen($buffer) > self::MAX_TAG_SIZE) {
+                throw new RuntimeException('The bookmark file contains a tag that is too large');
+            }
+            $chunk = fread($this->stream, self::READ_SIZE);
+            if ($chunk === false || $chunk === '') {
+                $eof = true;
+            } else {
+                $buffer .= $chunk;
+            }
+        }
+    }
+
+    private static function getPath(array $lists) {
+        return array_values(array_filter($lists, function ($name) {
+            return $name !== null;
+        }));
+    }
+
+    private static function getAttribute($attributes, $name) {
+        if (!preg_match('~\b' . $name . '\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))~i', $attributes, $m)) {
+            return '';
+        }
+
+        return html_entity_decode(end($m), ENT_QUOTES | ENT_HTML5, 'UTF-8');
+    }
+
+    private static function decode($text) {
+        $text = html_entity_decode($text, ENT_QUOTES | ENT_HTML5, 'UTF-8');
+        return trim(preg_replace('/\s+/u', ' ', $text) ?? $text);
+    }
+}
+
+/**
+ * Reads the JSON Lines files written by BookmarkExporter, one record per line.
+ */
+class JsonBookmarkReader {
+    private $stream;
+
+    public function __construct($stream) {
+        $this->stream = $stream;
+    }
+
+    /**
+     * Yields the same entries as NetscapeBookmarkReader. The header line and
+     * record types this version does not know are skipped.
+     */
+    public function entries() {
+        $lineNumber = 0;
+        while (($line = fgets($this->stream)) !== false) {
+            $lineNumber++;
+            if ($lineNumber === 1) {
+                $line = preg_replace('/^\xEF\xBB\xBF/', '', $line);
+            }
+            $line = trim($line);
+            if ($line === '') {
+                continue;
+            }
+
+            $record = json_decode($line, true);
+            if (!is_array($record)) {
+                throw new RuntimeException("Line {$lineNumber} is not valid JSON");
+            }
+
+            $type = $record['type'] ?? '';
+            if ($type === 'page') {
+                yield ['type' => 'folder', 'path' => [(string)($record['page'] ?? '')]];
+            } elseif ($type === 'category') {
+                yield ['type' => 'folder', 'path' => [(string)($record['page'] ?? ''), (string)($record['category'] ?? '')]];
+            } elseif ($type === 'bookmark') {
+                yield [
+                    'type' => 'bookmark',
+                    'path' => [(string)($record['page'] ?? ''), (string)($record['category'] ?? '')],
+                    'url' => (string)($record['url'] ?? ''),
+                    'title' => (string)($record['title'] ?? ''),
+                    'description' => (string)($record['description'] ?? ''),
+                    'color' => (int)($record['color'] ?? 0),
+                ];
+            }
+        }
+    }
+}
+?>
@@ -0,0 +1,185 @@
+<?php
+/**
+ * Bookmark Writer
+ * Adds bookmarks at the end of their category.
+ *
+ * A single bookmark is added with one INSERT ... SELECT, which checks that the
+ * category is the user's and not in Trash and takes the next position in the
+ * same statement, so concurrent adds cannot receive the same sort_order. Bulk
+ * adds lock the category row, read the next position once and insert the rows
+ * with multi-row INSERTs. Favicons are not resolved here: rows are stored
+ * without one and their icons are queued through FaviconRefreshQueue.
+ */
+
+class BookmarkWriter {
+    public const MAX_FIELD_LENGTH = 200;
+    private const INSERT_CHUNK_SIZE = 200;
+    private const DEADLOCK_RETRIES = 2;
+
+    private $pdo;
+    private $userId;
+
+    public function __construct($pdo, $userId) {
+        $this->pdo = $pdo;
+        $this->userId = (int)$userId;
+    }
+
+    /**
+     * Add one bookmark to the end of a category. $bookmark holds url and optionally
+     * title, description and color. Returns the new ID, or null when the category
+     * is not an active category of the user.
+     */
+    public function add($categoryId, array $bookmark) {
+        $row = self::prepareRow($bookmark);
+        $stmt = $this->pdo->prepare("
+            INSERT INTO bookmarks (user_id, title, url, description, favicon_url, category_id, color, sort_order, created_at, updated_at)
+            SELECT c.user_id, ?, ?, ?, '', c.id, ?,
+                COALESCE((SELECT MAX(b.sort_order) + 1 FROM bookmarks b WHERE b.category_id = c.id AND b.user_id = c.user_id), 0),
+                CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+            FROM categories c
+            WHERE c.id = ? AND c.user_id = ? AND c.deleted_at IS NULL
+        ");
+        $params = [$row['title'], $row['url'], $row['description'], $row['color'], (int)$categoryId, $this->userId];
+
+        // Two adds to the same category can deadlock on the position read; the loser runs again
+        for ($attempt = 0; ; $attempt++) {
+            try {
+                $stmt->execute($params);
+                break;
+            } catch (PDOException $e) {
+                if ($attempt >= self::DEADLOCK_RETRIES || !self::isDeadlock($e)) {
+                    throw $e;
+                }
+            }
+        }
+
+        return $stmt->rowCount() > 0 ? (int)$this->pdo->lastInsertId() : null;
+    }
+
+    /**
+     * Add bookmarks to the end of a category in the given order. Returns their IDs
+     * in the same order, or null when the category is not an active category of the user.
+     */
+    public function addMany($categoryId, array $bookmarks) {
+        $categoryId = (int)$categoryId;
+        $rows = array_map([self::class, 'prepareRow'], array_values($bookmarks));
+
+        $this->pdo->beginTransaction();
+        try {
+            // Single adds read the category row too, so they wait until these positions are taken
+            $stmt = $this->pdo->prepare('
+                SELECT id
+                FROM categories
+                WHERE id = ? AND user_id = ? AND deleted_at IS NULL
+                FOR UPDATE
+            ');
+            $stmt->execute([$categoryId, $this->userId]);
+            if ($stmt->fetchColumn() === false) {
+                $this->pdo->rollBack();
+                return null;
+            }
+
+            $stmt = $this->pdo->prepare('SELECT COALESCE(MAX(sort_order) + 1, 0) FROM bookmarks WHERE category_id = ? AND user_id = ?');
+            $stmt->execute([$categoryId, $this->userId]);
+            $firstOrder = (int)$stmt->fetchColumn();
+
+            foreach (array_chunk($rows, self::INSERT_CHUNK_SIZE, true) as $chunk) {
+                $params = [];
+                foreach ($chunk as $index => $row) {
+                    array_push(
+                        $params,
+                        $this->userId,
+                        $row['title'],
+                        $row['url'],
+                        $row['description'],
+                        $categoryId,
+                        $row['color'],
+                        $firstOrder + $index
+                    );
+                }
+                $values = implode(', ', array_fill(0, count($chunk), "(?, ?, ?, ?, '', ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"));
+                $stmt = $this->pdo->prepare(
+                    'INSERT INTO bookmarks (user_id, title, url, description, favicon_url, category_id, color, sort_order, created_at, updated_at) VALUES ' . $values
+                );
+                $stmt->execute($params);
+            }
+
+            // Positions are unique while the category is locked; auto-increment IDs need not be consecutive
+            $stmt = $this->pdo->prepare('
+                SELECT id, sort_order
+                FROM bookmarks
+                WHERE category_id = ? AND user_id = ? AND sort_order >= ?
+            ');
+            $stmt->execute([$categoryId, $this->userId, $firstOrder]);
+            $idsByOrder = [];
+            foreach ($stmt->fetchAll(PDO::FETCH_ASSOC) as $inserted) {
+                $idsByOrder[(int)$inserted['sort_order']] = (int)$inserted['id'];
+            }
+
+            $this->pdo->commit();
+        } catch (Exception $e) {
+            $this->pdo->rollBack();
+            throw $e;
+        }
+
+        $ids = [];
+        foreach (array_keys($rows) as $index) {
+            $ids[] = $idsByOrder[$firstOrder + $index];
+        }
+        return $ids;
+    }
+
+    /**
+     * Trim a submitted URL and expand shorthand like "https:example.com".
+     * Throws InvalidArgumentException when it is not a URL with a host.
+     */
+    public static function normalizeUrl($url) {
+        $url = trim((string)$url);
+        if (preg_match('~^(https?):([^/].*)$~i', $url, $m)) {
+            $url = $m[1] . '://' . $m[2];
+        }
+
+        if (!filter_var($url, FILTER_VALIDATE_URL)) {
+            throw new InvalidArgumentException('Invalid URL format');
+        }
+        // filter_var can accept odd strings without a host
+        if (!parse_url($url, PHP_URL_HOST)) {
+            throw new InvalidArgumentException('Invalid URL host');
+        }
+
+        return $url;
+    }
+
+    /**
+     * Column values for a bookmark: fields cut to MAX_FIELD_LENGTH, the host as the
+     * title when none is given, and null for the default color.
+     */
+    public static function prepareRow(array $bookmark) {
+        $url = (string)$bookmark['url'];
+        $title = trim((string)($bookmark['title'] ?? ''));
+        $color = (int)($bookmark['color'] ?? 0);
+
+        return [
+            'url' => self::truncate($url),
+            'title' => self::truncate($title !== '' ? $title : (string)parse_url($url, PHP_URL_HOST)),
+            'description' => self::truncate(trim((string)($bookmark['description'] ?? ''))),
+            // 0 or no color means the default
+            'color' => $color > 0 ? $color : null,
+        ];
+    }
+
+    /**
+     * Cut text to MAX_FIELD_LENGTH without splitting a multibyte character, which
+     * the database would reject.
+     */
+    public static function truncate($text) {
+        return function_exists('mb_substr')
+            ? mb_substr((string)$text, 0, self::MAX_FIELD_LENGTH, 'UTF-8')
+            : substr((string)$text, 0, self::MAX_FIELD_LENGTH);
+    }
+
+    private static function isDeadlock(PDOException $e) {
+        return $e->getCode() === '40001' || (int)($e->errorInfo[1] ?? 0) === 1213;
+    }
+}
+?>
@@ -0,0 +1,338 @@
+<?php
+/**
+ * Click Buffer
+ * Batched bookmark click writes with an optional write-behind buffer.
+ *
+ * Without a buffer, every batch is applied at once with one UPDATE per
+ * user. With STARTPAGE_CLICK_BUFFER set to "apcu" or "file", clicks are
+ * collected first and written at most once per flush interval, either by the
+ * request that finds the interval elapsed or by tools/flush-click-buffer.php.
+ * File logs hold every user's clicks, so they live in private storage.
+ */
+
+require_once __DIR__ . '/../private_storage.php';
+require_once __DIR__ . '/index-render-cache.php';
+
+class ClickBuffer {
+    private const APCU_PREFIX = 'startpage:clicks:';
+    private const MAX_CLICKS_PER_BOOKMARK = 100;
+    private const MAX_BOOKMARKS_PER_BATCH = 500;
+    private const UPDATE_CHUNK_SIZE = 500;
+
+    private $backend;
+    private $bufferDir;
+    private $flushInterval;
+
+    public function __construct($backend = 'file', $bufferDir = null, $flushInterval = 60) {
+        if (!in_array($backend, ['apcu', 'file'], true)) {
+            throw new InvalidArgumentException('Unknown click buffer backend: ' . $backend);
+        }
+        if ($backend === 'apcu' && !(function_exists('apcu_enabled') && apcu_enabled())) {
+            throw new RuntimeException('APCu is not available for the click buffer');
+        }
+
+        $this->backend = $backend;
+        $this->bufferDir = rtrim($bufferDir ?? getPrivateStoragePath('clicks'), '/\\') . '/';
+        $this->flushInterval = max(1, (int)$flushInterval);
+    }
+
+    /**
+     * Create the buffer configured by STARTPAGE_CLICK_BUFFER, or null when clicks are written directly.
+     */
+    public static function fromEnvironment() {
+        $backend = strtolower(trim((string)getenv('STARTPAGE_CLICK_BUFFER')));
+        if ($backend === '' || $backend === 'off') {
+            return null;
+        }
+
+        $flushInterval = (int)(getenv('STARTPAGE_CLICK_FLUSH_INTERVAL') ?: 60);
+
+        try {
+            return new self($backend, null, $flushInterval);
+        } catch (Exception $e) {
+            error_log('Click buffer disabled: ' . $e->getMessage());
+            return null;
+        }
+    }
+
+    /**
+     * Delete click logs earlier versions buffered in the web-served cache/clicks/.
+     */
+    public static function removeLegacyFiles() {
+        $legacyDir = dirname(__DIR__, 2) . '/cache/clicks';
+        if (!is_dir($legacyDir)) {
+            return 0;
+        }
+
+        $deleted = 0;
+        foreach (glob($legacyDir . '/*') ?: [] as $file) {
+            if (is_file($file) && @unlink($file)) {
+                $deleted++;
+            }
+        }
+        @rmdir($legacyDir);
+
+        return $deleted;
+    }
+
+    /**
+     * Turn a client batch into bookmark ID => click count, dropping invalid entries.
+     */
+    public static function normalizeClicks($clicks) {
+        if (!is_array($clicks)) {
+            return [];
+        }
+
+        $normalized = [];
+        foreach ($clicks as $click) {
+            $bookmarkId = (int)($click['id'] ?? 0);
+            $count = (int)($click['count'] ?? 1);
+            if ($bookmarkId <= 0 || $count <= 0) {
+                continue;
+            }
+            $normalized[$bookmarkId] = min(self::MAX_CLICKS_PER_BOOKMARK, ($normalized[$bookmarkId] ?? 0) + $count);
+            if (count($normalized) >= self::MAX_BOOKMARKS_PER_BATCH) {
+                break;
+            }
+        }
+
+        return $normalized;
+    }
+
+    /**
+     * Add clicks to the user's bookmarks in one UPDATE per chunk.
+     * $clicks maps bookmark ID => ['count' => int, 'clicked_at' => unix time].
+     * Bookmarks that are not owned by the user or are in Trash are skipped.
+     */
+    public static function apply($pdo, $userId, array $clicks) {
+        $updated = 0;
+        foreach (array_chunk($clicks, self::UPDATE_CHUNK_SIZE, true) as $chunk) {
+            $countCases = [];
+            $timeCases = [];
+            $countParams = [];
+            $timeParams = [];
+            foreach ($chunk as $bookmarkId => $click) {
+                $countCases[] = 'WHEN ? THEN ?';
+                $countParams[] = (int)$bookmarkId;
+                $countParams[] = (int)$click['count'];
+                $timeCases[] = 'WHEN ? THEN FROM_UNIXTIME(?)';
+                $timeParams[] = (int)$bookmarkId;
+                $timeParams[] = (int)$click['clicked_at'];
+            }
+            $placeholders = implode(', ', array_fill(0, count($chunk), '?'));
+
+            $stmt = $pdo->prepare('
+                UPDATE bookmarks b
+                JOIN categories c ON c.id = b.category_id AND c.user_id = b.user_id AND c.deleted_at IS NULL
+                SET b.click_count = COALESCE(b.click_count, 0) + CASE b.id ' . implode(' ', $countCases) . ' ELSE 0 END,
+                    b.last_clicked_at = GREATEST(
+                        COALESCE(b.last_clicked_at, FROM_UNIXTIME(0)),
+                        CASE b.id ' . implode(' ', $timeCases) . ' END
+                    )
+                WHERE b.user_id = ? AND b.id IN (' . $placeholders . ')
+            ');
+            $stmt->execute(array_merge(
+                $countParams,
+                $timeParams,
+                [(int)$userId],
+                array_map('intval', array_keys($chunk))
+            ));
+            $updated += $stmt->rowCount();
+        }
+
+        if ($updated > 0) {
+            IndexRenderCache::recordClickWrite($pdo, $userId);
+        }
+
+        return $updated;
+    }
+
+    /**
+     * Buffer clicks for a later flush.
+     */
+    public function add($userId, array $clicks, $clickedAt) {
+        if ($this->backend === 'apcu') {
+            foreach ($clicks as $bookmarkId => $count) {
+                $key = (int)$userId . ':' . (int)$bookmarkId;
+                $success = false;
+                apcu_inc(self::APCU_PREFIX . 'count:' . $key, $count, $success);
+                if (!$success && !apcu_add(self::APCU_PREFIX . 'count:' . $key, $count)) {
+                    apcu_inc(self::APCU_PREFIX . 'count:' . $key, $count);
+                }
+                apcu_store(self::APCU_PREFIX . 'time:' . $key, (int)$clickedAt);
+            }
+            return;
+        }
+
+        $this->ensureBufferDir();
+        $line = json_encode(['user_id' => (int)$userId, 'clicks' => $clicks, 'clicked_at' => (int)$clickedAt]) . "\n";
+        file_put_contents($this->bufferDir . 'pending.log', $line, FILE_APPEND | LOCK_EX);
+    }
+
+    /**
+     * Flush when the interval has elapsed; only one request per interval does the work.
+     */
+    public function flushIfDue($pdo) {
+        if ($this->backend === 'apcu') {
+            if (!apcu_add(self::APCU_PREFIX . 'flush-due', time(), $this->flushInterval)) {
+                return 0;
+            }
+        } else {
+            $this->ensureBufferDir();
+            $stampPath = $this->bufferDir . 'last-flush';
+            if (is_file($stampPath) && filemtime($stampPath) > time() - $this->flushInterval) {
+                return 0;
+            }
+            touch($stampPath);
+        }
+
+        return $this->flush($pdo, false);
+    }
+
+    /**
+     * Write every buffered click to the database and return the number of updated bookmarks.
+     * With $wait false, a flush already in progress elsewhere makes this a no-op.
+     */
+    public function flush($pdo, $wait = true) {
+        return $this->withFlushLock($wait, function () use ($pdo) {
+            return $this->flushLocked($pdo);
+        });
+    }
+
+    private function flushLocked($pdo) {
+        if ($this->backend === 'apcu') {
+            $clicksByUser = $this->drainApcu();
+            $files = [];
+        } else {
+            [$clicksByUser, $files] = $this->drainFiles();
+        }
+
+        $updated = 0;
+        $pdo->beginTransaction();
+        try {
+            foreach ($clicksByUser as $userId => $clicks) {
+                $updated += self::apply($pdo, $userId, $clicks);
+            }
+            $pdo->commit();
+        } catch (Exception $e) {
+            $pdo->rollBack();
+            // Put drained APCu clicks back; file logs stay on disk for the next flush
+            foreach ($this->backend === 'apcu' ? $clicksByUser : [] as $userId => $clicks) {
+                foreach ($clicks as $bookmarkId => $click) {
+                    $this->add($userId, [$bookmarkId => $click['count']], $click['clicked_at']);
+                }
+            }
+            throw $e;
+        }
+
+        // Logs are removed only after every update succeeded
+        foreach ($files as $file) {
+            @unlink($file);
+        }
+
+        return $updated;
+    }
+
+    private function drainApcu() {
+        $clicksByUser = [];
+        $pattern = '/^' . preg_quote(self::APCU_PREFIX . 'count:', '/') . '(\d+):(\d+)$/';
+        foreach (new APCUIterator($pattern, APC_ITER_KEY | APC_ITER_VALUE) as $key => $entry) {
+            if (!preg_match($pattern, $key, $matches)) {
+                continue;
+            }
+            $count = (int)$entry['value'];
+            if ($count <= 0) {
+                continue;
+            }
+
+            // Decrement rather than delete, so clicks added during the flush are kept
+            apcu_dec($key, $count);
+            $clickedAt = apcu_fetch(self::APCU_PREFIX . 'time:' . $matches[1] . ':' . $matches[2]) ?: time();
+            $clicksByUser[(int)$matches[1]][(int)$matches[2]] = ['count' => $count, 'clicked_at' => (int)$clickedAt];
+        }
+
+        return $clicksByUser;
+    }
+
+    private function drainFiles() {
+        $this->ensureBufferDir();
+        $pendingPath = $this->bufferDir . 'pending.log';
+
+        // Copy the log aside and truncate it under the lock writers append with,
+        // so no click lands in a file that is already being flushed
+        if (is_file($pendingPath)) {
+            $handle = fopen($pendingPath, 'r+');
+            if ($handle !== false) {
+                flock($handle, LOCK_EX);
+                $contents = stream_get_contents($handle);
+                if ($contents !== '' && $contents !== false) {
+                    $flushingPath = $this->bufferDir . 'flushing-' . date('YmdHis') . '-' . bin2hex(random_bytes(4)) . '.log';
+                    if (file_put_contents($flushingPath, $contents) === strlen($contents)) {
+                        ftruncate($handle, 0);
+                    }
+                }
+                flock($handle, LOCK_UN);
+                fclose($handle);
+            }
+        }
+
+        // Logs left behind by an interrupted flush are picked up again
+        $clicksByUser = [];
+        $files = glob($this->bufferDir . 'flushing-*.log') ?: [];
+        foreach ($files as $file) {
+            foreach (file($file, FILE_IGNORE_NEW_LINES | FILE_SKIP_EMPTY_LINES) ?: [] as $line) {
+                $entry = json_decode($line, true);
+                if (!is_array($entry) || !isset($entry['user_id'], $entry['clicks'])) {
+                    continue;
+                }
+                foreach ($entry['clicks'] as $bookmarkId => $count) {
+                    $current = $clicksByUser[(int)$entry['user_id']][(int)$bookmarkId] ?? ['count' => 0, 'clicked_at' => 0];
+                    $clicksByUser[(int)$entry['user_id']][(int)$bookmarkId] = [
+                        'count' => $current['count'] + (int)$count,
+                        'clicked_at' => max($current['clicked_at'], (int)($entry['clicked_at'] ?? time()))
+                    ];
+                }
+            }
+        }
+
+        return [$clicksByUser, $files];
+    }
+
+    private function withFlushLock($wait, callable $callback) {
+        if ($this->backend === 'apcu') {
+            // The lock expires on its own if a flush dies without releasing it
+            while (!apcu_add(self::APCU_PREFIX . 'flush-lock', getmypid(), 300)) {
+                if (!$wait) {
+                    return 0;
+                }
+                usleep(100000);
+            }
+
+            try {
+                return $callback();
+            } finally {
+                apcu_delete(self::APCU_PREFIX . 'flush-lock');
+            }
+        }
+
+        $this->ensureBufferDir();
+        $lock = fopen($this->bufferDir . 'flush.lock', 'c');
+        if ($lock === false || !flock($lock, $wait ? LOCK_EX : LOCK_EX | LOCK_NB)) {
+            return 0;
+        }
+
+        try {
+            return $callback();
+        } finally {
+            flock($lock, LOCK_UN);
+            fclose($lock);
+        }
+    }
+
+    private function ensureBufferDir() {
+        if (!is_dir($this->bufferDir)) {
+            @mkdir($this->bufferDir, 0700, true);
+        }
+    }
+}
+?>
@@ -0,0 +1,203 @@
+<?php
+/**
+ * Favicon Refresh Queue
+ * Resolves bookmark favicons through the background job queue.
+ *
+ * Bookmarks are grouped by origin, so each site is resolved once no matter how
+ * many bookmarks point at it. New icons replace cached files in place and the
+ * bookmark rows are updated as each origin finishes; nothing is cleared up front.
+ * Newly added bookmarks are queued under their own job type, which workers take
+ * first and which reuses icons already in the cache. Such a job invalidates only
+ * the render caches of the bookmarks' owners.
+ */
+
+require_once __DIR__ . '/job-queue.php';
+require_once __DIR__ . '/index-render-cache.php';
+require_once __DIR__ . '/../favicon/favicon-config.php';
+
+class FaviconRefreshQueue {
+    public const JOB_TYPE = 'favicon_refresh';
+    public const NEW_BOOKMARK_JOB_TYPE = 'favicon_new';
+    private const UPDATE_CHUNK_SIZE = 500;
+
+    private $pdo;
+    private $queue;
+
+    public function __construct($pdo, $queue = null) {
+        $this->pdo = $pdo;
+        $this->queue = $queue ?: new JobQueue($pdo);
+    }
+
+    /**
+     * Queue a refresh of all bookmarks, one job per origin.
+     * While a refresh is still running, its batch ID is returned instead of starting another.
+     */
+    public function enqueueAll() {
+        $activeBatchId = $this->queue->findActiveBatchId(self::JOB_TYPE);
+        if ($activeBatchId !== null) {
+            return $activeBatchId;
+        }
+
+        $jobs = [];
+        $stmt = $this->pdo->query('SELECT id, url FROM bookmarks ORDER BY id ASC');
+        while ($bookmark = $stmt->fetch(PDO::FETCH_ASSOC)) {
+            $origin = self::getOrigin($bookmark['url']);
+            if ($origin === '') {
+                continue;
+            }
+            if (!isset($jobs[$origin])) {
+                // The oldest bookmark's URL stands in for its origin
+                $jobs[$origin] = ['url' => $bookmark['url'], 'bookmark_ids' => []];
+            }
+            $jobs[$origin]['bookmark_ids'][] = (int)$bookmark['id'];
+        }
+
+        return $this->queue->createBatch(self::JOB_TYPE, $jobs);
+    }
+
+    /**
+     * Queue icon resolution for newly added bookmarks. $bookmarkUrls maps bookmark IDs
+     * to their URLs. Returns the batch ID, or null when no URL has a host.
+     */
+    public function enqueueBookmarks(array $bookmarkUrls) {
+        $jobs = [];
+        foreach ($bookmarkUrls as $bookmarkId => $url) {
+            $origin = self::getOrigin($url);
+            if ($origin === '') {
+                continue;
+            }
+            if (!isset($jobs[$origin])) {
+                $jobs[$origin] = ['url' => $url, 'bookmark_ids' => []];
+            }
+            $jobs[$origin]['bookmark_ids'][] = (int)$bookmarkId;
+        }
+
+        return $jobs ? $this->queue->createBatch(self::NEW_BOOKMARK_JOB_TYPE, $jobs) : null;
+    }
+
+    /**
+     * Whether any favicon job, new bookmark or refresh, is waiting for a worker.
+     */
+    public function hasQueuedJobs() {
+        return $this->queue->hasAvailableJobs(self::NEW_BOOKMARK_JOB_TYPE)
+            || $this->queue->hasAvailableJobs(self::JOB_TYPE);
+    }
+
+    public function getProgress($batchId = null) {
+        $batchId = $batchId ?? $this->queue->findLatestBatchId(self::JOB_TYPE);
+        return $batchId === null ? null : $this->queue->getProgress($batchId);
+    }
+
+    /**
+     * Claim and run one job, new bookmarks before refreshes. With $batchId, only a new-bookmark
+     * job of that batch is claimed. Returns the type of the job run, or null when none was available.
+     */
+    public function processNext($resolver, $workerId, $batchId = null) {
+        $job = $this->queue->reserve(self::NEW_BOOKMARK_JOB_TYPE, $workerId, 300, $batchId);
+        if (!$job && $batchId === null) {
+            $job = $this->queue->reserve(self::JOB_TYPE, $workerId);
+        }
+        if (!$job) {
+            return null;
+        }
+
+        try {
+            // A new bookmark can use the cached icon of its site; a refresh fetches it again
+            $forceRefresh = $job['type'] === self::JOB_TYPE;
+            $result = $this->refreshOrigin($resolver, $job['payload'], $forceRefresh);
+            if (!$forceRefresh && $result['updated'] > 0) {
+                $this->invalidateOwners($job['payload']['bookmark_ids']);
+            }
+            $this->queue->complete($job, $result);
+        } catch (Exception $e) {
+            $this->queue->fail($job, $e->getMessage());
+        }
+
+        return $job['type'];
+    }
+
+    /**
+     * New icons only change their owners' dashboards; refreshes are left to the caller,
+     * which invalidates every user's cache once per group of jobs.
+     */
+    private function invalidateOwners(array $bookmarkIds) {
+        $bookmarkIds = array_map('intval', $bookmarkIds);
+        $placeholders = implode(', ', array_fill(0, count($bookmarkIds), '?'));
+        $stmt = $this->pdo->prepare('SELECT DISTINCT user_id FROM bookmarks WHERE id IN (' . $placeholders . ')');
+        $stmt->execute($bookmarkIds);
+        foreach ($stmt->fetchAll(PDO::FETCH_COLUMN) as $userId) {
+            IndexRenderCache::invalidate($this->pdo, (int)$userId);
+        }
+    }
+
+    private function refreshOrigin($resolver, array $payload, $forceRefresh) {
+        $bookmarkIds = array_map('intval', $payload['bookmark_ids'] ?? []);
+        if (($payload['url'] ?? '') === '' || !$bookmarkIds) {
+            return ['updated' => 0];
+        }
+
+        $resolved = $resolver->resolveForUrl($payload['url'], $forceRefresh);
+        $faviconUrl = FaviconConfig::normalizeStoredFaviconUrl($resolved['favicon_url']);
+        $isFallback = in_array($resolved['source'], ['generated', 'external-fallback'], true);
+
+        $updated = 0;
+        foreach (array_chunk($bookmarkIds, self::UPDATE_CHUNK_SIZE) as $chunk) {
+            $placeholders = implode(', ', array_fill(0, count($chunk), '?'));
+            $params = array_merge([$faviconUrl], $chunk);
+            $sql = 'UPDATE bookmarks SET favicon_url = ? WHERE id IN (' . $placeholders . ')';
+
+            // A site that is down right now should not cost bookmarks the icon they already have
+            if ($isFallback) {
+                $keep = $this->findBookmarksWithCachedIcons($chunk);
+                if ($keep) {
+                    $sql .= ' AND id NOT IN (' . implode(', ', array_fill(0, count($keep), '?')) . ')';
+                    $params = array_merge($params, $keep);
+                }
+            }
+
+            $stmt = $this->pdo->prepare($sql);
+            $stmt->execute($params);
+            $updated += $stmt->rowCount();
+        }
+
+        return [
+            'updated' => $updated,
+            'source' => $resolved['source'],
+            'favicon_url' => $faviconUrl,
+        ];
+    }
+
+    private function findBookmarksWithCachedIcons(array $bookmarkIds) {
+        $placeholders = implode(', ', array_fill(0, count($bookmarkIds), '?'));
+        $stmt = $this->pdo->prepare('SELECT id, favicon_url FROM bookmarks WHERE id IN (' . $placeholders . ')');
+        $stmt->execute($bookmarkIds);
+
+        $cached = [];
+        foreach ($stmt->fetchAll(PDO::FETCH_ASSOC) as $row) {
+            if (strpos(FaviconConfig::getRenderableStoredFaviconUrl($row['favicon_url']), 'cache/') === 0) {
+                $cached[] = (int)$row['id'];
+            }
+        }
+
+        return $cached;
+    }
+
+    /**
+     * Lowercased scheme, host and port; URLs without a scheme are treated as https.
+     */
+    public static function getOrigin($url) {
+        $url = trim((string)$url);
+        if ($url !== '' && !preg_match('~^https?://~i', $url)) {
+            $url = 'https://' . ltrim($url, '/');
+        }
+
+        $parsed = parse_url($url);
+        if (!$parsed || empty($parsed['host'])) {
+            return '';
+        }
+
+        $port = isset($parsed['port']) ? ':' . $parsed['port'] : '';
+        return strtolower(($parsed['scheme'] ?? 'https') . '://' . $parsed['host']) . $port;
+    }
+}
+?>
@@ -4,10 +4,15 @@
  * Handles all database operations and data processing for the main index page
  */
 
+require_once __DIR__ . '/../favicon/favicon-bundle.php';
+
 class IndexDataService {
     private $pdo;
     private $currentUserId;
     private $currentPageId;
+    private $renderCache;
+    private $cacheVersion;
+    private $allPages;
     
     // Category width configuration - easily changeable in one place
     private $CATEGORY_WIDTHS = [
@@ -17,32 +22,37 @@ class IndexDataService {
         4 => 300   // Large
     ];
     
-    public function __construct($pdo, $currentUserId) {
+    // Usage buckets, in seconds since the last click
+    private const RECENT_USAGE_WINDOW = 3 * 86400;
+    private const FORTNIGHT_USAGE_WINDOW = 14 * 86400;
+    private const STALE_USAGE_MONTHS = 3;
+    
+    public function __construct($pdo, $currentUserId, $renderCache = null) {
         $this->pdo = $pdo;
         $this->currentUserId = $currentUserId;
+        $this->renderCache = $renderCache;
     }
     
     /**
      * Get or create default page for user
      */
     public function getCurrentPageId() {
-        // Get user's pages to determine default page
-        $stmt = $this->pdo->prepare('SELECT id FROM pages WHERE user_id = ? ORDER BY sort_order ASC, id ASC LIMIT 1');
-        $stmt->execute([$this->currentUserId]);
-        $userPage = $stmt->fetch(PDO::FETCH_ASSOC);
+        // The page list is already ordered, so its first entry is the default page
+        $userPages = $this->getAllPages();
         
         // Handle page selection via cookie
-        $currentPageId = $userPage ? $userPage['id'] : null; // Use user's first page as default
+        $currentPageId = $userPages ? $userPages[0]['id'] : null; // Use user's first page as default
         
         // Check if page cookie exists and belongs to current user
         if (isset($_COOKIE['startpage_current_page_id'])) {
             $cookiePageId = (int)$_COOKIE['startpage_current_page_id'];
             
             // Verify the page belongs to the current user
-            $stmt = $this->pdo->prepare('SELECT id FROM pages WHERE id = ? AND user_id = ?');
-            $stmt->execute([$cookiePageId, $this->currentUserId]);
-            if ($stmt->fetch()) {
-                $currentPageId = $cookiePageId;
+            foreach ($userPages as $page) {
+                if ((int)$page['id'] === $cookiePageId) {
+                    $currentPageId = $cookiePageId;
+                    break;
+                }
             }
         }
         
@@ -64,6 +74,8 @@ class IndexDataService {
                     $stmt = $this->pdo->prepare("INSERT INTO categories (user_id, name, page_id, sort_order) VALUES (?, ?, ?, ?)");
                     $stmt->execute([$this->currentUserId, $category[0], $currentPageId, $category[1]]);
                 }
+                
+                $this->invalidateRenderCache();
             } catch (Exception $e) {
                 // Handle error - could log this
                 $currentPageId = 1; // Fallback to admin page if creation fails
@@ -118,10 +130,98 @@ class IndexDataService {
         ];
     }
     
+    /**
+     * Whether only each category's visible bookmarks are rendered with the page,
+     * the rest being fetched when the category is expanded (STARTPAGE_LAZY_BOOKMARKS)
+     */
+    public static function isLazyRenderingEnabled() {
+        $setting = strtolower(trim((string)getenv('STARTPAGE_LAZY_BOOKMARKS')));
+        return $setting !== '' && $setting !== '0' && $setting !== 'off';
+    }
+    
+    /**
+     * Switch to another owned page, as if it had been chosen by cookie. Returns false
+     * when the page does not belong to the user.
+     */
+    public function selectPage($pageId) {
+        foreach ($this->getAllPages() as $page) {
+            if ((int)$page['id'] === (int)$pageId) {
+                $this->currentPageId = (int)$page['id'];
+                setcookie('startpage_current_page_id', $this->currentPageId, time() + (86400 * 365), '/');
+                return true;
+            }
+        }
+        return false;
+    }
+    
     /**
      * Get all categories and bookmarks for current page
      */
     public function getCategoriesAndBookmarks() {
+        $pageData = $this->getPageData($this->currentPageId);
+        
+        return [
+            'categories' => $pageData['categories'],
+            'bookmarksByCategory' => $pageData['bookmarksByCategory'],
+            'faviconBundle' => $pageData['favicon_bundle'] ?? ''
+        ];
+    }
+    
+    /**
+     * Get one category and its bookmarks, from the same cached page data as the
+     * dashboard. Returns null when the category is not an active category of the user.
+     */
+    public function getCategoryBookmarks($categoryId) {
+        foreach ($this->getCategoriesByPage() as $pageId => $pageCategories) {
+            foreach ($pageCategories['categories'] as $category) {
+                if ((int)$category['id'] !== (int)$categoryId) {
+                    continue;
+                }
+                
+                $pageData = $this->getPageData($pageId);
+                foreach ($pageData['categories'] as $pageCategory) {
+                    if ((int)$pageCategory['id'] === (int)$categoryId) {
+                        return [
+                            'category' => $pageCategory,
+                            'bookmarks' => $pageData['bookmarksByCategory'][$pageCategory['id']]
+                        ];
+                    }
+                }
+                return null;
+            }
+        }
+        return null;
+    }
+    
+    /**
+     * Load a page's grouped data through the render cache and add usage states
+     */
+    private function getPageData($pageId) {
+        $pageData = $this->remember('page-' . (int)$pageId, function () use ($pageId) {
+            return $this->loadCategoriesAndBookmarks($pageId);
+        });
+        
+        // Usage buckets depend on the current time, so they are never cached
+        $clicks = $this->renderCache ? $this->renderCache->getClicks($this->currentUserId) : [];
+        $now = time() + $pageData['db_clock_offset'];
+        foreach ($pageData['bookmarksByCategory'] as &$bookmarks) {
+            foreach ($bookmarks as &$bookmark) {
+                $clickedAt = $clicks[$bookmark['id']] ?? null;
+                if ($clickedAt !== null && ($bookmark['last_clicked_at'] === null || strcmp($clickedAt, $bookmark['last_clicked_at']) > 0)) {
+                    $bookmark['last_clicked_at'] = $clickedAt;
+                }
+                $bookmark['usage_state'] = $this->getUsageState($bookmark['last_clicked_at'], $now);
+            }
+        }
+        unset($bookmarks, $bookmark);
+        
+        return $pageData;
+    }
+    
+    /**
+     * Query and group a page's categories and bookmarks
+     */
+    private function loadCategoriesAndBookmarks($pageId) {
         // Get all data in one optimized query
         $stmt = $this->pdo->prepare('
             SELECT 
@@ -139,22 +239,20 @@ class IndexDataService {
                 b.favicon_url,
                 b.sort_order as bookmark_sort,
                 b.color as bookmark_color,
-                b.last_clicked_at,
-                CASE
-                    WHEN b.last_clicked_at >= DATE_SUB(CURRENT_TIMESTAMP, INTERVAL 3 DAY) THEN \'recent\'
-                    WHEN b.last_clicked_at >= DATE_SUB(CURRENT_TIMESTAMP, INTERVAL 14 DAY) THEN \'fortnight\'
-                    WHEN b.last_clicked_at IS NULL OR b.last_clicked_at < DATE_SUB(CURRENT_TIMESTAMP, INTERVAL 3 MONTH) THEN \'stale\'
-                    ELSE \'normal\'
-                END as bookmark_usage_state
+                b.last_clicked_at
             FROM categories c 
             JOIN pages p ON c.page_id = p.id AND p.user_id = ?
             LEFT JOIN bookmarks b ON c.id = b.category_id AND b.user_id = ?
             WHERE c.page_id = ? AND c.user_id = ? AND c.deleted_at IS NULL
             ORDER BY c.sort_order ASC, c.id ASC, b.sort_order ASC, b.id ASC
         ');
-        $stmt->execute([$this->currentUserId, $this->currentUserId, $this->currentPageId, $this->currentUserId]);
+        $stmt->execute([$this->currentUserId, $this->currentUserId, $pageId, $this->currentUserId]);
         $allData = $stmt->fetchAll(PDO::FETCH_ASSOC);
         
+        // Click timestamps are in database time; remember how far it is from PHP's clock
+        $dbNow = strtotime((string)$this->pdo->query('SELECT CURRENT_TIMESTAMP')->fetchColumn());
+        $dbClockOffset = $dbNow !== false ? $dbNow - time() : 0;
+        
         // Process the data
         $categories = [];
         $bookmarksByCategory = [];
@@ -199,8 +297,7 @@ class IndexDataService {
                     'category_id' => $categoryId,
                     'sort_order' => $row['bookmark_sort'],
                     'color' => $row['bookmark_color'],
-                    'last_clicked_at' => $row['last_clicked_at'],
-                    'usage_state' => $row['bookmark_usage_state']
+                    'last_clicked_at' => $row['last_clicked_at']
                 ];
             }
         }
@@ -208,35 +305,132 @@ class IndexDataService {
         // Convert categories array to indexed array for compatibility
         $categories = array_values($categories);
         
+        $faviconBundle = $this->bundleFavicons($categories, $bookmarksByCategory);
+        
         return [
             'categories' => $categories,
-            'bookmarksByCategory' => $bookmarksByCategory
+            'bookmarksByCategory' => $bookmarksByCategory,
+            'favicon_bundle' => $faviconBundle,
+            'db_clock_offset' => $dbClockOffset
         ];
     }
     
+    /**
+     * Pack the page's visible cached favicons into one stylesheet and give each
+     * bookmark its class in it. Bookmarks left out keep their own image file.
+     * Runs whenever the page data is rebuilt, i.e. after any bookmark or favicon change.
+     */
+    private function bundleFavicons(array $categories, array &$bookmarksByCategory) {
+        $faviconPaths = [];
+        foreach ($categories as $category) {
+            if (!$category['show_favicon']) {
+                continue;
+            }
+            foreach ($bookmarksByCategory[$category['id']] as $bookmark) {
+                if (strpos($bookmark['favicon_url'], 'cache/') === 0) {
+                    $faviconPaths[] = $bookmark['favicon_url'];
+                }
+            }
+        }
+        
+        try {
+            $bundle = (new FaviconBundle())->build($faviconPaths);
+        } catch (Throwable $e) {
+            error_log('Favicon bundle build failed: ' . $e->getMessage());
+            $bundle = ['href' => '', 'classes' => []];
+        }
+        
+        foreach ($bookmarksByCategory as &$bookmarks) {
+            foreach ($bookmarks as &$bookmark) {
+                $bookmark['favicon_bundle_class'] = $bundle['classes'][$bookmark['favicon_url']] ?? '';
+            }
+        }
+        unset($bookmarks, $bookmark);
+        
+        return $bundle['href'];
+    }
+    
+    /**
+     * Classify a bookmark by how recently it was clicked
+     */
+    private function getUsageState($lastClickedAt, $now) {
+        $clickedAt = $lastClickedAt ? strtotime($lastClickedAt) : false;
+        if ($clickedAt === false) {
+            return 'stale';
+        }
+        
+        if ($clickedAt >= $now - self::RECENT_USAGE_WINDOW) {
+            return 'recent';
+        }
+        if ($clickedAt >= $now - self::FORTNIGHT_USAGE_WINDOW) {
+            return 'fortnight';
+        }
+        if ($clickedAt < strtotime('-' . self::STALE_USAGE_MONTHS . ' months', $now)) {
+            return 'stale';
+        }
+        
+        return 'normal';
+    }
+    
+    /**
+     * Get a short version of the current page as it would be rendered now. It
+     * changes with every write, every recorded click and every day (usage arcs
+     * age), so the offline shell can check its copy without loading page data.
+     */
+    public function getPageVersion() {
+        $version = $this->renderCache ? $this->renderCache->getVersion($this->currentUserId) : null;
+        if ($version === null) {
+            // Without the counters nothing can be compared, so every copy is stale
+            return substr(sha1(uniqid('', true)), 0, 16);
+        }
+
+        $clicks = $this->renderCache->getClicks($this->currentUserId);
+        return substr(sha1(implode('|', [
+            $version,
+            (int)$this->currentPageId,
+            count($clicks),
+            $clicks ? max($clicks) : '',
+            date('Y-m-d'),
+            self::isLazyRenderingEnabled() ? 'lazy' : 'full'
+        ])), 0, 16);
+    }
+
     /**
      * Get current page name
      */
     public function getCurrentPageName() {
-        $stmt = $this->pdo->prepare('SELECT name FROM pages WHERE id = ? AND user_id = ?');
-        $stmt->execute([$this->currentPageId, $this->currentUserId]);
-        $pageResult = $stmt->fetch(PDO::FETCH_ASSOC);
-        return $pageResult ? $pageResult['name'] : 'My Start Page';
+        foreach ($this->getAllPages() as $page) {
+            if ((int)$page['id'] === (int)$this->currentPageId) {
+                return $page['name'];
+            }
+        }
+        return 'My Start Page';
     }
     
     /**
      * Get all available pages for dropdown
      */
     public function getAllPages() {
-        $stmt = $this->pdo->prepare('SELECT id, name FROM pages WHERE user_id = ? ORDER BY sort_order ASC, id ASC');
-        $stmt->execute([$this->currentUserId]);
-        return $stmt->fetchAll(PDO::FETCH_ASSOC);
+        if ($this->allPages === null) {
+            $this->allPages = $this->remember('pages', function () {
+                $stmt = $this->pdo->prepare('SELECT id, name FROM pages WHERE user_id = ? ORDER BY sort_order ASC, id ASC');
+                $stmt->execute([$this->currentUserId]);
+                return $stmt->fetchAll(PDO::FETCH_ASSOC);
+            });
+        }
+        return $this->allPages;
     }
     
     /**
      * Get all categories grouped by page for dropdowns
      */
     public function getCategoriesByPage() {
+        return $this->remember('categories-by-page', function () {
+            return $this->loadCategoriesByPage();
+        });
+    }
+    
+    private function loadCategoriesByPage() {
         $stmt = $this->pdo->prepare('
             SELECT c.id, c.name, c.page_id, p.name as page_name 
             FROM categories c 
@@ -262,5 +456,37 @@ class IndexDataService {
         
         return $categoriesByPage;
     }
+    
+    /**
+     * Return a cached value for the current user, building and storing it on a miss
+     */
+    private function remember($name, callable $loader) {
+        if (!$this->renderCache) {
+            return $loader();
+        }
+        
+        // The version is read before querying so a concurrent write leaves the entry stale
+        if ($this->cacheVersion === null) {
+            $this->cacheVersion = $this->renderCache->getVersion($this->currentUserId);
+            if ($this->cacheVersion === null) {
+                return $loader();
+            }
+        }
+        
+        $data = $this->renderCache->fetch($this->currentUserId, $name, $this->cacheVersion);
+        if ($data === null) {
+            $data = $loader();
+            $this->renderCache->store($this->currentUserId, $name, $this->cacheVersion, $data);
+        }
+        return $data;
+    }
+    
+    private function invalidateRenderCache() {
+        $this->allPages = null;
+        if ($this->renderCache) {
+            IndexRenderCache::invalidate($this->pdo, $this->currentUserId);
+            $this->cacheVersion = null;
+        }
+    }
 }
 ?>
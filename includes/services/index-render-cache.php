@@ -0,0 +1,307 @@
+<?php
+/**
+ * Index Render Cache
+ * Per-user cache of the page, category, and bookmark structure rendered by app/index.php.
+ *
+ * Entries are stamped with a version made of a global epoch and a per-user
+ * counter. Writes bump the counter, so stale entries are never read again and
+ * simply get overwritten. The counters live in the render_cache_versions table,
+ * so command-line tools invalidate the same entries as the web server, whose
+ * APCu or files they cannot reach.
+ *
+ * Entries are kept in APCu when available, otherwise in small files in the
+ * private storage directory. They hold a user's bookmarks, so they are never
+ * written under the web-served cache/ folder.
+ */
+
+require_once __DIR__ . '/../private_storage.php';
+
+class IndexRenderCache {
+    private const KEY_PREFIX = 'startpage:index:';
+    private const MAX_TRACKED_CLICKS = 500;
+    private const GLOBAL_SCOPE = 'all';
+    private const CLICK_SCOPE_PREFIX = 'clicks:';
+
+    private $pdo;
+    private $cacheDir;
+    private $ttl;
+    private $useApcu;
+
+    /**
+     * $pdo reads and bumps the version counters; the click overlay works without it.
+     */
+    public function __construct($pdo, $cacheDir = null, $ttl = 86400 * 7, $useApcu = null) {
+        $this->pdo = $pdo;
+        $this->cacheDir = rtrim($cacheDir ?? getPrivateStoragePath('index'), '/') . '/';
+        $this->ttl = (int)$ttl;
+        $this->useApcu = $useApcu ?? (function_exists('apcu_enabled') && apcu_enabled());
+    }
+
+    /**
+     * Invalidate every cached entry for one user after a write.
+     */
+    public static function invalidate($pdo, $userId) {
+        if ($userId === null) {
+            return;
+        }
+
+        try {
+            (new self($pdo))->bumpUserVersion((int)$userId);
+        } catch (Throwable $e) {
+            error_log('Index render cache invalidation failed: ' . $e->getMessage());
+        }
+    }
+
+    /**
+     * Invalidate every user's entries, e.g. after the favicon cache is rebuilt.
+     */
+    public static function invalidateAll($pdo) {
+        try {
+            (new self($pdo))->bumpGlobalEpoch();
+        } catch (Throwable $e) {
+            error_log('Index render cache invalidation failed: ' . $e->getMessage());
+        }
+    }
+
+    /**
+     * Count a write of the user's click counters. Clicks keep the render cache
+     * through the overlay, but search data includes them, so they get their own counter.
+     */
+    public static function recordClickWrite($pdo, $userId) {
+        try {
+            (new self($pdo))->incrementVersion(self::CLICK_SCOPE_PREFIX . (int)$userId);
+        } catch (Throwable $e) {
+            error_log('Index render cache click version update failed: ' . $e->getMessage());
+        }
+    }
+
+    /**
+     * Delete the files earlier versions kept in the web-served cache/index/ folder.
+     * Returns the number of files removed.
+     */
+    public static function removeLegacyFiles() {
+        $legacyDir = dirname(__DIR__, 2) . '/cache/index';
+        if (!is_dir($legacyDir)) {
+            return 0;
+        }
+
+        $deleted = 0;
+        foreach (glob($legacyDir . '/*') ?: [] as $file) {
+            if (is_file($file) && @unlink($file)) {
+                $deleted++;
+            }
+        }
+        @rmdir($legacyDir);
+
+        return $deleted;
+    }
+
+    /**
+     * Remember a click so cached pages show fresh usage without a rebuild.
+     */
+    public static function recordClick($userId, $bookmarkId, $lastClickedAt) {
+        if ($lastClickedAt) {
+            self::recordClicks($userId, [(int)$bookmarkId => (string)$lastClickedAt]);
+        }
+    }
+
+    /**
+     * Remember several clicks at once, keyed by bookmark ID.
+     */
+    public static function recordClicks($userId, array $lastClickedAtByBookmark) {
+        if ($userId === null || !$lastClickedAtByBookmark) {
+            return;
+        }
+
+        try {
+            (new self(null))->mergeClicks((int)$userId, $lastClickedAtByBookmark);
+        } catch (Throwable $e) {
+            error_log('Index render cache click update failed: ' . $e->getMessage());
+        }
+    }
+
+    /**
+     * Get the version a new entry for this user must be stored with, or null when
+     * the counters cannot be read and nothing may be cached.
+     * Read it before querying so a concurrent write is never cached as current.
+     */
+    public function getVersion($userId) {
+        $userScope = 'user:' . (int)$userId;
+        try {
+            $stmt = $this->pdo->prepare('SELECT scope, version FROM render_cache_versions WHERE scope IN (?, ?)');
+            $stmt->execute([self::GLOBAL_SCOPE, $userScope]);
+            $versions = $stmt->fetchAll(PDO::FETCH_KEY_PAIR);
+        } catch (PDOException $e) {
+            error_log('Index render cache versions unavailable: ' . $e->getMessage());
+            return null;
+        }
+
+        return (int)($versions[self::GLOBAL_SCOPE] ?? 0) . '.' . (int)($versions[$userScope] ?? 0);
+    }
+
+    /**
+     * Get a version that changes with every write to the user's bookmark data,
+     * clicks included, or null when the counters cannot be read.
+     */
+    public function getDataVersion($userId) {
+        $userScope = 'user:' . (int)$userId;
+        $clickScope = self::CLICK_SCOPE_PREFIX . (int)$userId;
+        try {
+            $stmt = $this->pdo->prepare('SELECT scope, version FROM render_cache_versions WHERE scope IN (?, ?, ?)');
+            $stmt->execute([self::GLOBAL_SCOPE, $userScope, $clickScope]);
+            $versions = $stmt->fetchAll(PDO::FETCH_KEY_PAIR);
+        } catch (PDOException $e) {
+            error_log('Index render cache versions unavailable: ' . $e->getMessage());
+            return null;
+        }
+
+        return (int)($versions[self::GLOBAL_SCOPE] ?? 0) . '.' . (int)($versions[$userScope] ?? 0) . '.' . (int)($versions[$clickScope] ?? 0);
+    }
+
+    /**
+     * Fetch an entry, or null when it is missing or older than $version.
+     */
+    public function fetch($userId, $name, $version) {
+        $entry = $this->read($this->entryKey($userId, $name));
+        if (!is_array($entry) || ($entry['version'] ?? null) !== $version) {
+            return null;
+        }
+
+        return $entry['data'];
+    }
+
+    public function store($userId, $name, $version, $data) {
+        $this->write($this->entryKey($userId, $name), ['version' => $version, 'data' => $data]);
+    }
+
+    /**
+     * Get clicks recorded since the user's entries were last invalidated, keyed by bookmark ID.
+     */
+    public function getClicks($userId) {
+        $clicks = $this->read('clicks:' . (int)$userId);
+        return is_array($clicks) ? $clicks : [];
+    }
+
+    public function mergeClicks($userId, array $clicks) {
+        $this->withLock('clicks:' . (int)$userId, function ($key) use ($clicks) {
+            $current = $this->read($key);
+            $current = is_array($current) ? $current : [];
+            foreach ($clicks as $bookmarkId => $lastClickedAt) {
+                if (!isset($current[$bookmarkId]) || strcmp($lastClickedAt, $current[$bookmarkId]) > 0) {
+                    $current[$bookmarkId] = $lastClickedAt;
+                }
+            }
+            if (count($current) > self::MAX_TRACKED_CLICKS) {
+                arsort($current);
+                $current = array_slice($current, 0, self::MAX_TRACKED_CLICKS, true);
+            }
+            $this->write($key, $current);
+        });
+    }
+
+    public function bumpUserVersion($userId) {
+        $this->incrementVersion('user:' . (int)$userId);
+        // Fresh entries are rebuilt from the database, which already holds these clicks.
+        $this->delete('clicks:' . (int)$userId);
+    }
+
+    public function bumpGlobalEpoch() {
+        $this->incrementVersion(self::GLOBAL_SCOPE);
+    }
+
+    private function entryKey($userId, $name) {
+        return 'entry:' . (int)$userId . ':' . preg_replace('/[^a-z0-9_-]/i', '_', $name);
+    }
+
+    private function incrementVersion($scope) {
+        // A new row starts at the current time, so it cannot match entries stored
+        // before an earlier row for this scope was deleted.
+        $stmt = $this->pdo->prepare('
+            INSERT INTO render_cache_versions (scope, version) VALUES (?, ?)
+            ON DUPLICATE KEY UPDATE version = version + 1
+        ');
+        $stmt->execute([$scope, (int)(microtime(true) * 1000)]);
+    }
+
+    private function read($key) {
+        if ($this->useApcu) {
+            $success = false;
+            $value = apcu_fetch(self::KEY_PREFIX . $key, $success);
+            return $success ? $value : null;
+        }
+
+        $path = $this->pathFor($key);
+        $contents = @file_get_contents($path);
+        if ($contents === false) {
+            return null;
+        }
+
+        $payload = @unserialize($contents, ['allowed_classes' => false]);
+        if (!is_array($payload) || !array_key_exists('value', $payload)) {
+            return null;
+        }
+        if ($payload['expires'] && $payload['expires'] < time()) {
+            @unlink($path);
+            return null;
+        }
+
+        return $payload['value'];
+    }
+
+    private function write($key, $value, $ttl = null) {
+        $ttl = $ttl ?? $this->ttl;
+        if ($this->useApcu) {
+            apcu_store(self::KEY_PREFIX . $key, $value, $ttl);
+            return;
+        }
+
+        $this->ensureCacheDir();
+        $path = $this->pathFor($key);
+        $temporaryPath = $path . '.' . bin2hex(random_bytes(4)) . '.tmp';
+        $payload = serialize(['expires' => $ttl > 0 ? time() + $ttl : 0, 'value' => $value]);
+        if (file_put_contents($temporaryPath, $payload) !== false) {
+            // rename() is atomic, so readers see either the old or the new entry.
+            rename($temporaryPath, $path);
+        }
+    }
+
+    private function delete($key) {
+        if ($this->useApcu) {
+            apcu_delete(self::KEY_PREFIX . $key);
+            return;
+        }
+
+        @unlink($this->pathFor($key));
+    }
+
+    private function withLock($key, callable $callback) {
+        if ($this->useApcu) {
+            return $callback($key);
+        }
+
+        $this->ensureCacheDir();
+        $lock = fopen($this->pathFor($key) . '.lock', 'c');
+        if ($lock === false) {
+            return $callback($key);
+        }
+
+        try {
+            flock($lock, LOCK_EX);
+            return $callback($key);
+        } finally {
+            flock($lock, LOCK_UN);
+            fclose($lock);
+        }
+    }
+
+    private function pathFor($key) {
+        return $this->cacheDir . preg_replace('/[^a-z0-9_.-]/i', '-', $key) . '.cache';
+    }
+
+    private function ensureCacheDir() {
+        if (!is_dir($this->cacheDir)) {
+            @mkdir($this->cacheDir, 0700, true);
+        }
+    }
+}
+?>
@@ -0,0 +1,237 @@
+<?php
+/**
+ * Job Queue
+ * Database-backed queue for long-running background work.
+ *
+ * Jobs belong to a batch, so one run's progress can be reported. Workers
+ * claim a job with a single UPDATE that sets a lease; a job whose lease
+ * expires (the worker crashed or was killed) is claimed again until it runs
+ * out of attempts.
+ */
+
+class JobQueue {
+    public const MAX_ATTEMPTS = 3;
+    private const INSERT_CHUNK_SIZE = 200;
+
+    private $pdo;
+
+    public function __construct($pdo) {
+        $this->pdo = $pdo;
+    }
+
+    /**
+     * Create a batch of jobs of one type. $jobs maps a dedupe key to the job's payload;
+     * a key appears only once per batch. Returns the batch ID.
+     */
+    public function createBatch($type, array $jobs) {
+        $this->pdo->beginTransaction();
+        try {
+            $stmt = $this->pdo->prepare('INSERT INTO job_batches (type, total_jobs) VALUES (?, ?)');
+            $stmt->execute([$type, count($jobs)]);
+            $batchId = (int)$this->pdo->lastInsertId();
+
+            foreach (array_chunk($jobs, self::INSERT_CHUNK_SIZE, true) as $chunk) {
+                $params = [];
+                foreach ($chunk as $dedupeKey => $payload) {
+                    array_push($params, $batchId, $type, substr((string)$dedupeKey, 0, 191), json_encode($payload));
+                }
+                $rows = implode(', ', array_fill(0, count($chunk), '(?, ?, ?, ?)'));
+                $stmt = $this->pdo->prepare('INSERT IGNORE INTO jobs (batch_id, type, dedupe_key, payload) VALUES ' . $rows);
+                $stmt->execute($params);
+            }
+
+            if (!$jobs) {
+                $stmt = $this->pdo->prepare('UPDATE job_batches SET finished_at = CURRENT_TIMESTAMP WHERE id = ?');
+                $stmt->execute([$batchId]);
+            }
+
+            $this->pdo->commit();
+        } catch (Exception $e) {
+            $this->pdo->rollBack();
+            throw $e;
+        }
+
+        return $batchId;
+    }
+
+    /**
+     * The most recent unfinished batch of a type, or null.
+     */
+    public function findActiveBatchId($type) {
+        $stmt = $this->pdo->prepare('SELECT id FROM job_batches WHERE type = ? AND finished_at IS NULL ORDER BY id DESC LIMIT 1');
+        $stmt->execute([$type]);
+        $batchId = $stmt->fetchColumn();
+        return $batchId === false ? null : (int)$batchId;
+    }
+
+    /**
+     * The most recent batch of a type, finished or not, or null.
+     */
+    public function findLatestBatchId($type) {
+        $stmt = $this->pdo->prepare('SELECT id FROM job_batches WHERE type = ? ORDER BY id DESC LIMIT 1');
+        $stmt->execute([$type]);
+        $batchId = $stmt->fetchColumn();
+        return $batchId === false ? null : (int)$batchId;
+    }
+
+    /**
+     * Whether a job of the type is waiting to be claimed, including jobs whose lease expired.
+     */
+    public function hasAvailableJobs($type) {
+        $stmt = $this->pdo->prepare("
+            SELECT 1 FROM jobs
+            WHERE type = ?
+                AND attempts < ?
+                AND (status = 'pending' OR (status = 'running' AND locked_until < CURRENT_TIMESTAMP))
+            LIMIT 1
+        ");
+        $stmt->execute([$type, self::MAX_ATTEMPTS]);
+        return $stmt->fetchColumn() !== false;
+    }
+
+    /**
+     * Claim the oldest available job of a type for $leaseSeconds, only from $batchId when given.
+     * Returns the job with its decoded payload and claim token, or null when none is available.
+     */
+    public function reserve($type, $workerId, $leaseSeconds = 300, $batchId = null) {
+        // Jobs abandoned by crashed workers on their last attempt will not be retried
+        $stmt = $this->pdo->prepare("
+            UPDATE jobs
+            SET status = 'failed', locked_by = NULL, locked_until = NULL, error = 'Worker stopped before finishing'
+            WHERE type = ? AND status = 'running' AND locked_until < CURRENT_TIMESTAMP AND attempts >= ?
+        ");
+        $stmt->execute([$type, self::MAX_ATTEMPTS]);
+        if ($stmt->rowCount() > 0) {
+            $this->finishCompletedBatches($type);
+        }
+
+        // One UPDATE claims the job, so concurrent workers never receive the same one
+        $claim = substr($workerId, 0, 40) . ':' . bin2hex(random_bytes(8));
+        $params = [$claim, (int)$leaseSeconds, $type, self::MAX_ATTEMPTS];
+        $batchFilter = '';
+        if ($batchId !== null) {
+            $batchFilter = ' AND batch_id = ?';
+            $params[] = (int)$batchId;
+        }
+        $stmt = $this->pdo->prepare("
+            UPDATE jobs
+            SET status = 'running',
+                locked_by = ?,
+                locked_until = DATE_ADD(CURRENT_TIMESTAMP, INTERVAL ? SECOND),
+                attempts = attempts + 1
+            WHERE type = ?
+                AND attempts < ?
+                AND (status = 'pending' OR (status = 'running' AND locked_until < CURRENT_TIMESTAMP))" . $batchFilter . "
+            ORDER BY id ASC
+            LIMIT 1
+        ");
+        $stmt->execute($params);
+        if ($stmt->rowCount() === 0) {
+            return null;
+        }
+
+        $stmt = $this->pdo->prepare("SELECT id, batch_id, type, dedupe_key, payload, attempts FROM jobs WHERE locked_by = ? AND status = 'running'");
+        $stmt->execute([$claim]);
+        $job = $stmt->fetch(PDO::FETCH_ASSOC);
+        if (!$job) {
+            return null;
+        }
+
+        $job['payload'] = json_decode($job['payload'], true) ?: [];
+        $job['claim'] = $claim;
+        return $job;
+    }
+
+    /**
+     * Mark a claimed job as done. Returns false when the claim was lost to an expired lease.
+     */
+    public function complete(array $job, array $result = []) {
+        $stmt = $this->pdo->prepare("
+            UPDATE jobs
+            SET status = 'done', locked_by = NULL, locked_until = NULL, result = ?, error = NULL
+            WHERE id = ? AND locked_by = ?
+        ");
+        $stmt->execute([json_encode($result), $job['id'], $job['claim']]);
+        $this->finishCompletedBatches($job['type']);
+
+        return $stmt->rowCount() > 0;
+    }
+
+    /**
+     * Record a failed attempt. The job is retried until it reaches MAX_ATTEMPTS.
+     */
+    public function fail(array $job, $error) {
+        $stmt = $this->pdo->prepare("
+            UPDATE jobs
+            SET status = IF(attempts >= ?, 'failed', 'pending'), locked_by = NULL, locked_until = NULL, error = ?
+            WHERE id = ? AND locked_by = ?
+        ");
+        $stmt->execute([self::MAX_ATTEMPTS, substr((string)$error, 0, 255), $job['id'], $job['claim']]);
+        $this->finishCompletedBatches($job['type']);
+
+        return $stmt->rowCount() > 0;
+    }
+
+    /**
+     * Job counts per status for a batch, plus its most recent failures.
+     */
+    public function getProgress($batchId) {
+        $stmt = $this->pdo->prepare('SELECT id, type, total_jobs, created_at, finished_at FROM job_batches WHERE id = ?');
+        $stmt->execute([$batchId]);
+        $batch = $stmt->fetch(PDO::FETCH_ASSOC);
+        if (!$batch) {
+            return null;
+        }
+
+        $counts = ['pending' => 0, 'running' => 0, 'done' => 0, 'failed' => 0];
+        $stmt = $this->pdo->prepare('SELECT status, COUNT(*) AS job_count FROM jobs WHERE batch_id = ? GROUP BY status');
+        $stmt->execute([$batchId]);
+        foreach ($stmt->fetchAll(PDO::FETCH_ASSOC) as $row) {
+            $counts[$row['status']] = (int)$row['job_count'];
+        }
+
+        $stmt = $this->pdo->prepare("SELECT dedupe_key, error FROM jobs WHERE batch_id = ? AND status = 'failed' ORDER BY updated_at DESC, id DESC LIMIT 10");
+        $stmt->execute([$batchId]);
+
+        return [
+            'batch_id' => (int)$batch['id'],
+            'type' => $batch['type'],
+            'total' => (int)$batch['total_jobs'],
+            'pending' => $counts['pending'],
+            'running' => $counts['running'],
+            'done' => $counts['done'],
+            'failed' => $counts['failed'],
+            'finished' => $batch['finished_at'] !== null,
+            'created_at' => $batch['created_at'],
+            'finished_at' => $batch['finished_at'],
+            'recent_failures' => $stmt->fetchAll(PDO::FETCH_ASSOC),
+        ];
+    }
+
+    /**
+     * Delete batches of a type that finished more than $days days ago, with their jobs.
+     * Returns the number of batches deleted.
+     */
+    public function pruneFinishedBatches($type, $days) {
+        $stmt = $this->pdo->prepare('
+            DELETE FROM job_batches
+            WHERE type = ? AND finished_at < DATE_SUB(CURRENT_TIMESTAMP, INTERVAL ? DAY)
+        ');
+        $stmt->execute([$type, (int)$days]);
+        return $stmt->rowCount();
+    }
+
+    private function finishCompletedBatches($type) {
+        $stmt = $this->pdo->prepare("
+            UPDATE job_batches b
+            SET b.finished_at = CURRENT_TIMESTAMP
+            WHERE b.type = ?
+                AND b.finished_at IS NULL
+                AND NOT EXISTS (
+                    SELECT 1 FROM jobs j WHERE j.batch_id = b.id AND j.status IN ('pending', 'running')
+                )
+        ");
+        $stmt->execute([$type]);
+    }
+}
+?>
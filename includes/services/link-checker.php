@@ -0,0 +1,343 @@
+<?php
+/**
+ * Link Checker
+ * Checks whether bookmark URLs still exist and reads their page descriptions.
+ *
+ * check() tests one bookmark. checkMany() tests a list through curl_multi
+ * with a global and a per-host concurrency limit, reporting each result as it
+ * arrives and stopping at a deadline.
+ */
+
+require_once __DIR__ . '/../favicon/favicon-config.php';
+
+class LinkChecker {
+    private const USER_AGENT = 'Mozilla/5.0 (compatible; MyStartPage-LinkChecker/1.0)';
+    private const BODY_LIMIT = 1048576;
+    private const CONNECT_TIMEOUT_SECONDS = 5;
+    private const REQUEST_TIMEOUT_SECONDS = 12;
+
+    private $concurrency;
+    private $perHostLimit;
+
+    public function __construct($concurrency = 8, $perHostLimit = 2) {
+        $this->concurrency = max(1, (int)$concurrency);
+        $this->perHostLimit = max(1, (int)$perHostLimit);
+    }
+
+    /**
+     * Test one bookmark (an array with id, url and description).
+     */
+    public function check(array $bookmark) {
+        $url = trim((string)$bookmark['url']);
+        if (!filter_var($url, FILTER_VALIDATE_URL)) {
+            return self::buildInvalidUrlResult();
+        }
+
+        $fetch = $this->createFetch($url, microtime(true) + self::REQUEST_TIMEOUT_SECONDS);
+        $curlResult = curl_exec($fetch->handle);
+        $this->readFetch($fetch, $curlResult !== false ? CURLE_OK : curl_errno($fetch->handle));
+
+        return $this->buildResult($bookmark, $fetch);
+    }
+
+    /**
+     * Test bookmarks concurrently. $onResult receives each bookmark and its result as
+     * soon as it is known and may return false to stop. Returns the IDs left untested
+     * because the deadline passed or the callback stopped the run.
+     */
+    public function checkMany(array $bookmarks, $deadline, callable $onResult) {
+        $untested = [];
+        foreach ($bookmarks as $bookmark) {
+            $untested[(int)$bookmark['id']] = true;
+        }
+
+        $queue = [];
+        $stopped = false;
+        foreach ($bookmarks as $bookmark) {
+            if (filter_var(trim((string)$bookmark['url']), FILTER_VALIDATE_URL)) {
+                $queue[] = $bookmark;
+                continue;
+            }
+            unset($untested[(int)$bookmark['id']]);
+            if ($onResult($bookmark, self::buildInvalidUrlResult()) === false) {
+                return array_keys($untested);
+            }
+        }
+
+        $multi = curl_multi_init();
+        $active = [];
+        $activeByHost = [];
+
+        while (!$stopped && ($queue || $active)) {
+            // Start queued checks whose host has a free slot, keeping queue order otherwise
+            foreach ($queue as $index => $bookmark) {
+                if (count($active) >= $this->concurrency || microtime(true) >= $deadline) {
+                    break;
+                }
+                $host = strtolower((string)parse_url($bookmark['url'], PHP_URL_HOST));
+                if (($activeByHost[$host] ?? 0) >= $this->perHostLimit) {
+                    continue;
+                }
+
+                $fetch = $this->createFetch(trim((string)$bookmark['url']), $deadline);
+                $fetch->bookmark = $bookmark;
+                $fetch->host = $host;
+                curl_multi_add_handle($multi, $fetch->handle);
+                $active[] = $fetch;
+                $activeByHost[$host] = ($activeByHost[$host] ?? 0) + 1;
+                unset($queue[$index]);
+            }
+
+            if (!$active) {
+                break;
+            }
+
+            do {
+                $status = curl_multi_exec($multi, $running);
+            } while ($status === CURLM_CALL_MULTI_PERFORM);
+
+            while (!$stopped && ($info = curl_multi_info_read($multi))) {
+                foreach ($active as $index => $fetch) {
+                    if ($fetch->handle !== $info['handle']) {
+                        continue;
+                    }
+
+                    curl_multi_remove_handle($multi, $fetch->handle);
+                    $this->readFetch($fetch, $info['result']);
+                    unset($active[$index]);
+                    unset($untested[(int)$fetch->bookmark['id']]);
+                    $activeByHost[$fetch->host]--;
+
+                    if ($onResult($fetch->bookmark, $this->buildResult($fetch->bookmark, $fetch)) === false) {
+                        $stopped = true;
+                    }
+                    break;
+                }
+            }
+
+            if (!$stopped && $running > 0 && curl_multi_select($multi, 0.2) === -1) {
+                usleep(1000);
+            }
+        }
+
+        foreach ($active as $fetch) {
+            curl_multi_remove_handle($multi, $fetch->handle);
+            curl_close($fetch->handle);
+        }
+        curl_multi_close($multi);
+
+        return array_keys($untested);
+    }
+
+    /**
+     * The user-facing message for a working link once its favicon refresh is known.
+     */
+    public static function describeWorkingLink(array $result, $faviconRefreshed) {
+        $message = $result['description_updated']
+            ? 'The link works and its description was updated.'
+            : ($result['description'] !== ''
+                ? 'The link works. Its existing description was kept.'
+                : 'The link works. No page description was available.');
+        if ($faviconRefreshed) {
+            $message .= ' Its favicon was refreshed.';
+        }
+
+        return $message;
+    }
+
+    /**
+     * Whether a working link answered well enough to refresh its favicon.
+     */
+    public static function canRefreshMetadata(array $result) {
+        return $result['exists'] === true && $result['status'] >= 200 && $result['status'] < 400;
+    }
+
+    /**
+     * Revalidate a working link's favicon. Returns the new stored favicon path, or ''
+     * when only a fallback was found and the current icon should be kept.
+     */
+    public static function refreshFavicon($faviconCache, $url) {
+        $faviconResult = $faviconCache->resolveForUrl($url, false);
+        $resolvedFaviconUrl = FaviconConfig::normalizeStoredFaviconUrl($faviconResult['favicon_url'] ?? '');
+        $refreshed = ($faviconResult['failure_reason'] ?? null) === null
+            && ($faviconResult['source'] ?? '') !== 'generated'
+            && ($faviconResult['source'] ?? '') !== 'external-fallback';
+
+        return $refreshed ? $resolvedFaviconUrl : '';
+    }
+
+    /**
+     * Return a compact, normalized page description suitable for bookmark storage.
+     */
+    public static function extractPageDescription(string $html): string
+    {
+        if ($html === '' || !class_exists('DOMDocument')) {
+            return '';
+        }
+
+        $previousErrors = libxml_use_internal_errors(true);
+        $document = new DOMDocument();
+        $loaded = $document->loadHTML(
+            '<?xml encoding="utf-8" ?>' . $html,
+            LIBXML_NOERROR | LIBXML_NOWARNING | LIBXML_NONET
+        );
+        libxml_clear_errors();
+        libxml_use_internal_errors($previousErrors);
+
+        if (!$loaded) {
+            return '';
+        }
+
+        $description = '';
+        foreach ($document->getElementsByTagName('meta') as $meta) {
+            $name = strtolower(trim($meta->getAttribute('name')));
+            $property = strtolower(trim($meta->getAttribute('property')));
+            if (
+                $name === 'description'
+                || $name === 'twitter:description'
+                || $property === 'og:description'
+            ) {
+                $description = trim($meta->getAttribute('content'));
+                if ($description !== '') {
+                    break;
+                }
+            }
+        }
+
+        $description = html_entity_decode($description, ENT_QUOTES | ENT_HTML5, 'UTF-8');
+        $description = preg_replace('/\s+/u', ' ', $description) ?? $description;
+        $description = trim($description);
+
+        return function_exists('mb_substr')
+            ? mb_substr($description, 0, 200, 'UTF-8')
+            : substr($description, 0, 200);
+    }
+
+    private function createFetch($url, $deadline) {
+        $fetch = new stdClass();
+        $fetch->url = $url;
+        $fetch->body = '';
+        $fetch->truncated = false;
+
+        $timeoutMs = (int)min(self::REQUEST_TIMEOUT_SECONDS * 1000, max(1, ($deadline - microtime(true)) * 1000));
+        $fetch->handle = curl_init($url);
+        curl_setopt_array($fetch->handle, [
+            CURLOPT_FOLLOWLOCATION => true,
+            CURLOPT_MAXREDIRS => 6,
+            CURLOPT_CONNECTTIMEOUT_MS => min(self::CONNECT_TIMEOUT_SECONDS * 1000, $timeoutMs),
+            CURLOPT_TIMEOUT_MS => $timeoutMs,
+            CURLOPT_USERAGENT => self::USER_AGENT,
+            CURLOPT_HTTPHEADER => [
+                'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                'Accept-Language: en-US,en;q=0.9,nl;q=0.8',
+                'Cache-Control: no-cache',
+            ],
+            CURLOPT_AUTOREFERER => true,
+            CURLOPT_RETURNTRANSFER => false,
+            CURLOPT_ENCODING => '',
+            CURLOPT_SSL_VERIFYPEER => false,
+            CURLOPT_SSL_VERIFYHOST => false,
+            CURLOPT_WRITEFUNCTION => static function ($curl, string $chunk) use ($fetch): int {
+                $remaining = self::BODY_LIMIT - strlen($fetch->body);
+                if ($remaining <= 0) {
+                    $fetch->truncated = true;
+                    return 0;
+                }
+
+                if (strlen($chunk) > $remaining) {
+                    $fetch->body .= substr($chunk, 0, $remaining);
+                    $fetch->truncated = true;
+                    return 0;
+                }
+
+                $fetch->body .= $chunk;
+                return strlen($chunk);
+            },
+        ]);
+
+        return $fetch;
+    }
+
+    private function readFetch($fetch, $curlErrorNumber) {
+        $fetch->status = (int)curl_getinfo($fetch->handle, CURLINFO_HTTP_CODE);
+        $fetch->contentType = strtolower((string)(curl_getinfo($fetch->handle, CURLINFO_CONTENT_TYPE) ?: ''));
+        $fetch->finalUrl = (string)(curl_getinfo($fetch->handle, CURLINFO_EFFECTIVE_URL) ?: $fetch->url);
+        $fetch->errno = (int)$curlErrorNumber;
+        $fetch->error = $fetch->errno !== CURLE_OK ? (curl_error($fetch->handle) ?: curl_strerror($fetch->errno)) : '';
+        curl_close($fetch->handle);
+        $fetch->handle = null;
+    }
+
+    private function buildResult(array $bookmark, $fetch) {
+        // Stopping at the body limit aborts the transfer, but the link answered
+        $transportSucceeded = $fetch->errno === CURLE_OK || $fetch->truncated;
+        $definitelyMissing = in_array($fetch->status, [404, 410], true)
+            || ($fetch->status === 0 && $fetch->errno === CURLE_COULDNT_RESOLVE_HOST);
+
+        if ($definitelyMissing) {
+            return [
+                'success' => true,
+                'exists' => false,
+                'status' => $fetch->status,
+                'final_url' => $fetch->finalUrl,
+                'message' => $fetch->status > 0
+                    ? "The link returned HTTP {$fetch->status} and appears not to exist."
+                    : 'The link host could not be found.',
+                'description_updated' => false,
+                'favicon_refreshed' => false,
+            ];
+        }
+
+        if (!$transportSucceeded || $fetch->status >= 500 || $fetch->status === 0) {
+            $detail = $fetch->status >= 500
+                ? "HTTP {$fetch->status}"
+                : ($fetch->error !== '' ? $fetch->error : 'no response');
+            return [
+                'success' => true,
+                'exists' => null,
+                'status' => $fetch->status,
+                'final_url' => $fetch->finalUrl,
+                'message' => "The link could not be verified ({$detail}). Try again later.",
+                'description_updated' => false,
+                'favicon_refreshed' => false,
+            ];
+        }
+
+        $description = '';
+        if (
+            $fetch->status >= 200 && $fetch->status < 400
+            && (strpos($fetch->contentType, 'text/html') !== false || stripos(substr($fetch->body, 0, 300), '<html') !== false)
+        ) {
+            $description = self::extractPageDescription($fetch->body);
+        }
+
+        $currentDescription = trim((string)($bookmark['description'] ?? ''));
+        $descriptionUpdated = $currentDescription === '' && $description !== '';
+        $result = [
+            'success' => true,
+            'exists' => true,
+            'status' => $fetch->status,
+            'final_url' => $fetch->finalUrl,
+            'message' => '',
+            'description_updated' => $descriptionUpdated,
+            'description' => $descriptionUpdated ? $description : $currentDescription,
+            'favicon_refreshed' => false,
+            'favicon_url' => FaviconConfig::normalizeStoredFaviconUrl($bookmark['favicon_url'] ?? ''),
+        ];
+        $result['message'] = self::describeWorkingLink($result, false);
+
+        return $result;
+    }
+
+    private static function buildInvalidUrlResult() {
+        return [
+            'success' => true,
+            'exists' => false,
+            'status' => 0,
+            'message' => 'The bookmark URL is invalid.',
+            'description_updated' => false,
+            'favicon_refreshed' => false,
+        ];
+    }
+}
+?>
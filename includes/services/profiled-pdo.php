@@ -0,0 +1,133 @@
+<?php
+/**
+ * Profiled PDO
+ * A PDO connection that times every statement and reuses prepared statements.
+ *
+ * prepare() returns the statement already prepared for the same SQL during
+ * this request, so statements run in loops are parsed by the server once.
+ * Statements are wrapped rather than subclassed through
+ * PDO::ATTR_STATEMENT_CLASS, which PDO refuses for persistent connections.
+ */
+
+require_once __DIR__ . '/query-profiler.php';
+
+class ProfiledPDO extends PDO {
+    private const STATEMENT_CACHE_SIZE = 64;
+
+    private $profiler;
+    private $statementCache = [];
+
+    public function __construct($dsn, $username, $password, array $options, QueryProfiler $profiler) {
+        $this->profiler = $profiler;
+        $start = hrtime(true);
+        parent::__construct($dsn, $username, $password, $options);
+        $profiler->recordConnect((hrtime(true) - $start) / 1e6);
+    }
+
+    public function getProfiler() {
+        return $this->profiler;
+    }
+
+    #[\ReturnTypeWillChange]
+    public function prepare($query, $options = []) {
+        if ($options) {
+            return new ProfiledStatement(parent::prepare($query, $options), $this->profiler);
+        }
+
+        if (isset($this->statementCache[$query])) {
+            $statement = $this->statementCache[$query];
+            // Most recently used last, so the oldest entry is evicted first
+            unset($this->statementCache[$query]);
+            $statement->closeCursor();
+        } else {
+            $statement = new ProfiledStatement(parent::prepare($query), $this->profiler);
+            if (count($this->statementCache) >= self::STATEMENT_CACHE_SIZE) {
+                array_shift($this->statementCache);
+            }
+        }
+
+        $this->statementCache[$query] = $statement;
+        return $statement;
+    }
+
+    #[\ReturnTypeWillChange]
+    public function query($query, $fetchMode = null, ...$fetchModeArgs) {
+        $start = hrtime(true);
+        try {
+            $statement = $fetchMode === null
+                ? parent::query($query)
+                : parent::query($query, $fetchMode, ...$fetchModeArgs);
+        } finally {
+            $this->profiler->record($query, (hrtime(true) - $start) / 1e6);
+        }
+
+        return new ProfiledStatement($statement, $this->profiler);
+    }
+
+    #[\ReturnTypeWillChange]
+    public function exec($statement) {
+        $start = hrtime(true);
+        try {
+            return parent::exec($statement);
+        } finally {
+            $this->profiler->record($statement, (hrtime(true) - $start) / 1e6);
+        }
+    }
+}
+
+/**
+ * A PDOStatement whose executions are reported to the profiler. Everything
+ * else is passed through to the wrapped statement.
+ */
+class ProfiledStatement implements IteratorAggregate {
+    private $statement;
+    private $profiler;
+
+    public function __construct(PDOStatement $statement, QueryProfiler $profiler) {
+        $this->statement = $statement;
+        $this->profiler = $profiler;
+    }
+
+    public function execute($params = null) {
+        $start = hrtime(true);
+        try {
+            return $this->statement->execute($params);
+        } finally {
+            $this->profiler->record($this->statement->queryString, (hrtime(true) - $start) / 1e6);
+        }
+    }
+
+    public function fetch(...$args) {
+        return $this->statement->fetch(...$args);
+    }
+
+    public function fetchAll(...$args) {
+        return $this->statement->fetchAll(...$args);
+    }
+
+    public function fetchColumn($column = 0) {
+        return $this->statement->fetchColumn($column);
+    }
+
+    public function rowCount() {
+        return $this->statement->rowCount();
+    }
+
+    public function closeCursor() {
+        return $this->statement->closeCursor();
+    }
+
+    #[\ReturnTypeWillChange]
+    public function getIterator() {
+        return $this->statement;
+    }
+
+    public function __get($name) {
+        return $this->statement->$name;
+    }
+
+    public function __call($method, $args) {
+        return $this->statement->$method(...$args);
+    }
+}
+?>
@@ -0,0 +1,148 @@
+<?php
+/**
+ * Query Profiler
+ * Per-request count and timing of database statements.
+ *
+ * ProfiledPDO reports every statement it runs here. At the end of the request
+ * the totals can be sent as a Server-Timing header (STARTPAGE_DB_DEBUG) and
+ * requests over a time or query-count threshold are written to the error log
+ * (STARTPAGE_DB_SLOW_MS, STARTPAGE_DB_SLOW_QUERIES), with the statements that
+ * ran most often, so N+1 query patterns show up in production logs.
+ */
+
+class QueryProfiler {
+    private const SLOWEST_KEPT = 5;
+    private const SQL_SUMMARY_LENGTH = 120;
+
+    private $count = 0;
+    private $totalMs = 0.0;
+    private $connectMs = 0.0;
+    private $slowest = [];
+    private $statements = [];
+
+    /**
+     * Create a profiler that reports according to the STARTPAGE_DB_* settings.
+     */
+    public static function fromEnvironment() {
+        $profiler = new self();
+        $slowMs = (float)(getenv('STARTPAGE_DB_SLOW_MS') ?: 0);
+        $slowQueries = (int)(getenv('STARTPAGE_DB_SLOW_QUERIES') ?: 0);
+
+        if (PHP_SAPI !== 'cli' && in_array(strtolower(trim((string)getenv('STARTPAGE_DB_DEBUG'))), ['1', 'on', 'true'], true)) {
+            // Runs just before the headers go out, so it covers every query up to the first output
+            header_register_callback(function () use ($profiler) {
+                header('Server-Timing: ' . $profiler->getServerTiming(), false);
+            });
+        }
+
+        if ($slowMs > 0 || $slowQueries > 0) {
+            register_shutdown_function(function () use ($profiler, $slowMs, $slowQueries) {
+                $profiler->logIfSlow($slowMs, $slowQueries);
+            });
+        }
+
+        return $profiler;
+    }
+
+    public function recordConnect($elapsedMs) {
+        $this->connectMs += $elapsedMs;
+    }
+
+    public function record($sql, $elapsedMs) {
+        $this->count++;
+        $this->totalMs += $elapsedMs;
+
+        $key = self::summarize($sql);
+        if (!isset($this->statements[$key])) {
+            $this->statements[$key] = ['count' => 0, 'ms' => 0.0];
+        }
+        $this->statements[$key]['count']++;
+        $this->statements[$key]['ms'] += $elapsedMs;
+
+        // A short list kept sorted by time; requests run a few dozen statements at most
+        if (count($this->slowest) < self::SLOWEST_KEPT || $elapsedMs > end($this->slowest)['ms']) {
+            $this->slowest[] = ['sql' => $key, 'ms' => $elapsedMs];
+            usort($this->slowest, function ($a, $b) {
+                return $b['ms'] <=> $a['ms'];
+            });
+            $this->slowest = array_slice($this->slowest, 0, self::SLOWEST_KEPT);
+        }
+    }
+
+    /**
+     * Query count, total and connect time in milliseconds, the slowest statements,
+     * and the statements run more than once with their counts.
+     */
+    public function getSummary() {
+        $repeated = array_filter($this->statements, function ($statement) {
+            return $statement['count'] > 1;
+        });
+        uasort($repeated, function ($a, $b) {
+            return $b['count'] <=> $a['count'];
+        });
+
+        return [
+            'count' => $this->count,
+            'total_ms' => round($this->totalMs, 2),
+            'connect_ms' => round($this->connectMs, 2),
+            'slowest' => $this->slowest,
+            'repeated' => array_slice($repeated, 0, self::SLOWEST_KEPT, true),
+        ];
+    }
+
+    /**
+     * The Server-Timing header value: the total, the connection, and the slowest statements.
+     */
+    public function getServerTiming() {
+        $metrics = [
+            sprintf('db;dur=%.2f;desc="%d queries"', $this->totalMs, $this->count),
+            sprintf('db-connect;dur=%.2f', $this->connectMs),
+        ];
+        foreach ($this->slowest as $index => $statement) {
+            $metrics[] = sprintf('db-%d;dur=%.2f;desc="%s"', $index + 1, $statement['ms'], addcslashes($statement['sql'], '"\\'));
+        }
+
+        return implode(', ', $metrics);
+    }
+
+    /**
+     * Write the request's summary to the error log when it crossed either threshold
+     * (0 disables a threshold).
+     */
+    public function logIfSlow($slowMs, $slowQueries) {
+        $isSlow = ($slowMs > 0 && $this->totalMs >= $slowMs)
+            || ($slowQueries > 0 && $this->count >= $slowQueries);
+        if (!$isSlow) {
+            return;
+        }
+
+        $summary = $this->getSummary();
+        $lines = [sprintf(
+            'Slow database request %s %s: %d queries, %.1f ms (connect %.1f ms)',
+            $_SERVER['REQUEST_METHOD'] ?? 'CLI',
+            $_SERVER['REQUEST_URI'] ?? implode(' ', $_SERVER['argv'] ?? []),
+            $summary['count'],
+            $summary['total_ms'],
+            $summary['connect_ms']
+        )];
+        foreach ($summary['slowest'] as $statement) {
+            $lines[] = sprintf('  %.1f ms  %s', $statement['ms'], $statement['sql']);
+        }
+        foreach ($summary['repeated'] as $sql => $statement) {
+            $lines[] = sprintf('  %dx %.1f ms  %s', $statement['count'], $statement['ms'], $sql);
+        }
+
+        error_log(implode("\n", $lines));
+    }
+
+    /**
+     * One line of SQL, short enough for a header or a log line.
+     */
+    private static function summarize($sql) {
+        $sql = trim(preg_replace('/\s+/', ' ', (string)$sql));
+        return strlen($sql) > self::SQL_SUMMARY_LENGTH
+            ? substr($sql, 0, self::SQL_SUMMARY_LENGTH - 3) . '...'
+            : $sql;
+    }
+}
+?>
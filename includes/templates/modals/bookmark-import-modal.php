@@ -0,0 +1,21 @@
+<!-- Bookmark Import Modal -->
+<div id="bookmarkImportModal" class="wp-dialog-backdrop modal-backdrop" role="dialog" aria-modal="true" aria-labelledby="bookmarkImportModalTitle" aria-hidden="true" data-dialog-dismiss="bookmarkImportCancel" data-dialog-backdrop-dismiss="false">
+    <div class="wp-dialog wp-dialog--compact modal-panel">
+        <div class="wp-dialog__header dialog-header">
+            <h3 id="bookmarkImportModalTitle" class="wp-dialog__title dialog-title">Import Bookmarks</h3>
+            <button type="button" class="wp-icon-button wp-dialog__close dialog-close-button" data-dialog-dismiss="bookmarkImportCancel" aria-label="Close import bookmarks dialog">&times;</button>
+        </div>
+        <form id="bookmarkImportForm" class="wp-dialog__body wp-stack dialog-form">
+            <div class="wp-field">
+                <label for="bookmark-import-file" class="wp-label">Bookmark File</label>
+                <input type="file" id="bookmark-import-file" name="file" class="wp-input" accept=".html,.htm,.json,.jsonl" required>
+            </div>
+            <p class="confirmation-dialog__note">An HTML export from any browser, or a JSON export from this start page. Top-level folders become pages and the folders inside them categories. Links already in a category are skipped.</p>
+            <div class="wp-dialog__actions dialog-actions">
+                <span class="dialog-action-spacer"></span>
+                <button type="button" id="bookmarkImportCancel" class="wp-button wp-button--secondary dialog-button dialog-button-secondary">Cancel</button>
+                <button type="submit" class="wp-button wp-button--primary dialog-button dialog-button-primary">Import</button>
+            </div>
+        </form>
+    </div>
+</div>
@@ -0,0 +1,68 @@
+<?php
+    // Bookmark item, rendered by the dashboard and the lazy bookmark endpoint.
+    // Expects $bm, $cat, $bookmarkIndex and $collapsedBookmarkLimit.
+    $colorInt = isset($bm['color']) ? (int)$bm['color'] : 0;
+    $bgToken = bookmarkColorToken($colorInt);
+    $bgClass = bookmarkBgClassFromToken($bgToken);
+    $usageState = in_array($bm['usage_state'] ?? '', ['recent', 'fortnight', 'normal', 'stale'], true)
+        ? $bm['usage_state']
+        : 'normal';
+    $usageLabels = [
+        'recent' => 'Used within the last 3 days',
+        'fortnight' => 'Used within the last 14 days',
+        'normal' => 'Used within the last 3 months',
+        'stale' => empty($bm['last_clicked_at']) ? 'Never used' : 'Last used more than 3 months ago'
+    ];
+    $usageLabel = $usageLabels[$usageState];
+?>
+<li class="bookmark-item<?= !empty($bm['description']) && !$cat['no_url_description'] ? ' has-description' : '' ?><?= $bookmarkIndex >= $collapsedBookmarkLimit ? ' collapsed-bookmark-hidden' : '' ?> is-not-draggable <?= $bgClass ?>"
+    data-id="<?= $bm['id'] ?>" 
+    data-title="<?= htmlspecialchars($bm['title']) ?>" 
+    data-url="<?= htmlspecialchars($bm['url']) ?>" 
+    data-description="<?= htmlspecialchars($bm['description'] ?? '') ?>"
+    data-category-id="<?= $bm['category_id'] ?>"
+    data-favicon-url="<?= htmlspecialchars($bm['favicon_url'] ?? '') ?>"
+    data-color="<?= $colorInt ?>"
+    data-usage-state="<?= $usageState ?>"
+    data-last-clicked-at="<?= htmlspecialchars($bm['last_clicked_at'] ?? '') ?>"
+    data-background-color="<?= $bgToken ?>">
+    <!-- Bookmark icon and desktop drag handle -->
+    <div class="bookmark-icon drag-handle mobile-drag-handle"<?= $cat['show_favicon'] ? '' : ' style="display:none;"' ?>>
+        <?php if (!empty($bm['favicon_bundle_class'])): ?>
+            <img src="<?= FaviconBundle::PLACEHOLDER_SRC ?>" class="favicon-bundled <?= $bm['favicon_bundle_class'] ?>" alt="" aria-hidden="true">
+        <?php else: ?>
+            <img src="<?= htmlspecialchars(FaviconConfig::getDisplayFaviconUrl($bm['favicon_url'] ?? '', $bm['url'] ?? '')) ?>" alt="" aria-hidden="true">
+        <?php endif; ?>
+    </div>
+    <div class="bookmark-content no-drag">
+        <!-- Bookmark title -->
+        <a href="<?= htmlspecialchars($bm['url']) ?>" target="_blank" class="bookmark-title" data-tooltip="<?= htmlspecialchars($bm['title']) ?>" data-tooltip-detail="<?= htmlspecialchars($bm['url']) ?>">
+            <?= htmlspecialchars($bm['title']) ?>
+            <!-- Bookmark description -->
+            <?php if (!empty($bm['description']) && !$cat['no_url_description']): ?>
+                <p class="bookmark-description"><?= htmlspecialchars($bm['description']) ?></p>
+            <?php endif; ?>
+        </a>
+    </div>
+    <!-- Bookmark activity and actions -->
+    <div class="bookmark-activity-slot no-drag">
+        <button
+            type="button"
+            class="bookmark-activity-button"
+            data-action="bookmark-actions"
+            data-id="<?= $bm['id'] ?>"
+            data-usage-state="<?= $usageState ?>"
+            aria-haspopup="menu"
+            aria-expanded="false"
+            aria-label="<?= htmlspecialchars($usageLabel) ?>. Bookmark actions"
+            title="<?= htmlspecialchars($usageLabel) ?> — bookmark actions"
+        >
+            <span class="bookmark-recency-arc" aria-hidden="true">
+                <svg viewBox="0 0 20 20">
+                    <circle class="bookmark-recency-track" cx="10" cy="10" r="7"></circle>
+                    <circle class="bookmark-recency-value" cx="10" cy="10" r="7" pathLength="100"></circle>
+                </svg>
+            </span>
+        </button>
+    </div>
+</li>
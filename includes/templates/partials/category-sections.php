@@ -0,0 +1,100 @@
+<!-- Category Sections: expects $categories, $bookmarksByCategory and $lazyBookmarks -->
+<?php foreach ($categories as $cat): ?>
+    <?php
+        $bookmarkCount = count($bookmarksByCategory[$cat['id']]);
+        $collapsedBookmarkLimit = $cat['collapsed_link_limit'];
+        $hiddenBookmarkCount = max(0, $bookmarkCount - $collapsedBookmarkLimit);
+        // In lazy mode the bookmarks behind "Show more" are fetched on expand or drag
+        $renderedBookmarks = $lazyBookmarks
+            ? array_slice($bookmarksByCategory[$cat['id']], 0, $collapsedBookmarkLimit)
+            : $bookmarksByCategory[$cat['id']];
+        $pendingBookmarkCount = $bookmarkCount - count($renderedBookmarks);
+        $categoryWidth = (int)$cat['width'];
+        // Lets the dashboard keep sections whose markup would not change when it patches a page in
+        $renderHash = substr(md5(serialize([$cat, $bookmarksByCategory[$cat['id']], $lazyBookmarks])), 0, 12);
+    ?>
+
+    <!-- Header: Bookmark Category -->
+    <section style="--category-width:<?= $categoryWidth ?>px;" class="category-slot" data-category-id="<?= $cat['id'] ?>" data-collapsed-link-limit="<?= $collapsedBookmarkLimit ?>" data-render-hash="<?= $renderHash ?>">
+        <div class="category-card">
+            <div class="category-card-header">
+            <div class="category-card-heading">
+                <span class="category-drag-handle">⋮⋮</span>
+                <h2 class="category-heading">
+                    <button
+                        type="button"
+                        title="<?= htmlspecialchars($cat['name']) ?> — edit category"
+                        class="category-title"
+                        data-action="edit-category"
+                        data-id="<?= $cat['id'] ?>"
+                        data-name="<?= htmlspecialchars($cat['name']) ?>"
+                        data-page-id="<?= $cat['page_id'] ?>"
+                        data-width="<?= $cat['preferences']['cat_width'] ?? 3 ?>"
+                        data-no-description="<?= $cat['no_url_description'] ?>"
+                        data-show-favicon="<?= $cat['show_favicon'] ?>"
+                        data-collapsed-link-limit="<?= $collapsedBookmarkLimit ?>"
+                    >
+                        <?= htmlspecialchars($cat['name']) ?>
+                    </button>
+                </h2>
+            </div>
+            <div class="category-header-actions">
+                <button
+                    type="button"
+                    class="category-actions-btn"
+                    data-category-id="<?= $cat['id'] ?>"
+                    aria-label="Actions for <?= htmlspecialchars($cat['name']) ?>"
+                    aria-haspopup="menu"
+                    aria-expanded="false"
+                    title="Category actions"
+                >
+                    <svg class="category-actions-icon" fill="currentColor" viewBox="0 0 24 24" aria-hidden="true">
+                        <circle cx="5" cy="12" r="1.7"></circle>
+                        <circle cx="12" cy="12" r="1.7"></circle>
+                        <circle cx="19" cy="12" r="1.7"></circle>
+                    </svg>
+                </button>
+            </div>
+            </div>
+
+            <!-- Bookmark List -->
+            <div id="category-content-<?= $cat['id'] ?>" class="section-content<?= $hiddenBookmarkCount > 0 ? ' has-expand-control' : '' ?>">
+            <ul class="bookmark-list<?= $cat['show_favicon'] ? '' : ' no-favicons' ?>" data-category-id="<?= $cat['id'] ?>">
+                <?php if (empty($bookmarksByCategory[$cat['id']])): ?>
+                    <li class="bookmark-empty-state">
+                        <span>📭 No bookmarks yet</span>
+                    </li>
+                <?php else: ?>
+                    <?php foreach ($renderedBookmarks as $bookmarkIndex => $bm): ?>
+                        <?php include __DIR__ . '/bookmark-item.php'; ?>
+
+                    <?php endforeach; ?>
+                    <?php if ($pendingBookmarkCount > 0): ?>
+                        <li class="bookmark-lazy-anchor" data-pending-count="<?= $pendingBookmarkCount ?>" hidden></li>
+                    <?php endif; ?>
+                <?php endif; ?>
+            </ul>
+            </div>
+
+            <?php if ($hiddenBookmarkCount > 0): ?>
+                <div class="expand-control-footer">
+                    <button
+                        type="button"
+                        class="expand-indicator"
+                        data-section-id="<?= $cat['id'] ?>"
+                        data-hidden-count="<?= $hiddenBookmarkCount ?>"
+                        aria-controls="category-content-<?= $cat['id'] ?>"
+                        aria-expanded="false"
+                        aria-label="Show <?= $hiddenBookmarkCount ?> more bookmarks in <?= htmlspecialchars($cat['name']) ?>"
+                    >
+                        <span class="expand-indicator-label">Show <?= $hiddenBookmarkCount ?> more</span>
+                        <svg fill="none" stroke="currentColor" viewBox="0 0 24 24" aria-hidden="true">
+                            <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M19 9l-7 7-7-7"></path>
+                        </svg>
+                    </button>
+                </div>
+            <?php endif; ?>
+
+        </div>
+    </section>
+<?php endforeach; ?>
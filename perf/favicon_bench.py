@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Favicon resolution benchmark
+
+Starts the fixture sites from perf/favicon_fixtures.py on localhost and
+resolves each corpus bookmark with IconResolver, one PHP process per resolve
+(perf/favicon_resolve.php). Every repetition starts from an empty favicon
+cache. Reported per site: resolver wall time, HTTP fetches, body bytes
+downloaded, the paths requested, and the icon chosen. No request leaves the
+machine.
+
+    python perf/favicon_bench.py --repeat 5 --output perf/results/favicons-before.json
+    python perf/favicon_bench.py --repeat 5 --compare perf/results/favicons-before.json
+    python perf/favicon_bench.py --diff perf/results/favicons-before.json perf/results/favicons-after.json
+
+Results are JSON with sorted keys and origin-independent values, so two runs
+on different ports can be diffed directly. Needs the PHP CLI with curl.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from favicon_fixtures import BOOKMARKS, FixtureServer
+
+ROOT = Path(__file__).resolve().parent.parent
+RUNNER = Path(__file__).resolve().parent / 'favicon_resolve.php'
+
+
+def run_php(args, *extra):
+    completed = subprocess.run(
+        [args.php, *extra], capture_output=True, text=True, cwd=ROOT, timeout=args.timeout, env=args.env,
+    )
+    return completed
+
+
+def php_version(args):
+    try:
+        return run_php(args, '-r', 'echo PHP_VERSION;').stdout.strip() or None
+    except OSError:
+        return None
+
+
+def git_commit():
+    try:
+        completed = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=ROOT)
+    except OSError:
+        return None
+    return completed.stdout.strip() or None
+
+
+def describe_url(url, fixtures):
+    """Replace fixture origins with {site:NAME}, so results do not depend on ports."""
+    if not url:
+        return url
+    for name, origin in sorted(fixtures.origins.items(), key=lambda item: -len(item[1])):
+        if url.startswith(origin):
+            return f'{{site:{name}}}' + url[len(origin):]
+    return url
+
+
+def resolve_once(args, fixtures, cache_dir, name, site, url):
+    fixtures.reset_stats()
+    completed = run_php(args, str(RUNNER), str(cache_dir), url)
+    stats = fixtures.stats[site].snapshot() if site in fixtures.stats else {'fetches': 0, 'bytes': 0, 'paths': {}}
+    if completed.returncode != 0:
+        raise RuntimeError(f'{name}: resolver exited with {completed.returncode}: {completed.stderr.strip()}')
+    output = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    # Fetches on other fixture sites, such as a cross-origin redirect target
+    for other, other_stats in fixtures.stats.items():
+        if other == site:
+            continue
+        snapshot = other_stats.snapshot()
+        stats['fetches'] += snapshot['fetches']
+        stats['bytes'] += snapshot['bytes']
+        for path, count in snapshot['paths'].items():
+            stats['paths'][f'{{site:{other}}}{path}'] = count
+
+    result = output['result']
+    favicon_url = result['favicon_url']
+    if favicon_url.startswith('data:'):
+        favicon_url = 'data:'
+    elif favicon_url.startswith('cache/favicons/'):
+        # Cache file names hash the bookmark URL, port included
+        favicon_url = 'cache/favicons/*' + Path(favicon_url).suffix
+    else:
+        favicon_url = describe_url(favicon_url, fixtures)
+    failure_reason = result['failure_reason']
+    if failure_reason:
+        failure_reason = failure_reason.split('; next attempt after')[0]
+
+    return {
+        'wall_ms': output['elapsed_ms'],
+        'fetches': stats['fetches'],
+        'bytes': stats['bytes'],
+        'paths': dict(sorted(stats['paths'].items())),
+        'icon': {
+            'source': result['source'],
+            'source_url': describe_url(result['source_url'], fixtures),
+            'favicon_url': favicon_url,
+            'file': output['cached_file'],
+            'failure_reason': failure_reason,
+        },
+    }
+
+
+def summarize(runs):
+    walls = sorted(run['wall_ms'] for run in runs)
+    last = runs[-1]
+    return {
+        'wall_ms': {
+            'median': round(statistics.median(walls), 2),
+            'min': walls[0],
+            'max': walls[-1],
+        },
+        'fetches': int(statistics.median(run['fetches'] for run in runs)),
+        'bytes': int(statistics.median(run['bytes'] for run in runs)),
+        'paths': last['paths'],
+        'icon': last['icon'],
+        # The parallel resolver stops early once it has a good icon, so requests can vary between runs
+        'stable': all(run['paths'] == last['paths'] and run['icon'] == last['icon'] for run in runs),
+    }
+
+
+def run(args):
+    names = set(args.sites) if args.sites else None
+    if names:
+        unknown = names - {bookmark[0] for bookmark in BOOKMARKS}
+        if unknown:
+            raise SystemExit(f"Unknown site(s): {', '.join(sorted(unknown))}")
+
+    work_dir = Path(tempfile.mkdtemp(prefix='favicon-bench-'))
+    runs = {}
+    try:
+        with FixtureServer(latency_ms=args.latency_ms) as fixtures:
+            bookmarks = fixtures.bookmarks(names)
+            for repetition in range(args.repeat):
+                # Each repetition starts cold: no cached icons and no remembered origins
+                cache_dir = work_dir / f'run-{repetition}' / 'favicons'
+                cache_dir.mkdir(parents=True)
+                # The cache index lives in the private storage directory
+                args.env['STARTPAGE_PRIVATE_DIR'] = str(work_dir / f'run-{repetition}' / 'private')
+                for name, site, url in bookmarks:
+                    runs.setdefault(name, []).append(resolve_once(args, fixtures, cache_dir, name, site, url))
+                    if args.verbose:
+                        latest = runs[name][-1]
+                        print(f"  {repetition + 1}/{args.repeat} {name:<24}{latest['wall_ms']:>9.1f} ms"
+                              f"{latest['fetches']:>5} fetches {latest['icon']['source']}", file=sys.stderr)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    sites = {name: summarize(site_runs) for name, site_runs in runs.items()}
+    return {
+        'meta': {
+            'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'php': php_version(args),
+            'concurrency': args.concurrency,
+            'repeat': args.repeat,
+            'latency_ms': args.latency_ms,
+            'label': args.label,
+        },
+        'sites': sites,
+        'total': {
+            'wall_ms': round(sum(site['wall_ms']['median'] for site in sites.values()), 2),
+            'fetches': sum(site['fetches'] for site in sites.values()),
+            'bytes': sum(site['bytes'] for site in sites.values()),
+        },
+    }
+
+
+def print_report(result):
+    header = f"{'site':<24}{'wall ms':>10}{'fetches':>9}{'bytes':>11}  {'source':<18}icon"
+    print()
+    print(header)
+    print('-' * (len(header) + 20))
+    for name, site in result['sites'].items():
+        icon = site['icon']
+        chosen = icon['source_url'] or icon['favicon_url']
+        marker = '' if site['stable'] else ' (varies)'
+        print(f"{name:<24}{site['wall_ms']['median']:>10.1f}{site['fetches']:>9}{site['bytes']:>11}  "
+              f"{icon['source']:<18}{chosen}{marker}")
+    total = result['total']
+    print(f"{'TOTAL':<24}{total['wall_ms']:>10.1f}{total['fetches']:>9}{total['bytes']:>11}")
+    print('(median wall time per resolve)')
+
+
+def compare(result, baseline, max_wall_regression, min_wall_delta):
+    """Print per-site deltas; return (regressions, changed icons)."""
+    regressions = []
+    changes = []
+    print()
+    print(f"{'site':<24}{'wall before':>12}{'wall after':>11}{'change':>9}{'fetches':>10}{'bytes':>14}")
+    names = sorted(set(result['sites']) | set(baseline.get('sites', {})))
+    for name in names:
+        after = result['sites'].get(name)
+        before = baseline.get('sites', {}).get(name)
+        if not after or not before:
+            print(f"{name:<24}{'(only in one run)':>45}")
+            continue
+
+        wall_before = before['wall_ms']['median']
+        wall_after = after['wall_ms']['median']
+        change = (wall_after - wall_before) / wall_before * 100 if wall_before else None
+        print(
+            f"{name:<24}{wall_before:>12.1f}{wall_after:>11.1f}"
+            f"{(f'{change:+.1f}%' if change is not None else '-'):>9}"
+            f"{after['fetches'] - before['fetches']:>+10}{after['bytes'] - before['bytes']:>+14}"
+        )
+        # Small absolute differences are scheduling noise, whatever their percentage
+        if change is not None and change > max_wall_regression and wall_after - wall_before > min_wall_delta:
+            regressions.append(f'{name}: wall time {change:+.1f}% ({wall_before:.1f} -> {wall_after:.1f} ms)')
+        if after['fetches'] > before['fetches']:
+            regressions.append(f"{name}: fetches {before['fetches']} -> {after['fetches']}")
+        if after['icon'] != before['icon']:
+            changes.append(f"{name}: {describe_icon(before['icon'])} -> {describe_icon(after['icon'])}")
+    return regressions, changes
+
+
+def describe_icon(icon):
+    return f"{icon['source']} {icon['source_url'] or icon['favicon_url']}"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--php', default='php', help='PHP CLI binary (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3, help='Cold resolves per site (default: %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='STARTPAGE_FAVICON_CONCURRENCY for the resolver (default: its own default)')
+    parser.add_argument('--latency-ms', type=int, default=0, help='Delay added to every fixture response')
+    parser.add_argument('--sites', nargs='+', metavar='SITE',
+                        help=f"Only these corpus sites (known: {', '.join(b[0] for b in BOOKMARKS)})")
+    parser.add_argument('--timeout', type=float, default=60.0, help='Seconds before one resolve is abandoned')
+    parser.add_argument('--label', default='', help='Free-form label stored with the results')
+    parser.add_argument('--output', help='Write results JSON to this path')
+    parser.add_argument('--compare', help='Baseline results JSON to diff against')
+    parser.add_argument('--diff', nargs=2, metavar=('BASELINE', 'RESULT'),
+                        help='Only compare two saved result files; nothing is resolved')
+    parser.add_argument('--max-wall-regression', type=float, default=25.0,
+                        help='Allowed median wall time increase in percent (default: %(default)s)')
+    parser.add_argument('--min-wall-delta', type=float, default=20.0,
+                        help='Wall time increases below this many ms are never regressions (default: %(default)s)')
+    parser.add_argument('--verbose', action='store_true', help='Print every resolve as it finishes')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.diff:
+        baseline, result = (json.loads(Path(path).read_text()) for path in args.diff)
+        return report(*compare(result, baseline, args.max_wall_regression, args.min_wall_delta))
+    if args.repeat < 1:
+        raise SystemExit('--repeat must be at least 1')
+
+    args.env = dict(os.environ)
+    if args.concurrency is not None:
+        args.env['STARTPAGE_FAVICON_CONCURRENCY'] = str(args.concurrency)
+    if php_version(args) is None:
+        print(f"PHP CLI not found: {args.php} (pass --php)", file=sys.stderr)
+        return 2
+
+    result = run(args)
+    print_report(result)
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, indent=2, sort_keys=True) + '\n')
+        print(f'Results written to {output}')
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        return report(*compare(result, baseline, args.max_wall_regression, args.min_wall_delta))
+    return 0
+
+
+def report(regressions, changes):
+    if changes:
+        print('\nChosen icon changed:\n  ' + '\n  '.join(changes))
+    if regressions:
+        print('\nRegressions:\n  ' + '\n  '.join(regressions))
+        return 1
+    print('\nNo regressions beyond the configured thresholds.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
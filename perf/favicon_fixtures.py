@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Fixture web server for favicon resolution benchmarks
+
+Serves a corpus of synthetic sites on 127.0.0.1, one port per site, so every
+site is its own origin with its own /favicon.ico and /site.webmanifest. The
+corpus covers plain icon links, root-only icons, SVG icons, linked and root
+manifests, redirect chains, a cross-origin redirect, <base href>, huge HTML,
+broken icons, sites without icons, server errors, slow and stalled sites, and
+a refused connection.
+
+Each site counts the requests it answers and the body bytes it sends, so a
+benchmark can report what a resolve cost. Used by perf/favicon_bench.py; run
+it directly to browse the corpus by hand:
+
+    python perf/favicon_fixtures.py --latency-ms 20
+"""
+
+import argparse
+import json
+import socket
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+WRITE_CHUNK_SIZE = 64 * 1024
+HUGE_HTML_BYTES = 3 * 1024 * 1024
+
+
+def make_png(size, rgb=(52, 120, 246)):
+    """A valid single-color RGB PNG of size x size pixels."""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    row = b'\x00' + bytes(rgb) * size
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0))
+        + chunk(b'IDAT', zlib.compress(row * size, 9))
+        + chunk(b'IEND', b'')
+    )
+
+
+def make_ico(size, rgb=(230, 80, 40)):
+    """A one-image ICO file with an embedded PNG, as modern favicon.ico files are."""
+    png = make_png(size, rgb)
+    dimension = 0 if size >= 256 else size
+    return struct.pack('<HHH', 0, 1, 1) + struct.pack('<BBBBHHII', dimension, dimension, 0, 0, 1, 32, len(png), 22) + png
+
+
+def make_svg(color='#2a9d8f'):
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 64 64">'
+        f'<rect width="64" height="64" rx="12" fill="{color}"/></svg>'
+    ).encode()
+
+
+def html(head='', body='', title='Fixture site'):
+    return response(200, 'text/html; charset=utf-8', (
+        '<!DOCTYPE html>\n<html lang="en">\n<head>\n'
+        f'<meta charset="utf-8">\n<title>{title}</title>\n{head}\n</head>\n'
+        f'<body>\n<h1>{title}</h1>\n{body}\n</body>\n</html>\n'
+    ).encode())
+
+
+def manifest(icons):
+    body = json.dumps({
+        'name': 'Fixture app',
+        'icons': [{'src': src, 'sizes': f'{size}x{size}', 'type': 'image/png'} for src, size in icons],
+    }).encode()
+    return response(200, 'application/manifest+json', body)
+
+
+def png(size):
+    return response(200, 'image/png', make_png(size))
+
+
+def ico(size):
+    return response(200, 'image/x-icon', make_ico(size))
+
+
+def svg():
+    return response(200, 'image/svg+xml', make_svg())
+
+
+def redirect(status, location):
+    return response(status, 'text/html; charset=utf-8', b'<a href="moved">Moved</a>', location=location)
+
+
+def response(status, content_type, body, location=None, delay_ms=0):
+    return {'status': status, 'content_type': content_type, 'body': body, 'location': location, 'delay_ms': delay_ms}
+
+
+def delayed(route, delay_ms):
+    return dict(route, delay_ms=delay_ms)
+
+
+def filler_html(size):
+    """Body markup of about size bytes: the kind of inline-everything page some sites serve."""
+    paragraph = '<div class="card"><p>' + 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 8 + '</p></div>\n'
+    return paragraph * (size // len(paragraph) + 1)
+
+
+def build_corpus():
+    """Site name -> {'latency_ms', 'default_status', 'routes'}. Bodies are generated once."""
+    icon_link = '<link rel="icon" type="image/png" sizes="32x32" href="/static/icon-32.png">'
+    basic_routes = {
+        '/': html(icon_link, title='Basic'),
+        '/static/icon-32.png': png(32),
+        '/favicon.ico': ico(16),
+    }
+
+    return {
+        'basic': {'routes': basic_routes},
+        'root-favicon': {'routes': {
+            '/': html(title='Root favicon only'),
+            '/favicon.ico': ico(32),
+        }},
+        'svg-icon': {'routes': {
+            '/': html('<link rel="icon" type="image/svg+xml" href="/icon.svg">', title='SVG icon'),
+            '/icon.svg': svg(),
+            '/favicon.ico': ico(16),
+        }},
+        'linked-manifest': {'routes': {
+            '/': html('<link rel="manifest" href="/app.webmanifest">', title='Linked manifest'),
+            '/app.webmanifest': manifest([('/icons/192.png', 192), ('/icons/512.png', 512)]),
+            '/icons/192.png': png(192),
+            '/icons/512.png': png(512),
+        }},
+        'root-manifest': {'routes': {
+            '/': html(title='Root manifest'),
+            '/site.webmanifest': manifest([('/android-chrome-192x192.png', 192)]),
+            '/android-chrome-192x192.png': png(192),
+        }},
+        'redirect-chain': {'routes': {
+            '/': redirect(301, '/start'),
+            '/start': redirect(302, '/home/'),
+            '/home/': html('<link rel="icon" href="icon.png" sizes="48x48">', title='Redirect chain'),
+            '/home/icon.png': png(48),
+        }},
+        'cross-origin-redirect': {'routes': {
+            '/': redirect(302, '{site:basic}/'),
+        }},
+        'base-href': {'routes': {
+            '/deep/page': html('<base href="/assets/">\n<link rel="icon" href="fav.png" sizes="32x32">', title='Base href'),
+            '/assets/fav.png': png(32),
+        }},
+        'huge-html': {'routes': {
+            '/': html(icon_link, filler_html(HUGE_HTML_BYTES), title='Huge HTML'),
+            '/static/icon-32.png': png(32),
+        }},
+        'huge-html-late-icon': {'routes': {
+            # The icon link only appears after megabytes of markup
+            '/': html(body=filler_html(HUGE_HTML_BYTES) + icon_link, title='Huge HTML, late icon'),
+            '/static/icon-32.png': png(32),
+        }},
+        'broken-icons': {'routes': {
+            '/': html('\n'.join([
+                '<link rel="icon" type="image/png" sizes="64x64" href="/missing.png">',
+                '<link rel="icon" type="image/png" sizes="48x48" href="/html-instead.png">',
+                '<link rel="icon" type="image/png" sizes="32x32" href="/empty.png">',
+                '<link rel="icon" type="image/svg+xml" href="/not-svg.svg">',
+            ]), title='Broken icons'),
+            '/html-instead.png': html(title='Not an image'),
+            '/empty.png': response(200, 'image/png', b''),
+            '/not-svg.svg': response(200, 'image/svg+xml', b'<html>oops</html>'),
+            '/apple-touch-icon.png': png(180),
+        }},
+        'no-icon': {'routes': {
+            '/': html(title='No icon'),
+        }},
+        'server-error': {'default_status': 500, 'routes': {}},
+        'forbidden': {'default_status': 403, 'routes': {
+            '/favicon.ico': ico(16),
+        }},
+        'slow': {'latency_ms': 300, 'routes': basic_routes},
+        'slow-icons': {'routes': {
+            '/': html(icon_link, title='Slow icons'),
+            '/static/icon-32.png': delayed(png(32), 1500),
+            '/favicon.ico': delayed(ico(16), 2500),
+        }},
+        'stall': {'routes': {
+            # Longer than the resolver's whole time budget
+            '/': delayed(html(icon_link, title='Stalled'), 10000),
+            '/static/icon-32.png': png(32),
+        }},
+        'shared-origin': {'routes': {
+            '/docs/a': html('<link rel="icon" href="/logo.png" sizes="64x64">', title='Shared origin A'),
+            '/docs/b': html('<link rel="icon" href="/logo.png" sizes="64x64">', title='Shared origin B'),
+            '/logo.png': png(64),
+        }},
+    }
+
+
+# (bookmark name, site, path). Sites without a server, like 'refused', get a port nobody listens on.
+BOOKMARKS = [
+    ('basic', 'basic', '/'),
+    ('root-favicon', 'root-favicon', '/'),
+    ('svg-icon', 'svg-icon', '/'),
+    ('linked-manifest', 'linked-manifest', '/'),
+    ('root-manifest', 'root-manifest', '/'),
+    ('redirect-chain', 'redirect-chain', '/'),
+    ('cross-origin-redirect', 'cross-origin-redirect', '/'),
+    ('base-href', 'base-href', '/deep/page'),
+    ('huge-html', 'huge-html', '/'),
+    ('huge-html-late-icon', 'huge-html-late-icon', '/'),
+    ('broken-icons', 'broken-icons', '/'),
+    ('no-icon', 'no-icon', '/'),
+    ('server-error', 'server-error', '/'),
+    ('forbidden', 'forbidden', '/'),
+    ('slow', 'slow', '/'),
+    ('slow-icons', 'slow-icons', '/'),
+    ('stall', 'stall', '/'),
+    ('refused', 'refused', '/'),
+    ('shared-origin-a', 'shared-origin', '/docs/a'),
+    ('shared-origin-b', 'shared-origin', '/docs/b'),
+]
+
+
+class SiteStats:
+    """Requests answered and body bytes sent by one site since the last reset."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            # A request still running from before the reset, like a stalled one, is no longer counted
+            self.generation += 1
+            self.fetches = 0
+            self.bytes = 0
+            self.paths = Counter()
+
+    def record(self, path):
+        """Count a request; returns the token its bytes are counted with."""
+        with self.lock:
+            self.fetches += 1
+            self.paths[path] += 1
+            return self.generation
+
+    def add_bytes(self, count, token):
+        with self.lock:
+            if token == self.generation:
+                self.bytes += count
+
+    def snapshot(self):
+        with self.lock:
+            return {'fetches': self.fetches, 'bytes': self.bytes, 'paths': dict(sorted(self.paths.items()))}
+
+
+def make_handler(name, site, stats, fixtures):
+    class SiteHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        server_version = f'FaviconFixture/{name}'
+
+        def do_GET(self):
+            self.serve(send_body=True)
+
+        def do_HEAD(self):
+            self.serve(send_body=False)
+
+        def serve(self, send_body):
+            path = urlsplit(self.path).path
+            token = stats.record(path)
+            route = site['routes'].get(path) or response(
+                site.get('default_status', 404), 'text/html; charset=utf-8', b'<!DOCTYPE html><title>Not found</title>'
+            )
+
+            delay_ms = site.get('latency_ms', 0) + route['delay_ms'] + fixtures.latency_ms
+            if delay_ms:
+                time.sleep(delay_ms / 1000)
+
+            body = fixtures.expand(route['body'])
+            try:
+                self.send_response(route['status'])
+                self.send_header('Content-Type', route['content_type'])
+                self.send_header('Content-Length', str(len(body)))
+                if route['location']:
+                    self.send_header('Location', fixtures.expand(route['location'].encode()).decode())
+                self.end_headers()
+                if send_body:
+                    for offset in range(0, len(body), WRITE_CHUNK_SIZE):
+                        part = body[offset:offset + WRITE_CHUNK_SIZE]
+                        self.wfile.write(part)
+                        stats.add_bytes(len(part), token)
+            except (BrokenPipeError, ConnectionResetError):
+                # The resolver abandons requests once it has a good enough icon
+                self.close_connection = True
+
+        def log_message(self, format, *args):
+            if fixtures.verbose:
+                sys.stderr.write(f'[{name}] {format % args}\n')
+
+    return SiteHandler
+
+
+class FixtureServer:
+    """Starts every corpus site on its own port. Use as a context manager."""
+
+    def __init__(self, host='127.0.0.1', port_base=0, latency_ms=0, verbose=False):
+        self.host = host
+        self.port_base = port_base
+        self.latency_ms = latency_ms
+        self.verbose = verbose
+        self.corpus = build_corpus()
+        self.stats = {name: SiteStats() for name in self.corpus}
+        self.origins = {}
+        self.servers = []
+        self.threads = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        for offset, (name, site) in enumerate(self.corpus.items()):
+            port = self.port_base + offset if self.port_base else 0
+            server = ThreadingHTTPServer((self.host, port), make_handler(name, site, self.stats[name], self))
+            server.daemon_threads = True
+            self.servers.append(server)
+            self.origins[name] = f'http://{self.host}:{server.server_address[1]}'
+
+            thread = threading.Thread(target=server.serve_forever, name=f'fixture-{name}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+        self.origins['refused'] = f'http://{self.host}:{unused_port(self.host)}'
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def expand(self, body):
+        """Replace {site:NAME} with that site's origin, for cross-origin links."""
+        if b'{site:' not in body:
+            return body
+        for name, origin in self.origins.items():
+            body = body.replace(f'{{site:{name}}}'.encode(), origin.encode())
+        return body
+
+    def bookmarks(self, names=None):
+        """(name, site, url) for the corpus bookmarks, optionally only those named."""
+        selected = [b for b in BOOKMARKS if not names or b[0] in names]
+        return [(name, site, self.origins[site] + path) for name, site, path in selected]
+
+    def reset_stats(self):
+        for stats in self.stats.values():
+            stats.reset()
+
+
+def unused_port(host):
+    """A port that refuses connections: bound once to pick it, then released."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: %(default)s)')
+    parser.add_argument('--port-base', type=int, default=8700,
+                        help='First port; sites use consecutive ports, 0 picks free ones (default: %(default)s)')
+    parser.add_argument('--latency-ms', type=int, default=0, help='Delay added to every response')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    with FixtureServer(args.host, args.port_base, args.latency_ms, verbose=args.verbose) as fixtures:
+        for name, site, url in fixtures.bookmarks():
+            print(f'{name:<24}{url}')
+        print('Serving; press Ctrl+C to stop.')
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+<?php
+/**
+ * Resolve one bookmark URL with IconResolver and print the result as JSON.
+ *
+ * Used by perf/favicon_bench.py, which starts one PHP process per resolve, as a
+ * request would. Concurrency comes from STARTPAGE_FAVICON_CONCURRENCY.
+ *
+ *   php perf/favicon_resolve.php <cache-dir> <url>
+ */
+
+if (PHP_SAPI !== 'cli') {
+    http_response_code(404);
+    exit;
+}
+
+require_once __DIR__ . '/../includes/favicon/icon-resolver.php';
+
+if ($argc < 3) {
+    fwrite(STDERR, "Usage: php perf/favicon_resolve.php <cache-dir> <url>\n");
+    exit(2);
+}
+
+$resolver = new IconResolver($argv[1]);
+$started = microtime(true);
+$result = $resolver->resolveForUrl($argv[2]);
+$elapsedMs = (microtime(true) - $started) * 1000;
+
+$cachedFile = null;
+if (strpos($result['favicon_url'], 'cache/favicons/') === 0) {
+    $path = rtrim($argv[1], '/') . '/' . basename($result['favicon_url']);
+    if (is_file($path)) {
+        $cachedFile = [
+            'extension' => pathinfo($path, PATHINFO_EXTENSION),
+            'size' => filesize($path),
+            'sha1' => sha1_file($path),
+        ];
+    }
+}
+
+echo json_encode([
+    'elapsed_ms' => round($elapsedMs, 2),
+    'result' => $result,
+    'cached_file' => $cachedFile,
+], JSON_UNESCAPED_SLASHES) . "\n";
+?>
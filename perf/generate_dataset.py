@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset generator for the StartPage schema
+
+Writes SQL that fills the users, pages, categories and bookmarks tables from
+database/setup.sql with multi-row INSERT statements. The same seed and
+options always produce byte-identical output, so load tests and benchmarks
+run against the same data every time.
+
+    python perf/generate_dataset.py --users 10000 --pages 20 --categories 4-8 \\
+        --bookmarks 500 --seed 42 --truncate | mysql startpage
+
+Counts accept a fixed number ("20") or an inclusive range ("4-8").
+Every generated account is named seed_user_00001, seed_user_00002, ...
+and uses the password "seed-password" unless --password-hash is given.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+from datetime import datetime
+
+# bcrypt hash of "seed-password"; PHP's password_verify() accepts it.
+SEED_PASSWORD_HASH = '$2y$10$abcdefghijklmnopqrstuuzRojDD.Z5QxgiKRv3jGSjPDWl8MgOfm'
+USERNAME_FORMAT = 'seed_user_{:05d}'
+
+# Mirrors bookmarkColorTokens() in includes/color_map.php (0 = no color).
+COLOR_IDS = [1, 2, 3, 4, 5]
+
+WORDS = [
+    'alpha', 'atlas', 'beacon', 'blue', 'cloud', 'code', 'daily', 'data', 'delta', 'dev',
+    'docs', 'echo', 'field', 'focus', 'forge', 'garden', 'grid', 'harbor', 'hub', 'ink',
+    'kit', 'lab', 'lake', 'ledger', 'lens', 'link', 'maple', 'market', 'metric', 'news',
+    'north', 'notes', 'orbit', 'paper', 'pilot', 'pixel', 'portal', 'quartz', 'radar', 'river',
+    'signal', 'sketch', 'solar', 'stack', 'studio', 'summit', 'tide', 'trail', 'vault', 'wave',
+]
+TLDS = ['com', 'org', 'net', 'io', 'dev', 'co.uk', 'nl', 'de']
+PAGE_NAMES = ['Home', 'Work', 'Projects', 'Reading', 'Tools', 'News', 'Travel', 'Finance', 'Media', 'Archive']
+CATEGORY_NAMES = ['Daily', 'Docs', 'Dashboards', 'Reference', 'Social', 'Shopping', 'Learning', 'Music', 'Infra', 'Misc']
+
+
+def parse_range(value):
+    """Parse "N" or "A-B" into an inclusive (low, high) tuple."""
+    low, _, high = str(value).partition('-')
+    low = int(low)
+    high = int(high) if high else low
+    if low < 0 or high < low:
+        raise argparse.ArgumentTypeError(f"invalid count or range: '{value}'")
+    return low, high
+
+
+def sql_string(value):
+    if value is None:
+        return 'NULL'
+    escaped = (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace("'", "\\'")
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+        .replace('\0', '\\0')
+    )
+    return f"'{escaped}'"
+
+
+def zipf_weights(size, exponent):
+    return [1.0 / (rank ** exponent) for rank in range(1, size + 1)]
+
+
+class DatasetGenerator:
+    """Produces deterministic rows; every random draw comes from one seeded RNG."""
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.next_ids = {
+            'users': args.id_offset + 1,
+            'pages': args.id_offset + 1,
+            'categories': args.id_offset + 1,
+            'bookmarks': args.id_offset + 1,
+        }
+        self.counts = {table: 0 for table in self.next_ids}
+        self.trashed_categories = 0
+        self.clicked_bookmarks = 0
+
+    def take_id(self, table):
+        value = self.next_ids[table]
+        self.next_ids[table] += 1
+        self.counts[table] += 1
+        return value
+
+    def draw(self, count_range):
+        low, high = count_range
+        return low if low == high else self.rng.randint(low, high)
+
+    def timestamp(self, seconds_ago):
+        """Render a time relative to @ref, which the SQL header sets once."""
+        return f'@ref - INTERVAL {int(seconds_ago)} SECOND'
+
+    def words(self, count):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(count))
+
+    def preferences(self):
+        # Most categories keep the schema default; a minority vary the layout.
+        if self.rng.random() < 0.7:
+            return None
+        return json.dumps({
+            'cat_width': self.rng.randint(1, 4),
+            'no_descr': int(self.rng.random() < 0.3),
+            'show_fav': int(self.rng.random() < 0.9),
+            'collapsed_link_limit': self.rng.randint(3, 20),
+        }, separators=(', ', ': '))
+
+    def user_rows(self, user_id):
+        age = self.rng.randint(30, 3 * 365) * 86400
+        yield (
+            user_id,
+            sql_string(USERNAME_FORMAT.format(user_id - self.args.id_offset)),
+            sql_string(self.args.password_hash),
+            self.timestamp(age),
+            self.timestamp(age),
+        )
+
+    def bookmark_row(self, bookmark_id, user_id, category_id, sort_order, click_count):
+        args = self.args
+        host = f'{self.rng.choice(WORDS)}{self.rng.choice(WORDS)}.{self.rng.choice(TLDS)}'
+        path = '/'.join(self.rng.choice(WORDS) for _ in range(self.rng.randint(0, 3)))
+        url = f'https://{host}/{path}'[:200]
+        title = self.words(self.rng.randint(1, 5)).title()[:255]
+        description = self.words(self.rng.randint(3, 14))[:200] if self.rng.random() < args.description_ratio else None
+        color = self.rng.choice(COLOR_IDS) if self.rng.random() < args.color_ratio else None
+        created_ago = self.rng.randint(1, 3 * 365) * 86400 + self.rng.randint(0, 86399)
+
+        if click_count > 0:
+            # Exponential age: most clicked bookmarks were used recently, a long tail is stale.
+            clicked_ago = min(created_ago, int(self.rng.expovariate(1 / (args.click_age_days * 86400))))
+            last_clicked = self.timestamp(clicked_ago)
+            self.clicked_bookmarks += 1
+        else:
+            last_clicked = 'NULL'
+
+        return (
+            bookmark_id,
+            sql_string(title),
+            sql_string(url),
+            sql_string(description),
+            'NULL',
+            category_id,
+            sort_order,
+            color if color is not None else 'NULL',
+            self.timestamp(created_ago),
+            self.timestamp(self.rng.randint(0, created_ago)),
+            user_id,
+            click_count,
+            last_clicked,
+        )
+
+    def click_counts(self, size):
+        """Zipf-skewed click counts: a few favourites collect most clicks."""
+        args = self.args
+        weights = zipf_weights(size, args.click_skew)
+        ranks = list(range(size))
+        self.rng.shuffle(ranks)
+        counts = []
+        for position in range(size):
+            if self.rng.random() < args.never_clicked_ratio:
+                counts.append(0)
+                continue
+            share = weights[ranks[position]]
+            counts.append(max(1, int(args.max_clicks * share * self.rng.uniform(0.5, 1.0))))
+        return counts
+
+    def chunk(self, first_user, last_user):
+        """Return rows per table for one block of users, in foreign-key order."""
+        args = self.args
+        rows = {'users': [], 'pages': [], 'categories': [], 'bookmarks': []}
+
+        for _ in range(first_user, last_user + 1):
+            user_id = self.take_id('users')
+            rows['users'].extend(self.user_rows(user_id))
+
+            for page_index in range(self.draw(args.pages)):
+                page_id = self.take_id('pages')
+                page_name = PAGE_NAMES[page_index % len(PAGE_NAMES)]
+                if page_index >= len(PAGE_NAMES):
+                    page_name = f'{page_name} {page_index // len(PAGE_NAMES) + 1}'
+                page_age = self.rng.randint(1, 365) * 86400
+                rows['pages'].append((
+                    page_id, sql_string(page_name), page_index,
+                    self.timestamp(page_age), self.timestamp(page_age), user_id,
+                ))
+
+                for category_index in range(self.draw(args.categories)):
+                    category_id = self.take_id('categories')
+                    trashed = self.rng.random() < args.trashed_ratio
+                    if trashed:
+                        self.trashed_categories += 1
+                    preferences = self.preferences()
+                    rows['categories'].append((
+                        category_id,
+                        sql_string(f'{CATEGORY_NAMES[category_index % len(CATEGORY_NAMES)]} {category_index + 1}'),
+                        page_id,
+                        category_index,
+                        sql_string(preferences) if preferences else 'DEFAULT',
+                        self.timestamp(self.rng.randint(0, 30 * 86400)) if trashed else 'NULL',
+                        user_id,
+                    ))
+
+                    bookmark_count = self.draw(args.bookmarks)
+                    for sort_order, clicks in enumerate(self.click_counts(bookmark_count)):
+                        rows['bookmarks'].append(self.bookmark_row(
+                            self.take_id('bookmarks'), user_id, category_id, sort_order, clicks
+                        ))
+        return rows
+
+
+COLUMNS = {
+    'users': ['id', 'username', 'password_hash', 'created_at', 'updated_at'],
+    'pages': ['id', 'name', 'sort_order', 'created_at', 'updated_at', 'user_id'],
+    'categories': ['id', 'name', 'page_id', 'sort_order', 'preferences', 'deleted_at', 'user_id'],
+    'bookmarks': [
+        'id', 'title', 'url', 'description', 'favicon_url', 'category_id', 'sort_order', 'color',
+        'created_at', 'updated_at', 'user_id', 'click_count', 'last_clicked_at',
+    ],
+}
+
+
+class SqlWriter:
+    """Writes statements and keeps a running checksum of everything written."""
+
+    def __init__(self, stream, batch_size):
+        self.stream = stream
+        self.batch_size = batch_size
+        self.digest = hashlib.sha256()
+
+    def write(self, text):
+        self.stream.write(text)
+        self.digest.update(text.encode('utf-8'))
+
+    def insert(self, table, rows):
+        columns = ', '.join(f'`{column}`' for column in COLUMNS[table])
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            values = ',\n'.join('(' + ', '.join(str(value) for value in row) + ')' for row in batch)
+            self.write(f'INSERT INTO `{table}` ({columns}) VALUES\n{values};\n')
+
+
+def generate(args, stream):
+    generator = DatasetGenerator(args)
+    writer = SqlWriter(stream, args.batch_size)
+
+    writer.write('-- Generated by perf/generate_dataset.py\n')
+    writer.write(f'-- Options: {json.dumps(describe_options(args), sort_keys=True)}\n')
+    writer.write('SET NAMES utf8mb4;\n')
+    writer.write('SET FOREIGN_KEY_CHECKS = 0;\nSET UNIQUE_CHECKS = 0;\nSET autocommit = 0;\n')
+    if args.reference_time:
+        writer.write(f"SET @ref = {sql_string(args.reference_time)};\n")
+    else:
+        writer.write('SET @ref = NOW();\n')
+    if args.truncate:
+        for table in ('bookmarks', 'categories', 'pages', 'remember_tokens', 'users'):
+            writer.write(f'DELETE FROM `{table}`;\n')
+        writer.write('COMMIT;\n')
+
+    for first_user in range(1, args.users + 1, args.users_per_chunk):
+        last_user = min(args.users, first_user + args.users_per_chunk - 1)
+        rows = generator.chunk(first_user, last_user)
+        for table in ('users', 'pages', 'categories', 'bookmarks'):
+            writer.insert(table, rows[table])
+        writer.write('COMMIT;\n')
+
+    writer.write('SET FOREIGN_KEY_CHECKS = 1;\nSET UNIQUE_CHECKS = 1;\nSET autocommit = 1;\n')
+    for table in ('users', 'pages', 'categories', 'bookmarks'):
+        writer.write(f'ALTER TABLE `{table}` AUTO_INCREMENT = {generator.next_ids[table]};\n')
+
+    return {
+        'rows': generator.counts,
+        'trashed_categories': generator.trashed_categories,
+        'clicked_bookmarks': generator.clicked_bookmarks,
+        'sha256': writer.digest.hexdigest(),
+    }
+
+
+def describe_options(args):
+    return {
+        'seed': args.seed,
+        'users': args.users,
+        'pages': list(args.pages),
+        'categories': list(args.categories),
+        'bookmarks': list(args.bookmarks),
+        'trashed_ratio': args.trashed_ratio,
+        'never_clicked_ratio': args.never_clicked_ratio,
+        'click_skew': args.click_skew,
+        'max_clicks': args.max_clicks,
+        'click_age_days': args.click_age_days,
+        'description_ratio': args.description_ratio,
+        'color_ratio': args.color_ratio,
+        'id_offset': args.id_offset,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: %(default)s)')
+    parser.add_argument('--users', type=int, default=100, help='Number of users (default: %(default)s)')
+    parser.add_argument('--pages', type=parse_range, default=(3, 3), help='Pages per user, N or A-B (default: 3)')
+    parser.add_argument('--categories', type=parse_range, default=(4, 8), help='Categories per page (default: 4-8)')
+    parser.add_argument('--bookmarks', type=parse_range, default=(5, 30), help='Bookmarks per category (default: 5-30)')
+    parser.add_argument('--trashed-ratio', type=float, default=0.05,
+                        help='Share of categories moved to Trash via deleted_at (default: %(default)s)')
+    parser.add_argument('--never-clicked-ratio', type=float, default=0.4,
+                        help='Share of bookmarks with click_count 0 (default: %(default)s)')
+    parser.add_argument('--click-skew', type=float, default=1.2,
+                        help='Zipf exponent for click_count within a category (default: %(default)s)')
+    parser.add_argument('--max-clicks', type=int, default=500,
+                        help='Click count of the most popular bookmark (default: %(default)s)')
+    parser.add_argument('--click-age-days', type=float, default=30.0,
+                        help='Mean age of last_clicked_at in days (default: %(default)s)')
+    parser.add_argument('--description-ratio', type=float, default=0.5, help='Share of bookmarks with a description')
+    parser.add_argument('--color-ratio', type=float, default=0.1, help='Share of bookmarks with a color')
+    parser.add_argument('--id-offset', type=int, default=0,
+                        help='Start generated IDs after this value, to load next to existing rows')
+    parser.add_argument('--password-hash', default=SEED_PASSWORD_HASH, help='password_hash for every user')
+    parser.add_argument('--reference-time',
+                        help="Fixed 'YYYY-MM-DD HH:MM:SS' for relative timestamps (default: NOW() at load time)")
+    parser.add_argument('--truncate', action='store_true', help='Delete existing users and content first')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT (default: %(default)s)')
+    parser.add_argument('--users-per-chunk', type=int, default=25, help='Users per transaction (default: %(default)s)')
+    parser.add_argument('--output', help='Write SQL to this file instead of stdout')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.reference_time:
+        datetime.strptime(args.reference_time, '%Y-%m-%d %H:%M:%S')
+    for name in ('trashed_ratio', 'never_clicked_ratio', 'description_ratio', 'color_ratio'):
+        if not 0 <= getattr(args, name) <= 1:
+            raise SystemExit(f"--{name.replace('_', '-')} must be between 0 and 1")
+    if args.click_age_days <= 0 or args.batch_size < 1 or args.users_per_chunk < 1:
+        raise SystemExit('--click-age-days, --batch-size and --users-per-chunk must be positive')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='\n') as stream:
+            summary = generate(args, stream)
+    else:
+        summary = generate(args, sys.stdout)
+
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Load generator for the StartPage JSON API
+
+Logs in a pool of users through app/login.php, keeps one cookie jar per user,
+and replays a weighted mix of API calls at a fixed arrival rate:
+
+    get-all-bookmarks.php, track_click.php, reorder.php, add.php, edit.php
+
+Results are reported per endpoint (p50/p95/p99 latency, throughput, error
+rate) and saved as JSON. Passing --compare with an earlier result prints the
+difference and exits non-zero when p95 latency or error rate regress.
+
+    python perf/load_test.py --base-url http://localhost:8000 --users 20 \\
+        --rate 50 --duration 60 --output perf/results/run.json
+
+The write endpoints change data. Run against a seeded database
+(perf/generate_dataset.py) or pass --read-only.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - reported at runtime
+    aiohttp = None
+
+DEFAULT_MIX = 'get-all-bookmarks=30,track_click=45,reorder=10,add=5,edit=10'
+WRITE_ENDPOINTS = {'track_click', 'reorder', 'add', 'edit'}
+ADDED_TITLE_PREFIX = 'loadtest-'
+
+
+def parse_mix(spec, read_only=False):
+    """Parse 'name=weight,...' into an ordered list of (endpoint, weight)."""
+    mix = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip().removesuffix('.php')
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}' (known: {', '.join(sorted(ENDPOINTS))})")
+        if read_only and name in WRITE_ENDPOINTS:
+            continue
+        mix.append((name, float(weight or 1)))
+    if not mix:
+        raise ValueError('The endpoint mix is empty')
+    return mix
+
+
+def percentile(sorted_values, fraction):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class UserSession:
+    """One logged-in user with its own cookie jar and a local view of its bookmarks."""
+
+    def __init__(self, http, base_url, username):
+        self.http = http
+        self.base_url = base_url
+        self.username = username
+        self.bookmarks = {}
+        self.added_ids = []
+        self.counter = 0
+
+    def api_url(self, endpoint):
+        return f'{self.base_url}/api/{endpoint}.php'
+
+    async def login(self, password):
+        async with self.http.get(f'{self.base_url}/app/login.php') as response:
+            await response.read()
+        async with self.http.post(
+            f'{self.base_url}/app/login.php',
+            data={'username': self.username, 'password': password},
+        ) as response:
+            await response.read()
+            if not response.url.path.endswith('/app/index.php'):
+                raise RuntimeError(f"Login failed for '{self.username}' (ended at {response.url})")
+
+    def remember_bookmarks(self, rows):
+        self.bookmarks = {int(row['id']): row for row in rows}
+
+    def bookmarks_by_category(self):
+        grouped = {}
+        for row in self.bookmarks.values():
+            grouped.setdefault(int(row['category_id']), []).append(int(row['id']))
+        return grouped
+
+
+async def call_get_all_bookmarks(session, rng):
+    async with session.http.get(session.api_url('get-all-bookmarks')) as response:
+        payload = await response.json(content_type=None)
+    if payload.get('success'):
+        session.remember_bookmarks(payload.get('bookmarks', []))
+    return response.status, payload
+
+
+async def call_track_click(session, rng):
+    if not session.bookmarks:
+        return None
+    bookmark_id = rng.choice(list(session.bookmarks))
+    return await post_json(session, 'track_click', {'id': bookmark_id})
+
+
+async def call_reorder(session, rng):
+    categories = [ids for ids in session.bookmarks_by_category().values() if len(ids) > 1]
+    if not categories:
+        return None
+    order = list(rng.choice(categories))
+    # Simulate one drag: move a single bookmark to another position.
+    moved = order.pop(rng.randrange(len(order)))
+    order.insert(rng.randrange(len(order) + 1), moved)
+    category_id = int(session.bookmarks[moved]['category_id'])
+    return await post_json(session, 'reorder', {'category_id': category_id, 'order': order})
+
+
+async def call_add(session, rng):
+    categories = list(session.bookmarks_by_category())
+    if not categories:
+        return None
+    marker = uuid.UUID(int=rng.getrandbits(128)).hex[:12]
+    status, payload = await post_json(session, 'add', {
+        # .invalid never resolves, so server-side metadata and favicon lookups fail fast.
+        'url': f'https://loadtest-{marker}.invalid/',
+        'title': f'{ADDED_TITLE_PREFIX}{marker}',
+        'description': 'Created by perf/load_test.py',
+        'category_id': rng.choice(categories),
+    })
+    if payload.get('success') and payload.get('id'):
+        session.added_ids.append(int(payload['id']))
+    return status, payload
+
+
+async def call_edit(session, rng):
+    if not session.bookmarks:
+        return None
+    row = session.bookmarks[rng.choice(list(session.bookmarks))]
+    session.counter += 1
+    # A changing description guarantees the UPDATE touches a row. edit.php
+    # clears a color that is not sent, so the current one goes along.
+    return await post_json(session, 'edit', {
+        'id': int(row['id']),
+        'title': row['title'],
+        'url': row['url'],
+        'description': f'loadtest edit {session.counter} {time.time():.3f}',
+        'category_id': int(row['category_id']),
+        'color': int(row.get('color') or 0),
+    })
+
+
+async def post_json(session, endpoint, body):
+    async with session.http.post(session.api_url(endpoint), json=body) as response:
+        payload = await response.json(content_type=None)
+    return response.status, payload if isinstance(payload, dict) else {}
+
+
+ENDPOINTS = {
+    'get-all-bookmarks': call_get_all_bookmarks,
+    'track_click': call_track_click,
+    'reorder': call_reorder,
+    'add': call_add,
+    'edit': call_edit,
+}
+
+
+class Recorder:
+    """Collects one sample per request."""
+
+    def __init__(self):
+        self.samples = {}
+        self.skipped = {}
+
+    def record(self, endpoint, latency_ms, ok, status, error=None):
+        self.samples.setdefault(endpoint, []).append({
+            'latency_ms': latency_ms,
+            'ok': ok,
+            'status': status,
+            'error': error,
+        })
+
+    def skip(self, endpoint):
+        self.skipped[endpoint] = self.skipped.get(endpoint, 0) + 1
+
+    def summarize(self, elapsed):
+        endpoints = {}
+        every = []
+        for endpoint, samples in sorted(self.samples.items()):
+            endpoints[endpoint] = summarize_samples(samples, elapsed)
+            endpoints[endpoint]['skipped'] = self.skipped.get(endpoint, 0)
+            every.extend(samples)
+        return {'total': summarize_samples(every, elapsed), 'endpoints': endpoints}
+
+
+def summarize_samples(samples, elapsed):
+    latencies = sorted(sample['latency_ms'] for sample in samples)
+    errors = [sample for sample in samples if not sample['ok']]
+    statuses = {}
+    for sample in samples:
+        key = str(sample['status'])
+        statuses[key] = statuses.get(key, 0) + 1
+    messages = {}
+    for sample in errors:
+        if sample['error']:
+            messages[sample['error']] = messages.get(sample['error'], 0) + 1
+
+    def rounded(value):
+        return None if value is None else round(value, 2)
+
+    return {
+        'requests': len(samples),
+        'errors': len(errors),
+        'error_rate': round(len(errors) / len(samples), 4) if samples else 0.0,
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed > 0 else 0.0,
+        'latency_ms': {
+            'mean': rounded(statistics.fmean(latencies)) if latencies else None,
+            'p50': rounded(percentile(latencies, 0.50)),
+            'p95': rounded(percentile(latencies, 0.95)),
+            'p99': rounded(percentile(latencies, 0.99)),
+            'max': rounded(latencies[-1]) if latencies else None,
+        },
+        'status_codes': statuses,
+        'top_errors': dict(sorted(messages.items(), key=lambda item: -item[1])[:5]),
+    }
+
+
+async def run_request(endpoint, session, rng, recorder, limiter):
+    async with limiter:
+        started = time.perf_counter()
+        try:
+            result = await ENDPOINTS[endpoint](session, rng)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as error:
+            recorder.record(endpoint, (time.perf_counter() - started) * 1000, False, 'exception', type(error).__name__)
+            return
+        latency_ms = (time.perf_counter() - started) * 1000
+
+    if result is None:
+        recorder.skip(endpoint)
+        return
+    status, payload = result
+    ok = 200 <= status < 300 and bool(payload.get('success'))
+    recorder.record(endpoint, latency_ms, ok, status, None if ok else str(payload.get('message', ''))[:120])
+
+
+def load_credentials(args):
+    if args.users_file:
+        with open(args.users_file, newline='') as handle:
+            rows = [row for row in csv.reader(handle) if row and not row[0].startswith('#')]
+        return [(row[0].strip(), row[1].strip()) for row in rows][: args.users or None]
+    return [(args.username_format.format(index), args.password) for index in range(1, args.users + 1)]
+
+
+async def open_sessions(args, credentials):
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    sessions = []
+    for username, password in credentials:
+        http = aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True), timeout=timeout)
+        session = UserSession(http, args.base_url, username)
+        try:
+            await session.login(password)
+            status, payload = await call_get_all_bookmarks(session, None)
+            if not payload.get('success'):
+                raise RuntimeError(f"get-all-bookmarks.php failed for '{username}' ({status})")
+        except Exception:
+            await http.close()
+            raise
+        sessions.append(session)
+    return sessions
+
+
+async def cleanup_added(sessions):
+    removed = 0
+    for session in sessions:
+        for bookmark_id in session.added_ids:
+            status, payload = await post_json(session, 'delete-bookmark', {'id': bookmark_id})
+            removed += bool(payload.get('success'))
+    return removed
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix, args.read_only)
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+
+    credentials = load_credentials(args)
+    if not credentials:
+        raise SystemExit('No users configured')
+
+    print(f'Logging in {len(credentials)} users at {args.base_url} ...')
+    sessions = await open_sessions(args, credentials)
+    recorder = Recorder()
+    limiter = asyncio.Semaphore(args.concurrency)
+    tasks = []
+
+    print(f'Running {args.rate:g} req/s for {args.duration:g}s, mix: {", ".join(f"{n}={w:g}" for n, w in mix)}')
+    started = time.perf_counter()
+    next_at = started
+    try:
+        while True:
+            # Poisson arrivals keep the offered load independent of server latency.
+            next_at += rng.expovariate(args.rate)
+            if next_at - started >= args.duration:
+                break
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            endpoint = rng.choices(names, weights)[0]
+            session = rng.choice(sessions)
+            request_rng = random.Random(rng.getrandbits(64))
+            tasks.append(asyncio.create_task(run_request(endpoint, session, request_rng, recorder, limiter)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+        if args.cleanup:
+            removed = await cleanup_added(sessions)
+            print(f'Removed {removed} bookmarks created by this run')
+    finally:
+        for session in sessions:
+            await session.http.close()
+
+    summary = recorder.summarize(elapsed)
+    return {
+        'meta': {
+            'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'base_url': args.base_url,
+            'users': len(sessions),
+            'rate': args.rate,
+            'duration_s': args.duration,
+            'elapsed_s': round(elapsed, 3),
+            'concurrency': args.concurrency,
+            'mix': dict(mix),
+            'seed': args.seed,
+            'label': args.label,
+        },
+        **summary,
+    }
+
+
+def print_report(result):
+    header = f"{'endpoint':<20}{'reqs':>8}{'err%':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    print()
+    print(header)
+    print('-' * len(header))
+    rows = list(result['endpoints'].items()) + [('TOTAL', result['total'])]
+    for name, stats in rows:
+        latency = stats['latency_ms']
+
+        def cell(value):
+            return f"{value:>9.1f}" if value is not None else f"{'-':>9}"
+
+        print(
+            f"{name:<20}{stats['requests']:>8}{stats['error_rate'] * 100:>7.1f}%{stats['throughput_rps']:>9.1f}"
+            f"{cell(latency['p50'])}{cell(latency['p95'])}{cell(latency['p99'])}{cell(latency['max'])}"
+        )
+    print('(latencies in ms)')
+
+
+def compare(result, baseline, max_latency_regression, max_error_increase):
+    """Print per-endpoint deltas; return the list of regressions found."""
+    regressions = []
+    print()
+    print(f"{'endpoint':<20}{'p95 before':>12}{'p95 after':>12}{'change':>9}{'err before':>12}{'err after':>11}")
+    names = sorted(set(result['endpoints']) | set(baseline.get('endpoints', {})))
+    for name in names + ['TOTAL']:
+        after = result['total'] if name == 'TOTAL' else result['endpoints'].get(name)
+        before = baseline.get('total') if name == 'TOTAL' else baseline.get('endpoints', {}).get(name)
+        if not after or not before:
+            print(f"{name:<20}{'(only in one run)':>45}")
+            continue
+        p95_before = before['latency_ms']['p95']
+        p95_after = after['latency_ms']['p95']
+        change = None
+        if p95_before and p95_after is not None:
+            change = (p95_after - p95_before) / p95_before * 100
+        print(
+            f"{name:<20}{p95_before or 0:>12.1f}{p95_after or 0:>12.1f}"
+            f"{(f'{change:+.1f}%' if change is not None else '-'):>9}"
+            f"{before['error_rate'] * 100:>11.1f}%{after['error_rate'] * 100:>10.1f}%"
+        )
+        if change is not None and change > max_latency_regression:
+            regressions.append(f'{name}: p95 {change:+.1f}%')
+        if (after['error_rate'] - before['error_rate']) * 100 > max_error_increase:
+            regressions.append(f"{name}: error rate {before['error_rate']:.2%} -> {after['error_rate']:.2%}")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--base-url', default='http://localhost/msp', help='Application root (default: %(default)s)')
+    parser.add_argument('--users', type=int, default=10, help='Number of concurrent users (default: %(default)s)')
+    parser.add_argument('--username-format', default='seed_user_{:05d}',
+                        help='Username pattern for generated accounts (default: %(default)s)')
+    parser.add_argument('--password', default='seed-password', help='Password for generated accounts')
+    parser.add_argument('--users-file', help='CSV of username,password rows; overrides --username-format')
+    parser.add_argument('--rate', type=float, default=20.0, help='Total requests per second (default: %(default)s)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to generate load (default: %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=100, help='Maximum in-flight requests (default: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Endpoint weights (default: %(default)s)')
+    parser.add_argument('--read-only', action='store_true', help='Drop write endpoints from the mix')
+    parser.add_argument('--cleanup', action='store_true', help='Delete bookmarks created by add.php after the run')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the request schedule')
+    parser.add_argument('--label', default='', help='Free-form label stored with the results')
+    parser.add_argument('--output', help='Write results JSON to this path')
+    parser.add_argument('--compare', help='Baseline results JSON to diff against')
+    parser.add_argument('--diff', nargs=2, metavar=('BASELINE', 'RESULT'),
+                        help='Only compare two saved result files; no load is generated')
+    parser.add_argument('--max-p95-regression', type=float, default=20.0,
+                        help='Allowed p95 increase in percent before --compare fails (default: %(default)s)')
+    parser.add_argument('--max-error-increase', type=float, default=1.0,
+                        help='Allowed error-rate increase in percentage points (default: %(default)s)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.base_url = args.base_url.rstrip('/')
+    if args.diff:
+        baseline, result = (json.loads(Path(path).read_text()) for path in args.diff)
+        return report_regressions(compare(result, baseline, args.max_p95_regression, args.max_error_increase))
+    if aiohttp is None:
+        print('aiohttp is required: pip install -r perf/requirements.txt', file=sys.stderr)
+        return 2
+    try:
+        parse_mix(args.mix, args.read_only)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+
+    result = asyncio.run(run(args))
+    print_report(result)
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, indent=2) + '\n')
+        print(f'Results written to {output}')
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        return report_regressions(compare(result, baseline, args.max_p95_regression, args.max_error_increase))
+    return 0
+
+
+def report_regressions(regressions):
+    if regressions:
+        print('\nRegressions:\n  ' + '\n  '.join(regressions))
+        return 1
+    print('\nNo regressions beyond the configured thresholds.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
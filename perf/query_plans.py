@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression suite for the hottest statements
+
+Runs EXPLAIN and ANALYZE FORMAT=JSON on each hot statement against a local
+MariaDB, for the user with the most bookmarks, and times repeated runs. A
+statement fails when a table is read by a full table or index scan, when it
+sorts or builds a temporary table without being allowed to, or, with
+--compare, when its p95 latency regresses.
+
+With --recreate the database is dropped and rebuilt first: database/setup.sql,
+then every file in database/migrations/ in name order, then a dataset from
+perf/generate_dataset.py. Without it the existing database is used as is.
+
+    python perf/query_plans.py --user root --database startpage_plans --recreate \\
+        --users 500 --output perf/results/plans-before.json
+    python perf/query_plans.py --user root --database startpage_plans \\
+        --compare perf/results/plans-before.json
+
+HOT_QUERIES copies each statement from the file named in its 'source'; keep
+them in sync when those statements change. Writes run inside a transaction
+that is rolled back.
+"""
+
+import argparse
+import io
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import generate_dataset
+
+try:
+    import pymysql
+    from pymysql.constants import CLIENT
+except ImportError:  # pragma: no cover - reported at runtime
+    pymysql = None
+
+ROOT = Path(__file__).resolve().parent.parent
+SCHEMA_FILE = ROOT / 'database' / 'setup.sql'
+MIGRATIONS_DIR = ROOT / 'database' / 'migrations'
+DATA_TABLES = ('users', 'pages', 'categories', 'bookmarks')
+
+# Sorting the joined rows of one user cannot be avoided when ORDER BY spans tables
+MULTI_TABLE_ORDER = 'ORDER BY spans several tables, so one user\'s joined rows are sorted'
+
+
+def placeholders(values):
+    return ', '.join(['?'] * len(values))
+
+
+HOT_QUERIES = [
+    {
+        'name': 'index_page',
+        'source': 'includes/services/index-data-service.php (loadCategoriesAndBookmarks)',
+        'sql': lambda s: '''
+            SELECT
+                c.id as category_id,
+                c.name as category_name,
+                c.page_id,
+                c.sort_order as category_sort,
+                c.preferences,
+                p.name as page_name,
+                p.sort_order as page_sort,
+                b.id as bookmark_id,
+                b.title as bookmark_title,
+                b.url as bookmark_url,
+                b.description as bookmark_description,
+                b.favicon_url,
+                b.sort_order as bookmark_sort,
+                b.color as bookmark_color,
+                b.last_clicked_at
+            FROM categories c
+            JOIN pages p ON c.page_id = p.id AND p.user_id = ?
+            LEFT JOIN bookmarks b ON c.id = b.category_id AND b.user_id = ?
+            WHERE c.page_id = ? AND c.user_id = ? AND c.deleted_at IS NULL
+            ORDER BY c.sort_order ASC, c.id ASC, b.sort_order ASC, b.id ASC
+        ''',
+        'params': lambda s: [s['user_id'], s['user_id'], s['page_id'], s['user_id']],
+        'allow': {'filesort': MULTI_TABLE_ORDER, 'temporary': MULTI_TABLE_ORDER},
+    },
+    {
+        'name': 'page_list',
+        'source': 'includes/services/index-data-service.php (getAllPages)',
+        'sql': lambda s: 'SELECT id, name FROM pages WHERE user_id = ? ORDER BY sort_order ASC, id ASC',
+        'params': lambda s: [s['user_id']],
+    },
+    {
+        'name': 'all_bookmarks',
+        'source': 'api/get-all-bookmarks.php (full sync)',
+        'sql': lambda s: '''
+            SELECT
+                b.id,
+                b.title,
+                b.url,
+                b.description,
+                b.favicon_url,
+                b.category_id,
+                b.color,
+                b.sort_order,
+                b.click_count,
+                b.last_clicked_at,
+                c.name as category_name,
+                c.sort_order as category_sort,
+                p.id as page_id,
+                p.name as page_name,
+                p.sort_order as page_sort
+            FROM bookmarks b
+            JOIN categories c ON b.category_id = c.id AND c.user_id = ? AND c.deleted_at IS NULL
+            JOIN pages p ON c.page_id = p.id AND p.user_id = ?
+            WHERE b.user_id = ?
+            ORDER BY p.sort_order ASC, p.id ASC, c.sort_order ASC, c.id ASC, b.sort_order ASC, b.id ASC
+        ''',
+        'params': lambda s: [s['user_id'], s['user_id'], s['user_id']],
+        'allow': {'filesort': MULTI_TABLE_ORDER, 'temporary': MULTI_TABLE_ORDER},
+    },
+    {
+        'name': 'track_click',
+        'source': 'api/track_click.php',
+        'write': True,
+        'sql': lambda s: '''
+            UPDATE bookmarks
+            SET click_count = COALESCE(click_count, 0) + 1,
+                last_clicked_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+                AND user_id = ?
+                AND EXISTS (
+                    SELECT 1
+                    FROM categories c
+                    WHERE c.id = bookmarks.category_id
+                        AND c.user_id = bookmarks.user_id
+                        AND c.deleted_at IS NULL
+                )
+        ''',
+        'params': lambda s: [s['bookmark_id'], s['user_id']],
+    },
+    {
+        'name': 'reorder_positions',
+        'source': 'api/reorder.php (ownership and current positions)',
+        'write': True,
+        'sql': lambda s: f'''
+            SELECT b.id, b.category_id, b.sort_order
+            FROM bookmarks b
+            JOIN categories c
+                ON c.id = b.category_id
+                AND c.user_id = b.user_id
+                AND c.deleted_at IS NULL
+            WHERE b.user_id = ? AND b.id IN ({placeholders(s['order'])})
+            FOR UPDATE
+        ''',
+        'params': lambda s: [s['user_id'], *s['order']],
+    },
+    {
+        'name': 'reorder_renumber',
+        'source': 'api/reorder.php (closing gaps in source categories)',
+        'write': True,
+        'sql': lambda s: f'''
+            UPDATE bookmarks b
+            JOIN (
+                SELECT id, ROW_NUMBER() OVER (PARTITION BY category_id ORDER BY sort_order ASC, id ASC) - 1 AS new_sort_order
+                FROM bookmarks
+                WHERE user_id = ? AND category_id IN ({placeholders(s['category_ids'])})
+            ) ranked ON ranked.id = b.id
+            SET b.sort_order = ranked.new_sort_order, b.updated_at = CURRENT_TIMESTAMP
+            WHERE b.sort_order <> ranked.new_sort_order
+        ''',
+        'params': lambda s: [s['user_id'], *s['category_ids']],
+        # The window function sorts each partition itself, after reading it in index order
+        'allow': {'filesort': 'ROW_NUMBER() sorts its partitions', 'temporary': 'the ranked rows are materialized'},
+    },
+    {
+        'name': 'next_sort_order',
+        'source': 'includes/services/bookmark-writer.php (bulk add)',
+        'sql': lambda s: 'SELECT COALESCE(MAX(sort_order) + 1, 0) FROM bookmarks WHERE category_id = ? AND user_id = ?',
+        'params': lambda s: [s['category_id'], s['user_id']],
+    },
+]
+
+
+def connect(args, database=None):
+    return pymysql.connect(
+        host=args.host,
+        port=args.port,
+        user=args.user,
+        password=args.password,
+        database=database,
+        charset='utf8mb4',
+        autocommit=True,
+        client_flag=CLIENT.MULTI_STATEMENTS,
+    )
+
+
+def execute_script(cursor, sql):
+    """Run several statements sent as one string and drain every result."""
+    cursor.execute(sql)
+    while cursor.nextset():
+        pass
+
+
+def recreate_database(args):
+    """Drop and rebuild the database: schema, migrations, then the generated dataset."""
+    with connect(args) as connection, connection.cursor() as cursor:
+        cursor.execute(f'DROP DATABASE IF EXISTS `{args.database}`')
+        cursor.execute(f'CREATE DATABASE `{args.database}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci')
+
+    with connect(args, args.database) as connection, connection.cursor() as cursor:
+        print(f'Loading {SCHEMA_FILE.relative_to(ROOT)}')
+        execute_script(cursor, SCHEMA_FILE.read_text())
+        # Migrations are idempotent, so on top of the current schema they must all apply cleanly
+        for migration in sorted(MIGRATIONS_DIR.glob('*.sql')):
+            print(f'Applying {migration.relative_to(ROOT)}')
+            execute_script(cursor, migration.read_text())
+
+        dataset_args = generate_dataset.build_parser().parse_args([
+            '--users', str(args.users),
+            '--pages', args.pages,
+            '--categories', args.categories,
+            '--bookmarks', args.bookmarks,
+            '--seed', str(args.seed),
+        ])
+        sql = io.StringIO()
+        summary = generate_dataset.generate(dataset_args, sql)
+        print(f"Loading dataset: {json.dumps(summary['rows'], sort_keys=True)}")
+        # The generator ends every transaction with COMMIT on its own line
+        for chunk in sql.getvalue().split('COMMIT;\n'):
+            if chunk.strip():
+                execute_script(cursor, chunk + 'COMMIT;\n')
+
+        cursor.execute('ANALYZE TABLE ' + ', '.join(f'`{table}`' for table in DATA_TABLES))
+        cursor.fetchall()
+
+
+def pick_sample(cursor):
+    """Parameters for the user with the most bookmarks, and its largest page and category."""
+    def one(sql, params=()):
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+        if not row:
+            raise SystemExit('The database has no bookmarks in active categories; use --recreate')
+        return row[0]
+
+    active = '''
+        FROM bookmarks b
+        JOIN categories c ON c.id = b.category_id AND c.user_id = b.user_id AND c.deleted_at IS NULL
+    '''
+    user_id = one(f'SELECT b.user_id {active} GROUP BY b.user_id ORDER BY COUNT(*) DESC, b.user_id LIMIT 1')
+    page_id = one(f'SELECT c.page_id {active} WHERE b.user_id = %s GROUP BY c.page_id ORDER BY COUNT(*) DESC, c.page_id LIMIT 1', (user_id,))
+    category_id = one(f'SELECT c.id {active} WHERE b.user_id = %s GROUP BY c.id ORDER BY COUNT(*) DESC, c.id LIMIT 1', (user_id,))
+
+    cursor.execute('SELECT id FROM bookmarks WHERE category_id = %s ORDER BY sort_order, id', (category_id,))
+    order = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        f'SELECT c.id {active} WHERE b.user_id = %s GROUP BY c.id ORDER BY COUNT(*) DESC, c.id LIMIT 3', (user_id,)
+    )
+    category_ids = [row[0] for row in cursor.fetchall()]
+
+    return {
+        'user_id': user_id,
+        'page_id': page_id,
+        'category_id': category_id,
+        'bookmark_id': order[0],
+        # One category's drag: its bookmarks in reverse
+        'order': list(reversed(order)),
+        'category_ids': category_ids,
+    }
+
+
+def to_driver_sql(sql):
+    """PDO placeholders to pymysql ones; the statements contain no literal %."""
+    return sql.replace('?', '%s')
+
+
+def explain(cursor, sql, params):
+    cursor.execute('EXPLAIN ' + sql, params)
+    columns = [column[0].lower() for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def check_plan(query, plan):
+    """Problems in an EXPLAIN result, as readable strings."""
+    problems = []
+    allow = query.get('allow', {})
+    for row in plan:
+        table = row.get('table')
+        extra = row.get('extra') or ''
+        # Derived tables and subquery results are scanned after they are built
+        if table and not table.startswith('<'):
+            if row.get('type') == 'ALL':
+                problems.append(f'{table}: full table scan')
+            elif row.get('type') == 'index':
+                problems.append(f"{table}: full scan of index {row.get('key')}")
+            elif row.get('type') and not row.get('key'):
+                problems.append(f"{table}: no index used ({row.get('type')})")
+        if 'Using filesort' in extra and 'filesort' not in allow:
+            problems.append(f'{table}: filesort')
+        if 'Using temporary' in extra and 'temporary' not in allow:
+            problems.append(f'{table}: temporary table')
+    return problems
+
+
+def analyze(cursor, sql, params):
+    """MariaDB's ANALYZE runs the statement and reports actual rows and time per table."""
+    cursor.execute('ANALYZE FORMAT=JSON ' + sql, params)
+    row = cursor.fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def time_query(cursor, sql, params, runs, warmup):
+    timings = []
+    for run in range(warmup + runs):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        elapsed = (time.perf_counter() - started) * 1000
+        if run >= warmup:
+            timings.append(elapsed)
+    timings.sort()
+    return {
+        'median': round(statistics.median(timings), 3),
+        'p95': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'max': round(timings[-1], 3),
+    }
+
+
+def run_query(connection, query, sample, args):
+    sql = to_driver_sql(query['sql'](sample))
+    params = query['params'](sample)
+    with connection.cursor() as cursor:
+        plan = explain(cursor, sql, params)
+        if query.get('write'):
+            # Writes and locking reads change or lock nothing once rolled back
+            connection.begin()
+        try:
+            analyzed = analyze(cursor, sql, params)
+            latency = time_query(cursor, sql, params, args.runs, args.warmup)
+        finally:
+            if query.get('write'):
+                connection.rollback()
+
+    return {
+        'source': query['source'],
+        'plan': [
+            {key: row.get(key) for key in ('id', 'select_type', 'table', 'type', 'key', 'rows', 'extra')}
+            for row in plan
+        ],
+        'problems': check_plan(query, plan),
+        'allowed': query.get('allow', {}),
+        'analyze': analyzed,
+        'latency_ms': latency,
+    }
+
+
+def run(args):
+    if args.recreate:
+        recreate_database(args)
+
+    names = set(args.queries) if args.queries else None
+    with connect(args, args.database) as connection:
+        with connection.cursor() as cursor:
+            sample = pick_sample(cursor)
+            cursor.execute('SELECT VERSION()')
+            server = cursor.fetchone()[0]
+            counts = {}
+            for table in DATA_TABLES:
+                cursor.execute(f'SELECT COUNT(*) FROM `{table}`')
+                counts[table] = cursor.fetchone()[0]
+
+        queries = {}
+        for query in HOT_QUERIES:
+            if names and query['name'] not in names:
+                continue
+            queries[query['name']] = run_query(connection, query, sample, args)
+
+    return {
+        'meta': {
+            'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'server': server,
+            'database': args.database,
+            'rows': counts,
+            'sample': sample,
+            'runs': args.runs,
+            'label': args.label,
+        },
+        'queries': queries,
+    }
+
+
+def print_report(result):
+    header = f"{'query':<20}{'median':>9}{'p95':>9}  plan"
+    print()
+    print(header)
+    print('-' * 80)
+    for name, query in result['queries'].items():
+        latency = query['latency_ms']
+        plan = ', '.join(
+            f"{row['table']}:{row['type']}/{row['key'] or '-'}" for row in query['plan'] if row['table']
+        )
+        print(f"{name:<20}{latency['median']:>9.2f}{latency['p95']:>9.2f}  {plan}")
+        for problem in query['problems']:
+            print(f"{'':<20}  ! {problem}")
+    print('(latencies in ms)')
+
+
+def compare(result, baseline, max_regression, min_delta):
+    """Print per-query deltas; return the list of latency regressions and plan changes."""
+    regressions = []
+    print()
+    print(f"{'query':<20}{'p95 before':>12}{'p95 after':>12}{'change':>9}")
+    for name in sorted(set(result['queries']) | set(baseline.get('queries', {}))):
+        after = result['queries'].get(name)
+        before = baseline.get('queries', {}).get(name)
+        if not after or not before:
+            print(f"{name:<20}{'(only in one run)':>33}")
+            continue
+        p95_before = before['latency_ms']['p95']
+        p95_after = after['latency_ms']['p95']
+        change = (p95_after - p95_before) / p95_before * 100 if p95_before else None
+        print(f"{name:<20}{p95_before:>12.2f}{p95_after:>12.2f}{(f'{change:+.1f}%' if change is not None else '-'):>9}")
+        if change is not None and change > max_regression and p95_after - p95_before > min_delta:
+            regressions.append(f'{name}: p95 {change:+.1f}% ({p95_before:.2f} -> {p95_after:.2f} ms)')
+
+        access = [(row['table'], row['type'], row['key']) for row in after['plan']]
+        previous = [(row['table'], row['type'], row['key']) for row in before['plan']]
+        if access != previous:
+            print(f"{'':<20}  plan changed: {previous} -> {access}")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--host', default='127.0.0.1', help='MariaDB host (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=3306, help='MariaDB port (default: %(default)s)')
+    parser.add_argument('--user', default='root', help='MariaDB user (default: %(default)s)')
+    parser.add_argument('--password', default='', help='MariaDB password')
+    parser.add_argument('--database', default='startpage_plans', help='Database to use (default: %(default)s)')
+    parser.add_argument('--recreate', action='store_true',
+                        help='Drop the database and load schema, migrations and a generated dataset')
+    parser.add_argument('--users', type=int, default=500, help='Generated users with --recreate (default: %(default)s)')
+    parser.add_argument('--pages', default='3-6', help='Pages per user with --recreate (default: %(default)s)')
+    parser.add_argument('--categories', default='4-10', help='Categories per page with --recreate (default: %(default)s)')
+    parser.add_argument('--bookmarks', default='5-40', help='Bookmarks per category with --recreate (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=1, help='Dataset seed with --recreate (default: %(default)s)')
+    parser.add_argument('--queries', nargs='+', metavar='NAME',
+                        help=f"Only these queries (known: {', '.join(q['name'] for q in HOT_QUERIES)})")
+    parser.add_argument('--runs', type=int, default=50, help='Timed runs per query (default: %(default)s)')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed runs before timing (default: %(default)s)')
+    parser.add_argument('--label', default='', help='Free-form label stored with the results')
+    parser.add_argument('--output', help='Write results JSON to this path')
+    parser.add_argument('--compare', help='Baseline results JSON to diff against')
+    parser.add_argument('--max-p95-regression', type=float, default=50.0,
+                        help='Allowed p95 increase in percent before --compare fails (default: %(default)s)')
+    parser.add_argument('--min-p95-delta', type=float, default=0.5,
+                        help='p95 increases below this many ms are never regressions (default: %(default)s)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if pymysql is None:
+        print('pymysql is required: pip install -r perf/requirements.txt', file=sys.stderr)
+        return 2
+    if args.runs < 1:
+        raise SystemExit('--runs must be at least 1')
+
+    result = run(args)
+    print_report(result)
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, indent=2, default=str) + '\n')
+        print(f'Results written to {output}')
+
+    failures = [f'{name}: {problem}' for name, query in result['queries'].items() for problem in query['problems']]
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        failures += compare(result, baseline, args.max_p95_regression, args.min_p95_delta)
+
+    if failures:
+        print('\nFailures:\n  ' + '\n  '.join(failures))
+        return 1
+    print('\nEvery hot query is index-backed and within the configured thresholds.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Shared pytest configuration for the browser workflow tests.
+
+Options can be given on the command line or through the environment:
+
+    --base-url     STARTPAGE_BASE_URL   (default: http://localhost/msp)
+    --username     STARTPAGE_USERNAME
+    --password     STARTPAGE_PASSWORD
+    --headed       STARTPAGE_HEADED=1   (default: headless Chrome)
+    --wait-timeout STARTPAGE_WAIT_TIMEOUT (default: 10 seconds)
+
+When no username is configured, every worker registers its own throwaway
+account through app/register.php. Combined with pytest-xdist (`-n N`) this
+shards the workflow across N independent browsers.
+"""
+
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+DEFAULT_BASE_URL = 'http://localhost/msp'
+THROWAWAY_PASSWORD = 'workflow-pass-1234'
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('startpage', 'StartPage browser workflow')
+    group.addoption(
+        '--base-url',
+        default=os.environ.get('STARTPAGE_BASE_URL', DEFAULT_BASE_URL),
+        help='Application root, e.g. http://localhost/msp (env: STARTPAGE_BASE_URL)'
+    )
+    group.addoption(
+        '--username',
+        default=os.environ.get('STARTPAGE_USERNAME', ''),
+        help='Existing account to test with; omit to register throwaway users (env: STARTPAGE_USERNAME)'
+    )
+    group.addoption(
+        '--password',
+        default=os.environ.get('STARTPAGE_PASSWORD', ''),
+        help='Password for --username (env: STARTPAGE_PASSWORD)'
+    )
+    group.addoption(
+        '--headed',
+        action='store_true',
+        default=os.environ.get('STARTPAGE_HEADED', '') not in ('', '0'),
+        help='Show the Chrome window instead of running headless (env: STARTPAGE_HEADED=1)'
+    )
+    group.addoption(
+        '--wait-timeout',
+        type=float,
+        default=float(os.environ.get('STARTPAGE_WAIT_TIMEOUT', '10')),
+        help='Seconds an explicit wait may take before failing (env: STARTPAGE_WAIT_TIMEOUT)'
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Expose each phase's report on the item so fixtures can react to failures."""
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f'rep_{report.when}', report)
+
+
+@pytest.fixture(scope='session')
+def base_url(pytestconfig):
+    return pytestconfig.getoption('base_url').rstrip('/')
+
+
+@pytest.fixture(scope='session')
+def wait_timeout(pytestconfig):
+    return pytestconfig.getoption('wait_timeout')
+
+
+@pytest.fixture(scope='session')
+def worker_id_label(request):
+    """Return the xdist worker name (gw0, gw1, ...) or 'main' without xdist."""
+    return os.environ.get('PYTEST_XDIST_WORKER', 'main')
+
+
+def setup_driver(headed=False):
+    """Create a Chrome driver; headless unless explicitly asked to show the window."""
+    chrome_options = Options()
+    if headed:
+        chrome_options.add_argument("--start-maximized")
+    else:
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--window-size=1440,1000")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+
+    driver = webdriver.Chrome(options=chrome_options)
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    return driver
+
+
+@pytest.fixture(scope='session')
+def driver(pytestconfig):
+    """One browser per worker process, shared by that worker's tests."""
+    browser = setup_driver(headed=pytestconfig.getoption('headed'))
+    yield browser
+    browser.quit()
+
+
+@pytest.fixture
+def wait(driver, wait_timeout):
+    return WebDriverWait(driver, wait_timeout)
+
+
+def register_user(driver, wait, base_url, username, password):
+    """Create an account through the public registration form."""
+    driver.get(f'{base_url}/app/register.php')
+    wait.until(EC.presence_of_element_located((By.ID, 'username'))).send_keys(username)
+    driver.find_element(By.ID, 'password').send_keys(password)
+    driver.find_element(By.ID, 'confirm_password').send_keys(password)
+    driver.find_element(By.CSS_SELECTOR, "form button[type='submit']").click()
+
+    outcome = wait.until(lambda d: (
+        d.find_elements(By.CSS_SELECTOR, ".wp-alert--success")
+        or d.find_elements(By.CSS_SELECTOR, ".wp-alert--error, [role='alert']")
+    ))
+    if 'wp-alert--success' not in outcome[0].get_attribute('class'):
+        raise AssertionError(
+            f"Could not register throwaway user '{username}'. {outcome[0].text.strip()}"
+        )
+
+
+def login(driver, wait, base_url, username, password):
+    """Submit the login form and leave the browser on the start page."""
+    if not driver.current_url.startswith(f'{base_url}/app/login.php'):
+        driver.get(f'{base_url}/app/login.php')
+
+    username_field = wait.until(EC.presence_of_element_located((By.ID, "username")))
+    username_field.clear()
+    username_field.send_keys(username)
+
+    password_field = driver.find_element(By.ID, "password")
+    password_field.clear()
+    password_field.send_keys(password)
+
+    driver.find_element(By.CSS_SELECTOR, "button[type='submit']").click()
+
+
+def wait_for_login(driver, wait, username):
+    """Wait for the authenticated start page and return its account menu button."""
+    try:
+        account_button = wait.until(
+            EC.visibility_of_element_located((By.ID, "accountMenuButton"))
+        )
+    except TimeoutException as error:
+        login_errors = driver.find_elements(
+            By.CSS_SELECTOR,
+            ".bg-red-100, [role='alert']"
+        )
+        detail = login_errors[0].text.strip() if login_errors else "No login error was shown."
+        raise AssertionError(
+            f"Login did not reach the start page. Current URL: {driver.current_url}. {detail}"
+        ) from error
+
+    displayed_username = account_button.find_element(
+        By.CSS_SELECTOR,
+        ".account-menu-name"
+    ).text.strip()
+    if displayed_username != username:
+        raise AssertionError(
+            f"Logged in as '{displayed_username}', expected '{username}'."
+        )
+
+    return account_button
+
+
+@pytest.fixture(scope='session')
+def credentials(pytestconfig, driver, base_url, wait_timeout, worker_id_label):
+    """Return (username, password) for this worker, registering a throwaway user when needed."""
+    username = pytestconfig.getoption('username')
+    password = pytestconfig.getoption('password')
+    if username:
+        if not password:
+            pytest.exit('A password is required with --username / STARTPAGE_USERNAME', returncode=2)
+        return username, password
+
+    username = f'wf_{worker_id_label}_{uuid.uuid4().hex[:10]}'
+    register_user(driver, WebDriverWait(driver, wait_timeout), base_url, username, THROWAWAY_PASSWORD)
+    return username, THROWAWAY_PASSWORD
+
+
+@pytest.fixture
+def start_page(request, driver, wait, base_url, credentials):
+    """Open the authenticated start page, logging in first when the session is gone."""
+    username, password = credentials
+    driver.get(f'{base_url}/app/index.php')
+    wait.until(lambda d: d.find_elements(By.ID, 'accountMenuButton') or d.find_elements(By.ID, 'password'))
+    if driver.find_elements(By.ID, 'password'):
+        login(driver, wait, base_url, username, password)
+    wait_for_login(driver, wait, username)
+
+    yield driver
+
+    report = getattr(request.node, 'rep_call', None)
+    if report is not None and report.failed:
+        screenshot = Path(__file__).parent / f'test_failure_{request.node.name}.png'
+        driver.save_screenshot(str(screenshot))
+        print(f"📸 Screenshot saved as '{screenshot.name}'")
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Build the dashboard's JavaScript and CSS bundles
+
+Reads the ordered file lists in assets/bundles.json, concatenates and minifies
+each list into one content-hashed file under assets/dist/, writes .gz and .br
+siblings next to it, and records the file names in assets/dist/manifest.php.
+app/index.php includes that manifest and links the two bundles; without it,
+the page loads every source file separately as before.
+
+    python tools/build_assets.py
+
+Run it after every change to a listed file: while the manifest exists, the
+page ignores the source files, so an edit without a rebuild does not show.
+Bundles the new manifest does not reference are deleted. Brotli output needs
+the "brotli" package (pip install -r tools/requirements.txt); without it only
+.gz files are written.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+import time
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIST_DIR = 'assets/dist'
+
+# Already minified; copied as-is
+VERBATIM_SUFFIX = '.min.js'
+
+# After one of these characters or keywords a "/" starts a regular expression, not a division
+REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+REGEX_KEYWORDS = {
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await',
+}
+IDENTIFIER_CHARS = re.compile(r'[A-Za-z0-9_$\\\u0080-\uffff]')
+
+
+def is_identifier_char(char):
+    return bool(char) and bool(IDENTIFIER_CHARS.match(char))
+
+
+class JsMinifier:
+    """
+    Strips comments and collapses whitespace without parsing the program.
+
+    Strings, template literals and regular expressions are copied unchanged.
+    Line breaks are kept (one per run of blank lines), so automatic semicolon
+    insertion behaves exactly as in the source.
+    """
+
+    def __init__(self, source):
+        self.src = source
+        self.pos = 0
+        self.out = []
+        self.pending_space = False
+        self.pending_newline = False
+
+    def minify(self):
+        src = self.src
+        length = len(src)
+        while self.pos < length:
+            char = src[self.pos]
+            if char in ' \t\r\f\v\u00a0\ufeff':
+                self.pending_space = True
+                self.pos += 1
+            elif char == '\n':
+                self.pending_newline = True
+                self.pos += 1
+            elif char == '/' and src.startswith('//', self.pos):
+                end = src.find('\n', self.pos)
+                self.pos = length if end == -1 else end
+            elif char == '/' and src.startswith('/*', self.pos):
+                end = src.find('*/', self.pos + 2)
+                end = length if end == -1 else end + 2
+                if src.startswith('/*!', self.pos):
+                    # License comments are kept
+                    self.emit(src[self.pos:end])
+                    self.pending_newline = True
+                elif '\n' in src[self.pos:end]:
+                    self.pending_newline = True
+                else:
+                    self.pending_space = True
+                self.pos = end
+            elif char in '"\'':
+                self.emit(self.read_string(char))
+            elif char == '`':
+                self.emit(self.read_template())
+            elif char == '/' and self.regex_allowed():
+                self.emit(self.read_regex())
+            else:
+                self.emit(char)
+                self.pos += 1
+        return ''.join(self.out).strip() + '\n'
+
+    def emit(self, text):
+        previous = self.last_char()
+        if self.pending_newline and self.out:
+            self.out.append('\n')
+        elif self.pending_space and previous and self.needs_space(previous, text[0]):
+            self.out.append(' ')
+        self.pending_space = False
+        self.pending_newline = False
+        self.out.append(text)
+
+    def last_char(self):
+        return self.out[-1][-1] if self.out else ''
+
+    @staticmethod
+    def needs_space(previous, following):
+        if is_identifier_char(previous) and is_identifier_char(following):
+            return True
+        # a + +b, a - -b, and 1 .toString()
+        if previous in '+-' and following == previous:
+            return True
+        return previous.isdigit() and following == '.'
+
+    def regex_allowed(self):
+        previous = self.last_char()
+        if not previous or previous in REGEX_PRECEDERS:
+            return True
+        if is_identifier_char(previous):
+            word = re.search(r'[A-Za-z0-9_$]+$', ''.join(self.out[-12:]))
+            return bool(word) and word.group(0) in REGEX_KEYWORDS
+        return False
+
+    def read_string(self, quote):
+        src = self.src
+        start = self.pos
+        self.pos += 1
+        while self.pos < len(src):
+            char = src[self.pos]
+            if char == '\\':
+                self.pos += 2
+                continue
+            self.pos += 1
+            if char == quote or char == '\n':
+                break
+        return src[start:self.pos]
+
+    def read_template(self):
+        src = self.src
+        start = self.pos
+        self.pos += 1
+        while self.pos < len(src):
+            char = src[self.pos]
+            if char == '\\':
+                self.pos += 2
+            elif char == '`':
+                self.pos += 1
+                break
+            elif src.startswith('${', self.pos):
+                self.pos += 2
+                self.skip_template_expression()
+            else:
+                self.pos += 1
+        return src[start:self.pos]
+
+    def skip_template_expression(self):
+        """Move past a ${...} expression, which is copied unchanged with its template."""
+        src = self.src
+        depth = 1
+        while self.pos < len(src) and depth:
+            char = src[self.pos]
+            if char in '"\'':
+                self.read_string(char)
+            elif char == '`':
+                self.read_template()
+            else:
+                if char == '{':
+                    depth += 1
+                elif char == '}':
+                    depth -= 1
+                self.pos += 1
+
+    def read_regex(self):
+        src = self.src
+        start = self.pos
+        self.pos += 1
+        in_class = False
+        while self.pos < len(src):
+            char = src[self.pos]
+            if char == '\\':
+                self.pos += 2
+                continue
+            self.pos += 1
+            if char == '[':
+                in_class = True
+            elif char == ']':
+                in_class = False
+            elif char == '/' and not in_class:
+                break
+            elif char == '\n':
+                raise ValueError(f'unterminated regular expression at offset {start}')
+        while self.pos < len(src) and is_identifier_char(src[self.pos]):
+            self.pos += 1
+        return src[start:self.pos]
+
+
+CSS_TOKENS = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/|\s+|[^"\'/\s]+|/', re.S)
+CSS_IMPORT = re.compile(r'@import\s+(?:url\(\s*)?["\']?([^"\')\s]+)["\']?\s*\)?\s*([^;]*);')
+CSS_URL = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)')
+
+
+def minify_css(source):
+    """Drop comments and collapse whitespace; strings are copied unchanged."""
+    parts = []
+    for token in CSS_TOKENS.findall(source):
+        if token.startswith('/*'):
+            if token.startswith('/*!'):
+                parts.append(token)
+            continue
+        if token.isspace():
+            parts.append(' ')
+        else:
+            parts.append(token)
+    css = ''.join(parts)
+    # Spaces around these never matter outside strings; strings are rare enough here
+    # that they are protected by splitting on them.
+    pieces = re.split(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')', css)
+    for index in range(0, len(pieces), 2):
+        piece = re.sub(r'\s*([{};,])\s*', r'\1', pieces[index])
+        pieces[index] = piece.replace(';}', '}')
+    return ''.join(pieces).strip() + '\n'
+
+
+def load_css(path, seen=None):
+    """Read a stylesheet, inlining local @imports and rebasing url() to the bundle's directory."""
+    seen = seen if seen is not None else set()
+    if path in seen:
+        return ''
+    seen.add(path)
+
+    with open(os.path.join(ROOT, path), encoding='utf-8') as stream:
+        source = stream.read()
+    base = posixpath.dirname(path)
+
+    def inline_import(match):
+        target, media = match.group(1), match.group(2).strip()
+        if re.match(r'^(?:[a-z]+:)?//', target, re.I):
+            return match.group(0)
+        imported = load_css(posixpath.normpath(posixpath.join(base, target)), seen)
+        return f'@media {media}{{{imported}}}' if media else imported
+
+    def rebase_url(match):
+        url = match.group(2).strip()
+        if re.match(r'^(?:[a-z]+:|/|#)', url, re.I):
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(base, url))
+        return f'url("{posixpath.relpath(target, DIST_DIR)}")'
+
+    source = re.sub(r'@charset\s+[^;]+;', '', source)
+    source = CSS_URL.sub(rebase_url, source)
+    return CSS_IMPORT.sub(inline_import, source)
+
+
+def build_js(paths, minify):
+    chunks = []
+    for path in paths:
+        with open(os.path.join(ROOT, path), encoding='utf-8') as stream:
+            source = stream.read()
+        if minify and not path.endswith(VERBATIM_SUFFIX):
+            source = JsMinifier(source).minify()
+        # A file ending without a semicolon must not run into the next one
+        chunks.append(source.rstrip() + '\n;\n')
+    return ''.join(chunks)
+
+
+def build_css(paths, minify):
+    css = '\n'.join(load_css(path) for path in paths)
+    return minify_css(css) if minify else css
+
+
+def write_file(path, data):
+    temp_path = f'{path}.tmp-{os.getpid()}'
+    with open(temp_path, 'wb') as stream:
+        stream.write(data)
+    os.replace(temp_path, path)
+
+
+def write_bundle(name, extension, content):
+    """Write a content-hashed bundle with compressed siblings. Returns its path from the app root."""
+    data = content.encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    relative_path = f'{DIST_DIR}/{name}.{digest}.{extension}'
+    target = os.path.join(ROOT, relative_path)
+
+    write_file(target, data)
+    write_file(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        write_file(target + '.br', brotli.compress(data, quality=11))
+
+    sizes = [f'{len(data)} bytes', f'{os.path.getsize(target + ".gz")} gzip']
+    if brotli is not None:
+        sizes.append(f'{os.path.getsize(target + ".br")} brotli')
+    print(f'{relative_path}: {", ".join(sizes)}')
+    return relative_path
+
+
+def write_manifest(bundles):
+    lines = [
+        '<?php',
+        '// Generated by tools/build_assets.py from assets/bundles.json; do not edit.',
+        'return [',
+    ]
+    for key, path in bundles.items():
+        lines.append(f"    '{key}' => '{path}',")
+    lines += ['];', '']
+    write_file(os.path.join(ROOT, DIST_DIR, 'manifest.php'), '\n'.join(lines).encode('utf-8'))
+
+
+def prune_old_bundles(current, keep_seconds):
+    """Delete bundles the manifest no longer references that are older than keep_seconds."""
+    keep = {os.path.basename(path) for path in current.values()}
+    dist = os.path.join(ROOT, DIST_DIR)
+    deleted = 0
+    for filename in os.listdir(dist):
+        base = re.sub(r'\.(gz|br)$', '', filename)
+        if base in keep or not re.match(r'^[a-z]+\.[0-9a-f]{16}\.(js|css)$', base):
+            continue
+        path = os.path.join(dist, filename)
+        if time.time() - os.path.getmtime(path) > keep_seconds:
+            os.remove(path)
+            deleted += 1
+    return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--no-minify', action='store_true', help='Concatenate without minifying')
+    parser.add_argument('--keep-days', type=float, default=0,
+                        help='Keep replaced bundles this many days instead of deleting them (default: %(default)s)')
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT, 'assets', 'bundles.json'), encoding='utf-8') as stream:
+        lists = json.load(stream)
+
+    if brotli is None:
+        print('brotli is not installed; writing .gz files only', file=sys.stderr)
+
+    os.makedirs(os.path.join(ROOT, DIST_DIR), exist_ok=True)
+    bundles = {
+        'js': write_bundle('app', 'js', build_js(lists['js'], not args.no_minify)),
+        'css': write_bundle('app', 'css', build_css(lists['css'], not args.no_minify)),
+    }
+    write_manifest(bundles)
+
+    deleted = prune_old_bundles(bundles, args.keep_days * 86400)
+    if deleted:
+        print(f'Deleted {deleted} old bundle files')
+    print(f'{DIST_DIR}/manifest.php now replaces the source files; rerun this script after editing them, '
+          f'or delete {DIST_DIR}/ to load the sources directly', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,8 +2,19 @@
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
 require_once '../includes/favicon/favicon-cache.php';
+require_once '../includes/services/index-render-cache.php';
+require_once '../includes/services/favicon-refresh-queue.php';
 
 $faviconCache = new FaviconCache('../cache/favicons/');
+$refreshQueue = new FaviconRefreshQueue($pdo);
+
+// Progress of a queued refresh, polled by the page below
+if (($_GET['action'] ?? '') === 'progress') {
+    header('Content-Type: application/json');
+    $progress = $refreshQueue->getProgress(isset($_GET['batch']) ? (int)$_GET['batch'] : null);
+    echo json_encode(['success' => true, 'progress' => $progress]);
+    exit;
+}
 
 // Handle actions
 if (isset($_GET['action'])) {
@@ -28,49 +39,19 @@ if (isset($_GET['action'])) {
             }
             break;
         case 'refresh':
-            // Check if cache directory exists and create it if not
-            $cacheDir = '../cache/favicons/';
-            if (!is_dir($cacheDir)) {
-                if (!mkdir($cacheDir, 0755, true)) {
-                    $message = "Error: Could not create cache directory!";
-                    break;
-                }
-                $message = "Created cache directory. ";
-            }
-            
-            $deletedCount = $faviconCache->clearCache();
-            
-            // Get all bookmarks from database and refresh their favicons
-            $stmt = $pdo->query('SELECT id, url FROM bookmarks');
-            $bookmarks = $stmt->fetchAll(PDO::FETCH_ASSOC);
-            
-            $refreshedCount = 0;
-            $failedCount = 0;
-            $updatedCount = 0;
-            foreach ($bookmarks as $bookmark) {
-                try {
-                    $resolved = $faviconCache->resolveForUrl($bookmark['url'], true);
-                    $refreshedCount++;
-
-                    $updateStmt = $pdo->prepare('UPDATE bookmarks SET favicon_url = ? WHERE id = ?');
-                    $updateStmt->execute([$resolved['favicon_url'], $bookmark['id']]);
-                    $updatedCount += $updateStmt->rowCount();
-                } catch (Exception $e) {
-                    $failedCount++;
-                }
-            }
-            
-            $message = "Deleted {$deletedCount} old favicons. ";
-            $message .= "Refreshed {$refreshedCount} favicons successfully! ";
-            $message .= "Updated {$updatedCount} bookmarks in database to use cached favicons.";
-            if ($failedCount > 0) {
-                $message .= " Failed to refresh {$failedCount} favicons.";
-            }
-            break;
+            // tools/favicon-refresh-worker.php resolves each site in the background;
+            // current icons stay in place until a new one replaces them
+            $batchId = $refreshQueue->enqueueAll();
+            header('Location: ?batch=' . $batchId);
+            exit;
     }
+
+    // Rendered dashboards embed favicon paths, so every user's cached copy is now stale
+    IndexRenderCache::invalidateAll($pdo);
 }
 
 $stats = $faviconCache->getCacheStats();
+$refreshProgress = $refreshQueue->getProgress(isset($_GET['batch']) ? (int)$_GET['batch'] : null);
 ?>
 
 <!DOCTYPE html>
@@ -103,6 +84,10 @@ $stats = $faviconCache->getCacheStats();
                     <div class="wp-metric__value"><?= $stats['count'] ?></div>
                     <div class="wp-metric__label">Cached Favicons</div>
                 </div>
+                <div class="wp-metric">
+                    <div class="wp-metric__value"><?= $stats['unique_count'] ?></div>
+                    <div class="wp-metric__label">Unique Icons Stored</div>
+                </div>
                 <div class="wp-metric">
                     <div class="wp-metric__value"><?= $stats['size_formatted'] ?></div>
                     <div class="wp-metric__label">Total Size</div>
@@ -125,7 +110,7 @@ $stats = $faviconCache->getCacheStats();
                     🗑️ Clear All
                 </a>
                 <a href="?action=refresh" class="wp-button wp-button--primary"
-                   onclick="return confirm('Are you sure you want to refresh all cached favicons from bookmarks? This will re-download all favicons from all bookmarks. This may take a few moments.')">
+                   onclick="return confirm('Queue a refresh of all favicons? Each site is resolved again in the background and its icon is replaced when the new one is ready.')">
                     🔄 Refresh All Icons
                 </a>
                 <a href="../app/" class="wp-button wp-button--secondary">
@@ -133,6 +118,50 @@ $stats = $faviconCache->getCacheStats();
                 </a>
             </div>
         </section>
+
+        <?php if ($refreshProgress): ?>
+            <section class="wp-panel wp-panel--section" id="refresh-progress"
+                     data-batch="<?= (int)$refreshProgress['batch_id'] ?>"
+                     data-finished="<?= $refreshProgress['finished'] ? '1' : '0' ?>">
+                <h2 class="wp-section-title">Icon Refresh</h2>
+                <progress max="<?= max(1, (int)$refreshProgress['total']) ?>" value="<?= (int)($refreshProgress['done'] + $refreshProgress['failed']) ?>" style="width: 100%"></progress>
+                <p class="wp-meta" data-role="summary">
+                    <?= (int)$refreshProgress['done'] ?> of <?= (int)$refreshProgress['total'] ?> sites refreshed,
+                    <?= (int)$refreshProgress['failed'] ?> failed<?= $refreshProgress['finished'] ? ', finished ' . htmlspecialchars($refreshProgress['finished_at']) : '' ?>.
+                </p>
+                <?php if (!$refreshProgress['finished']): ?>
+                    <p class="wp-supporting-text" data-role="waiting">
+                        Sites are refreshed by <code>php tools/favicon-refresh-worker.php</code>; make sure it runs from cron or start it by hand.
+                    </p>
+                <?php endif; ?>
+            </section>
+            <script>
+            (function() {
+                const section = document.getElementById('refresh-progress');
+                if (section.dataset.finished === '1') return;
+
+                const poll = () => {
+                    fetch(`?action=progress&batch=${section.dataset.batch}`)
+                        .then(response => response.json())
+                        .then(data => {
+                            const progress = data.progress;
+                            if (!progress) return;
+                            section.querySelector('progress').value = progress.done + progress.failed;
+                            section.querySelector('[data-role="summary"]').textContent =
+                                `${progress.done} of ${progress.total} sites refreshed, ${progress.failed} failed`
+                                + (progress.finished ? `, finished ${progress.finished_at}.` : `, ${progress.running} in progress.`);
+                            if (progress.finished) {
+                                section.querySelector('[data-role="waiting"]')?.remove();
+                            } else {
+                                setTimeout(poll, 3000);
+                            }
+                        })
+                        .catch(() => setTimeout(poll, 10000));
+                };
+                setTimeout(poll, 3000);
+            })();
+            </script>
+        <?php endif; ?>
         
         <?php if ($stats['count'] > 0): ?>
             <section class="wp-panel wp-panel--section">
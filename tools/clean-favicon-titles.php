@@ -6,6 +6,7 @@
 
 require_once '../includes/db.php';
 require_once '../includes/auth_functions.php';
+require_once '../includes/services/index-render-cache.php';
 
 // Require authentication
 requireAuth($pdo);
@@ -57,6 +58,7 @@ if (empty($updates)) {
             $stmt->execute([$update['cleaned'], $update['id'], $currentUserId]);
             $cleanedCount++;
         }
+        IndexRenderCache::invalidate($pdo, $currentUserId);
         
         echo "<h3>✅ Successfully cleaned {$cleanedCount} bookmark titles!</h3>";
         echo "<p><a href='../app/index.php'>Return to startpage</a></p>";
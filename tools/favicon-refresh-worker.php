@@ -0,0 +1,123 @@
+<?php
+/**
+ * Process queued favicon refresh jobs.
+ *
+ * "Refresh All Icons" in cache-manager.php only queues the work; this worker
+ * resolves one origin per job and updates its bookmarks. Icons of newly added
+ * bookmarks are queued the same way and are resolved first. Run it from cron so
+ * queued work starts on its own, for example every minute:
+ *
+ *   * * * * * php /path/to/startpage/tools/favicon-refresh-worker.php --workers=4
+ *
+ * Options:
+ *   --workers=N  Number of parallel worker processes (default 4)
+ *   --enqueue    Queue a refresh of all bookmarks before working
+ *
+ * Only one worker group runs at a time; a second invocation exits at once.
+ * Jobs held by a worker that died are retried when their lease expires.
+ */
+
+if (PHP_SAPI !== 'cli') {
+    http_response_code(404);
+    exit;
+}
+
+require_once __DIR__ . '/../includes/db.php';
+require_once __DIR__ . '/../includes/favicon/icon-resolver.php';
+require_once __DIR__ . '/../includes/services/favicon-refresh-queue.php';
+require_once __DIR__ . '/../includes/services/index-render-cache.php';
+
+const FAVICON_WORKER_INVALIDATE_EVERY = 25;
+
+$options = getopt('', ['workers:', 'enqueue', 'child']);
+$refreshQueue = new FaviconRefreshQueue($pdo);
+
+// A child process works through jobs until the queue is empty
+if (isset($options['child'])) {
+    $resolver = new IconResolver(__DIR__ . '/../cache/favicons/');
+    $workerId = gethostname() . ':' . getmypid();
+    $refreshed = 0;
+
+    // New-bookmark jobs invalidate their owners' caches themselves
+    while (($jobType = $refreshQueue->processNext($resolver, $workerId)) !== null) {
+        if ($jobType !== FaviconRefreshQueue::JOB_TYPE) {
+            continue;
+        }
+        $refreshed++;
+        // Rendered dashboards embed favicon paths; refresh them as icons come in
+        if ($refreshed % FAVICON_WORKER_INVALIDATE_EVERY === 0) {
+            IndexRenderCache::invalidateAll($pdo);
+        }
+    }
+    if ($refreshed > 0) {
+        IndexRenderCache::invalidateAll($pdo);
+    }
+    exit(0);
+}
+
+if (isset($options['enqueue'])) {
+    $batchId = $refreshQueue->enqueueAll();
+    echo "Queued favicon refresh batch {$batchId}.\n";
+}
+
+$lockDir = __DIR__ . '/../cache/jobs';
+if (!is_dir($lockDir)) {
+    @mkdir($lockDir, 0755, true);
+}
+$lock = fopen($lockDir . '/favicon-refresh-worker.lock', 'c');
+if ($lock === false || !flock($lock, LOCK_EX | LOCK_NB)) {
+    echo "Another favicon refresh worker is already running.\n";
+    exit(0);
+}
+
+if (!$refreshQueue->hasQueuedJobs()) {
+    echo "No favicon jobs are queued.\n";
+    exit(0);
+}
+$progress = $refreshQueue->getProgress();
+if ($progress && $progress['finished']) {
+    $progress = null;
+}
+
+$workerCount = max(1, (int)($options['workers'] ?? 4));
+$command = escapeshellarg(PHP_BINARY) . ' ' . escapeshellarg(__FILE__) . ' --child';
+$children = [];
+for ($i = 0; $i < $workerCount; $i++) {
+    $process = proc_open($command, [0 => ['pipe', 'r'], 1 => STDOUT, 2 => STDERR], $pipes);
+    if (is_resource($process)) {
+        fclose($pipes[0]);
+        $children[] = $process;
+    }
+}
+if (!$children) {
+    fwrite(STDERR, "Could not start worker processes.\n");
+    exit(1);
+}
+
+echo "Started " . count($children) . " worker processes" . ($progress ? " for batch {$progress['batch_id']}" : '') . ".\n";
+
+while ($children) {
+    sleep(5);
+    foreach ($children as $index => $process) {
+        if (!proc_get_status($process)['running']) {
+            proc_close($process);
+            unset($children[$index]);
+        }
+    }
+
+    // Only a refresh reports progress; new bookmark jobs are few and quick
+    if (!$progress) {
+        continue;
+    }
+    $progress = $refreshQueue->getProgress($progress['batch_id']);
+    echo sprintf(
+        "%d/%d origins done, %d failed, %d running\n",
+        $progress['done'],
+        $progress['total'],
+        $progress['failed'],
+        $progress['running']
+    );
+}
+
+flock($lock, LOCK_UN);
+fclose($lock);
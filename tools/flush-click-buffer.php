@@ -0,0 +1,34 @@
+<?php
+/**
+ * Flush buffered bookmark clicks to the database.
+ *
+ * Only needed when STARTPAGE_CLICK_BUFFER is set. Run it from cron with the
+ * same environment as the web server, for example every minute:
+ *
+ *   * * * * * STARTPAGE_CLICK_BUFFER=file php /path/to/startpage/tools/flush-click-buffer.php
+ *
+ * The APCu backend keeps clicks in the web server's memory, which the CLI
+ * cannot see; with APCu, rely on the request-driven flush instead.
+ */
+
+if (PHP_SAPI !== 'cli') {
+    http_response_code(404);
+    exit;
+}
+
+require_once __DIR__ . '/../includes/db.php';
+require_once __DIR__ . '/../includes/services/click-buffer.php';
+
+$buffer = ClickBuffer::fromEnvironment();
+if (!$buffer) {
+    fwrite(STDERR, "STARTPAGE_CLICK_BUFFER is not set; clicks are written directly.\n");
+    exit(0);
+}
+
+try {
+    $updated = $buffer->flush($pdo);
+    echo "Flushed buffered clicks into {$updated} bookmarks.\n";
+} catch (Exception $e) {
+    fwrite(STDERR, 'Click flush failed: ' . $e->getMessage() . "\n");
+    exit(1);
+}
@@ -0,0 +1,58 @@
+<?php
+/**
+ * Import a bookmark file for a user from the command line.
+ *
+ * Accepts the same files as the dashboard's import: a Netscape bookmark file
+ * exported by a browser, or a JSON Lines export of this application. Use it
+ * for files larger than the web server accepts as an upload.
+ *
+ *   php tools/import-bookmarks.php --user=1 bookmarks.html
+ *
+ * Favicons of the new bookmarks are queued for tools/favicon-refresh-worker.php.
+ */
+
+if (PHP_SAPI !== 'cli') {
+    http_response_code(404);
+    exit;
+}
+
+require_once __DIR__ . '/../includes/db.php';
+require_once __DIR__ . '/../includes/services/bookmark-import.php';
+require_once __DIR__ . '/../includes/services/index-render-cache.php';
+
+$options = getopt('', ['user:'], $fileIndex);
+$userId = (int)($options['user'] ?? 0);
+$file = $argv[$fileIndex] ?? '';
+if ($userId <= 0 || $file === '') {
+    fwrite(STDERR, "Usage: php tools/import-bookmarks.php --user=<id> <file>\n");
+    exit(1);
+}
+
+$stream = @fopen($file, 'rb');
+if ($stream === false) {
+    fwrite(STDERR, "Could not open {$file}.\n");
+    exit(1);
+}
+
+$importer = new BookmarkImporter($pdo, $userId);
+$failed = false;
+try {
+    $importer->import(BookmarkImporter::createReader($stream));
+} catch (Exception $e) {
+    fwrite(STDERR, 'Import failed: ' . $e->getMessage() . "\n");
+    $failed = true;
+} finally {
+    fclose($stream);
+    IndexRenderCache::invalidate($pdo, $userId);
+}
+
+$summary = $importer->getSummary();
+echo sprintf(
+    "%d bookmarks added, %d duplicates and %d invalid links skipped; %d pages and %d categories created.\n",
+    $summary['added'],
+    $summary['duplicates'],
+    $summary['invalid'],
+    $summary['pages_created'],
+    $summary['categories_created']
+);
+exit($failed ? 1 : 0);
@@ -0,0 +1,84 @@
+<?php
+/**
+ * Periodic database maintenance.
+ *
+ * Removes rows and files that request handlers do not clean up themselves. Run it
+ * from cron, for example hourly:
+ *
+ *   0 * * * * php /path/to/startpage/tools/maintenance.php
+ *
+ * Tasks:
+ *   - expired remember-me tokens
+ *   - favicon bundle stylesheets no page has used for 30 days
+ *   - favicon jobs of bookmarks added more than 7 days ago
+ *   - rate limit buckets that have refilled
+ *   - render cache files earlier versions left in the web-served cache/index/
+ *   - click logs earlier versions left in the web-served cache/clicks/
+ */
+
+if (PHP_SAPI !== 'cli') {
+    http_response_code(404);
+    exit;
+}
+
+require_once __DIR__ . '/../includes/db.php';
+require_once __DIR__ . '/../includes/auth_functions.php';
+require_once __DIR__ . '/../includes/rate_limiter.php';
+require_once __DIR__ . '/../includes/favicon/favicon-bundle.php';
+require_once __DIR__ . '/../includes/services/favicon-refresh-queue.php';
+require_once __DIR__ . '/../includes/services/index-render-cache.php';
+require_once __DIR__ . '/../includes/services/click-buffer.php';
+
+$failed = false;
+
+try {
+    $deleted = pruneExpiredRememberTokens($pdo);
+    echo "Deleted {$deleted} expired remember tokens.\n";
+} catch (Exception $e) {
+    fwrite(STDERR, 'Remember token cleanup failed: ' . $e->getMessage() . "\n");
+    $failed = true;
+}
+
+try {
+    $deleted = (new FaviconBundle())->pruneUnused();
+    echo "Deleted {$deleted} unused favicon bundles.\n";
+} catch (Exception $e) {
+    fwrite(STDERR, 'Favicon bundle cleanup failed: ' . $e->getMessage() . "\n");
+    $failed = true;
+}
+
+try {
+    // Every add creates a batch; refresh batches are kept for the cache manager's history
+    $deleted = (new JobQueue($pdo))->pruneFinishedBatches(FaviconRefreshQueue::NEW_BOOKMARK_JOB_TYPE, 7);
+    echo "Deleted {$deleted} finished new-bookmark favicon batches.\n";
+} catch (Exception $e) {
+    fwrite(STDERR, 'Favicon job cleanup failed: ' . $e->getMessage() . "\n");
+    $failed = true;
+}
+
+try {
+    // Only the database backend leaves rows behind; APCu entries expire on their own
+    $deleted = RateLimiter::pruneExpired($pdo);
+    echo "Deleted {$deleted} refilled rate limit buckets.\n";
+} catch (Exception $e) {
+    fwrite(STDERR, 'Rate limit cleanup failed: ' . $e->getMessage() . "\n");
+    $failed = true;
+}
+
+try {
+    $deleted = IndexRenderCache::removeLegacyFiles();
+    echo "Deleted {$deleted} legacy render cache files from cache/index/.\n";
+} catch (Exception $e) {
+    fwrite(STDERR, 'Legacy render cache cleanup failed: ' . $e->getMessage() . "\n");
+    $failed = true;
+}
+
+try {
+    $deleted = ClickBuffer::removeLegacyFiles();
+    echo "Deleted {$deleted} legacy click buffer files from cache/clicks/.\n";
+} catch (Exception $e) {
+    fwrite(STDERR, 'Legacy click buffer cleanup failed: ' . $e->getMessage() . "\n");
+    $failed = true;
+}
+
+exit($failed ? 1 : 0);